@@ -13,11 +13,10 @@
 # limitations under the License.
 """Provides Testrun data via REST API."""
 from fastapi import (FastAPI, APIRouter, Response, Request, status, UploadFile)
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import asyncio
-import json
-from json import JSONDecodeError
+from datetime import datetime
 import os
 import psutil
 import requests
@@ -26,7 +25,8 @@ import threading
 import uvicorn
 
 from core import tasks
-from common import logger
+from common import codec, logger
+from common.codec import JSONDecodeError
 from common.device import Device
 from common.statuses import TestrunStatus
 
@@ -42,6 +42,7 @@ DEVICE_TECH_KEY = "technology"
 DEVICE_ADDITIONAL_INFO_KEY = "additional_info"
 
 DEVICES_PATH = "local/devices"
+REPORT_FILE_CHUNK_SIZE = 1024 * 1024
 REPORTS_PATH = "local/reports"
 PROFILES_PATH = "local/risk_profiles"
 
@@ -101,6 +102,8 @@ class Api:
                                methods=["DELETE"])
     self._router.add_api_route("/report/{report_name}",
                                self.get_report)
+    self._router.add_api_route("/report/{report_name}/files/{file_path:path}",
+                               self.get_report_file)
     self._router.add_api_route("/export/{report_name}",
                                self.get_results,
                                methods=["POST"])
@@ -138,6 +141,12 @@ class Api:
                                self.export_profile,
                                methods=["POST"])
 
+    # Analytics endpoints
+    self._router.add_api_route("/analytics/tests", self.get_analytics_tests)
+    self._router.add_api_route("/analytics/trends", self.get_analytics_trends)
+    self._router.add_api_route("/analytics/manufacturers",
+                               self.get_analytics_manufacturers)
+
     # Allow all origins to access the API
     origins = ["*"]
 
@@ -175,7 +184,7 @@ class Api:
     # Open the file in read mode
     with open(file_path, "r", encoding="utf-8") as file:
       # Return the file content
-      return json.load(file)
+      return codec.load(file)
 
   def _get_testrun(self):
     return self._testrun
@@ -216,7 +225,7 @@ class Api:
   async def post_sys_config(self, request: Request, response: Response):
     try:
       config = (await request.body()).decode("UTF-8")
-      config_json = json.loads(config)
+      config_json = codec.loads(config)
 
       # Validate req fields
       if ("network" not in config_json or
@@ -254,7 +263,7 @@ class Api:
     body_json = None
 
     try:
-      body_json = json.loads(body)
+      body_json = codec.loads(body)
     except JSONDecodeError:
       response.status_code = status.HTTP_400_BAD_REQUEST
       return self._generate_msg(False, "Invalid JSON received")
@@ -327,13 +336,14 @@ class Api:
 
     self._testrun.get_session().set_target_device(device)
 
-    return self._testrun.get_session().to_json()
+    return Response(content=codec.dumpb(self._testrun.get_session().to_json()),
+                    media_type="application/json")
 
   def _generate_msg(self, success, message):
     msg_type = "success"
     if not success:
       msg_type = "error"
-    return json.loads('{"' + msg_type + '": "' + message + '"}')
+    return codec.loads('{"' + msg_type + '": "' + message + '"}')
 
   def _start_testrun(self):
     self._testrun.start()
@@ -359,12 +369,14 @@ class Api:
 
   async def _run_stop(self):
     try:
-      await self._testrun.stop()  # Assuming .stop is async
+      # Keep the network for the next session
+      await self._testrun.stop(keep_topology=True)
     except Exception as e:
       LOGGER.exception("Error while stopping testrun: %s", e)
 
   async def get_status(self):
-    return self._testrun.get_session().to_json()
+    return Response(content=codec.dumpb(self._testrun.get_session().to_json()),
+                    media_type="application/json")
 
   def shutdown(self, response: Response):
 
@@ -482,7 +494,7 @@ class Api:
 
       # Extract MAC address from request body
       device_raw = (await request.body()).decode("UTF-8")
-      device_json = json.loads(device_raw)
+      device_json = codec.loads(device_raw)
 
       # Validate that mac_addr has been specified in the body
       if "mac_addr" not in device_json:
@@ -530,7 +542,7 @@ class Api:
 
     try:
       device_raw = (await request.body()).decode("UTF-8")
-      device_json = json.loads(device_raw)
+      device_json = codec.loads(device_raw)
 
       if not self._validate_device_json(device_json):
         response.status_code = status.HTTP_400_BAD_REQUEST
@@ -603,7 +615,7 @@ class Api:
 
     try:
       req_raw = (await request.body()).decode("UTF-8")
-      req_json = json.loads(req_raw)
+      req_json = codec.loads(req_raw)
 
       # Validate top level fields
       if not (DEVICE_MAC_ADDR_KEY in req_json and "device" in req_json):
@@ -692,6 +704,38 @@ class Api:
       response.status_code = 404
       return self._generate_msg(False, "Report could not be found")
 
+  async def get_report_file(self, response: Response, report_name,
+                            file_path):
+    """Serve a file of a report, such as a capture or log. Archived files
+    are decompressed as they are streamed"""
+    device_with_report = self._session.get_report(report_name)
+    if device_with_report.device is None or device_with_report.report is None:
+      LOGGER.info("Report could not be found, returning 404")
+      response.status_code = 404
+      return self._generate_msg(False, "Report not found from list")
+
+    try:
+      reader = self._get_testrun().get_test_orc().open_report_file(
+          device_with_report.report, file_path)
+    except OSError as e:
+      LOGGER.info("Report file could not be found, returning 404")
+      LOGGER.debug(e)
+      response.status_code = 404
+      return self._generate_msg(False, "Report file could not be found")
+
+    return StreamingResponse(
+        self._stream_file(reader),
+        media_type="application/octet-stream",
+        headers={
+            "Content-Disposition":
+            f"attachment; filename=\"{os.path.basename(file_path)}\""
+        })
+
+  def _stream_file(self, reader):
+    with reader:
+      while chunk := reader.read(REPORT_FILE_CHUNK_SIZE):
+        yield chunk
+
   async def get_results(
       self,
       request: Request,
@@ -704,7 +748,7 @@ class Api:
 
     try:
       req_raw = (await request.body()).decode("UTF-8")
-      req_json = json.loads(req_raw)
+      req_json = codec.loads(req_raw)
 
       # Check if profile has been specified
       if "profile" in req_json and len(req_json.get("profile")) > 0:
@@ -796,7 +840,7 @@ class Api:
   def get_profiles(self):
     profiles = []
     for profile in self.get_session().get_profiles():
-      profiles.append(json.loads(profile.to_json()))
+      profiles.append(codec.loads(profile.to_json()))
     return profiles
 
   async def update_profile(self, request: Request, response: Response):
@@ -811,7 +855,7 @@ class Api:
 
     try:
       req_raw = (await request.body()).decode("UTF-8")
-      req_json = json.loads(req_raw)
+      req_json = codec.loads(req_raw)
     except JSONDecodeError as e:
       LOGGER.error("An error occurred whilst decoding JSON")
       LOGGER.debug(e)
@@ -857,7 +901,7 @@ class Api:
 
     try:
       req_raw = (await request.body()).decode("UTF-8")
-      req_json = json.loads(req_raw)
+      req_json = codec.loads(req_raw)
     except JSONDecodeError as e:
       LOGGER.error("An error occurred whilst decoding JSON")
       LOGGER.debug(e)
@@ -900,7 +944,7 @@ class Api:
 
     try:
       req_raw = (await request.body()).decode("UTF-8")
-      req_json = json.loads(req_raw)
+      req_json = codec.loads(req_raw)
 
       # Check if device mac_addr has been specified
       if "mac_addr" in req_json and len(req_json.get("mac_addr")) > 0:
@@ -1067,7 +1111,7 @@ class Api:
 
     try:
       req_raw = (await request.body()).decode("UTF-8")
-      req_json = json.loads(req_raw)
+      req_json = codec.loads(req_raw)
 
       if "name" not in req_json:
         response.status_code = status.HTTP_400_BAD_REQUEST
@@ -1089,6 +1133,51 @@ class Api:
       LOGGER.error("An error occurred whilst deleting a certificate")
       LOGGER.debug(e)
 
+  async def get_analytics_tests(self,
+                                test_pack: str = None,
+                                manufacturer: str = None,
+                                device: str = None,
+                                start: datetime = None,
+                                end: datetime = None):
+    LOGGER.debug("Received test analytics request")
+    return self._session.get_analytics().get_test_summary(
+        test_pack=test_pack,
+        manufacturer=manufacturer,
+        device=device,
+        start=start,
+        end=end)
+
+  async def get_analytics_trends(self, # pylint: disable=R0917
+                                 response: Response,
+                                 interval: str = None,
+                                 test: str = None,
+                                 test_pack: str = None,
+                                 manufacturer: str = None,
+                                 start: datetime = None,
+                                 end: datetime = None):
+    LOGGER.debug("Received trend analytics request")
+    try:
+      return self._session.get_analytics().get_trends(
+          interval=interval,
+          test=test,
+          test_pack=test_pack,
+          manufacturer=manufacturer,
+          start=start,
+          end=end)
+    except ValueError:
+      response.status_code = status.HTTP_400_BAD_REQUEST
+      return self._generate_msg(False, "Invalid interval received")
+
+  async def get_analytics_manufacturers(self,
+                                        test_pack: str = None,
+                                        start: datetime = None,
+                                        end: datetime = None):
+    LOGGER.debug("Received manufacturer analytics request")
+    return self._session.get_analytics().get_manufacturer_summary(
+        test_pack=test_pack,
+        start=start,
+        end=end)
+
   def get_test_modules(self):
     modules = []
     for module in self._testrun.get_test_orc().get_test_modules():
@@ -0,0 +1,320 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Aggregate test results across all historical reports."""
+import threading
+from datetime import datetime
+import numpy as np
+from common import logger
+from common.statuses import TestResult, TestrunResult
+
+LOGGER = logger.get_logger('analytics')
+
+_INITIAL_CAPACITY = 1024
+
+# Categorical columns, stored as codes into a per-column dictionary
+_CATEGORIES = ('test', 'result', 'device', 'manufacturer', 'test_pack',
+               'version', 'report', 'report_result')
+
+_COLUMNS = {
+    'test': np.int32,
+    'result': np.int32,
+    'device': np.int32,
+    'manufacturer': np.int32,
+    'test_pack': np.int32,
+    'version': np.int32,
+    'report': np.int32,
+    'report_result': np.int32,
+    'started': 'datetime64[s]',
+    'finished': 'datetime64[s]',
+}
+
+TREND_INTERVALS = {
+    'day': 'datetime64[D]',
+    'week': 'datetime64[W]',
+    'month': 'datetime64[M]',
+}
+
+
+class _Dictionary:
+  """Maps the distinct values of a column to integer codes"""
+
+  def __init__(self):
+    self.values = []
+    self._codes = {}
+
+  def encode(self, value):
+    code = self._codes.get(value)
+    if code is None:
+      code = len(self.values)
+      self._codes[value] = code
+      self.values.append(value)
+    return code
+
+  def lookup(self, value):
+    return self._codes.get(value, -1)
+
+
+class ReportAnalytics:
+  """Columnar table of every test result in every report.
+
+  One row is stored per test result. Rows are appended as reports are
+  loaded or written and removed when reports are deleted, so queries never
+  need to read report.json files from disk."""
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self.clear()
+
+  def clear(self):
+    with self._lock:
+      self._size = 0
+      self._dictionaries = {name: _Dictionary() for name in _CATEGORIES}
+      self._columns = {
+          name: np.empty(_INITIAL_CAPACITY, dtype=dtype)
+          for name, dtype in _COLUMNS.items()
+      }
+
+  def __len__(self):
+    return self._size
+
+  def add_report(self, report):
+    """Append the test results of a report to the table"""
+    device_info = report.get_device()
+    results = report.get_results()
+    if not results or report.get_started() is None:
+      return
+
+    with self._lock:
+      row = {
+          'device': device_info.get('mac_addr'),
+          'manufacturer': device_info.get('manufacturer'),
+          'test_pack': device_info.get('test_pack', 'Device Qualification'),
+          'version': report.get_version(),
+          'report': report.get_folder_name(),
+          'report_result': report.get_result()
+      }
+      codes = {
+          name: self._dictionaries[name].encode(value)
+          for name, value in row.items()
+      }
+
+      count = len(results)
+      start = self._size
+      self._reserve(start + count)
+      end = start + count
+
+      for name, code in codes.items():
+        self._columns[name][start:end] = code
+      self._columns['test'][start:end] = [
+          self._dictionaries['test'].encode(test.name) for test in results
+      ]
+      self._columns['result'][start:end] = [
+          self._dictionaries['result'].encode(test.result) for test in results
+      ]
+      self._columns['started'][start:end] = _to_datetime64(
+          report.get_started())
+      finished = report.get_finished() or report.get_started()
+      self._columns['finished'][start:end] = _to_datetime64(finished)
+      self._size = end
+
+  def add_reports(self, reports):
+    for report in reports:
+      self.add_report(report)
+
+  def remove_report(self, folder_name):
+    """Remove all rows belonging to a report"""
+    with self._lock:
+      code = self._dictionaries['report'].lookup(folder_name)
+      if code >= 0:
+        self._compact(self._view('report') != code)
+
+  def remove_device(self, mac_addr):
+    """Remove all rows belonging to a device"""
+    with self._lock:
+      code = self._dictionaries['device'].lookup(mac_addr)
+      if code >= 0:
+        self._compact(self._view('device') != code)
+
+  def get_test_summary(self, **filters):
+    """Number of results of each type and the pass rate for every test"""
+    with self._lock:
+      mask = self._filter(**filters)
+      tests = self._view('test')[mask]
+      results = self._view('result')[mask]
+      test_names = self._dictionaries['test'].values
+      result_names = self._dictionaries['result'].values
+
+      # Count every (test, result) combination in one pass
+      counts = np.bincount(tests * len(result_names) + results,
+                           minlength=len(test_names) * len(result_names))
+      counts = counts.reshape(len(test_names), len(result_names))
+
+    summary = []
+    for code in np.flatnonzero(counts.sum(axis=1)):
+      test_counts = counts[code]
+      summary.append({
+          'name': test_names[code],
+          'total': int(test_counts.sum()),
+          'results': {
+              result_names[r]: int(test_counts[r])
+              for r in np.flatnonzero(test_counts)
+          },
+          'pass_rate': _pass_rate(test_counts, result_names)
+      })
+    return summary
+
+  def get_trends(self, interval=None, **filters):
+    """Failure rate of tests grouped by Testrun version, or by period of
+    time when an interval is provided"""
+    if interval is not None and interval not in TREND_INTERVALS:
+      raise ValueError(f'Unsupported interval {interval}')
+
+    with self._lock:
+      mask = self._filter(**filters)
+      results = self._view('result')[mask]
+      if interval is None:
+        keys = self._view('version')[mask]
+        labels = np.array(self._dictionaries['version'].values, dtype=object)
+      else:
+        periods = self._view('started')[mask].astype(TREND_INTERVALS[interval])
+        labels, keys = np.unique(periods, return_inverse=True)
+        labels = labels.astype(str)
+      reports = self._view('report')[mask]
+      compliant = self._dictionaries['result'].lookup(TestResult.COMPLIANT)
+      non_compliant = self._dictionaries['result'].lookup(
+          TestResult.NON_COMPLIANT)
+
+    keys = keys.ravel()
+    length = len(labels)
+    totals = np.bincount(keys, minlength=length)
+    passed = np.bincount(keys, weights=results == compliant, minlength=length)
+    failed = np.bincount(keys,
+                         weights=results == non_compliant,
+                         minlength=length)
+
+    # Number of distinct reports per group
+    pairs = np.unique(np.stack((keys, reports)), axis=1)
+    report_counts = np.bincount(pairs[0], minlength=length)
+
+    trends = []
+    for key in np.flatnonzero(totals):
+      decided = passed[key] + failed[key]
+      trends.append({
+          'group': labels[key],
+          'reports': int(report_counts[key]),
+          'total': int(totals[key]),
+          'compliant': int(passed[key]),
+          'non_compliant': int(failed[key]),
+          'failure_rate':
+              round(float(failed[key] / decided), 4) if decided else None
+      })
+    return trends
+
+  def get_manufacturer_summary(self, **filters):
+    """Report outcomes and test pass rates for each manufacturer"""
+    with self._lock:
+      mask = self._filter(**filters)
+      manufacturers = self._view('manufacturer')[mask]
+      devices = self._view('device')[mask]
+      reports = self._view('report')[mask]
+      report_results = self._view('report_result')[mask]
+      results = self._view('result')[mask]
+      manufacturer_names = self._dictionaries['manufacturer'].values
+      result_names = self._dictionaries['result'].values
+      compliant_report = self._dictionaries['report_result'].lookup(
+          TestrunResult.COMPLIANT)
+
+    length = len(manufacturer_names)
+    counts = np.bincount(manufacturers * len(result_names) + results,
+                         minlength=length * len(result_names)).reshape(
+                             length, len(result_names))
+
+    # Reduce to one row per report and one row per device
+    report_rows = np.unique(np.stack((manufacturers, reports, report_results)),
+                            axis=1)
+    report_counts = np.bincount(report_rows[0], minlength=length)
+    compliant_reports = np.bincount(report_rows[0],
+                                    weights=report_rows[2] == compliant_report,
+                                    minlength=length)
+    device_rows = np.unique(np.stack((manufacturers, devices)), axis=1)
+    device_counts = np.bincount(device_rows[0], minlength=length)
+
+    summary = []
+    for code in np.flatnonzero(report_counts):
+      summary.append({
+          'manufacturer': manufacturer_names[code],
+          'devices': int(device_counts[code]),
+          'reports': int(report_counts[code]),
+          'compliant_reports': int(compliant_reports[code]),
+          'total': int(counts[code].sum()),
+          'pass_rate': _pass_rate(counts[code], result_names)
+      })
+    return summary
+
+  def _view(self, name):
+    return self._columns[name][:self._size]
+
+  def _filter(self, *, test_pack=None, manufacturer=None, device=None,
+              test=None, start=None, end=None):
+    """Resolve the rows matching all of the provided filters"""
+    mask = np.ones(self._size, dtype=bool)
+    for name, value in (('test_pack', test_pack),
+                        ('manufacturer', manufacturer),
+                        ('device', device),
+                        ('test', test)):
+      if value is not None:
+        mask &= self._view(name) == self._dictionaries[name].lookup(value)
+    if start is not None:
+      mask &= self._view('started') >= _to_datetime64(start)
+    if end is not None:
+      mask &= self._view('started') <= _to_datetime64(end)
+    return mask
+
+  def _reserve(self, size):
+    capacity = len(self._columns['test'])
+    if size <= capacity:
+      return
+    while capacity < size:
+      capacity *= 2
+    for name, column in self._columns.items():
+      resized = np.empty(capacity, dtype=column.dtype)
+      resized[:self._size] = column[:self._size]
+      self._columns[name] = resized
+
+  def _compact(self, keep):
+    size = int(keep.sum())
+    for column in self._columns.values():
+      column[:size] = column[:self._size][keep]
+    self._size = size
+
+
+def _pass_rate(counts, result_names):
+  """Share of compliant results among compliant and non-compliant results"""
+  passed = failed = 0
+  for code, name in enumerate(result_names):
+    if name == TestResult.COMPLIANT:
+      passed = counts[code]
+    elif name == TestResult.NON_COMPLIANT:
+      failed = counts[code]
+  if passed + failed == 0:
+    return None
+  return round(float(passed / (passed + failed)), 4)
+
+
+def _to_datetime64(value):
+  """Reports are timestamped in local time, so aware datetimes are
+  converted to naive local time before comparison"""
+  if isinstance(value, datetime) and value.tzinfo is not None:
+    value = value.astimezone().replace(tzinfo=None)
+  return np.datetime64(value, 's')
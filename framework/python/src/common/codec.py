@@ -0,0 +1,95 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""JSON encoding and decoding used for reports, device configs and status.
+
+orjson is used when it is installed, otherwise the standard library json
+module is used. Both produce equivalent output: datetimes are written in ISO
+format and dataclasses are written as a dictionary of their public fields."""
+import dataclasses
+import datetime
+import json
+
+try:
+  import orjson
+except ImportError:
+  orjson = None
+
+# Raised by both serializers for invalid JSON
+JSONDecodeError = json.JSONDecodeError
+
+# orjson only supports an indent of 2 spaces
+_ORJSON_INDENTS = (None, 2)
+
+
+def dataclass_to_dict(obj):
+  """Shallow dictionary of the public fields of a dataclass"""
+  return {
+      field.name: getattr(obj, field.name)
+      for field in dataclasses.fields(obj)
+      if not field.name.startswith('_')
+  }
+
+
+def _default(obj):
+  """Encode types which are not supported by the serializer"""
+  if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+    return dataclass_to_dict(obj)
+  if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+    return obj.isoformat()
+  if isinstance(obj, (set, frozenset, tuple)):
+    return list(obj)
+  raise TypeError(f'Object of type {type(obj).__name__} '
+                  'is not JSON serializable')
+
+
+def _orjson_options(indent):
+  options = orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+  if indent:
+    options |= orjson.OPT_INDENT_2
+  return options
+
+
+def dumpb(obj, indent=None) -> bytes:
+  """Serialize an object to UTF-8 encoded JSON"""
+  if orjson is not None and indent in _ORJSON_INDENTS:
+    return orjson.dumps(obj, default=_default, option=_orjson_options(indent))
+  return json.dumps(obj, indent=indent, default=_default).encode('utf-8')
+
+
+def dumps(obj, indent=None) -> str:
+  """Serialize an object to a JSON string"""
+  if orjson is not None and indent in _ORJSON_INDENTS:
+    return dumpb(obj, indent).decode('utf-8')
+  return json.dumps(obj, indent=indent, default=_default)
+
+
+def dump(obj, fp, indent=None):
+  """Serialize an object to a file opened in text or binary mode"""
+  if 'b' in getattr(fp, 'mode', ''):
+    fp.write(dumpb(obj, indent))
+  else:
+    fp.write(dumps(obj, indent))
+
+
+def loads(data):
+  """Deserialize a JSON string or bytes.
+  Raises JSONDecodeError if the data is not valid JSON"""
+  if orjson is not None:
+    return orjson.loads(data)
+  return json.loads(data)
+
+
+def load(fp):
+  """Deserialize a JSON file opened in text or binary mode"""
+  return loads(fp.read())
@@ -0,0 +1,272 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tracks the state of the Testrun containers from the Docker events
+stream."""
+import threading
+import requests
+from common import docker_util
+from common import logger
+
+LOGGER = logger.get_logger('container_monitor')
+
+# Label added to every container started by Testrun
+LABEL = 'org.testrun.module'
+
+# Container states
+CREATED = 'created'
+RUNNING = 'running'
+EXITED = 'exited'
+REMOVED = 'removed'
+
+# Events passed to callbacks with the container name
+CONTAINER_STARTED = 'start'
+CONTAINER_DIED = 'die'
+CONTAINER_OOM = 'oom'
+CONTAINER_HEALTH = 'health_status'
+
+# Seconds to wait before resubscribing after losing the events stream
+RETRY_INTERVAL = 2
+
+
+class ContainerMonitor:
+  """Maintains a table of the Testrun containers from the Docker events
+  stream, so that container state can be queried or waited on without
+  polling the daemon.
+
+  The event source returns an iterable of decoded events, which is closed
+  on stop. The container source returns the current containers and is
+  used to load the table each time the events stream is subscribed to, so
+  that events missed whilst reconnecting are not needed."""
+
+  def __init__(self, event_source=None, container_source=None):
+    self._event_source = event_source or _get_events
+    self._container_source = container_source or _get_containers
+    self._thread = None
+    self._stream = None
+    self._stop_event = threading.Event()
+    self._condition = threading.Condition()
+    self._containers = {}
+    self._callbacks = []
+    self._subscribed = False
+
+  def start(self):
+    if self.is_running():
+      return
+    self._stop_event.clear()
+    self._thread = threading.Thread(target=self._monitor,
+                                    name='Container monitor',
+                                    daemon=True)
+    self._thread.start()
+
+  def stop(self):
+    self._stop_event.set()
+    self._close_stream()
+    if self.is_running():
+      self._thread.join()
+    with self._condition:
+      self._subscribed = False
+      self._condition.notify_all()
+
+  def is_running(self):
+    return self._thread is not None and self._thread.is_alive()
+
+  def is_subscribed(self):
+    """Whether the table reflects the current state of the containers"""
+    with self._condition:
+      return self._subscribed
+
+  def register_callback(self, callback, events=[]):  # pylint: disable=dangerous-default-value
+    """Register a callback for specified events. Callbacks are called
+    with the event and container name from the monitor thread."""
+    with self._condition:
+      self._callbacks.append({'callback': callback, 'events': events})
+
+  def unregister_callback(self, callback):
+    with self._condition:
+      self._callbacks = [
+          c for c in self._callbacks if c['callback'] != callback
+      ]
+
+  def get_container(self, name):
+    """State of a container, with the exit code, health and the times at
+    which it started and finished"""
+    with self._condition:
+      container = self._containers.get(name)
+      return dict(container) if container is not None else None
+
+  def get_status(self, name):
+    container = self.get_container(name)
+    if container is None or container['status'] == REMOVED:
+      return None
+    return container['status']
+
+  def wait_for_exit(self, name, container_id, timeout=None):
+    """Wait for a container to exit, returning its state or None if it is
+    still running when the timeout expires or the monitor stops"""
+
+    def exited():
+      container = self._containers.get(name)
+      return (not self._subscribed or
+              (container is not None and container['id'] == container_id
+               and container['status'] in (EXITED, REMOVED)))
+
+    with self._condition:
+      if not self._condition.wait_for(exited, timeout):
+        return None
+      container = self._containers.get(name)
+      if container is None or container['id'] != container_id:
+        return None
+      return dict(container)
+
+  def _monitor(self):
+    while not self._stop_event.is_set():
+      try:
+        # Subscribe before loading the table so that no changes are missed
+        self._stream = self._event_source()
+        if self._stop_event.is_set():
+          break
+        self._load()
+        for event in self._stream:
+          self._handle(event)
+      except Exception as e:  # pylint: disable=W0703
+        if not self._stop_event.is_set():
+          LOGGER.error(f'Error reading container events: {e}')
+          if isinstance(e, requests.exceptions.ConnectionError):
+            # Reconnect to the daemon rather than reusing the client
+            # until its next health check
+            docker_util.reset_client()
+      finally:
+        self._close_stream()
+        with self._condition:
+          self._subscribed = False
+          self._condition.notify_all()
+      self._stop_event.wait(RETRY_INTERVAL)
+
+  def _load(self):
+    """Replace the table with the current containers"""
+    containers = {}
+    for container in self._container_source():
+      containers[container['name']] = container
+    with self._condition:
+      self._containers = containers
+      self._subscribed = True
+      self._condition.notify_all()
+
+  def _handle(self, event):
+    if event.get('Type') != 'container':
+      return
+    actor = event.get('Actor', {})
+    attributes = actor.get('Attributes', {})
+    name = attributes.get('name')
+    if name is None:
+      return
+
+    # Health events are reported as 'health_status: healthy'
+    action, _, health = event.get('Action', '').partition(': ')
+    if action not in ('create', CONTAINER_STARTED, CONTAINER_DIED,
+                      CONTAINER_OOM, CONTAINER_HEALTH, 'destroy'):
+      return
+    timestamp = event.get('timeNano', 0) / 1e9 or event.get('time')
+
+    with self._condition:
+      container = self._containers.get(name)
+      if container is None or container['id'] != actor.get('ID'):
+        container = _new_container(name, actor.get('ID'))
+        self._containers[name] = container
+
+      if action == 'create':
+        container['status'] = CREATED
+      elif action == CONTAINER_STARTED:
+        container.update(status=RUNNING,
+                         started=timestamp,
+                         finished=None,
+                         exit_code=None)
+      elif action == CONTAINER_DIED:
+        exit_code = attributes.get('exitCode')
+        container.update(
+            status=EXITED,
+            finished=timestamp,
+            exit_code=int(exit_code) if exit_code is not None else None)
+      elif action == CONTAINER_OOM:
+        container['oom_killed'] = True
+      elif action == CONTAINER_HEALTH:
+        container['health'] = health
+      else:
+        container['status'] = REMOVED
+      self._condition.notify_all()
+      callbacks = list(self._callbacks)
+
+    LOGGER.debug(f'Container {name} {event.get("Action")}')
+    for callback in callbacks:
+      if action in callback['events']:
+        try:
+          callback['callback'](action, name)
+        except Exception as e:  # pylint: disable=W0703
+          LOGGER.error(f'Error in container callback: {e}')
+
+  def _close_stream(self):
+    stream = self._stream
+    self._stream = None
+    if stream is not None and hasattr(stream, 'close'):
+      try:
+        stream.close()
+      except Exception:  # pylint: disable=W0703
+        pass
+
+
+def _new_container(name, container_id):
+  return {
+      'name': name,
+      'id': container_id,
+      'status': CREATED,
+      'exit_code': None,
+      'oom_killed': False,
+      'health': None,
+      'started': None,
+      'finished': None
+  }
+
+
+def _get_events():
+  return docker_util.get_client().events(decode=True,
+                                         filters={
+                                             'type': 'container',
+                                             'label': LABEL
+                                         })
+
+
+def _get_containers():
+  containers = []
+  client = docker_util.get_client()
+  for container in client.containers.list(all=True,
+                                          filters={'label': LABEL}):
+    state = container.attrs.get('State', {})
+    record = _new_container(container.name, container.id)
+    record.update(status=state.get('Status', container.status),
+                  exit_code=state.get('ExitCode'),
+                  oom_killed=state.get('OOMKilled', False),
+                  health=state.get('Health', {}).get('Status'))
+    if record['status'] not in (CREATED, RUNNING):
+      record['status'] = EXITED
+    containers.append(record)
+  return containers
+
+
+_monitor = ContainerMonitor()
+
+
+def get_monitor():
+  """Container monitor shared by all framework components"""
+  return _monitor
@@ -0,0 +1,145 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Runs tasks concurrently in the order of their dependencies."""
+from concurrent import futures
+import time
+
+
+class DependencyGraph:
+  """Directed acyclic graph of named tasks and their dependencies"""
+
+  def __init__(self):
+    self._dependencies = {}
+
+  def add_node(self, name, dependencies=()):
+    self._dependencies.setdefault(name, set()).update(dependencies)
+
+  def get_nodes(self):
+    return list(self._dependencies)
+
+  def get_dependencies(self, name):
+    """Dependencies of a node which are part of the graph"""
+    return {
+        dependency for dependency in self._dependencies[name]
+        if dependency in self._dependencies
+    }
+
+  def get_order(self, reverse=False):
+    """Topological order of the nodes, where each node comes after its
+    dependencies (or before them when reversed). Raises a ValueError if
+    the graph contains a cycle."""
+    order = []
+    state = {}
+
+    def visit(name, path):
+      if state.get(name) == 'done':
+        return
+      if state.get(name) == 'visiting':
+        raise ValueError('Dependency cycle: ' + ' -> '.join(path + [name]))
+      state[name] = 'visiting'
+      for dependency in sorted(self.get_dependencies(name)):
+        visit(dependency, path + [name])
+      state[name] = 'done'
+      order.append(name)
+
+    for name in self._dependencies:
+      visit(name, [])
+    return order[::-1] if reverse else order
+
+  def run(self, task, max_workers, reverse=False):
+    """Call task(name) for each node using a pool of max_workers threads.
+
+    A node is started once all of its dependencies have completed, or all
+    of its dependents when reversed. Returns the duration of each task in
+    seconds. If a task raises, no further tasks are started and the
+    exception is raised once the running tasks have completed."""
+    # Validates that the graph has no cycles
+    self.get_order()
+    waiting_on = self._get_edges(reverse)
+    unblocks = {name: set() for name in self._dependencies}
+    for name, edges in waiting_on.items():
+      for edge in edges:
+        unblocks[edge].add(name)
+
+    durations = {}
+    error = None
+    with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+      running = {}
+
+      def submit_ready():
+        for name in self._dependencies:
+          if (name not in durations and name not in running.values()
+              and not waiting_on[name]):
+            running[executor.submit(_timed, task, name)] = name
+
+      submit_ready()
+      while running:
+        done, _ = futures.wait(running, return_when=futures.FIRST_COMPLETED)
+        for future in done:
+          name = running.pop(future)
+          try:
+            durations[name] = future.result()
+          except BaseException as e:  # pylint: disable=W0718
+            durations[name] = None
+            if error is None:
+              error = e
+            continue
+          for dependent in unblocks[name]:
+            waiting_on[dependent].discard(name)
+        if error is None:
+          submit_ready()
+
+    if error is not None:
+      raise error
+    return durations
+
+  def get_critical_path(self, durations, reverse=False):
+    """Longest chain of dependent tasks by total duration.
+    Returns the chain, in the order it was run, and its duration."""
+    edges = self._get_edges(reverse)
+    finished = {}
+    previous = {}
+    for name in self.get_order(reverse):
+      start = 0
+      for edge in edges[name]:
+        if finished[edge] > start:
+          start = finished[edge]
+          previous[name] = edge
+      finished[name] = start + (durations.get(name) or 0)
+
+    if not finished:
+      return [], 0
+    name = max(finished, key=finished.get)
+    total = finished[name]
+    path = [name]
+    while path[-1] in previous:
+      path.append(previous[path[-1]])
+    return path[::-1], total
+
+  def _get_edges(self, reverse):
+    """Nodes which must complete before each node is started"""
+    if not reverse:
+      return {name: self.get_dependencies(name) for name in self._dependencies}
+    dependents = {name: set() for name in self._dependencies}
+    for name in self._dependencies:
+      for dependency in self.get_dependencies(name):
+        dependents[dependency].add(name)
+    return dependents
+
+
+def _timed(task, name):
+  started = time.monotonic()
+  task(name)
+  return time.monotonic() - started
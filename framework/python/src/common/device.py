@@ -14,10 +14,10 @@
 
 """Track device object information."""
 
-import json
 import os
 from typing import List, Dict
 from dataclasses import dataclass, field
+from common import codec
 from common.testreport import TestReport
 from datetime import datetime
 
@@ -135,7 +135,7 @@ class Device():
                                     self.device_folder, _DEVICE_CONFIG_FILE)
 
     with open(config_file_path, 'w+', encoding='utf-8') as config_file:
-      config_file.writelines(json.dumps(self.to_config_json(), indent=4))
+      codec.dump(self.to_config_json(), config_file, indent=2)
 
   def __post_init__(self):
     # Store initial values after creation
@@ -12,10 +12,89 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """Utility for common docker methods"""
+import threading
+import time
 import docker
+import requests
+from common import logger
+
+LOGGER = logger.get_logger('docker_util')
+
+# Maximum number of connections kept open to the Docker daemon
+MAX_POOL_SIZE = 10
+
+# Seconds between checks that the shared client can reach the daemon
+HEALTH_CHECK_INTERVAL = 30
+
+CLIENT_ERRORS = (docker.errors.DockerException,
+                 requests.exceptions.RequestException)
+
+
+class DockerClientManager:
+  """Shares one Docker client, and its connection pool, between threads.
+
+  The client is created on first use. Once the health check interval has
+  passed, the daemon is pinged before the client is returned and a new
+  client is created if it cannot be reached."""
+
+  def __init__(self,
+               max_pool_size=MAX_POOL_SIZE,
+               health_check_interval=HEALTH_CHECK_INTERVAL,
+               factory=docker.from_env):
+    self._max_pool_size = max_pool_size
+    self._health_check_interval = health_check_interval
+    self._factory = factory
+    self._lock = threading.Lock()
+    self._client = None
+    self._checked = 0
+
+  def get_client(self):
+    with self._lock:
+      now = time.monotonic()
+      if (self._client is not None
+          and now - self._checked >= self._health_check_interval):
+        self._checked = now
+        try:
+          self._client.ping()
+        except CLIENT_ERRORS as e:
+          LOGGER.debug(f'Docker daemon unreachable, reconnecting: {e}')
+          self._close_client()
+
+      if self._client is None:
+        self._client = self._factory(max_pool_size=self._max_pool_size)
+        self._checked = now
+      return self._client
+
+  def reset(self):
+    """Close the client so that the next request reconnects"""
+    with self._lock:
+      self._close_client()
+
+  def _close_client(self):
+    if self._client is not None:
+      try:
+        self._client.close()
+      except CLIENT_ERRORS:
+        pass
+      self._client = None
+
+
+_manager = DockerClientManager()
+
+
+def get_client():
+  """Docker client shared by all framework components"""
+  return _manager.get_client()
+
+
+def reset_client():
+  """Reconnect on the next request, after the connection to the daemon
+  has been lost"""
+  _manager.reset()
+
 
 def create_private_net(network_name):
-  client = docker.from_env()
+  client = get_client()
   try:
     network = client.networks.get(network_name)
     network.remove()
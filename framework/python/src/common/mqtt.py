@@ -13,10 +13,9 @@
 # limitations under the License.
 
 """MQTT client"""
-import json
 import typing as t
 import paho.mqtt.client as mqtt_client
-from common import logger
+from common import codec, logger
 from enum import Enum
 
 class MQTTTopic(str, Enum):
@@ -63,5 +62,5 @@ class MQTT:
     """
     self._connect()
     if isinstance(message, dict):
-      message = json.dumps(message)
+      message = codec.dumps(message)
     self._client.publish(topic.value, str(message))
@@ -0,0 +1,116 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Maintains the on-disk cache of NTP servers checked by the NTP test
+module."""
+import ipaddress
+import os
+import tempfile
+import threading
+import time
+from common import codec, logger
+
+LOGGER = logger.get_logger('ntp_whitelist')
+
+# Location of the cache relative to the Testrun root directory
+CACHE_FILE = 'local/ntp_whitelist.json'
+
+# Servers checked by the NTP module, relative to its runtime directory
+CHECKED_FILE = 'ntp_servers.json'
+
+DEFAULT_TTL_HOURS = 24
+
+# The cache is updated by both the test orchestrator and the scheduled refresh
+_cache_lock = threading.Lock()
+
+
+class NTPWhitelist:
+  """Cache of NTP servers and whether they are trusted. Servers are checked
+  by the NTP module when a device contacts them and removed from the cache
+  once older than the TTL, so that they are checked again."""
+
+  def __init__(self, cache_file, ttl_hours=DEFAULT_TTL_HOURS, offline=False):
+    self._cache_file = cache_file
+    self._ttl = ttl_hours * 60 * 60
+    self._offline = offline
+
+  def load(self):
+    """Cached servers by IP address, empty if there is no valid cache"""
+    try:
+      with open(self._cache_file, 'r', encoding='utf-8') as f:
+        servers = codec.load(f).get('servers', {})
+      if isinstance(servers, dict):
+        return servers
+    except FileNotFoundError:
+      pass
+    except (OSError, ValueError, AttributeError) as e:
+      LOGGER.error(f'Failed to load the NTP whitelist cache: {e}')
+    return {}
+
+  def refresh(self):
+    """Remove the expired entries and write the current settings to the
+    cache. Nothing is removed in offline mode since the servers cannot be
+    checked again. Returns the number of servers removed."""
+    with _cache_lock:
+      servers = self.load()
+      expired = []
+      if not self._offline:
+        now = time.time()
+        expired = [
+            ip for ip, server in servers.items()
+            if now - server.get('checked', 0) >= self._ttl
+        ]
+        for ip in expired:
+          del servers[ip]
+        LOGGER.debug(f'Removed {len(expired)} expired NTP servers, ' +
+                     f'{len(servers)} servers cached')
+      self._write(servers)
+    return len(expired)
+
+  def add(self, servers):
+    """Add the servers checked by the NTP module to the cache"""
+    with _cache_lock:
+      cached = self.load()
+      for ip, server in servers.items():
+        try:
+          ipaddress.ip_address(ip)
+          cached[ip] = {
+              'trusted': bool(server['trusted']),
+              'checked': float(server['checked'])
+          }
+        except (ValueError, TypeError, KeyError) as e:
+          LOGGER.debug(f'Ignoring invalid NTP server entry {ip}: {e}')
+      self._write(cached)
+
+  def _write(self, servers):
+    """Replace the cache file so that readers never see a partial file"""
+    cache_dir = os.path.dirname(self._cache_file) or '.'
+    os.makedirs(cache_dir, exist_ok=True)
+    cache = {
+        'updated': time.time(),
+        'ttl': self._ttl,
+        'offline': self._offline,
+        'servers': servers
+    }
+    fd, tmp_file = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+      with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        codec.dump(cache, f, indent=2)
+      # Readable by the test module containers
+      os.chmod(tmp_file, 0o644)
+      os.replace(tmp_file, self._cache_file)
+    except OSError as e:
+      LOGGER.error(f'Failed to write the NTP whitelist cache: {e}')
+      if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+
@@ -0,0 +1,190 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Compiles the IEEE OUI file into a sorted binary index and looks up the
+manufacturer of a MAC address in it.
+
+The index is a header followed by fixed width records, sorted by the 24
+bit OUI prefix, and a table of the manufacturer names:
+  header:  magic (4 bytes), number of records (uint32)
+  record:  prefix (uint32), offset of the name in the string table (uint32)
+  strings: length (uint16) followed by the UTF-8 encoded name
+
+Compile an index from the Testrun root directory:
+  PYTHONPATH=framework/python/src \\
+    python3 -m common.oui_index /usr/local/etc/oui.txt /usr/local/etc/oui.idx
+"""
+import argparse
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from common import logger
+
+LOGGER = logger.get_logger('oui_index')
+
+MAGIC = b'OUI1'
+
+_HEADER = struct.Struct('<4sI')
+_RECORD = struct.Struct('<II')
+_LENGTH = struct.Struct('<H')
+
+_MAC_SEPARATORS = str.maketrans('', '', ':-.')
+
+# Indexes opened by this process, by path
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+class OUIIndex:
+  """Read only view of a compiled OUI index"""
+
+  def __init__(self, index_file):
+    with open(index_file, 'rb') as f:
+      self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+      magic, self._count = _HEADER.unpack_from(self._mmap, 0)
+    except struct.error:
+      magic = None
+    if magic != MAGIC:
+      self._mmap.close()
+      raise ValueError(f'{index_file} is not an OUI index')
+    self._strings = _HEADER.size + self._count * _RECORD.size
+
+  def __len__(self):
+    return self._count
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  def lookup(self, mac_address):
+    """Manufacturer of a MAC address, None if its OUI is not registered"""
+    prefix = get_prefix(mac_address)
+    if prefix is None:
+      return None
+    low, high = 0, self._count
+    while low < high:
+      middle = (low + high) // 2
+      key, offset = _RECORD.unpack_from(self._mmap,
+                                        _HEADER.size + middle * _RECORD.size)
+      if key < prefix:
+        low = middle + 1
+      elif key > prefix:
+        high = middle
+      else:
+        return self._get_string(offset)
+    return None
+
+  def close(self):
+    self._mmap.close()
+
+  def _get_string(self, offset):
+    start = self._strings + offset
+    (length,) = _LENGTH.unpack_from(self._mmap, start)
+    start += _LENGTH.size
+    return self._mmap[start:start + length].decode('utf-8')
+
+
+def get_prefix(mac_address):
+  """24 bit OUI prefix of a MAC address in any of the usual formats"""
+  digits = mac_address.translate(_MAC_SEPARATORS)[:6]
+  if len(digits) < 6:
+    return None
+  try:
+    return int(digits, 16)
+  except ValueError:
+    return None
+
+
+def parse_oui_file(oui_file):
+  """Manufacturer names by prefix from the (hex) lines of the OUI file.
+  The first name is kept where a prefix is listed more than once."""
+  manufacturers = {}
+  with open(oui_file, 'r', encoding='utf-8', errors='replace') as f:
+    for line in f:
+      if '(hex)' not in line:
+        continue
+      prefix = get_prefix(line[:8])
+      if prefix is None or prefix in manufacturers:
+        continue
+      start = line.index('(hex)') + len('(hex)')
+      manufacturers[prefix] = line[start:].strip()
+  return manufacturers
+
+
+def compile_index(oui_file, index_file):
+  """Compile the OUI file into an index, replacing any existing index.
+  Returns the number of prefixes in the index."""
+  manufacturers = parse_oui_file(oui_file)
+  records = bytearray()
+  strings = bytearray()
+  offsets = {}
+  for prefix in sorted(manufacturers):
+    name = manufacturers[prefix]
+    if name not in offsets:
+      encoded = name.encode('utf-8')[:0xffff]
+      offsets[name] = len(strings)
+      strings += _LENGTH.pack(len(encoded)) + encoded
+    records += _RECORD.pack(prefix, offsets[name])
+
+  index_dir = os.path.dirname(index_file) or '.'
+  fd, tmp_file = tempfile.mkstemp(dir=index_dir, suffix='.tmp')
+  try:
+    with os.fdopen(fd, 'wb') as f:
+      f.write(_HEADER.pack(MAGIC, len(manufacturers)))
+      f.write(records)
+      f.write(strings)
+    os.chmod(tmp_file, 0o644)
+    os.replace(tmp_file, index_file)
+  except OSError:
+    os.remove(tmp_file)
+    raise
+  return len(manufacturers)
+
+
+def load(index_file, oui_file=None):
+  """Index shared by all callers in this process. If the OUI file is
+  given, the index is compiled first when it is missing or out of date."""
+  with _indexes_lock:
+    index = _indexes.get(index_file)
+    if (oui_file is not None and os.path.isfile(oui_file)
+        and (not os.path.isfile(index_file)
+             or os.path.getmtime(index_file) < os.path.getmtime(oui_file))):
+      LOGGER.info(f'Compiling OUI index {index_file}')
+      compile_index(oui_file, index_file)
+      if index is not None:
+        # Release the mapping of the replaced file
+        index.close()
+        index = None
+    if index is None:
+      index = OUIIndex(index_file)
+      _indexes[index_file] = index
+    return index
+
+
+def parse_args():
+  parser = argparse.ArgumentParser(
+      description='Compile the IEEE OUI file into a binary index')
+  parser.add_argument('oui_file', help='Path of the oui.txt file')
+  parser.add_argument('index_file', help='Path of the index to create')
+  return parser.parse_args()
+
+
+if __name__ == '__main__':
+  args = parse_args()
+  count = compile_index(args.oui_file, args.index_file)
+  LOGGER.info(f'Compiled {count} OUI prefixes into {args.index_file}')
@@ -0,0 +1,219 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Compresses the captures and logs of aged Testrun reports."""
+import fnmatch
+import gzip
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from common import logger
+
+try:
+  import zstandard
+except ImportError:
+  zstandard = None
+
+LOGGER = logger.get_logger('archive')
+
+COMPRESSION_GZIP = 'gzip'
+COMPRESSION_ZSTD = 'zstd'
+
+# Suffix appended to a file once it has been compressed
+ARCHIVE_SUFFIXES = {
+    COMPRESSION_GZIP: '.gz',
+    COMPRESSION_ZSTD: '.zst'
+}
+
+# Report files which are rarely opened and compress well
+ARCHIVE_PATTERNS = ('*.pcap', '*.log')
+
+# Report folders are named {mac_addr}_{timestamp}
+REPORT_TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+_CHUNK_SIZE = 1024 * 1024
+
+# Locks of the reports being archived or exported, by report directory
+_report_locks = {}
+_report_locks_lock = threading.Lock()
+
+
+class ReportArchiver:
+  """Compresses captures and logs of reports older than a number of days."""
+
+  def __init__(self, reports_dir, age_days, compression=COMPRESSION_GZIP):
+    self._reports_dir = reports_dir
+    self._age_days = age_days
+    self._compression = compression
+
+  def archive(self):
+    """Compress all eligible files in reports older than the configured age.
+    Returns the number of bytes saved on disk."""
+
+    if not self._age_days or self._age_days <= 0:
+      return 0
+
+    if self._compression not in ARCHIVE_SUFFIXES:
+      LOGGER.error(f'Unsupported report compression {self._compression}')
+      return 0
+
+    if self._compression == COMPRESSION_ZSTD and zstandard is None:
+      LOGGER.error('zstd compression requested but zstandard is not installed')
+      return 0
+
+    if not os.path.isdir(self._reports_dir):
+      return 0
+
+    cutoff = time.time() - self._age_days * 24 * 60 * 60
+    saved = 0
+
+    for report_folder in os.listdir(self._reports_dir):
+      report_dir = os.path.join(self._reports_dir, report_folder)
+      if not os.path.isdir(report_dir):
+        continue
+      if get_report_time(report_dir) > cutoff:
+        continue
+      # Skip reports which are being exported, they are archived
+      # on the next run instead
+      lock = get_report_lock(report_dir)
+      if not lock.acquire(blocking=False):
+        LOGGER.debug(f'Report {report_folder} is in use, skipping')
+        continue
+      try:
+        saved += self._archive_report(report_dir)
+      finally:
+        lock.release()
+
+    if saved > 0:
+      LOGGER.info(f'Archived aged reports, saved {saved} bytes')
+    return saved
+
+  def _archive_report(self, report_dir):
+    saved = 0
+    for root, _, files in os.walk(report_dir):
+      for file_name in files:
+        if not is_archivable(file_name):
+          continue
+        path = os.path.join(root, file_name)
+        try:
+          saved += compress_file(path, self._compression)
+        except OSError as e:
+          LOGGER.error(f'Failed to archive {path}')
+          LOGGER.debug(e)
+    return saved
+
+
+def get_report_lock(report_dir):
+  """Lock held while a report is archived. Hold it whilst reading the
+  files of a report to prevent them from being replaced."""
+  with _report_locks_lock:
+    return _report_locks.setdefault(os.path.realpath(report_dir),
+                                    threading.Lock())
+
+
+def is_archivable(file_name):
+  """Check whether a report file should be compressed when archived"""
+  return any(fnmatch.fnmatch(file_name, p) for p in ARCHIVE_PATTERNS)
+
+
+def get_report_time(report_dir):
+  """Resolve when a report was created, from the folder name if possible"""
+  timestamp = os.path.basename(report_dir).rsplit('_', 1)[-1]
+  try:
+    return datetime.strptime(timestamp, REPORT_TIMESTAMP_FORMAT).timestamp()
+  except ValueError:
+    return os.path.getmtime(report_dir)
+
+
+def compress_file(path, compression=COMPRESSION_GZIP):
+  """Replace a file with its compressed equivalent.
+  Returns the number of bytes saved."""
+  archive_path = path + ARCHIVE_SUFFIXES[compression]
+  tmp_path = archive_path + '.tmp'
+  original_stat = os.stat(path)
+
+  with open(path, 'rb') as src, open(tmp_path, 'wb') as dst:
+    if compression == COMPRESSION_ZSTD:
+      with zstandard.ZstdCompressor().stream_writer(dst) as writer:
+        shutil.copyfileobj(src, writer, _CHUNK_SIZE)
+    else:
+      with gzip.GzipFile(fileobj=dst, mode='wb') as writer:
+        shutil.copyfileobj(src, writer, _CHUNK_SIZE)
+
+  # Keep the original timestamps so the report age is preserved
+  shutil.copystat(path, tmp_path)
+  # and the owner so the report remains accessible to the host user
+  try:
+    os.chown(tmp_path, original_stat.st_uid, original_stat.st_gid)
+  except PermissionError:
+    LOGGER.debug(f'Unable to preserve the owner of {path}')
+  os.replace(tmp_path, archive_path)
+  os.remove(path)
+  return original_stat.st_size - os.path.getsize(archive_path)
+
+
+def _get_archive_path(path):
+  """Return the archived version of a file if the original is not present"""
+  for compression, suffix in ARCHIVE_SUFFIXES.items():
+    if os.path.isfile(path + suffix):
+      return path + suffix, compression
+  return None, None
+
+
+def _get_original_name(path):
+  """Resolve the original name and compression of an archived file"""
+  for compression, suffix in ARCHIVE_SUFFIXES.items():
+    if path.endswith(suffix) and is_archivable(
+        os.path.basename(path[:-len(suffix)])):
+      return path[:-len(suffix)], compression
+  return None, None
+
+
+def _open_archive(path, compression):
+  if compression == COMPRESSION_ZSTD:
+    if zstandard is None:
+      raise OSError(f'zstandard is required to read {path}')
+    return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'),  # pylint: disable=R1732
+                                                      closefd=True)
+  return gzip.open(path, 'rb')
+
+
+def open_report_file(path):
+  """Open a report file for binary reading, decompressing it
+  on the fly if it has been archived"""
+  if os.path.isfile(path):
+    return open(path, 'rb')  # pylint: disable=R1732
+  archive_path, compression = _get_archive_path(path)
+  if archive_path is None:
+    raise FileNotFoundError(path)
+  return _open_archive(archive_path, compression)
+
+
+def copy_decompressed(src, dst):
+  """Copy function for shutil.copytree which restores archived files
+  to their original form"""
+  original = _get_original_name(src)[0]
+  if original is None:
+    return shutil.copy2(src, dst)
+
+  if os.path.isdir(dst):
+    dst = os.path.join(dst, os.path.basename(original))
+  else:
+    dst = _get_original_name(dst)[0] or dst
+
+  with open_report_file(original) as reader, open(dst, 'wb') as writer:
+    shutil.copyfileobj(reader, writer, _CHUNK_SIZE)
+  shutil.copystat(src, dst)
+  return dst
@@ -99,6 +99,12 @@ class TestReport():
   def add_module_templates(self, module_templates):
     self._module_templates = module_templates
 
+  def get_device(self):
+    return self._device
+
+  def get_version(self):
+    return self._version
+
   def get_status(self):
     return self._status
 
@@ -121,6 +127,9 @@ class TestReport():
   def add_test(self, test):
     self._results.append(test)
 
+  def get_results(self):
+    return self._results
+
   def set_report_url(self, folder_name: str):
     self._folder_name = folder_name
     self._report_url = f'/report/{folder_name}'
@@ -192,6 +201,9 @@ class TestReport():
         and len(test.optional_recommendations) > 0):
         test_dict['optional_recommendations'] = test.optional_recommendations
 
+      if test.metrics is not None:
+        test_dict['metrics'] = test.metrics
+
       test_results.append(test_dict)
 
     report_json['tests'] = {'total': self._total_tests,
@@ -269,6 +281,8 @@ class TestReport():
           'optional_recommendations']
       if 'details' in test_result:
         test_case.details = test_result['details']
+      if 'metrics' in test_result:
+        test_case.metrics = test_result['metrics']
 
       self.add_test(test_case)
 
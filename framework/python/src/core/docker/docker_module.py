@@ -15,6 +15,9 @@
 import docker
 from docker.models.containers import Container
 import os
+import time
+from common import container_monitor
+from common import docker_util
 from common import logger
 import json
 
@@ -23,6 +26,9 @@ CONTAINER_PREFIX = 'tr-ct'
 DEFAULT_NETWORK = 'bridge'
 DEFAULT_LOG_LEVEL = 'INFO'
 
+# Seconds between status checks when container events are unavailable
+POLL_INTERVAL = 1
+
 class Module:
   """Represents the base module."""
 
@@ -86,7 +92,7 @@ class Module:
 
   def build(self):
     self.logger.debug('Building module ' + self.dir_name)
-    client = docker.from_env()
+    client = docker_util.get_client()
     client.images.build(
         dockerfile=os.path.join(self.dir, self.build_file),
         path=self._path,
@@ -96,7 +102,7 @@ class Module:
   def get_container(self):
     container = None
     try:
-      client = docker.from_env()
+      client = docker_util.get_client()
       container = client.containers.get(self.container_name)
     except docker.errors.NotFound:
       self.logger.debug('Container ' + self.container_name + ' not found')
@@ -109,11 +115,30 @@ class Module:
     return self._session
 
   def get_status(self):
+    monitor = container_monitor.get_monitor()
+    if monitor.is_subscribed():
+      return monitor.get_status(self.container_name)
     self.container = self.get_container()
     if self.container is not None:
       return self.container.status
     return None
 
+  def wait_for_exit(self, timeout):
+    """Wait up to timeout seconds for the container to exit, returning
+    whether it is no longer running"""
+    if self.container is None:
+      return True
+    monitor = container_monitor.get_monitor()
+    if monitor.is_subscribed():
+      if monitor.wait_for_exit(self.container_name, self.container.id,
+                               timeout) is not None:
+        return True
+      if monitor.is_subscribed():
+        return False
+    else:
+      time.sleep(min(timeout, POLL_INTERVAL))
+    return self.get_status() != 'running'
+
   def get_network(self):
     return self.docker_network
 
@@ -154,7 +179,7 @@ class Module:
                        container name: {self.container_name}""")
 
     try:
-      client = docker.from_env()
+      client = docker_util.get_client()
       self.container = client.containers.run(
           self.image_name,
           auto_remove=True,
@@ -166,6 +191,7 @@ class Module:
           detach=True,
           mounts=self.get_mounts(),
           environment=self.get_environment(device),
+          labels={container_monitor.LABEL: self.name},
           extra_hosts=self.extra_hosts if self.extra_hosts is not None else {})
     except docker.errors.ContainerError as error:
       self.logger.error('Container run error')
@@ -14,18 +14,26 @@
 """Represents a test module."""
 from core.docker.docker_module import Module
 import os
+import docker
 from docker.types import Mount
 
 RUNTIME_DIR = 'runtime'
 RUNTIME_TEST_DIR = os.path.join(RUNTIME_DIR, 'test')
+RUNTIME_NETWORK_DIR = os.path.join(RUNTIME_DIR, 'network')
 DEFAULT_TIMEOUT = 60  # time in seconds
 DEFAULT_DOCKER_NETWORK = 'none'
+DEFAULT_INTERFACE = 'veth0'
+CAPTURE_BIN = '/testrun/bin/capture'
+RESET_SCRIPT = 'reset_network_service'
 
 
 class NetworkModule(Module):
   """Represents a test module."""
 
-  def __init__(self, module_config_file, session):
+  def __init__(self, module_config_file, session, vlan=None):
+    # A module serving a VLAN rather than the default network. Set before
+    # the module is configured as the network config depends on it.
+    self.vlan = vlan
     super().__init__(module_config_file=module_config_file,
                      docker_network=DEFAULT_DOCKER_NETWORK,
                      session=session)
@@ -33,6 +41,8 @@ class NetworkModule(Module):
   def setup_module(self, module_json):
     self.template = module_json['config']['docker'].get('template', False)
     self.net_config = NetworkModuleNetConfig()
+    if self.vlan is not None:
+      self.container_name += f'-v{self.vlan.id}'
     if self.enable_container:
       self.net_config.enable_wan = module_json['config']['network'].get(
           'enable_wan', False)
@@ -42,24 +52,36 @@ class NetworkModule(Module):
         self.docker_network = 'host'
 
       if not self.net_config.host:
+        self.net_config.interface = module_json['config']['network'].get(
+            'interface', DEFAULT_INTERFACE)
         self.net_config.ip_index = module_json['config']['network'].get(
             'ip_index')
+        self.net_config.vlans = module_json['config']['network'].get(
+            'vlans', False)
 
-        self.net_config.ipv4_address = self.get_session().get_ipv4_subnet()[
-            self.net_config.ip_index]
-        self.net_config.ipv4_network = self.get_session().get_ipv4_subnet()
+        if self.vlan is not None:
+          ipv4_network = self.vlan.ipv4_network
+          ipv6_network = self.vlan.ipv6_network
+        else:
+          ipv4_network = self.get_session().get_ipv4_subnet()
+          ipv6_network = self.get_session().get_ipv6_subnet()
 
-        self.net_config.ipv6_address = self.get_session().get_ipv6_subnet()[
-            self.net_config.ip_index]
+        self.net_config.ipv4_address = ipv4_network[self.net_config.ip_index]
+        self.net_config.ipv4_network = ipv4_network
 
-        self.net_config.ipv6_network = self.get_session().get_ipv6_subnet()
+        self.net_config.ipv6_address = ipv6_network[self.net_config.ip_index]
+        self.net_config.ipv6_network = ipv6_network
 
       self._mounts = []
       if 'mounts' in module_json['config']['docker']:
         for mount_point in module_json['config']['docker']['mounts']:
+          source = mount_point['source']
+          if self.vlan is not None and source == RUNTIME_NETWORK_DIR:
+            # Keep the captures of each VLAN separate
+            source = os.path.join(source, self.vlan.name)
           self._mounts.append(
               Mount(target=mount_point['target'],
-                    source=os.path.join(os.getcwd(), mount_point['source']),
+                    source=os.path.join(os.getcwd(), source),
                     type='bind'))
 
   def _setup_runtime(self, device):
@@ -71,11 +93,55 @@ class NetworkModule(Module):
         'HOST_USER': self.get_session().get_host_user(),
         'LOG_LEVEL': self.log_level
     }
+    if self.vlan is not None:
+      environment['VLAN_ID'] = self.vlan.id
+      environment['VLAN_IPV4_NETWORK'] = str(self.vlan.ipv4_network)
+      environment['VLAN_IPV6_NETWORK'] = str(self.vlan.ipv6_network)
     return environment
 
   def get_mounts(self):
     return self._mounts
 
+  def reset_service(self):
+    """Reset the runtime state of a running container, such as config
+    changed by test modules, using the reset script of the module if it
+    has one"""
+    if not os.path.exists(os.path.join(self.dir, 'bin', RESET_SCRIPT)):
+      return True
+    container = self.get_container()
+    if container is None:
+      return False
+    try:
+      result = container.exec_run(
+          ['/bin/bash', os.path.join('/testrun/bin', RESET_SCRIPT)])
+    except docker.errors.APIError as error:
+      self.logger.error('Failed to reset network service')
+      self.logger.error(error)
+      return False
+    if result.exit_code != 0:
+      self.logger.error('Failed to reset network service: ' +
+                        result.output.decode('utf-8', 'replace'))
+      return False
+    return True
+
+  def restart_capture(self):
+    """Restart the packet capture of a running container, discarding the
+    packets captured so far"""
+    if self.net_config.host:
+      return True
+    container = self.get_container()
+    if container is None:
+      return False
+    try:
+      container.exec_run(['pkill', 'tcpdump'])
+      container.exec_run(
+          [CAPTURE_BIN, self.name, self.net_config.interface], detach=True)
+      return True
+    except docker.errors.APIError as error:
+      self.logger.error('Failed to restart capture')
+      self.logger.error(error)
+      return False
+
 
 class NetworkModuleNetConfig:
   """Define all the properties of the network config for a network module"""
@@ -83,6 +149,7 @@ class NetworkModuleNetConfig:
   def __init__(self):
 
     self.enable_wan = False
+    self.interface = DEFAULT_INTERFACE
 
     self.ip_index = 0
     self.ipv4_address = None
@@ -92,6 +159,9 @@ class NetworkModuleNetConfig:
 
     self.host = False
 
+    # Whether the module also serves each VLAN of the device interface
+    self.vlans = False
+
   def get_ipv4_addr_with_prefix(self):
     return format(self.ipv4_address) + '/' + str(self.ipv4_network.prefixlen)
 
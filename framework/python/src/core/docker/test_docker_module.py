@@ -17,6 +17,7 @@ from test_orc.test_case import TestCase
 import os
 import json
 from common import util
+from common.ntp_whitelist import CACHE_FILE as NTP_WHITELIST_FILE
 from docker.types import Mount
 
 RUNTIME_DIR = 'runtime'
@@ -80,6 +81,7 @@ class TestModule(Module):
 
     self.config_file = os.path.join(self.root_path, 'local/system.json')
     self.root_certs_dir = os.path.join(self.root_path, 'local/root_certs')
+    self.ntp_whitelist_file = os.path.join(self.root_path, NTP_WHITELIST_FILE)
 
     self.network_runtime_dir = os.path.join(self.root_path, 'runtime/network')
 
@@ -138,6 +140,13 @@ class TestModule(Module):
               type='bind',
               read_only=True)
     ]
+    # Written by the framework from the servers checked by the NTP module
+    if os.path.isfile(self.ntp_whitelist_file):
+      mounts.append(
+          Mount(target='/testrun/ntp_whitelist.json',
+                source=self.ntp_whitelist_file,
+                type='bind',
+                read_only=True))
     return mounts
 
   def _get_module_timeout(self, module_json):
@@ -0,0 +1,344 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Builds the Testrun docker images, concurrently where they do not
+depend on each other, skipping images whose build context is unchanged.
+
+Run using the provided command scripts in the cmd folder.
+E.g sudo cmd/build
+"""
+import argparse
+import collections
+import glob
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+from common import logger
+from common.dependency_graph import DependencyGraph
+
+LOGGER = logger.get_logger('build')
+
+IMAGE_PREFIX = 'testrun/'
+MODULE_CONFIG = 'conf/module_config.json'
+
+# Label recording the context hash an image was built from
+CONTEXT_HASH_LABEL = 'org.testrun.context-hash'
+
+# Module directories and the suffix added to the image names
+MODULE_DIRS = [('modules/network', ''), ('modules/devices', ''),
+               ('modules/test', '-test')]
+
+# Images which are not modules, with their Dockerfiles
+IMAGES = {
+    'testrun/ui': 'modules/ui/ui.Dockerfile',
+    'testrun/ws': 'modules/ws/ws.Dockerfile'
+}
+
+DEFAULT_WORKERS = 4
+
+# Lines of output repeated when a build fails, as the output of
+# concurrent builds is interleaved
+ERROR_LINES = 20
+
+_VARIABLE = re.compile(r'\$(?:\{(\w+)\}|(\w+))')
+
+
+class Image:  # pylint: disable=too-few-public-methods
+  """Docker image and the images it is built from"""
+
+  def __init__(self, name, dockerfile, dependencies=()):
+    self.name = name
+    self.dockerfile = dockerfile
+    self.dependencies = set(dependencies)
+    self.context_hash = None
+
+
+class ImageBuilder:
+  """Builds the images found under the Testrun root directory"""
+
+  def __init__(self,
+               root_dir,
+               workers=DEFAULT_WORKERS,
+               force=False,
+               build_image=None,
+               get_built_hash=None):
+    self._root_dir = root_dir
+    self._workers = workers
+    self._force = force
+    self._build_image = build_image or self._docker_build
+    self._get_built_hash = get_built_hash or _get_built_hash
+    self._images = discover_images(root_dir)
+    self._graph = DependencyGraph()
+    for image in self._images.values():
+      self._graph.add_node(image.name, image.dependencies)
+    self._cached = set()
+
+  def get_images(self):
+    return self._images
+
+  def build(self):
+    """Build all images, returning the duration of each build. Raises
+    the first build error once the running builds have completed."""
+    self._calculate_hashes()
+    return self._graph.run(self._build, self._workers)
+
+  def report(self, durations):
+    """Log the time taken to build each image and the chain of builds
+    which determined the total time"""
+    LOGGER.info('Image build times:')
+    for name in self._graph.get_order():
+      if name not in durations:
+        continue
+      if name in self._cached:
+        result = 'unchanged'
+      elif durations[name] is None:
+        result = 'failed'
+      else:
+        result = f'{durations[name]:.1f}s'
+      LOGGER.info(f'  {name:<28} {result}')
+    path, total = self._graph.get_critical_path(durations)
+    if path:
+      LOGGER.info(f'Critical path ({total:.1f}s): ' + ' -> '.join(path))
+
+  def _calculate_hashes(self):
+    """Hash the context of each image, including the hashes of the
+    images it depends on so that dependents are rebuilt with them"""
+    for name in self._graph.get_order():
+      image = self._images[name]
+      parent_hashes = [
+          self._images[dependency].context_hash
+          for dependency in sorted(self._graph.get_dependencies(name))
+      ]
+      if None in parent_hashes:
+        continue
+      image.context_hash = get_context_hash(self._root_dir, image.dockerfile,
+                                            parent_hashes)
+
+  def _build(self, name):
+    image = self._images[name]
+    if (not self._force and image.context_hash is not None
+        and self._get_built_hash(name) == image.context_hash):
+      LOGGER.info(f'Image {name} is up to date')
+      self._cached.add(name)
+      return
+    LOGGER.info(f'Building image {name}')
+    self._build_image(image)
+    LOGGER.info(f'Successfully built image {name}')
+
+  def _docker_build(self, image):
+    command = ['docker', 'build', '-f', image.dockerfile, '-t', image.name]
+    if image.context_hash is not None:
+      command += ['--label', f'{CONTEXT_HASH_LABEL}={image.context_hash}']
+    # Show the build output as it happens, prefixed with the image name
+    output = collections.deque(maxlen=ERROR_LINES)
+    with subprocess.Popen(command + ['.'],
+                          cwd=self._root_dir,
+                          stdout=subprocess.PIPE,
+                          stderr=subprocess.STDOUT,
+                          text=True) as process:
+      for line in process.stdout:
+        line = line.rstrip()
+        output.append(line)
+        LOGGER.info(f'{image.name}: {line}')
+    if process.returncode != 0:
+      LOGGER.error(f'An error occurred whilst building image {image.name}:\n' +
+                   '\n'.join(output))
+      raise RuntimeError(f'Failed to build image {image.name}')
+
+
+def discover_images(root_dir):
+  """Images for each module and the other Testrun images, by name. Each
+  image depends on the Testrun images it is built from and on the module
+  named by depends_on in its module config."""
+  images = {}
+  for name, dockerfile in IMAGES.items():
+    if os.path.exists(os.path.join(root_dir, dockerfile)):
+      images[name] = Image(name, dockerfile)
+
+  for modules_dir, suffix in MODULE_DIRS:
+    if not os.path.isdir(os.path.join(root_dir, modules_dir)):
+      continue
+    for module in sorted(os.listdir(os.path.join(root_dir, modules_dir))):
+      dockerfile = os.path.join(modules_dir, module, module + '.Dockerfile')
+      if not os.path.exists(os.path.join(root_dir, dockerfile)):
+        continue
+      image = Image(IMAGE_PREFIX + module + suffix, dockerfile)
+      depends_on = _get_depends_on(
+          os.path.join(root_dir, modules_dir, module, MODULE_CONFIG))
+      if depends_on is not None:
+        image.dependencies.add(IMAGE_PREFIX + depends_on + suffix)
+      images[image.name] = image
+
+  for image in images.values():
+    with open(os.path.join(root_dir, image.dockerfile), encoding='utf-8') as f:
+      image.dependencies.update(
+          parent for parent in get_parents(f.read()) if parent in images)
+  return images
+
+
+def get_parents(dockerfile):
+  """Images named in the FROM instructions of a Dockerfile"""
+  parents = set()
+  for instruction, args in _get_instructions(dockerfile):
+    if instruction == 'FROM':
+      words = [word for word in args.split() if not word.startswith('--')]
+      if words:
+        parents.add(re.split(r'[:@]', words[0])[0])
+  return parents
+
+
+def get_sources(dockerfile):
+  """Paths in the build context copied by a Dockerfile, with ARG and ENV
+  values substituted. Returns None if a path cannot be resolved."""
+  variables = {}
+  sources = set()
+  for instruction, args in _get_instructions(dockerfile):
+    if instruction in ('ARG', 'ENV'):
+      # Only the KEY=value form is used by the Testrun Dockerfiles
+      for definition in args.split():
+        key, separator, value = definition.partition('=')
+        if separator:
+          variables[key] = _substitute(value.strip('"\''), variables)
+    elif instruction in ('COPY', 'ADD'):
+      if '--from=' in args:
+        continue
+      if args.startswith('['):
+        paths = json.loads(args)
+      else:
+        paths = [word for word in args.split() if not word.startswith('--')]
+      for source in paths[:-1]:
+        source = _substitute(source, variables)
+        if '$' in source or '://' in source:
+          return None
+        sources.add(os.path.normpath(source))
+  return sorted(sources)
+
+
+def get_context_hash(root_dir, dockerfile, parent_hashes=()):
+  """Hash of a Dockerfile, the files it copies from the build context and
+  the hashes of its parent images. Returns None if the files copied
+  cannot be determined."""
+  with open(os.path.join(root_dir, dockerfile), 'rb') as f:
+    content = f.read()
+  sources = get_sources(content.decode('utf-8'))
+  if sources is None:
+    return None
+
+  context_hash = hashlib.sha256()
+  context_hash.update(content)
+  for parent_hash in parent_hashes:
+    context_hash.update(parent_hash.encode())
+
+  for source in sources:
+    paths = glob.glob(os.path.join(root_dir, source))
+    if not paths or source.startswith('..'):
+      return None
+    for path in sorted(paths):
+      for file in _get_files(path):
+        context_hash.update(os.path.relpath(file, root_dir).encode() + b'\0')
+        with open(file, 'rb') as f:
+          context_hash.update(f.read())
+  return context_hash.hexdigest()
+
+
+def _get_built_hash(name):
+  # Uses the docker CLI so that the build only needs the standard library
+  result = subprocess.run(
+      ['docker', 'image', 'inspect', '--format', '{{json .Config.Labels}}',
+       name],
+      capture_output=True,
+      text=True,
+      check=False)
+  if result.returncode != 0:
+    return None
+  try:
+    labels = json.loads(result.stdout) or {}
+  except ValueError:
+    return None
+  return labels.get(CONTEXT_HASH_LABEL)
+
+
+def _get_depends_on(module_config):
+  try:
+    with open(module_config, encoding='utf-8') as f:
+      return json.load(f)['config'].get('docker', {}).get('depends_on')
+  except (OSError, KeyError, ValueError, AttributeError):
+    return None
+
+
+def _get_instructions(dockerfile):
+  """Instructions of a Dockerfile with continuation lines joined"""
+  instructions = []
+  line = ''
+  for raw_line in dockerfile.splitlines():
+    stripped = raw_line.strip()
+    if stripped.startswith('#'):
+      continue
+    if stripped.endswith('\\'):
+      line += stripped[:-1] + ' '
+      continue
+    line += stripped
+    if line:
+      instruction, _, args = line.partition(' ')
+      instructions.append((instruction.upper(), args.strip()))
+    line = ''
+  return instructions
+
+
+def _substitute(value, variables):
+  return _VARIABLE.sub(
+      lambda m: variables.get(m.group(1) or m.group(2), m.group(0)), value)
+
+
+def _get_files(path):
+  if os.path.isfile(path):
+    return [path]
+  files = []
+  for directory, dirs, names in os.walk(path):
+    dirs.sort()
+    files.extend(os.path.join(directory, name) for name in sorted(names))
+  return files
+
+
+def parse_args():
+  parser = argparse.ArgumentParser(
+      description='Build the Testrun docker images',
+      formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+  parser.add_argument('-w',
+                      '--workers',
+                      type=int,
+                      default=DEFAULT_WORKERS,
+                      help='Number of images to build concurrently')
+  parser.add_argument('-f',
+                      '--force',
+                      action='store_true',
+                      help='Rebuild images whose build context is unchanged')
+  return parser.parse_args()
+
+
+def main():
+  args = parse_args()
+  builder = ImageBuilder(os.getcwd(), workers=args.workers, force=args.force)
+  try:
+    durations = builder.build()
+  except Exception as e:  # pylint: disable=W0703
+    LOGGER.error(e)
+    sys.exit(1)
+  builder.report(durations)
+
+
+if __name__ == '__main__':
+  main()
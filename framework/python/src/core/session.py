@@ -12,13 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """Track testing status."""
-import copy
 import datetime
 import pytz
-import json
 import os
-from fastapi.encoders import jsonable_encoder
-from common import util, logger, mqtt
+from common import codec, util, logger, mqtt
+from common.analytics import ReportAnalytics
 from common.risk_profile import RiskProfile
 from common.statuses import TestrunStatus, TestResult, TestrunResult
 from common.device import Device, DeviceWithReport
@@ -43,6 +41,11 @@ MAX_DEVICE_REPORTS_KEY = 'max_device_reports'
 ORG_NAME_KEY = 'org_name'
 TEST_CONFIG_KEY = 'test_modules'
 ALLOW_DISCONNECT_KEY='allow_disconnect'
+REPORT_ARCHIVE_KEY = 'report_archive'
+MAX_CAPTURE_SIZE_KEY = 'max_capture_size'
+NTP_WHITELIST_KEY = 'ntp_whitelist'
+VLANS_KEY = 'vlans'
+MAX_VLAN_ID = 4094
 CERTS_PATH = 'local/root_certs'
 CONFIG_FILE_PATH = 'local/system.json'
 
@@ -69,7 +72,7 @@ def session_tracker(method):
     if self.get_status() != TestrunStatus.IDLE and not self.pause_message:
       self.get_mqtt_client().send_message(
                                         mqtt.MQTTTopic.STATUS_TOPIC,
-                                        jsonable_encoder(self.to_json())
+                                        self.to_json()
                                         )
       if self.get_status() in STATUSES_COMPLETE:
         self.pause_message = True
@@ -122,6 +125,9 @@ class TestrunSession():
     # All device configurations
     self._device_repository = []
 
+    # Test results of all historical reports
+    self._analytics = ReportAnalytics()
+
     # Number of tests to be run this session
     self._total_tests = 0
 
@@ -131,6 +137,12 @@ class TestrunSession():
     # Export URL
     self._export_url = None
 
+    # Statistics of the packet capture in progress
+    self._capture_stats = None
+
+    # Last known state of the internet connection
+    self._internet_connection = None
+
     # Version
     self._load_version()
 
@@ -216,6 +228,16 @@ class TestrunSession():
         'api_port': 8000,
         'org_name': '',
         'single_intf': False,
+        'report_archive': {
+            'age_days': 0,
+            'compression': 'gzip'
+        },
+        'max_capture_size': 0,
+        'vlans': [],
+        'ntp_whitelist': {
+            'ttl_hours': 24,
+            'offline': False
+        }
     }
 
   def get_config(self):
@@ -230,7 +252,7 @@ class TestrunSession():
       return
 
     with open(self._config_file, 'r', encoding='utf-8') as f:
-      config_file_json = json.load(f)
+      config_file_json = codec.load(f)
 
       # Network interfaces
       if (NETWORK_KEY in config_file_json
@@ -276,6 +298,24 @@ class TestrunSession():
           TEST_CONFIG_KEY
         )
 
+      if REPORT_ARCHIVE_KEY in config_file_json:
+        self._config[REPORT_ARCHIVE_KEY].update(
+          config_file_json.get(REPORT_ARCHIVE_KEY) or {}
+        )
+
+      if MAX_CAPTURE_SIZE_KEY in config_file_json:
+        self._config[MAX_CAPTURE_SIZE_KEY] = config_file_json.get(
+          MAX_CAPTURE_SIZE_KEY
+        )
+
+      if VLANS_KEY in config_file_json:
+        self._config[VLANS_KEY] = config_file_json.get(VLANS_KEY)
+
+      if NTP_WHITELIST_KEY in config_file_json:
+        self._config[NTP_WHITELIST_KEY].update(
+          config_file_json.get(NTP_WHITELIST_KEY) or {}
+        )
+
   def _load_version(self):
     version_cmd = util.run_command(
         'dpkg-query --showformat=\'${Version}\' --show testrun')
@@ -324,7 +364,7 @@ class TestrunSession():
 
   def _save_config(self):
     with open(self._config_file, 'w', encoding='utf-8') as f:
-      f.write(json.dumps(self._config, indent=2))
+      codec.dump(self._config, f, indent=2)
     util.set_file_owner(owner=util.get_host_user(), path=self._config_file)
 
   def get_log_level(self):
@@ -363,6 +403,12 @@ class TestrunSession():
   def get_max_device_reports(self):
     return self._config.get(MAX_DEVICE_REPORTS_KEY)
 
+  def get_report_archive_config(self):
+    return self._config.get(REPORT_ARCHIVE_KEY) or {}
+
+  def get_ntp_whitelist_config(self):
+    return self._config.get(NTP_WHITELIST_KEY) or {}
+
   def set_config(self, config_json):
     self._config.update(config_json)
     self._save_config()
@@ -394,6 +440,9 @@ class TestrunSession():
           and device.mac_addr.replace(':', '') == mac_addr_simmplified):
         return device
 
+  def get_analytics(self):
+    return self._analytics
+
   def get_device_repository(self):
     return self._device_repository
 
@@ -409,9 +458,11 @@ class TestrunSession():
 
   def add_device(self, device):
     self._device_repository.append(device)
+    self._analytics.add_reports(device.get_reports())
 
   def clear_device_repository(self):
     self._device_repository = []
+    self._analytics.clear()
 
   def get_device(self, mac_addr):
     for device in self._device_repository:
@@ -421,6 +472,7 @@ class TestrunSession():
 
   def remove_device(self, device):
     self._device_repository.remove(device)
+    self._analytics.remove_device(device.mac_addr)
 
   def get_ipv4_subnet(self):
     return self._ipv4_subnet
@@ -483,6 +535,10 @@ class TestrunSession():
           details = ' '.join(details)
         test_result.details = details
 
+        # Add the time and resources used by the test if recorded
+        if result.metrics is not None:
+          test_result.metrics = result.metrics
+
         # Add recommendations if provided
         if result.recommendations is not None:
           test_result.recommendations = result.recommendations
@@ -553,6 +609,36 @@ class TestrunSession():
   def get_allow_disconnect(self):
     return self._config.get(ALLOW_DISCONNECT_KEY)
 
+  def get_max_capture_size(self):
+    """Maximum size of a packet capture in bytes, None if unlimited"""
+    max_capture_size = self._config.get(MAX_CAPTURE_SIZE_KEY)
+    if not max_capture_size:
+      return None
+    return max_capture_size * 1024 * 1024
+
+  def get_vlans(self):
+    """IDs of the VLANs carried by the device interface, each of which is
+    served as a separate network"""
+    vlans = set()
+    for vlan_id in self._config.get(VLANS_KEY) or []:
+      if isinstance(vlan_id, int) and 1 <= vlan_id <= MAX_VLAN_ID:
+        vlans.add(vlan_id)
+      else:
+        LOGGER.error(f'Ignoring invalid VLAN ID {vlan_id}')
+    return sorted(vlans)
+
+  def get_capture_stats(self):
+    return self._capture_stats
+
+  def set_capture_stats(self, capture_stats):
+    self._capture_stats = capture_stats
+
+  def get_internet_connection(self):
+    return self._internet_connection
+
+  def set_internet_connection(self, connection):
+    self._internet_connection = connection
+
   def get_total_tests(self):
     return self._total_tests
 
@@ -580,7 +666,7 @@ class TestrunSession():
     try:
       with open(os.path.join(self._root_dir, PROFILE_FORMAT_PATH),
                 encoding='utf-8') as profile_format_file:
-        format_json = json.load(profile_format_file)
+        format_json = codec.load(profile_format_file)
         # Save original profile format for internal validation
         self._profile_format = format_json
     except (IOError, ValueError) as e:
@@ -628,7 +714,7 @@ class TestrunSession():
                   encoding='utf-8') as f:
 
           # Parse risk profile json
-          json_data: dict = json.load(f)
+          json_data: dict = codec.load(f)
 
           # Validate profile JSON
           if not self.validate_profile_json(json_data):
@@ -882,6 +968,7 @@ question {question.get('question')}''')
     self.set_description(None)
     self.set_target_device(None)
     self._report_url = None
+    self._capture_stats = None
     self._total_tests = 0
     self._module_reports = []
     self._module_templates = []
@@ -898,9 +985,10 @@ question {question.get('question')}''')
     }
 
     # Remove reports from device for session status
-    device = copy.deepcopy(self.get_target_device())
+    device = self.get_target_device()
     if device is not None:
-      device.reports = None
+      device = codec.dataclass_to_dict(device)
+      device['reports'] = None
 
     session_json = {
         'status': self.get_status(),
@@ -920,6 +1008,11 @@ question {question.get('question')}''')
 
     session_json['description'] = self._description
 
+    if self._capture_stats is not None:
+      session_json['capture'] = self._capture_stats
+
+    session_json['internet'] = self._internet_connection
+
     return session_json
 
   def get_timezone(self):
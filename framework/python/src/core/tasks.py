@@ -21,11 +21,15 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from fastapi import FastAPI
 
 from common import logger, mqtt
+from net_orc import link_monitor
+from net_orc.ip_control import IPControl
 
-# Check adapters period seconds
 # Check adapters period seconds
 CHECK_NETWORK_ADAPTERS_PERIOD = 5
-CHECK_INTERNET_PERIOD = 2
+# Archive aged reports period seconds
+ARCHIVE_REPORTS_PERIOD = 60 * 60
+# Refresh NTP whitelist period seconds
+REFRESH_NTP_WHITELIST_PERIOD = 60 * 60
 
 LOGGER = logger.get_logger('tasks')
 
@@ -43,26 +47,45 @@ class PeriodicTasks:
     # Prevent scheduler warnings
     self._scheduler._logger.setLevel(logging.ERROR)
 
+    # check adapters when interfaces are added or removed, polling
+    # whilst link notifications are not available
+    self._link_monitor = self._testrun.get_net_orc().get_link_monitor()
+    self._link_monitor.register_callback(
+        self._adapters_changed,
+        [link_monitor.LINK_ADDED, link_monitor.LINK_REMOVED])
     self.adapters_checker_job = self._scheduler.add_job(
-        func=self._testrun.get_net_orc().network_adapters_checker,
-        kwargs={
-                'mqtt_client': self._mqtt_client,
-                'topic': mqtt.MQTTTopic.NETWORK_ADAPTERS_TOPIC
-                },
+        func=self._poll_adapters,
         trigger='interval',
         seconds=CHECK_NETWORK_ADAPTERS_PERIOD,
     )
-    # add internet connection cheking job only in single-intf mode
-    if 'single_intf' not in self._testrun.get_session().get_runtime_params():
-      self.internet_shecker = self._scheduler.add_job(
-          func=self._testrun.get_net_orc().internet_conn_checker,
-          kwargs={
-                  'mqtt_client': self._mqtt_client,
-                  'topic': mqtt.MQTTTopic.INTERNET_CONNECTION_TOPIC
-                  },
-          trigger='interval',
-          seconds=CHECK_INTERNET_PERIOD,
-      )
+    # compress captures and logs of aged reports, starting on launch
+    self.archive_reports_job = self._scheduler.add_job(
+        func=self._testrun.get_test_orc().archive_reports,
+        trigger='interval',
+        seconds=ARCHIVE_REPORTS_PERIOD,
+        next_run_time=datetime.datetime.now(local_tz),
+    )
+    # remove expired NTP whitelist entries, starting on launch
+    self.ntp_whitelist_job = self._scheduler.add_job(
+        func=self._testrun.get_test_orc().refresh_ntp_whitelist,
+        trigger='interval',
+        seconds=REFRESH_NTP_WHITELIST_PERIOD,
+        next_run_time=datetime.datetime.now(local_tz),
+    )
+
+  def _adapters_changed(self, event, iface):  # pylint: disable=unused-argument
+    # Ignore the interfaces created for the virtual network
+    if IPControl.is_sys_interface(iface):
+      self._check_adapters()
+
+  def _poll_adapters(self):
+    if not self._link_monitor.is_running():
+      self._check_adapters()
+
+  def _check_adapters(self):
+    self._testrun.get_net_orc().network_adapters_checker(
+        mqtt_client=self._mqtt_client,
+        topic=mqtt.MQTTTopic.NETWORK_ADAPTERS_TOPIC)
 
   @asynccontextmanager
   async def start(self, app: FastAPI):  # pylint: disable=unused-argument
@@ -73,4 +96,10 @@ class PeriodicTasks:
     """
     # Job that checks for changes in network adapters
     self._scheduler.start()
+
+    # Internet connection prober, not used in single-intf mode
+    internet_prober = self._testrun.get_net_orc().get_internet_prober()
+    if 'single_intf' not in self._testrun.get_session().get_runtime_params():
+      internet_prober.start()
     yield
+    await internet_prober.stop()
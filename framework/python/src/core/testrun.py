@@ -16,7 +16,6 @@ This file provides the integration between all of the
 Testrun components, such as net_orc, test_orc and test_ui.
 """
 import docker
-import json
 import os
 import shutil
 import signal
@@ -24,7 +23,7 @@ import sys
 import time
 import docker.errors
 
-from common import logger, util, mqtt
+from common import codec, container_monitor, docker_util, logger, util, mqtt
 from common.device import Device
 from common.testreport import TestReport
 from common.statuses import TestrunStatus
@@ -110,6 +109,9 @@ class Testrun:  # pylint: disable=too-few-public-methods
     if validate:
       self._session.add_runtime_param('validate')
 
+    # Track the state of the Testrun containers
+    container_monitor.get_monitor().start()
+
     self._net_orc = net_orc.NetworkOrchestrator(session=self._session)
     self._test_orc = test_orc.TestOrchestrator(self._session, self._net_orc)
 
@@ -234,8 +236,8 @@ class Testrun:  # pylint: disable=too-few-public-methods
                 encoding='utf-8') as device_config_file:
 
         try:
-          device_config_json = json.load(device_config_file)
-        except json.decoder.JSONDecodeError as e:
+          device_config_json = codec.load(device_config_file)
+        except codec.JSONDecodeError as e:
           LOGGER.error('Invalid JSON found in ' +
                        f'device configuration {device_config_file_path}')
           LOGGER.debug(e)
@@ -288,7 +290,7 @@ class Testrun:  # pylint: disable=too-few-public-methods
                                         RESOURCE_DEVICES_DIR,
                                         DEVICE_QUESTIONS_FILE_NAME)
         with open(format_file_path, 'r', encoding='utf-8') as f:
-          format_data = json.load(f)
+          format_data = codec.load(f)
 
         required_questions = [
             item['question'] for item in format_data
@@ -363,7 +365,7 @@ class Testrun:  # pylint: disable=too-few-public-methods
         continue
 
       with open(report_json_file_path, encoding='utf-8') as report_json_file:
-        report_json = json.load(report_json_file)
+        report_json = codec.load(report_json_file)
         test_report = TestReport()
         test_report.from_json(report_json)
         test_report.set_mac_addr(device.mac_addr)
@@ -385,6 +387,7 @@ class Testrun:  # pylint: disable=too-few-public-methods
                  f'at {report.get_folder_name()}')
 
     device.remove_report(report)
+    self.get_session().get_analytics().remove_report(report.get_folder_name())
     return True
 
   def create_device(self, device: Device):
@@ -399,7 +402,7 @@ class Testrun:  # pylint: disable=too-few-public-methods
     config_file_path = os.path.join(device_folder_path, DEVICE_CONFIG)
 
     with open(config_file_path, 'w', encoding='utf-8') as config_file:
-      config_file.writelines(json.dumps(device.to_config_json(), indent=4))
+      codec.dump(device.to_config_json(), config_file, indent=2)
 
     # Ensure new folder has correct permissions
     util.run_command(f"chown -R {util.get_host_user()} '{device_folder_path}'")
@@ -417,7 +420,7 @@ class Testrun:  # pylint: disable=too-few-public-methods
                                     device.device_folder, DEVICE_CONFIG)
 
     with open(config_file_path, 'w+', encoding='utf-8') as config_file:
-      config_file.writelines(json.dumps(device.to_config_json(), indent=4))
+      codec.dump(device.to_config_json(), config_file, indent=2)
 
 
     return device.to_config_json()
@@ -460,7 +463,12 @@ class Testrun:  # pylint: disable=too-few-public-methods
     while True:
       time.sleep(5)
 
-  async def stop(self):
+  async def stop(self, keep_topology=False):
+    """Stop the session. The network is left running for the next
+    session to reuse if keep_topology is set."""
+    self._stop(keep_topology=keep_topology)
+
+  def _stop(self, keep_topology=False):
 
     # First, change the status to stopping
     self.get_session().stop()
@@ -479,7 +487,7 @@ class Testrun:  # pylint: disable=too-few-public-methods
     # Disconnect before WS server stops to prevent error
     self._mqtt_client.disconnect()
 
-    self._stop_network(kill=True)
+    self._stop_network(kill=True, keep_topology=keep_topology)
 
   def _register_exits(self):
     signal.signal(signal.SIGINT, self._exit_handler)
@@ -489,9 +497,11 @@ class Testrun:  # pylint: disable=too-few-public-methods
 
   def shutdown(self):
     LOGGER.info('Shutting down Testrun')
-    self.stop()
+    self._stop()
     self._stop_ui()
     self._stop_ws()
+    container_monitor.get_monitor().stop()
+    self.get_net_orc().get_link_monitor().stop()
 
   def _exit_handler(self, signum, arg):  # pylint: disable=unused-argument
     LOGGER.debug('Exit signal received: ' + str(signum))
@@ -520,11 +530,11 @@ class Testrun:  # pylint: disable=too-few-public-methods
   def _start_network(self):
     # Start the network orchestrator
     if not self.get_net_orc().start():
-      self.stop()
+      self._stop()
       sys.exit(1)
 
-  def _stop_network(self, kill=True):
-    self.get_net_orc().stop(kill)
+  def _stop_network(self, kill=True, keep_topology=False):
+    self.get_net_orc().stop(kill, keep_topology=keep_topology)
 
   def _stop_tests(self):
     self._test_orc.stop()
@@ -568,8 +578,9 @@ class Testrun:  # pylint: disable=too-few-public-methods
   def _device_stable(self, mac_addr):
 
     # Do not continue testing if Testrun has cancelled during monitor phase
+    # Leave the network running so the next session can reuse it
     if self.get_session().get_status() == TestrunStatus.CANCELLED:
-      self._stop_network()
+      self._stop_network(keep_topology=True)
       return
 
     LOGGER.info(f'Device with mac address {mac_addr} is ready for testing.')
@@ -580,7 +591,7 @@ class Testrun:  # pylint: disable=too-few-public-methods
 
     self._test_orc.run_test_modules()
 
-    self._stop_network()
+    self._stop_network(keep_topology=True)
 
   def get_session(self):
     return self._session
@@ -594,7 +605,7 @@ class Testrun:  # pylint: disable=too-few-public-methods
 
     LOGGER.info('Starting UI')
 
-    client = docker.from_env()
+    client = docker_util.get_client()
 
     try:
       client.containers.run(image='testrun/ui',
@@ -614,7 +625,7 @@ class Testrun:  # pylint: disable=too-few-public-methods
 
   def _stop_ui(self):
     LOGGER.info('Stopping user interface')
-    client = docker.from_env()
+    client = docker_util.get_client()
     try:
       container = client.containers.get('tr-ui')
       if container is not None:
@@ -633,7 +644,7 @@ class Testrun:  # pylint: disable=too-few-public-methods
 
     LOGGER.info('Starting WS server')
 
-    client = docker.from_env()
+    client = docker_util.get_client()
 
     try:
       client.containers.run(image='testrun/ws',
@@ -652,7 +663,7 @@ class Testrun:  # pylint: disable=too-few-public-methods
 
   def _stop_ws(self):
     LOGGER.info('Stopping websockets server')
-    client = docker.from_env()
+    client = docker_util.get_client()
     try:
       container = client.containers.get('tr-ws')
       if container is not None:
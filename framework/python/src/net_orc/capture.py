@@ -0,0 +1,224 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Streams packets from an interface straight to a pcap file."""
+import socket
+import struct
+import threading
+import time
+from common import logger
+
+LOGGER = logger.get_logger('capture')
+
+ETH_P_ALL = 0x0003
+ETH_P_8021Q = 0x8100
+SO_TIMESTAMP = 29
+
+# The kernel strips the 802.1Q tag from received frames and reports it in
+# the packet auxdata instead
+SOL_PACKET = 263
+PACKET_AUXDATA = 8
+TP_STATUS_VLAN_VALID = 0x10
+TP_STATUS_VLAN_TPID_VALID = 0x40
+
+# EtherTypes of 802.1Q and 802.1ad VLAN tags
+VLAN_TPIDS = (ETH_P_8021Q, 0x88a8)
+MAX_FRAME_SIZE = 65535
+RECV_TIMEOUT = 1
+RECV_BUFFER_SIZE = 8 * 1024 * 1024
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Interval in seconds between capture statistics updates
+UPDATE_INTERVAL = 1
+
+# pcap file format, microsecond resolution with Ethernet link type
+PCAP_GLOBAL_HEADER = struct.pack('<IHHiIII', 0xa1b2c3d4, 2, 4, 0, 0,
+                                 MAX_FRAME_SIZE, 1)
+PCAP_RECORD_HEADER = struct.Struct('<IIII')
+_TIMEVAL = struct.Struct('@ll')
+# struct tpacket_auxdata
+_AUXDATA = struct.Struct('@IIIHHHH')
+
+# Buffer size for the receive time and auxdata of a frame
+ANCDATA_SIZE = (socket.CMSG_SPACE(_TIMEVAL.size) +
+                socket.CMSG_SPACE(_AUXDATA.size))
+
+
+class PacketCapture:
+  """Captures all frames on an interface to a pcap file.
+
+  Frames are written to disk as they are received, so memory use does not
+  grow with the length of the capture. The capture ends when stopped, after
+  max_duration seconds or when stop_filter returns True for a frame. Once
+  max_size bytes have been written, frames are still counted but no longer
+  written to the file. Frames with a VLAN tag are skipped when untagged is
+  set."""
+
+  def __init__(self,
+               iface,
+               path,
+               *,
+               max_duration=None,
+               max_size=None,
+               stop_filter=None,
+               on_update=None,
+               untagged=False):
+    self._iface = iface
+    self._path = path
+    self._max_duration = max_duration
+    self._max_size = max_size
+    self._stop_filter = stop_filter
+    self._on_update = on_update
+    self._untagged = untagged
+
+    self._stop_event = threading.Event()
+    self._thread = None
+    self._packets = 0
+    self._bytes = 0
+    self._written = 0
+    self._truncated = False
+
+  def start(self):
+    """Open the interface and start capturing in the background"""
+    sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW,
+                         socket.htons(ETH_P_ALL))
+    try:
+      sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_BUFFER_SIZE)
+      sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMP, 1)
+      sock.setsockopt(SOL_PACKET, PACKET_AUXDATA, 1)
+      sock.bind((self._iface, ETH_P_ALL))
+      sock.settimeout(RECV_TIMEOUT)
+    except OSError:
+      sock.close()
+      raise
+
+    self._stop_event.clear()
+    self._thread = threading.Thread(target=self._capture,
+                                    args=(sock,),
+                                    name=f'Capture {self._path}',
+                                    daemon=True)
+    self._thread.start()
+
+  def stop(self):
+    """Stop capturing and close the pcap file"""
+    self._stop_event.set()
+    self.wait()
+
+  def wait(self, timeout=None):
+    """Block until the capture has finished"""
+    if self._thread is not None:
+      self._thread.join(timeout)
+
+  def is_running(self):
+    return self._thread is not None and self._thread.is_alive()
+
+  def get_stats(self):
+    return {
+        'packets': self._packets,
+        'bytes': self._bytes,
+        'truncated': self._truncated
+    }
+
+  def _capture(self, sock):
+    started = time.monotonic()
+    last_update = started
+    try:
+      with open(self._path, 'wb', buffering=WRITE_BUFFER_SIZE) as pcap:
+        pcap.write(PCAP_GLOBAL_HEADER)
+        self._written = len(PCAP_GLOBAL_HEADER)
+
+        while not self._stop_event.is_set():
+          now = time.monotonic()
+          if (self._max_duration is not None
+              and now - started >= self._max_duration):
+            break
+
+          if self._on_update is not None and now - last_update >= (
+              UPDATE_INTERVAL):
+            last_update = now
+            self._on_update(self.get_stats())
+
+          try:
+            frame, ancdata, _, _ = sock.recvmsg(MAX_FRAME_SIZE,
+                                                ANCDATA_SIZE)
+          except socket.timeout:
+            continue
+          frame = restore_vlan_tag(frame, ancdata)
+          if self._untagged and is_vlan_tagged(frame):
+            continue
+
+          self._write(pcap, frame, _get_timestamp(ancdata))
+
+          if self._stop_filter is not None and self._stop_filter(frame):
+            break
+
+    except OSError as e:
+      LOGGER.error(f'Error capturing packets on {self._iface}: {e}')
+    finally:
+      sock.close()
+      if self._on_update is not None:
+        self._on_update(self.get_stats())
+      LOGGER.debug(f'Captured {self._packets} packets ({self._bytes} bytes) '
+                   f'to {self._path}')
+
+  def _write(self, pcap, frame, timestamp):
+    self._packets += 1
+    self._bytes += len(frame)
+
+    record_size = PCAP_RECORD_HEADER.size + len(frame)
+    if self._max_size is not None and (self._written + record_size
+                                       > self._max_size):
+      if not self._truncated:
+        LOGGER.warning(f'Capture {self._path} reached the maximum size of '
+                       f'{self._max_size} bytes, no further packets will be '
+                       'written')
+        self._truncated = True
+      return
+
+    seconds, microseconds = timestamp
+    pcap.write(
+        PCAP_RECORD_HEADER.pack(seconds, microseconds, len(frame),
+                                len(frame)))
+    pcap.write(frame)
+    self._written += record_size
+
+
+def _get_timestamp(ancdata):
+  """Resolve the kernel receive time of a frame, falling back
+  to the current time"""
+  for level, cmsg_type, data in ancdata:
+    if (level == socket.SOL_SOCKET and cmsg_type == SO_TIMESTAMP
+        and len(data) >= _TIMEVAL.size):
+      return _TIMEVAL.unpack_from(data)
+  now = time.time()
+  return int(now), int((now % 1) * 1000000)
+
+
+def restore_vlan_tag(frame, ancdata):
+  """Reinsert the VLAN tag of a received frame from its packet auxdata"""
+  for level, cmsg_type, data in ancdata:
+    if (level == SOL_PACKET and cmsg_type == PACKET_AUXDATA
+        and len(data) >= _AUXDATA.size):
+      status, _, _, _, _, tci, tpid = _AUXDATA.unpack_from(data)
+      if status & TP_STATUS_VLAN_VALID and len(frame) >= 12:
+        if not status & TP_STATUS_VLAN_TPID_VALID:
+          tpid = ETH_P_8021Q
+        return frame[:12] + struct.pack('!HH', tpid, tci) + frame[12:]
+  return frame
+
+
+def is_vlan_tagged(frame):
+  """Whether an Ethernet frame carries a VLAN tag"""
+  return len(frame) >= 14 and struct.unpack_from('!H', frame,
+                                                 12)[0] in VLAN_TPIDS
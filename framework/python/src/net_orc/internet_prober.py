@@ -0,0 +1,174 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Probes internet connectivity through the gateway network namespace."""
+import asyncio
+import ctypes
+import os
+import random
+import socket
+from common import logger
+
+LOGGER = logger.get_logger('internet_prober')
+
+GATEWAY_NAMESPACE = 'tr-ctns-gateway'
+NETNS_DIR = '/var/run/netns'
+CLONE_NEWNET = 0x40000000
+
+# Public DNS servers which accept TCP connections on port 53
+PROBE_TARGETS = [('8.8.8.8', 53), ('1.1.1.1', 53)]
+CONNECT_TIMEOUT = 2
+
+# Probe interval in seconds, doubled while the state does not change
+MIN_INTERVAL = 2
+MAX_INTERVAL = 60
+JITTER = 0.2
+
+
+class InternetProber:
+  """Periodically checks whether the internet can be reached from a
+  network namespace.
+
+  Connectivity is tested with a TCP connection to each target in turn.
+  The probe interval backs off exponentially, with jitter, while the state
+  is unchanged and on_change is only called when the state changes. The
+  state is None whilst should_probe returns False, and False without
+  probing whilst can_probe returns False."""
+
+  def __init__(self,
+               should_probe,
+               on_change,
+               *,
+               can_probe=None,
+               namespace=GATEWAY_NAMESPACE,
+               targets=None,
+               min_interval=MIN_INTERVAL,
+               max_interval=MAX_INTERVAL):
+    self._should_probe = should_probe
+    self._on_change = on_change
+    self._can_probe = can_probe
+    self._namespace = namespace
+    self._targets = targets if targets is not None else PROBE_TARGETS
+    self._min_interval = min_interval
+    self._max_interval = max_interval
+
+    self._state = None
+    self._interval = min_interval
+    self._task = None
+
+  def get_state(self):
+    return self._state
+
+  def start(self):
+    """Start probing in the running event loop"""
+    if self._task is None or self._task.done():
+      self._task = asyncio.create_task(self.run())
+
+  async def stop(self):
+    if self._task is not None:
+      self._task.cancel()
+      try:
+        await self._task
+      except asyncio.CancelledError:
+        pass
+      self._task = None
+
+  async def run(self):
+    while True:
+      await self.check()
+      await asyncio.sleep(self._get_delay())
+
+  async def check(self):
+    """Probe once if required and publish any change of state"""
+    if not self._should_probe():
+      state = None
+    elif self._can_probe is not None and not self._can_probe():
+      state = False
+    else:
+      state = await self.probe()
+
+    if state == self._state:
+      # Back off while the state is stable. Skipped probes are cheap so
+      # are always checked at the minimum interval.
+      if state is not None:
+        self._interval = min(self._interval * 2, self._max_interval)
+      return
+
+    LOGGER.debug(f'Internet connection changed from {self._state} to {state}')
+    self._state = state
+    self._interval = self._min_interval
+    try:
+      self._on_change(state)
+    except Exception as e:  # pylint: disable=W0703
+      LOGGER.error(f'Failed to publish internet connection state: {e}')
+
+  async def probe(self):
+    """Whether any of the targets can be reached"""
+    for target in self._targets:
+      if await self._connect(target):
+        return True
+    return False
+
+  def _get_delay(self):
+    interval = self._interval if self._state is not None else (
+        self._min_interval)
+    return interval * random.uniform(1 - JITTER, 1 + JITTER)
+
+  async def _connect(self, target):
+    loop = asyncio.get_running_loop()
+    try:
+      sock = await loop.run_in_executor(None, self._create_socket)
+    except OSError as e:
+      LOGGER.debug(f'Unable to create probe socket: {e}')
+      return False
+
+    try:
+      await asyncio.wait_for(loop.sock_connect(sock, target), CONNECT_TIMEOUT)
+      return True
+    except ConnectionRefusedError:
+      # The target responded, so it is reachable
+      return True
+    except (OSError, asyncio.TimeoutError):
+      return False
+    finally:
+      sock.close()
+
+  def _create_socket(self):
+    """Create a non-blocking socket in the namespace. Runs in a worker
+    thread, as switching namespace only affects the calling thread."""
+    if self._namespace is None:
+      return _nonblocking_socket()
+    with open(os.path.join(NETNS_DIR, self._namespace), 'rb') as target_ns, \
+        open('/proc/thread-self/ns/net', 'rb') as own_ns:
+      _setns(target_ns.fileno())
+      try:
+        return _nonblocking_socket()
+      finally:
+        _setns(own_ns.fileno())
+
+
+def _nonblocking_socket():
+  sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+  sock.setblocking(False)
+  return sock
+
+
+def _setns(fd):
+  if hasattr(os, 'setns'):
+    os.setns(fd, CLONE_NEWNET)
+    return
+  libc = ctypes.CDLL(None, use_errno=True)
+  if libc.setns(fd, CLONE_NEWNET) != 0:
+    errno = ctypes.get_errno()
+    raise OSError(errno, os.strerror(errno))
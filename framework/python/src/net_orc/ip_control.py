@@ -12,24 +12,50 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """IP Control Module"""
+import os
 import psutil
 import typing as t
 from common import logger
 from common import util
+from net_orc import netlink_control
 import re
 import socket
 
 LOGGER = logger.get_logger('ip_ctrl')
+NETNS_DIR = '/var/run/netns'
 
 
 class IPControl:
   """IP Control"""
 
-  def __init__(self):
-    """Initialize the IPControl object"""
+  def __init__(self, use_netlink=True):
+    """Initialize the IPControl object
+
+    Link and namespace operations are made over netlink when it is
+    available, falling back to the ip command if netlink is not installed
+    or an operation fails."""
+    self._netlink = None
+    if use_netlink and netlink_control.is_available():
+      self._netlink = netlink_control.NetlinkControl()
+    LOGGER.debug('Using ' + ('netlink' if self._netlink else 'ip command') +
+                 ' to manage links and namespaces')
+
+  def _netlink_call(self, operation, *args):
+    """Run an operation over netlink. Returns None when the ip command
+    should be used instead."""
+    if self._netlink is None:
+      return None
+    try:
+      return getattr(self._netlink, operation)(*args)
+    except netlink_control.NETLINK_ERRORS as e:
+      LOGGER.debug(f'Netlink {operation} failed, using ip command: {e}')
+      return None
 
   def add_link(self, interface_name, peer_name):
     """Create an ip link with a peer"""
+    result = self._netlink_call('add_link', interface_name, peer_name)
+    if result is not None:
+      return result
     success = util.run_command('ip link add ' + interface_name +
                                ' type veth peer name ' + peer_name)
     return success
@@ -40,21 +66,33 @@ class IPControl:
     LOGGER.info('Namespace exists: ' + str(exists))
     if exists:
       return True
+    result = self._netlink_call('add_namespace', namespace)
+    if result is not None:
+      return result
     else:
       success = util.run_command('ip netns add ' + namespace)
       return success
 
   def check_interface_status(self, interface_name):
+    result = self._netlink_call('check_interface_status', interface_name)
+    if result is not None:
+      return result
     output = util.run_command(cmd=f'ip link show {interface_name}', output=True)
     return 'state UP ' in output[0]
 
   def delete_link(self, interface_name):
     """Delete an ip link"""
+    result = self._netlink_call('delete_link', interface_name)
+    if result is not None:
+      return result
     success = util.run_command('ip link delete ' + interface_name)
     return success
 
   def delete_namespace(self, interface_name):
     """Delete an ip namespace"""
+    result = self._netlink_call('delete_namespace', interface_name)
+    if result is not None:
+      return result
     success = util.run_command('ip netns delete ' + interface_name)
     return success
 
@@ -68,6 +106,9 @@ class IPControl:
     return namespace in namespaces
 
   def get_links(self):
+    result = self._netlink_call('get_links')
+    if result is not None:
+      return result
     result = util.run_command('ip link list')
     links = result[0].strip().split('\n')
     netns_links = []
@@ -124,6 +165,9 @@ class IPControl:
     return None
 
   def get_namespaces(self):
+    result = self._netlink_call('get_namespaces')
+    if result is not None:
+      return result
     result = util.run_command('ip netns list')
     # Strip ID's from the namespace results
     namespaces = re.findall(r'(\S+)(?:\s+\(id: \d+\))?', result[0])
@@ -131,12 +175,19 @@ class IPControl:
 
   def set_namespace(self, interface_name, namespace):
     """Attach an interface to a network namespace"""
+    result = self._netlink_call('set_namespace', interface_name, namespace)
+    if result is not None:
+      return result
     success = util.run_command('ip link set ' + interface_name + ' netns ' +
                                namespace)
     return success
 
   def rename_interface(self, interface_name, namespace, new_name):
     """Rename an interface"""
+    result = self._netlink_call('rename_interface', interface_name, namespace,
+                                new_name)
+    if result is not None:
+      return result
     success = util.run_command('ip netns exec ' + namespace +
                                ' ip link set dev ' + interface_name + ' name ' +
                                new_name)
@@ -144,6 +195,10 @@ class IPControl:
 
   def set_interface_mac(self, interface_name, namespace, mac_addr):
     """Set MAC address of an interface"""
+    result = self._netlink_call('set_interface_mac', interface_name, namespace,
+                                mac_addr)
+    if result is not None:
+      return result
     success = util.run_command('ip netns exec ' + namespace +
                                ' ip link set dev ' + interface_name +
                                ' address ' + mac_addr)
@@ -151,12 +206,19 @@ class IPControl:
 
   def set_interface_ip(self, interface_name, namespace, ipaddr):
     """Set IP address of an interface"""
+    result = self._netlink_call('set_interface_ip', interface_name, namespace,
+                                ipaddr)
+    if result is not None:
+      return result
     success = util.run_command('ip netns exec ' + namespace + ' ip addr add ' +
                                ipaddr + ' dev ' + interface_name)
     return success
 
   def set_interface_up(self, interface_name, namespace=None):
     """Set the interface to the up state"""
+    result = self._netlink_call('set_interface_up', interface_name, namespace)
+    if result is not None:
+      return result
     if namespace is None:
       success = util.run_command('ip link set dev ' + interface_name + ' up')
     else:
@@ -190,7 +252,7 @@ class IPControl:
     ns_clean = True
     if namespace is not None:
       if self.namespace_exists(namespace):
-        ns_clean = self.delete_namespace
+        ns_clean = self.delete_namespace(namespace)
     return link_clean and ns_clean
 
   def configure_container_interface(self,
@@ -203,12 +265,6 @@ class IPControl:
                                     ipv4_addr=None,
                                     ipv6_addr=None):
 
-    # Cleanup old interface and namespaces
-    self.cleanup(bridge_intf, namespace)
-
-    # Create interface pair
-    self.add_link(bridge_intf, container_intf)
-
     if container_name is not None:
       # Get PID for running container
       # TODO: Some error checking around missing PIDs might be required
@@ -219,13 +275,25 @@ class IPControl:
         return False
 
       # Create symlink for container network namespace
-      if not util.run_command('ln -sf /proc/' + container_pid +
-                              '/ns/net /var/run/netns/' + namespace,
-                              output=False):
+      if not self._link_namespace(container_pid, namespace):
         LOGGER.error(
             f'Failed to link {container_name} to namespace {namespace_intf}')
         return False
 
+    # Configure the interface pair in one netlink session where possible
+    result = self._netlink_call('configure_container_interface', bridge_intf,
+                                container_intf, namespace_intf, namespace,
+                                mac_addr, ipv4_addr, ipv6_addr)
+    if result is not None:
+      return result
+
+    # Cleanup the old interface. The namespace is kept as it has already
+    # been linked to the container
+    self.cleanup(interface=bridge_intf)
+
+    # Create interface pair
+    self.add_link(bridge_intf, container_intf)
+
     # Attach container interface to container network namespace
     if not self.set_namespace(container_intf, namespace):
       LOGGER.error(f'Failed to set namespace {namespace} for {container_intf}')
@@ -264,6 +332,19 @@ class IPControl:
       return False
     return True
 
+  def _link_namespace(self, pid, namespace):
+    """Expose the network namespace of a process as a named namespace"""
+    path = os.path.join(NETNS_DIR, namespace)
+    try:
+      os.makedirs(NETNS_DIR, exist_ok=True)
+      if os.path.lexists(path):
+        os.remove(path)
+      os.symlink(f'/proc/{pid}/ns/net', path)
+    except OSError as e:
+      LOGGER.debug(f'Failed to link namespace {namespace}: {e}')
+      return False
+    return True
+
   def ping_via_gateway(self, host: str) -> bool:
     """Ping the host trough the gateway container"""
     command = f'timeout 3 docker exec tr-ct-gateway ping -W 1 -c 1 {host}'
@@ -272,6 +353,12 @@ class IPControl:
       return True
     return False
 
+  @staticmethod
+  def is_sys_interface(name: str) -> bool:
+    """Whether the interface is a host ethernet interface, as listed by
+    get_sys_interfaces"""
+    return name.startswith('en') or name.startswith('eth')
+
   @staticmethod
   def get_sys_interfaces() -> t.Dict[str, t.Dict[str, str]]:
     """ Retrieves all Ethernet network interfaces from the host system
@@ -284,7 +371,7 @@ class IPControl:
     for key in addrs:
       nic = addrs[key]
       # Ignore any interfaces that are not ethernet
-      if not (key.startswith('en') or key.startswith('eth')):
+      if not IPControl.is_sys_interface(key):
         continue
 
       ifaces[key] = nic[0].address
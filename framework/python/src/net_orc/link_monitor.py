@@ -0,0 +1,253 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tracks the state of the host network interfaces from rtnetlink link
+notifications."""
+import socket
+import struct
+import threading
+from common import logger
+
+LOGGER = logger.get_logger('link_monitor')
+
+# Link events passed to callbacks with the interface name
+LINK_ADDED = 'added'
+LINK_REMOVED = 'removed'
+LINK_UP = 'up'
+LINK_DOWN = 'down'
+
+NETLINK_ROUTE = 0
+RTMGRP_LINK = 0x1
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_GETLINK = 18
+NLMSG_DONE = 3
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+IFLA_ADDRESS = 1
+IFLA_IFNAME = 3
+IFLA_OPERSTATE = 16
+IF_OPER_UP = 6
+
+RECV_SIZE = 65536
+RECV_BUFFER_SIZE = 1024 * 1024
+RECV_TIMEOUT = 1
+
+_NLMSGHDR = struct.Struct('=IHHII')
+_IFINFOMSG = struct.Struct('=BxHiII')
+_RTATTR = struct.Struct('=HH')
+
+
+class LinkMonitor:
+  """Maintains a table of the host interfaces and notifies registered
+  callbacks when an interface is added, removed or changes state."""
+
+  def __init__(self):
+    self._socket = None
+    self._thread = None
+    self._stop_event = threading.Event()
+    self._lock = threading.Lock()
+    self._links = {}
+    self._callbacks = []
+
+  def start(self):
+    """Subscribe to link notifications and load the current interfaces"""
+    if self.is_running():
+      return True
+    try:
+      self._socket = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW,
+                                   NETLINK_ROUTE)
+      self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF,
+                              RECV_BUFFER_SIZE)
+      self._socket.bind((0, RTMGRP_LINK))
+      self._socket.settimeout(RECV_TIMEOUT)
+
+      # Load all existing links before returning so that the table is
+      # complete, notifications received meanwhile are applied in order
+      self._socket.send(
+          _NLMSGHDR.pack(_NLMSGHDR.size + _IFINFOMSG.size, RTM_GETLINK,
+                         NLM_F_REQUEST | NLM_F_DUMP, 1, 0) +
+          _IFINFOMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0))
+      done = False
+      while not done:
+        data = self._socket.recv(RECV_SIZE)
+        done = NLMSG_DONE in get_message_types(data)
+        self._handle(data)
+    except (AttributeError, OSError) as e:
+      LOGGER.error(f'Failed to subscribe to link notifications: {e}')
+      self._close_socket()
+      return False
+
+    self._stop_event.clear()
+    self._thread = threading.Thread(target=self._monitor,
+                                    name='Link monitor',
+                                    daemon=True)
+    self._thread.start()
+    return True
+
+  def stop(self):
+    if self.is_running():
+      self._stop_event.set()
+      self._thread.join()
+    self._close_socket()
+
+  def is_running(self):
+    return self._thread is not None and self._thread.is_alive()
+
+  def register_callback(self, callback, events=[]):  # pylint: disable=dangerous-default-value
+    """Register a callback for specified events. Callbacks are called
+    with the event and interface name from the monitor thread."""
+    with self._lock:
+      self._callbacks.append({'callback': callback, 'events': events})
+
+  def unregister_callback(self, callback):
+    with self._lock:
+      self._callbacks = [
+          c for c in self._callbacks if c['callback'] != callback
+      ]
+
+  def get_links(self):
+    """Current interfaces by name, each with the MAC address and whether
+    the interface is up"""
+    with self._lock:
+      return {link['name']: dict(link) for link in self._links.values()}
+
+  def link_exists(self, interface_name):
+    return self._get_link(interface_name) is not None
+
+  def is_up(self, interface_name):
+    link = self._get_link(interface_name)
+    return link is not None and link['up']
+
+  def _get_link(self, interface_name):
+    with self._lock:
+      for link in self._links.values():
+        if link['name'] == interface_name:
+          return link
+    return None
+
+  def _monitor(self):
+    while not self._stop_event.is_set():
+      try:
+        data = self._socket.recv(RECV_SIZE)
+      except socket.timeout:
+        continue
+      except OSError as e:
+        LOGGER.error(f'Error reading link notifications: {e}')
+        break
+      self._handle(data)
+
+  def _close_socket(self):
+    if self._socket is not None:
+      self._socket.close()
+      self._socket = None
+
+  def _handle(self, data):
+    for msg_type, link in parse_messages(data):
+      events = self._update(msg_type, link)
+      for event in events:
+        LOGGER.debug(f'Interface {link["name"]} {event}')
+        self._call_callbacks(event, link['name'])
+
+  def _update(self, msg_type, link):
+    """Apply a link message to the table, returning the resulting events"""
+    with self._lock:
+      previous = self._links.get(link['index'])
+
+      if msg_type == RTM_DELLINK:
+        if previous is None:
+          return []
+        del self._links[link['index']]
+        return [LINK_REMOVED]
+
+      self._links[link['index']] = link
+      if previous is None or previous['name'] != link['name']:
+        events = [LINK_ADDED]
+        if previous is not None:
+          # A renamed interface is reported as a new interface
+          events.insert(0, LINK_REMOVED)
+        return events + ([LINK_UP] if link['up'] else [])
+      if previous['up'] != link['up']:
+        return [LINK_UP if link['up'] else LINK_DOWN]
+      return []
+
+  def _call_callbacks(self, event, interface_name):
+    with self._lock:
+      callbacks = list(self._callbacks)
+    for callback in callbacks:
+      if event in callback['events']:
+        try:
+          callback['callback'](event, interface_name)
+        except Exception as e:  # pylint: disable=W0703
+          LOGGER.error(f'Error in link callback: {e}')
+
+
+def get_message_types(data):
+  """Types of the messages in a netlink datagram"""
+  types = []
+  offset = 0
+  while offset + _NLMSGHDR.size <= len(data):
+    length, msg_type, _, _, _ = _NLMSGHDR.unpack_from(data, offset)
+    if length < _NLMSGHDR.size:
+      break
+    types.append(msg_type)
+    offset += _align(length)
+  return types
+
+
+def parse_messages(data):
+  """Parse the link messages in a netlink datagram, returning a list of
+  message type and link tuples"""
+  messages = []
+  offset = 0
+  while offset + _NLMSGHDR.size <= len(data):
+    length, msg_type, _, _, _ = _NLMSGHDR.unpack_from(data, offset)
+    if length < _NLMSGHDR.size:
+      break
+    if msg_type in (RTM_NEWLINK, RTM_DELLINK):
+      link = parse_link(data[offset + _NLMSGHDR.size:offset + length])
+      if link is not None:
+        messages.append((msg_type, link))
+    offset += _align(length)
+  return messages
+
+
+def parse_link(payload):
+  """Parse an ifinfomsg and its attributes"""
+  if len(payload) < _IFINFOMSG.size:
+    return None
+  _, _, index, _, _ = _IFINFOMSG.unpack_from(payload)
+  link = {'index': index, 'name': None, 'mac_addr': None, 'up': False}
+
+  offset = _IFINFOMSG.size
+  while offset + _RTATTR.size <= len(payload):
+    length, attr_type = _RTATTR.unpack_from(payload, offset)
+    if length < _RTATTR.size:
+      break
+    value = payload[offset + _RTATTR.size:offset + length]
+    if attr_type == IFLA_IFNAME:
+      link['name'] = value.rstrip(b'\x00').decode('utf-8', 'replace')
+    elif attr_type == IFLA_ADDRESS and len(value) == 6:
+      link['mac_addr'] = value.hex(':')
+    elif attr_type == IFLA_OPERSTATE and value:
+      link['up'] = value[0] == IF_OPER_UP
+    offset += _align(length)
+
+  if link['name'] is None:
+    return None
+  return link
+
+
+def _align(length):
+  return (length + 3) & ~3
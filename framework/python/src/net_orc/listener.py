@@ -14,9 +14,14 @@
 
 """Intercepts network traffic between network services and the device
 under test."""
+import socket
+import struct
 import threading
-from scapy.all import AsyncSniffer, DHCP, get_if_hwaddr
+from scapy.all import get_if_hwaddr
+from scapy.arch.linux import attach_filter, set_promisc
 from scapy.error import Scapy_Exception
+from net_orc.capture import (ANCDATA_SIZE, PACKET_AUXDATA, SOL_PACKET,
+                             is_vlan_tagged, restore_vlan_tag)
 from net_orc.network_event import NetworkEvent
 from common import logger
 
@@ -28,6 +33,27 @@ DHCP_REQUEST = 3
 DHCP_ACK = 5
 CONTAINER_MAC_PREFIX = '9a:02:57:1e:8f'
 
+ETH_P_ALL = 0x0003
+ETH_P_IP = 0x0800
+IP_PROTO_UDP = 17
+DHCP_PORTS = (67, 68)
+DHCP_MAGIC_COOKIE = b'\x63\x82\x53\x63'
+DHCP_OPTION_PAD = 0
+DHCP_OPTION_MESSAGE_TYPE = 53
+DHCP_OPTION_END = 255
+
+# Offsets within a BOOTP message
+BOOTP_YIADDR = 16
+BOOTP_CHADDR = 28
+BOOTP_OPTIONS = 240
+
+MAX_FRAME_SIZE = 65535
+RECV_TIMEOUT = 1
+
+# Discovered devices are excluded in the kernel filter up to this limit,
+# after which they are dropped in Python instead
+MAX_FILTERED_DEVICES = 64
+
 
 class Listener:
   """Methods to start and stop the network listener."""
@@ -37,11 +63,12 @@ class Listener:
     self._device_intf = self._session.get_device_interface()
     self._device_intf_mac = get_if_hwaddr(self._device_intf)
 
-    self._sniffer = AsyncSniffer(iface=self._device_intf,
-                                 prn=self._packet_callback)
+    self._socket = None
+    self._thread = None
+    self._stop_event = threading.Event()
 
     self._callbacks = []
-    self._discovered_devices = []
+    self._discovered_devices = set()
 
   def start_listener(self):
     """Start sniffing packets on the device interface."""
@@ -51,24 +78,41 @@ class Listener:
       LOGGER.debug('Listener was already running')
       return
 
-    self._sniffer.start()
+    try:
+      self._socket = socket.socket(socket.AF_PACKET, socket.SOCK_RAW,
+                                   socket.htons(ETH_P_ALL))
+      # Report the VLAN tags stripped by the kernel
+      self._socket.setsockopt(SOL_PACKET, PACKET_AUXDATA, 1)
+      self._update_filter()
+      self._socket.bind((self._device_intf, ETH_P_ALL))
+      set_promisc(self._socket, self._device_intf)
+      self._socket.settimeout(RECV_TIMEOUT)
+    except OSError as e:
+      LOGGER.error(f'Error starting the listener: {e}')
+      self._close_socket()
+      return
+
+    self._stop_event.clear()
+    self._thread = threading.Thread(target=self._listen,
+                                    name='Listener',
+                                    daemon=True)
+    self._thread.start()
 
   def reset(self):
     self._callbacks = []
-    self._discovered_devices = []
+    self._discovered_devices = set()
 
   def stop_listener(self):
     """Stop sniffing packets on the device interface."""
-    try:
-      if self.is_running():
-        self._sniffer.stop()
-        LOGGER.debug('Stopped the network listener')
-    except Scapy_Exception as e:
-      LOGGER.error(f'Error stopping the listener: {e}')
+    if self.is_running():
+      self._stop_event.set()
+      self._thread.join()
+      LOGGER.debug('Stopped the network listener')
+    self._close_socket()
 
   def is_running(self):
     """Determine whether the sniffer is running."""
-    return self._sniffer.running
+    return self._thread is not None and self._thread.is_alive()
 
   def register_callback(self, callback, events=[]):  # pylint: disable=dangerous-default-value
     """Register a callback for specified events."""
@@ -82,20 +126,127 @@ class Listener:
                                            args=args)
         callback_thread.start()
 
-  def _packet_callback(self, packet):
+  def _listen(self):
+    while not self._stop_event.is_set():
+      try:
+        frame, ancdata, _, _ = self._socket.recvmsg(MAX_FRAME_SIZE,
+                                                    ANCDATA_SIZE)
+      except socket.timeout:
+        continue
+      except OSError as e:
+        LOGGER.error(f'Error reading from the device interface: {e}')
+        break
+      self._packet_callback(restore_vlan_tag(frame, ancdata))
+
+  def _close_socket(self):
+    if self._socket is not None:
+      self._socket.close()
+      self._socket = None
+
+  def _get_filter(self):
+    """Build a filter which passes DHCP traffic and frames from devices
+    that have not been discovered yet"""
+    ignored_macs = [self._device_intf_mac] + sorted(
+        self._discovered_devices)[:MAX_FILTERED_DEVICES]
+    ignored = ' or '.join(f'ether src {mac}' for mac in ignored_macs)
+
+    # Match the container MAC prefix against bytes 6-10 of the frame
+    prefix = CONTAINER_MAC_PREFIX.replace(':', '')
+    containers = f'ether[6:4] = 0x{prefix[:8]} and ether[10] = 0x{prefix[8:]}'
+
+    dhcp = ' or '.join(f'udp port {port}' for port in DHCP_PORTS)
+    return f'({dhcp}) or (not ({containers}) and not ({ignored}))'
+
+  def _update_filter(self):
+    # Without a kernel filter all frames are passed to _packet_callback,
+    # which applies the same checks
+    try:
+      attach_filter(self._socket, self._get_filter(), self._device_intf)
+    except (ImportError, OSError, Scapy_Exception) as e:
+      LOGGER.debug(f'Failed to attach the listener filter: {e}')
+
+  def _packet_callback(self, frame):
+
+    # Devices on the VLANs are served addresses but are not tested, so
+    # only the untagged network is followed
+    if is_vlan_tagged(frame):
+      return
+
+    src_mac = get_src_mac(frame)
+    if src_mac is None:
+      return
 
     # DHCP ACK callback
-    if DHCP in packet and self._get_dhcp_type(packet) == DHCP_ACK:
-      self.call_callback(NetworkEvent.DHCP_LEASE_ACK, packet)
+    dhcp = parse_dhcp(frame)
+    if dhcp is not None and dhcp[0] == DHCP_ACK:
+      self.call_callback(NetworkEvent.DHCP_LEASE_ACK, dhcp[1], dhcp[2])
 
     # New device discovered callback
-    if not packet.src is None and packet.src not in self._discovered_devices:
+    if src_mac not in self._discovered_devices:
       # Ignore packets originating from our containers
-      if packet.src.startswith(
-          CONTAINER_MAC_PREFIX) or packet.src == self._device_intf_mac:
+      if src_mac.startswith(
+          CONTAINER_MAC_PREFIX) or src_mac == self._device_intf_mac:
         return
-      self._discovered_devices.append(packet.src)
-      self.call_callback(NetworkEvent.DEVICE_DISCOVERED, packet.src)
-
-  def _get_dhcp_type(self, packet):
-    return packet[DHCP].options[0][1]
+      self._discovered_devices.add(src_mac)
+
+      # Stop passing traffic from this device through the kernel filter
+      self._update_filter()
+
+      self.call_callback(NetworkEvent.DEVICE_DISCOVERED, src_mac)
+
+
+def get_src_mac(frame):
+  """Source MAC address of an Ethernet frame"""
+  if len(frame) < 14:
+    return None
+  return frame[6:12].hex(':')
+
+
+def parse_dhcp(frame):
+  """Parse a DHCP message from an untagged Ethernet frame.
+
+  Returns a tuple of the DHCP message type, client MAC address and
+  assigned IP address, or None if the frame is not a DHCP message."""
+  try:
+    offset = 12
+    ether_type = struct.unpack_from('!H', frame, offset)[0]
+    offset += 2
+
+    if ether_type != ETH_P_IP:
+      return None
+
+    version_ihl = frame[offset]
+    if version_ihl >> 4 != 4 or frame[offset + 9] != IP_PROTO_UDP:
+      return None
+    offset += (version_ihl & 0x0F) * 4
+
+    src_port, dst_port = struct.unpack_from('!HH', frame, offset)
+    if src_port not in DHCP_PORTS or dst_port not in DHCP_PORTS:
+      return None
+    bootp = offset + 8
+
+    if frame[bootp + BOOTP_OPTIONS - 4:bootp + BOOTP_OPTIONS] != (
+        DHCP_MAGIC_COOKIE):
+      return None
+
+    # Locate the DHCP message type option
+    offset = bootp + BOOTP_OPTIONS
+    while offset < len(frame):
+      option = frame[offset]
+      if option == DHCP_OPTION_END:
+        break
+      if option == DHCP_OPTION_PAD:
+        offset += 1
+        continue
+      length = frame[offset + 1]
+      if option == DHCP_OPTION_MESSAGE_TYPE and length == 1:
+        chaddr = frame[bootp + BOOTP_CHADDR:bootp + BOOTP_CHADDR + 6]
+        yiaddr = frame[bootp + BOOTP_YIADDR:bootp + BOOTP_YIADDR + 4]
+        return (frame[offset + 2], chaddr.hex(':'), socket.inet_ntoa(yiaddr))
+      offset += length + 2
+
+  except (IndexError, struct.error):
+    # Truncated frame
+    return None
+
+  return None
@@ -0,0 +1,185 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Manages links and network namespaces over rtnetlink.
+
+Operations are sent over a netlink socket held by the framework process
+instead of spawning an ip process for each one."""
+import ipaddress
+import threading
+
+try:
+  from pyroute2 import IPRoute, NetNS, netns
+  from pyroute2.netlink.exceptions import NetlinkError
+except ImportError:
+  IPRoute = NetNS = netns = None
+  NetlinkError = OSError
+
+# Errors which indicate that an operation failed over netlink
+NETLINK_ERRORS = (NetlinkError, OSError, IndexError, ValueError)
+
+OPERSTATE_UP = 'UP'
+
+
+def is_available():
+  """Whether netlink support is installed"""
+  return IPRoute is not None
+
+
+class NetlinkControl:
+  """Netlink implementation of the link and namespace operations of
+  IPControl. Failures are raised as one of NETLINK_ERRORS."""
+
+  def __init__(self):
+    self._ipr = None
+    self._lock = threading.Lock()
+
+  def close(self):
+    with self._lock:
+      if self._ipr is not None:
+        self._ipr.close()
+        self._ipr = None
+
+  def add_link(self, interface_name, peer_name):
+    with self._lock:
+      self._get_ipr().link('add',
+                           ifname=interface_name,
+                           kind='veth',
+                           peer=peer_name)
+    return True
+
+  def add_namespace(self, namespace):
+    if namespace not in netns.listnetns():
+      netns.create(namespace)
+    return True
+
+  def check_interface_status(self, interface_name):
+    with self._lock:
+      ipr = self._get_ipr()
+      index = ipr.link_lookup(ifname=interface_name)
+      if not index:
+        return False
+      link = ipr.get_links(index[0])[0]
+      return link.get_attr('IFLA_OPERSTATE') == OPERSTATE_UP
+
+  def delete_link(self, interface_name):
+    with self._lock:
+      ipr = self._get_ipr()
+      ipr.link('del', index=ipr.link_lookup(ifname=interface_name)[0])
+    return True
+
+  def delete_namespace(self, namespace):
+    netns.remove(namespace)
+    return True
+
+  def get_links(self):
+    with self._lock:
+      return [
+          link.get_attr('IFLA_IFNAME') for link in self._get_ipr().get_links()
+      ]
+
+  def get_namespaces(self):
+    return netns.listnetns()
+
+  def set_namespace(self, interface_name, namespace):
+    with self._lock:
+      ipr = self._get_ipr()
+      ipr.link('set',
+               index=ipr.link_lookup(ifname=interface_name)[0],
+               net_ns_fd=namespace)
+    return True
+
+  def rename_interface(self, interface_name, namespace, new_name):
+    with NetNS(namespace) as ns:
+      ns.link('set',
+              index=ns.link_lookup(ifname=interface_name)[0],
+              ifname=new_name)
+    return True
+
+  def set_interface_mac(self, interface_name, namespace, mac_addr):
+    with NetNS(namespace) as ns:
+      ns.link('set',
+              index=ns.link_lookup(ifname=interface_name)[0],
+              address=mac_addr)
+    return True
+
+  def set_interface_ip(self, interface_name, namespace, ipaddr):
+    with NetNS(namespace) as ns:
+      _add_address(ns, ns.link_lookup(ifname=interface_name)[0], ipaddr)
+    return True
+
+  def set_interface_up(self, interface_name, namespace=None):
+    if namespace is not None:
+      with NetNS(namespace) as ns:
+        ns.link('set',
+                index=ns.link_lookup(ifname=interface_name)[0],
+                state='up')
+      return True
+
+    with self._lock:
+      ipr = self._get_ipr()
+      ipr.link('set',
+               index=ipr.link_lookup(ifname=interface_name)[0],
+               state='up')
+    return True
+
+  def configure_container_interface(self, # pylint: disable=R0917
+                                    bridge_intf,
+                                    container_intf,
+                                    namespace_intf,
+                                    namespace,
+                                    mac_addr,
+                                    ipv4_addr=None,
+                                    ipv6_addr=None):
+    """Create a veth pair and move one end into the namespace, renamed to
+    namespace_intf and configured with the MAC and IP addresses. Changes
+    within the namespace are made over a single netlink session."""
+    with self._lock:
+      ipr = self._get_ipr()
+
+      # Remove the pair left behind by a previous run
+      index = ipr.link_lookup(ifname=bridge_intf)
+      if index:
+        ipr.link('del', index=index[0])
+
+      ipr.link('add', ifname=bridge_intf, kind='veth', peer=container_intf)
+      ipr.link('set',
+               index=ipr.link_lookup(ifname=container_intf)[0],
+               net_ns_fd=namespace)
+
+    with NetNS(namespace) as ns:
+      index = ns.link_lookup(ifname=container_intf)[0]
+      ns.link('set', index=index, ifname=namespace_intf, address=mac_addr)
+      for addr in (ipv4_addr, ipv6_addr):
+        if addr is not None:
+          _add_address(ns, index, addr)
+      ns.link('set', index=index, state='up')
+
+    with self._lock:
+      ipr = self._get_ipr()
+      ipr.link('set', index=ipr.link_lookup(ifname=bridge_intf)[0], state='up')
+    return True
+
+  def _get_ipr(self):
+    if self._ipr is None:
+      self._ipr = IPRoute()
+    return self._ipr
+
+
+def _add_address(ns, index, ipaddr):
+  interface = ipaddress.ip_interface(ipaddr)
+  ns.addr('add',
+          index=index,
+          address=str(interface.ip),
+          prefixlen=interface.network.prefixlen)
@@ -13,20 +13,24 @@
 # limitations under the License.
 """Network orchestrator is responsible for managing
 all of the virtual network services"""
+import glob
 import ipaddress
-import json
 import os
 import re
-from scapy.all import sniff, wrpcap, BOOTP, AsyncSniffer
-from scapy.error import Scapy_Exception
 import shutil
 import subprocess
 import sys
+import threading
 import time
 import traceback
-from common import logger, util, mqtt
+from common import codec, logger, util, mqtt
+from common.dependency_graph import DependencyGraph
 from common.statuses import TestrunStatus
-from net_orc.listener import Listener
+from net_orc import link_monitor
+from net_orc import topology
+from net_orc.capture import PacketCapture
+from net_orc.internet_prober import InternetProber
+from net_orc.listener import Listener, get_src_mac
 from net_orc.network_event import NetworkEvent
 from net_orc.network_validator import NetworkValidator
 from net_orc.ovs_control import OVSControl
@@ -39,7 +43,15 @@ TEST_DIR = 'test'
 NET_DIR = 'runtime/network'
 NETWORK_MODULES_DIR = 'modules/network'
 
+STARTUP_PCAP = 'startup.pcap'
 MONITOR_PCAP = 'monitor.pcap'
+TRAFFIC_COUNTERS_FILE = 'traffic_counters.json'
+CONN_STATS_FILE = 'ethtool_conn_stats.txt'
+
+# Files written to the network directory for the test modules during a
+# session, removed when the network is reused for the next session
+SESSION_FILES = (TRAFFIC_COUNTERS_FILE, CONN_STATS_FILE,
+                 'ethtool_port_stats_*', 'ifconfig_port_stats_*')
 NETWORK_MODULE_METADATA = 'conf/module_config.json'
 
 DEVICE_BRIDGE = 'tr-d'
@@ -47,6 +59,14 @@ INTERNET_BRIDGE = 'tr-c'
 PRIVATE_DOCKER_NET = 'tr-private-net'
 CONTAINER_NAME = 'network_orchestrator'
 
+# Maximum number of network services started or stopped at once
+MAX_SERVICE_WORKERS = 4
+
+# Each VLAN of the device interface is given a /24 of this network, which
+# does not overlap the default Docker bridge networks in 172.17.0.0/16
+# onwards
+VLAN_IPV4_NETWORK = ipaddress.ip_network('10.16.0.0/12')
+
 
 class NetworkOrchestrator:
   """Manage and controls a virtual testing network."""
@@ -55,10 +75,17 @@ class NetworkOrchestrator:
 
     self._session = session
     self._monitor_in_progress = False
-    self._monitor_packets = []
     self._listener = None
     self._net_modules = []
 
+    # Instances of the network modules serving each VLAN
+    self._vlan_modules = []
+
+    # Network services left running by the previous session which are
+    # reused rather than restarted
+    self._reuse_network = False
+    self._reused_services = set()
+
     self._path = os.path.dirname(
         os.path.dirname(
             os.path.dirname(
@@ -69,6 +96,16 @@ class NetworkOrchestrator:
     self._ovs = OVSControl(self._session)
     self._ip_ctrl = IPControl()
 
+    # Interface state is tracked from link notifications, falling back to
+    # querying the interface when the subscription is not available
+    self._link_monitor = link_monitor.LinkMonitor()
+    self._link_monitor.start()
+
+    self._internet_prober = InternetProber(
+        should_probe=self._should_check_internet,
+        on_change=self._internet_connection_changed,
+        can_probe=self._internet_interface_connected)
+
     # Load subnet information into the session
     self._session.set_subnets(self.network_config.ipv4_network,
                               self.network_config.ipv6_network)
@@ -78,9 +115,6 @@ class NetworkOrchestrator:
 
     LOGGER.debug('Starting network orchestrator')
 
-    # Delete the runtime/network directory
-    shutil.rmtree(os.path.join(os.getcwd(), NET_DIR), ignore_errors=True)
-
     # Cleanup any old config files test files
     conf_runtime_dir = os.path.join(RUNTIME_DIR, 'conf')
     shutil.rmtree(conf_runtime_dir, ignore_errors=True)
@@ -89,18 +123,112 @@ class NetworkOrchestrator:
     # Copy the system config file to the runtime directory
     system_conf_runtime = os.path.join(conf_runtime_dir, 'system.json')
     with open(system_conf_runtime, 'w', encoding='utf-8') as f:
-      json.dump(self.get_session().get_config(), f, indent=2)
+      codec.dump(self.get_session().get_config(), f, indent=2)
 
     # Get all components ready
     self.load_network_modules()
+    self._load_vlan_modules()
+
+    # Reuse the network from the previous session if it still matches
+    fingerprint = topology.get_fingerprint(self._session, self.network_config,
+                                           self._net_modules)
+    reusable = self._get_reusable_services(fingerprint)
+    topology.delete()
 
-    # Restore the network first if required
-    self.stop(kill=True)
+    if reusable is None:
+      # Delete the runtime/network directory
+      shutil.rmtree(os.path.join(os.getcwd(), NET_DIR), ignore_errors=True)
+
+      # Restore the network first if required
+      self.stop(kill=True)
+    else:
+      self._prepare_network_reuse(reusable)
 
     self.start_network()
 
+    topology.save(fingerprint)
+
     return True
 
+  def _get_reusable_services(self, fingerprint):
+    """Names of the network services left running by the previous session
+    which match the fingerprint, or None if the network must be rebuilt"""
+    network_drift, drifted = topology.get_drift(topology.load(), fingerprint)
+    if network_drift:
+      LOGGER.debug('Network configuration has changed, rebuilding network')
+      return None
+
+    if not self._ovs.validate_baseline_network():
+      LOGGER.debug('Baseline network is incomplete, rebuilding network')
+      return None
+
+    device_ports = self._ovs.get_bridge_ports(DEVICE_BRIDGE)
+    internet_ports = self._ovs.get_bridge_ports(INTERNET_BRIDGE)
+
+    reusable = set()
+    for net_module in self._net_modules:
+      if not net_module.enable_container or not net_module.enabled:
+        continue
+      if net_module.dir_name in drifted:
+        LOGGER.debug(f'Network service {net_module.dir_name} has changed')
+        continue
+      if net_module.get_status() != 'running':
+        LOGGER.debug(f'Network service {net_module.dir_name} is not running')
+        continue
+      if not net_module.net_config.host:
+        # Interfaces are removed when the container namespace is deleted
+        device_port = DEVICE_BRIDGE + 'i-' + net_module.dir_name
+        if (device_port not in device_ports
+            or not self._is_interface_up(device_port)):
+          LOGGER.debug(f'Network service {net_module.dir_name} is detached')
+          continue
+        internet_port = INTERNET_BRIDGE + 'i-' + net_module.dir_name
+        if (net_module.net_config.enable_wan
+            and internet_port not in internet_ports):
+          LOGGER.debug(f'Network service {net_module.dir_name} is detached')
+          continue
+      reusable.add(net_module.dir_name)
+    return reusable
+
+  def _prepare_network_reuse(self, reusable):
+    """Stop the network services which have drifted and reset the state
+    of those being reused"""
+    for net_module in self._net_modules:
+      if not net_module.enable_container:
+        continue
+      if net_module.dir_name in reusable:
+        # Discard changes made and traffic captured during the previous
+        # session, otherwise restart the service
+        if net_module.reset_service():
+          net_module.restart_capture()
+          continue
+        reusable.discard(net_module.dir_name)
+      self._stop_service_module(net_module, kill=True)
+
+    LOGGER.info('Reusing network services: ' +
+                (' '.join(sorted(reusable)) or 'none'))
+    self._reuse_network = True
+    self._reused_services = reusable
+
+    # Services on VLANs are always restarted
+    for net_module in self._vlan_modules:
+      self._stop_service_module(net_module, kill=True)
+
+    self.remove_arp_filters()
+    self._ovs.delete_traffic_counters()
+    self._remove_test_module_ports()
+    self._remove_session_files()
+
+  def _remove_session_files(self):
+    """Remove the device statistics of the previous session, so that they
+    cannot be mistaken for those of the next device"""
+    for pattern in SESSION_FILES:
+      for session_file in glob.glob(os.path.join(NET_DIR, pattern)):
+        try:
+          os.remove(session_file)
+        except OSError as e:
+          LOGGER.error(f'Failed to remove {session_file}: {e}')
+
   def check_config(self):
 
     device_interface_ready = util.interface_exists(
@@ -153,6 +281,17 @@ class NetworkOrchestrator:
   def get_ip_address(self, iface):
     return self._ip_ctrl.get_ip_address(iface)
 
+  def get_link_monitor(self):
+    return self._link_monitor
+
+  def get_internet_prober(self):
+    return self._internet_prober
+
+  def _is_interface_up(self, iface):
+    if self._link_monitor.is_running():
+      return self._link_monitor.is_up(iface)
+    return self._ip_ctrl.check_interface_status(iface)
+
   def get_listener(self):
     return self._listener
 
@@ -160,10 +299,15 @@ class NetworkOrchestrator:
     LOGGER.debug('Starting network listener')
     self.get_listener().start_listener()
 
-  def stop(self, kill=False):
-    """Stop the network orchestrator."""
+  def stop(self, kill=False, keep_topology=False):
+    """Stop the network orchestrator. If keep_topology is set, the
+    network and its services are left running to be reused by the next
+    session."""
     self.stop_validator(kill=kill)
-    self.stop_network(kill=kill)
+    if keep_topology:
+      self._remove_test_module_ports()
+    else:
+      self.stop_network(kill=kill)
 
     # Listener may not have been defined yet
     if self.get_listener() is not None:
@@ -202,6 +346,10 @@ class NetworkOrchestrator:
       # Ignore device if not registered
       return
 
+    # Count the traffic of the device under test from discovery until the
+    # end of the monitor period, alongside the port statistics
+    self._ovs.add_traffic_counters(mac_addr)
+
     # Cleanup any old test files
     test_dir = os.path.join(RUNTIME_DIR, TEST_DIR)
     device_tests = os.listdir(test_dir)
@@ -216,15 +364,23 @@ class NetworkOrchestrator:
 
     util.run_command(f'chown -R {util.get_host_user()} {device_runtime_dir}')
 
-    packet_capture = sniff(iface=self._session.get_device_interface(),
-                           timeout=self._session.get_startup_timeout(),
-                           stop_filter=self._device_has_ip)
-    wrpcap(os.path.join(device_runtime_dir, 'startup.pcap'), packet_capture)
+    startup_capture = self._create_capture(
+        STARTUP_PCAP,
+        device_runtime_dir,
+        max_duration=self._session.get_startup_timeout(),
+        stop_filter=self._device_has_ip)
+    try:
+      startup_capture.start()
+      startup_capture.wait()
+    except OSError as e:
+      LOGGER.error(f'Failed to capture startup traffic: {e}')
 
     # Copy the device config file to the runtime directory
     runtime_device_conf = os.path.join(device_runtime_dir, 'device_config.json')
     with open(runtime_device_conf, 'w', encoding='utf-8') as f:
-      json.dump(self._session.get_target_device().to_config_json(), f, indent=2)
+      codec.dump(self._session.get_target_device().to_config_json(),
+                 f,
+                 indent=2)
 
     self._get_conn_stats()
 
@@ -249,7 +405,7 @@ class NetworkOrchestrator:
     dev_int = self._session.get_device_interface()
     conn_stats = self._ip_ctrl.get_iface_connection_stats(dev_int)
     if conn_stats is not None:
-      eth_out_file = os.path.join(NET_DIR, 'ethtool_conn_stats.txt')
+      eth_out_file = os.path.join(NET_DIR, CONN_STATS_FILE)
       with open(eth_out_file, 'w', encoding='utf-8') as f:
         f.write(conn_stats)
     else:
@@ -275,72 +431,115 @@ class NetworkOrchestrator:
     if ethtool_port_stats is None and ifconfig_port_stats is None:
       LOGGER.error('Failed to generate port stats')
 
+  def _get_traffic_counters(self, mac_addr):
+    """Snapshot the traffic counters of the device and store them to a
+    file for the conn test module to access"""
+    counters = self._ovs.get_traffic_counters(mac_addr)
+    if counters is None:
+      LOGGER.error('Failed to generate traffic counters')
+      return
+    with open(os.path.join(NET_DIR, TRAFFIC_COUNTERS_FILE),
+              'w',
+              encoding='utf-8') as f:
+      codec.dump(counters, f, indent=2)
+
   def monitor_in_progress(self):
     return self._monitor_in_progress
 
-  def _device_has_ip(self, packet):
-    device = self._session.get_device(mac_addr=packet.src)
+  def _create_capture(self, file_name, device_runtime_dir, **kwargs):
+    """Capture device traffic to a file, publishing packet and byte
+    counts to the session as the capture progresses. The device under
+    test is on the untagged network, so traffic of devices on the VLANs
+    is left out."""
+    name = os.path.splitext(file_name)[0]
+
+    def update_stats(stats):
+      self._session.set_capture_stats({'name': name, **stats})
+
+    return PacketCapture(iface=self._session.get_device_interface(),
+                         path=os.path.join(device_runtime_dir, file_name),
+                         max_size=self._session.get_max_capture_size(),
+                         on_update=update_stats,
+                         untagged=True,
+                         **kwargs)
+
+  def _device_has_ip(self, frame):
+    device = self._session.get_device(mac_addr=get_src_mac(frame))
     if device is None or device.ip_addr is None:
       return False
     return True
 
-  def _dhcp_lease_ack(self, packet):
-    mac_addr = packet[BOOTP].chaddr.hex(':')[0:17]
+  def _dhcp_lease_ack(self, mac_addr, ip_addr):
     device = self._session.get_device(mac_addr=mac_addr)
 
     # Ignore devices that are not registered
     if device is None:
       return
 
-    # TODO: Check if device is None
-    device.ip_addr = packet[BOOTP].yiaddr
+    device.ip_addr = ip_addr
 
   def _start_device_monitor(self, device):
     """Start a timer until the steady state has been reached and
         callback the steady state method for this device."""
     self.get_session().set_status(TestrunStatus.MONITORING)
-    self._monitor_packets = []
     LOGGER.info(f'Monitoring device with mac addr {device.mac_addr} '
                 f'for {str(self._session.get_monitor_period())} seconds')
 
     device_runtime_dir = os.path.join(RUNTIME_DIR, TEST_DIR,
                                       device.mac_addr.replace(':', ''))
 
-    sniffer = AsyncSniffer(iface=self._session.get_device_interface(),
-                           timeout=self._session.get_monitor_period(),
-                           prn=self._monitor_packet_callback)
-    sniffer.start()
+    monitor_capture = self._create_capture(
+        MONITOR_PCAP,
+        device_runtime_dir,
+        max_duration=self._session.get_monitor_period())
+    try:
+      monitor_capture.start()
+    except OSError as e:
+      LOGGER.error(f'Failed to capture monitor traffic: {e}')
+      self._session.set_status(TestrunStatus.CANCELLED)
+      return
 
-    while sniffer.running:
-      time.sleep(1)
+    # End the capture as soon as the device interface goes down, even
+    # briefly, as the device would not have been monitored for the full
+    # period
+    device_intf = self._session.get_device_interface()
+    disconnected = threading.Event()
+
+    def device_link_down(event, iface):  # pylint: disable=W0613
+      if iface == device_intf and not self._session.get_allow_disconnect():
+        disconnected.set()
+        monitor_capture.stop()
+
+    self._link_monitor.register_callback(
+        device_link_down, [link_monitor.LINK_DOWN, link_monitor.LINK_REMOVED])
+
+    try:
+      while monitor_capture.is_running():
+        monitor_capture.wait(1)
+
+        # Check Testrun hasn't been cancelled
+        if self._session.get_status() in (TestrunStatus.STOPPING,
+                                          TestrunStatus.CANCELLED):
+          monitor_capture.stop()
+          return
+        if not self._session.get_allow_disconnect():
+          if not self._is_interface_up(device_intf):
+            disconnected.set()
+            monitor_capture.stop()
+    finally:
+      self._link_monitor.unregister_callback(device_link_down)
 
-      # Check Testrun hasn't been cancelled
-      if self._session.get_status() in (TestrunStatus.STOPPING,
-                                        TestrunStatus.CANCELLED):
-        sniffer.stop()
-        return
-      if not self._session.get_allow_disconnect():
-        if not self._ip_ctrl.check_interface_status(
-            self._session.get_device_interface()):
-          try:
-            sniffer.stop()
-          except Scapy_Exception:
-            LOGGER.error('Device adapter disconnected whilst monitoring.')
-          finally:
-            self._session.set_status(TestrunStatus.CANCELLED)
-            LOGGER.error('Device interface disconnected, cancelling Testrun')
-
-    LOGGER.debug('Writing packets to monitor.pcap')
-    wrpcap(os.path.join(device_runtime_dir, 'monitor.pcap'),
-           self._monitor_packets)
     self._monitor_in_progress = False
+    if disconnected.is_set():
+      LOGGER.error('Device adapter disconnected whilst monitoring.')
+      self._session.set_status(TestrunStatus.CANCELLED)
+      LOGGER.error('Device interface disconnected, cancelling Testrun')
+
     self._get_port_stats(pre_monitor=False)
+    self._get_traffic_counters(device.mac_addr)
     self.get_listener().call_callback(NetworkEvent.DEVICE_STABLE,
                                       device.mac_addr)
 
-  def _monitor_packet_callback(self, packet):
-    self._monitor_packets.append(packet)
-
   def _check_network_services(self):
     LOGGER.debug('Checking network modules...')
     for net_module in self._net_modules:
@@ -414,17 +613,20 @@ class NetworkOrchestrator:
   def create_net(self):
     LOGGER.info('Creating baseline network')
 
-    if 'CI' in os.environ:
-      self._ci_pre_network_create()
+    if self._reuse_network:
+      LOGGER.info('Reusing baseline network')
+    else:
+      if 'CI' in os.environ:
+        self._ci_pre_network_create()
 
-    # Setup the virtual network
-    if not self._ovs.create_baseline_net(verify=True):
-      LOGGER.error('Baseline network validation failed.')
-      self.stop()
-      sys.exit(1)
+      # Setup the virtual network
+      if not self._ovs.create_baseline_net(verify=True):
+        LOGGER.error('Baseline network validation failed.')
+        self.stop()
+        sys.exit(1)
 
-    if 'CI' in os.environ:
-      self._ci_post_network_create()
+      if 'CI' in os.environ:
+        self._ci_post_network_create()
 
     # Private network not used, disable until
     # a use case is determined
@@ -474,6 +676,24 @@ class NetworkOrchestrator:
 
       return module
 
+  def _load_vlan_modules(self):
+    """Create an instance of each network module which serves VLANs for
+    every VLAN of the device interface"""
+    self._vlan_modules = []
+    for vlan_id in self._session.get_vlans():
+      vlan = self.network_config.get_vlan(vlan_id)
+      for net_module in self._net_modules:
+        if (net_module.enable_container and net_module.enabled
+            and net_module.net_config.vlans):
+          self._vlan_modules.append(
+              NetworkModule(
+                  os.path.join(net_module.dir, NETWORK_MODULE_METADATA),
+                  self._session,
+                  vlan=vlan))
+    if self._vlan_modules:
+      LOGGER.info('Loaded network modules for VLANs: ' +
+                  ' '.join(m.container_name for m in self._vlan_modules))
+
   def build_network_modules(self):
     LOGGER.info('Building network modules...')
     for net_module in self._net_modules:
@@ -508,18 +728,34 @@ class NetworkOrchestrator:
 
   def stop_networking_services(self, kill=False):
     LOGGER.info('Stopping network services')
-    for net_module in self._net_modules:
-      # Network modules may just be Docker images,
-      # so we do not want to stop them
-      if not net_module.enable_container:
-        continue
+
+    for net_module in self._vlan_modules:
       self._stop_service_module(net_module, kill)
 
+    # Network modules may just be Docker images,
+    # so we do not want to stop them
+    services = {
+        net_module.dir_name: net_module
+        for net_module in self._net_modules
+        if net_module.enable_container
+    }
+
+    # Stop modules before the modules they depend on
+    graph = self._get_service_graph(services.values())
+    started = time.monotonic()
+    durations = graph.run(
+        lambda name: self._stop_service_module(services[name], kill),
+        MAX_SERVICE_WORKERS,
+        reverse=True)
+    self._log_service_timings('Stopped', graph, durations,
+                              time.monotonic() - started, reverse=True)
+
   def start_network_services(self):
     LOGGER.info('Starting network services')
 
     os.makedirs(os.path.join(os.getcwd(), NET_DIR), exist_ok=True)
 
+    services = {}
     for net_module in self._net_modules:
 
       # Network modules may just be Docker images,
@@ -527,14 +763,71 @@ class NetworkOrchestrator:
       if not net_module.enable_container:
         continue
 
-      if net_module.enabled:
-        self._start_network_service(net_module)
+      if net_module.dir_name in self._reused_services:
+        LOGGER.debug(f'Reusing network service {net_module.name}')
+      elif net_module.enabled:
+        services[net_module.dir_name] = net_module
       else:
         LOGGER.debug(f'Not starting disabled network module {net_module.name}')
 
+    # Start modules once the modules they depend on are running
+    graph = self._get_service_graph(services.values())
+    started = time.monotonic()
+    durations = graph.run(
+        lambda name: self._start_network_service(services[name]),
+        MAX_SERVICE_WORKERS)
+    self._log_service_timings('Started', graph, durations,
+                              time.monotonic() - started)
+
+    self._start_vlan_services()
+
     LOGGER.info('All network services are running')
     self._check_network_services()
 
+  def _start_vlan_services(self):
+    """Start the network services of each VLAN. These do not depend on
+    each other so are all started concurrently."""
+    if not self._vlan_modules:
+      return
+    services = {}
+    graph = DependencyGraph()
+    for net_module in self._vlan_modules:
+      os.makedirs(os.path.join(os.getcwd(), NET_DIR, net_module.vlan.name),
+                  exist_ok=True)
+      services[net_module.container_name] = net_module
+      graph.add_node(net_module.container_name)
+    started = time.monotonic()
+    durations = graph.run(
+        lambda name: self._start_network_service(services[name]),
+        MAX_SERVICE_WORKERS)
+    self._log_service_timings('Started VLAN', graph, durations,
+                              time.monotonic() - started)
+
+  def _get_service_graph(self, net_modules):
+    """Build the dependency graph of the network services. Dependencies on
+    modules which do not run a container, such as the base image, only
+    apply when building."""
+    graph = DependencyGraph()
+    for net_module in net_modules:
+      graph.add_node(net_module.dir_name, [net_module.depends_on]
+                     if net_module.depends_on is not None else [])
+    return graph
+
+  def _log_service_timings(self,
+                           action,
+                           graph,
+                           durations,
+                           elapsed,
+                           reverse=False):
+    for name, duration in sorted(durations.items(),
+                                 key=lambda item: item[1],
+                                 reverse=True):
+      LOGGER.debug(f'{action} network service {name} in {duration:.2f}s')
+    path, total = graph.get_critical_path(durations, reverse)
+    LOGGER.info(f'{action} {len(durations)} network services in ' +
+                f'{elapsed:.2f}s, critical path: ' + ' -> '.join(path) +
+                f' ({total:.2f}s)')
+
   def attach_test_module_to_network(self, test_module):
     LOGGER.debug('Attaching test module  ' + test_module.display_name +
                  ' to device bridge')
@@ -550,57 +843,30 @@ class NetworkOrchestrator:
     # Container network namespace name
     container_net_ns = 'tr-test-' + test_module.dir_name
 
-    # Create interface pair
-    util.run_command('ip link add ' + bridge_intf + ' type veth peer name ' +
-                     container_intf)
+    # Resolve the interface information
+    mac_addr = '9a:02:57:1e:8f:' + str(test_module.ip_index)
+    ipv4_addr = (str(self.network_config.ipv4_network[test_module.ip_index]) +
+                 '/' + str(self.network_config.ipv4_network.prefixlen))
+    ipv6_addr = (str(self.network_config.ipv6_network[test_module.ip_index]) +
+                 '/' + str(self.network_config.ipv6_network.prefixlen))
+
+    # Add and configure the interface container
+    if not self._ip_ctrl.configure_container_interface(
+        bridge_intf, container_intf, 'veth0', container_net_ns, mac_addr,
+        test_module.container_name, ipv4_addr, ipv6_addr):
+      LOGGER.error('Failed to configure local networking for ' +
+                   test_module.name)
+      return
 
     # Add bridge interface to device bridge
     self._ovs.add_port(port=bridge_intf, bridge_name=DEVICE_BRIDGE)
 
-    # Get PID for running container
-    # TODO: Some error checking around missing PIDs might be required
-    container_pid = util.run_command('docker inspect -f {{.State.Pid}} ' +
-                                     test_module.container_name)[0]
-
-    # Create symlink for container network namespace
-    util.run_command('ln -sf /proc/' + container_pid +
-                     '/ns/net /var/run/netns/' + container_net_ns)
-
-    # Attach container interface to container network namespace
-    util.run_command('ip link set ' + container_intf + ' netns ' +
-                     container_net_ns)
-
-    # Rename container interface name to veth0
-    util.run_command('ip netns exec ' + container_net_ns + ' ip link set dev ' +
-                     container_intf + ' name veth0')
-
-    # Set MAC address of container interface
-    util.run_command('ip netns exec ' + container_net_ns +
-                     ' ip link set dev veth0 address 9a:02:57:1e:8f:' +
-                     str(test_module.ip_index))
-
-    # Set IP address of container interface
-    ipv4_address = self.network_config.ipv4_network[test_module.ip_index]
-    ipv6_address = self.network_config.ipv6_network[test_module.ip_index]
-
-    ipv4_address_with_prefix = str(ipv4_address) + '/' + str(
-        self.network_config.ipv4_network.prefixlen)
-    ipv6_address_with_prefix = str(ipv6_address) + '/' + str(
-        self.network_config.ipv6_network.prefixlen)
-
-    util.run_command('ip netns exec ' + container_net_ns + ' ip addr add ' +
-                     ipv4_address_with_prefix + ' dev veth0')
-
-    util.run_command('ip netns exec ' + container_net_ns + ' ip addr add ' +
-                     ipv6_address_with_prefix + ' dev veth0')
-
-    # Set interfaces up
-    util.run_command('ip link set dev ' + bridge_intf + ' up')
-    util.run_command('ip netns exec ' + container_net_ns +
-                     ' ip link set dev veth0 up')
-
   # TODO: Let's move this into a separate script? It does not look great
   def _attach_service_to_network(self, net_module):
+    if net_module.vlan is not None:
+      self._attach_vlan_service_to_network(net_module)
+      return
+
     LOGGER.debug('Attaching net service ' + net_module.display_name +
                  ' to device bridge')
 
@@ -661,6 +927,54 @@ class NetworkOrchestrator:
                        ' to internet bridge ' + DEVICE_BRIDGE + '. Exiting.')
           sys.exit(1)
 
+  def _attach_vlan_service_to_network(self, net_module):
+    vlan = net_module.vlan
+    LOGGER.debug('Attaching net service ' + net_module.display_name +
+                 f' to VLAN {vlan.id} of device bridge')
+
+    # Device bridge interface example:
+    # tr-v100i-2 (Test Run VLAN 100 Interface for the module at IP index 2)
+    bridge_intf = f'tr-v{vlan.id}i-{net_module.net_config.ip_index}'
+
+    # Container interface example:
+    # tr-v100c-2 (Test Run VLAN 100 Container interface)
+    container_intf = f'tr-v{vlan.id}c-{net_module.net_config.ip_index}'
+
+    # Container network namespace name
+    container_net_ns = f'tr-ctns-{net_module.dir_name}-v{vlan.id}'
+
+    # Resolve the interface information
+    mac_addr = '9a:02:57:1e:8f:' + str(net_module.net_config.ip_index)
+    ipv4_addr = net_module.net_config.get_ipv4_addr_with_prefix()
+    ipv6_addr = net_module.net_config.get_ipv6_addr_with_prefix()
+
+    # Add and configure the interface container
+    if not self._ip_ctrl.configure_container_interface(
+        bridge_intf, container_intf, net_module.net_config.interface,
+        container_net_ns, mac_addr, net_module.container_name, ipv4_addr,
+        ipv6_addr):
+      LOGGER.error('Failed to configure local networking for ' +
+                   net_module.container_name + '. Exiting.')
+      sys.exit(1)
+
+    # Add bridge interface to device bridge as an access port of the VLAN,
+    # the device interface trunks all VLANs
+    if self._ovs.add_port(port=bridge_intf, bridge_name=DEVICE_BRIDGE,
+                          tag=vlan.id):
+      if not self._ovs.port_exists(bridge_name=DEVICE_BRIDGE, port=bridge_intf):
+        LOGGER.error('Failed to add ' + net_module.container_name +
+                     ' to device bridge ' + DEVICE_BRIDGE + '. Exiting.')
+        sys.exit(1)
+
+    # Allow DHCP responses from the VLAN's own DHCP scope
+    self._ovs.add_dhcp_server_filter(str(net_module.net_config.ipv4_address))
+
+  def _remove_test_module_ports(self):
+    """Remove the ports of test modules from previous sessions"""
+    for port in self._ovs.get_bridge_ports(DEVICE_BRIDGE):
+      if port.startswith(DEVICE_BRIDGE + '-t-'):
+        self._ovs.delete_port(DEVICE_BRIDGE, port)
+
   def remove_arp_filters(self):
     LOGGER.info('Removing ARP inspection filters')
     self._ovs.delete_arp_inspection_filter()
@@ -673,7 +987,7 @@ class NetworkOrchestrator:
       self.get_listener().stop_listener()
 
     # Stop all network containers if still running
-    for net_module in self._net_modules:
+    for net_module in self._vlan_modules + self._net_modules:
       try:
         net_module.stop(kill=True)
       except Exception:  # pylint: disable=W0703
@@ -681,6 +995,9 @@ class NetworkOrchestrator:
 
     # Clear the virtual network
     self._ovs.restore_net()
+    topology.delete()
+    self._reuse_network = False
+    self._reused_services = set()
 
     # Clean up any existing network artifacts
     self._ip_ctrl.clean_all()
@@ -710,37 +1027,26 @@ class NetworkOrchestrator:
 
   def is_device_connected(self):
     """Check if device connected"""
-    return self._ip_ctrl.check_interface_status(
-        self._session.get_device_interface())
+    return self._is_interface_up(self._session.get_device_interface())
 
-  def internet_conn_checker(self, mqtt_client: mqtt.MQTT, topic: str):
-    """Checks internet connection and sends a status to frontend"""
-
-    # Default message
-    message = {'connection': False}
-
-    # Only check if Testrun is running
-    if self.get_session().get_status() not in [
+  def _should_check_internet(self):
+    """The internet connection is only checked whilst Testrun is running
+    with an internet network"""
+    return (self.get_session().get_status() in [
         TestrunStatus.WAITING_FOR_DEVICE, TestrunStatus.MONITORING,
         TestrunStatus.IN_PROGRESS, TestrunStatus.STARTING
-    ]:
-      message['connection'] = None
-
-    # Only run if single intf mode not used
-    elif 'single_intf' not in self._session.get_runtime_params():
-      iface = self._session.get_internet_interface()
+    ] and 'single_intf' not in self._session.get_runtime_params())
 
-      # Check that an internet intf has been selected
-      if iface and iface in self._ip_ctrl.get_sys_interfaces():
+  def _internet_interface_connected(self):
+    """Check that an internet interface has been selected and is present"""
+    iface = self._session.get_internet_interface()
+    return bool(iface) and iface in self._ip_ctrl.get_sys_interfaces()
 
-        # Ping google.com from gateway container
-        internet_connection = self._ip_ctrl.ping_via_gateway('google.com')
-
-        if internet_connection:
-          message['connection'] = True
-
-      # Broadcast via MQTT client
-      mqtt_client.send_message(topic, message)
+  def _internet_connection_changed(self, connection):
+    """Store the internet connection state and send it to the frontend"""
+    self._session.set_internet_connection(connection)
+    self._session.get_mqtt_client().send_message(
+        mqtt.MQTTTopic.INTERNET_CONNECTION_TOPIC, {'connection': connection})
 
 
 class NetworkConfig:
@@ -750,3 +1056,24 @@ class NetworkConfig:
   def __init__(self):
     self.ipv4_network = ipaddress.ip_network('10.10.10.0/24')
     self.ipv6_network = ipaddress.ip_network('fd10:77be:4186::/64')
+
+  def get_vlan(self, vlan_id):
+    """Network configuration of a VLAN. Each VLAN has a /24 of
+    VLAN_IPV4_NETWORK and the /64 at its ID after the default IPv6
+    network."""
+    ipv4_network = ipaddress.ip_network(
+        (int(VLAN_IPV4_NETWORK.network_address) + (vlan_id << 8), 24))
+    ipv6_network = ipaddress.ip_network(
+        (int(self.ipv6_network.network_address) + (vlan_id << 64), 64))
+    return VlanConfig(vlan_id, ipv4_network, ipv6_network)
+
+
+class VlanConfig:
+  """Define the properties of a network carried on a VLAN of the device
+  interface"""
+
+  def __init__(self, vlan_id, ipv4_network, ipv6_network):
+    self.id = vlan_id
+    self.name = f'vlan-{vlan_id}'
+    self.ipv4_network = ipv4_network
+    self.ipv6_network = ipv6_network
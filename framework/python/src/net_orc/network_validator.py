@@ -21,6 +21,8 @@ import time
 import docker
 from docker.types import Mount
 import getpass
+from common import container_monitor
+from common import docker_util
 from common import logger
 from common import util
 from net_orc.ovs_control import OVSControl
@@ -77,7 +79,7 @@ class NetworkValidator:
   def _build_device(self, net_device):
     LOGGER.debug('Building network validator ' + net_device.dir_name)
     try:
-      client = docker.from_env()
+      client = docker_util.get_client()
       client.images.build(dockerfile=os.path.join(net_device.dir,
                                                   net_device.build_file),
                           path=self._path,
@@ -152,7 +154,7 @@ class NetworkValidator:
     LOGGER.debug('Container name: ' + device.container_name)
 
     try:
-      client = docker.from_env()
+      client = docker_util.get_client()
       device.container = client.containers.run(
           device.image_name,
           auto_remove=True,
@@ -163,7 +165,8 @@ class NetworkValidator:
           privileged=True,
           detach=True,
           mounts=device.mounts,
-          environment={'HOST_USER': self._get_host_user()})
+          environment={'HOST_USER': self._get_host_user()},
+          labels={container_monitor.LABEL: device.name})
     except docker.errors.ContainerError as error:
       LOGGER.error('Container run error')
       LOGGER.error(error)
@@ -172,11 +175,15 @@ class NetworkValidator:
 
     # Determine the module timeout time
     test_module_timeout = time.time() + device.timeout
-    status = self._get_device_status(device)
-
-    while time.time() < test_module_timeout and status == 'running':
-      time.sleep(1)
+    monitor = container_monitor.get_monitor()
+    if device.container is not None and monitor.is_subscribed():
+      monitor.wait_for_exit(device.container_name, device.container.id,
+                            device.timeout)
+    else:
       status = self._get_device_status(device)
+      while time.time() < test_module_timeout and status == 'running':
+        time.sleep(1)
+        status = self._get_device_status(device)
 
     LOGGER.info('Validation device ' + device.name + ' has finished')
 
@@ -300,7 +307,7 @@ class NetworkValidator:
   def _get_device_container(self, net_device):
     container = None
     try:
-      client = docker.from_env()
+      client = docker_util.get_client()
       container = client.containers.get(net_device.container_name)
     except docker.errors.NotFound:
       LOGGER.debug('Container ' + net_device.container_name + ' not found')
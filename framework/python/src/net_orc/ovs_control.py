@@ -12,8 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """OVS Control Module"""
+import re
 from common import logger
 from common import util
+from net_orc.ovsdb_client import OvsdbClient, OvsdbError
 
 DEVICE_BRIDGE = 'tr-d'
 INTERNET_BRIDGE = 'tr-c'
@@ -22,14 +24,51 @@ DEVICER_ARP_COOKIE = '1000'
 UNKNOWN_ARP_COOKIE = '1183'
 CONTAINER_MAC_PREFIX = '9a:02:57:1e:8f'
 
+# Traffic on the device bridge is counted by the flows of the counter table
+# and then passed to the flows of the filter table
+COUNTER_TABLE = 0
+FILTER_TABLE = 1
+
+# Traffic counters of the device by type and direction, each with the
+# offset of its cookie, priority and match. Broadcast and multicast
+# traffic is matched before other traffic from the device.
+TRAFFIC_COOKIE = 0x2000
+TRAFFIC_COOKIE_MASK = '0xfffffffffffffff0'
+TRAFFIC_COUNTERS = {
+    ('broadcast', 'from'): (0, 300, 'dl_src={mac},dl_dst=ff:ff:ff:ff:ff:ff'),
+    ('multicast', 'from'):
+        (1, 200, 'dl_src={mac},dl_dst=01:00:00:00:00:00/01:00:00:00:00:00'),
+    ('unicast', 'from'): (2, 100, 'dl_src={mac}'),
+    ('unicast', 'to'): (3, 100, 'dl_dst={mac}'),
+}
+
 class OVSControl:
   """OVS Control"""
 
   def __init__(self, session):
     self._session = session
 
+    # Bridges and ports are managed over the OVSDB protocol, falling back
+    # to ovs-vsctl if the database cannot be reached
+    self._ovsdb = OvsdbClient()
+
+  def _ovsdb_call(self, operation, *args):
+    """Run an OVSDB operation. Returns None when ovs-vsctl should be used
+    instead."""
+    try:
+      return getattr(self._ovsdb, operation)(*args)
+    except OvsdbError as e:
+      LOGGER.debug(f'OVSDB {operation} failed, using ovs-vsctl: {e}')
+      return None
+
+  def _get_bridges(self):
+    return self._ovsdb_call('get_bridges')
+
   def add_bridge(self, bridge_name):
     LOGGER.debug('Adding OVS bridge: ' + bridge_name)
+    result = self._ovsdb_call('add_bridges', {bridge_name: []})
+    if result is not None:
+      return result
     # Create the bridge using ovs-vsctl commands
     # Uses the --may-exist option to prevent failures
     # if this bridge already exists by this name it won't fail
@@ -43,14 +82,34 @@ class OVSControl:
     success = util.run_command(f'ovs-ofctl add-flow {bridge_name} \'{flow}\'')
     return success
 
-  def add_port(self, port, bridge_name):
+  def add_bridges(self, bridges):
+    """Create bridges and add their ports, given as a dictionary of bridge
+    name to port names, in a single transaction"""
+    LOGGER.debug('Adding OVS bridges: ' + str(bridges))
+    result = self._ovsdb_call('add_bridges', bridges)
+    if result is not None:
+      return result
+    success = True
+    for bridge_name, ports in bridges.items():
+      success = self.add_bridge(bridge_name) and success
+      for port in ports:
+        success = self.add_port(port, bridge_name) and success
+    return success
+
+  def add_port(self, port, bridge_name, tag=None):
+    """Add a port to the bridge. If a VLAN tag is given, the port is an
+    access port for that VLAN, otherwise it is untagged."""
     LOGGER.debug('Adding port ' + port + ' to OVS bridge: ' + bridge_name)
+    result = self._ovsdb_call('add_ports', bridge_name, [port], tag)
+    if result is not None:
+      return result
     # Add a port to the bridge using ovs-vsctl commands
     # Uses the --may-exist option to prevent failures
     # if this port already exists on the bridge and will not
     # modify the existing bridge
+    tag_option = f' tag={tag}' if tag is not None else ''
     success = util.run_command(f"""ovs-vsctl --may-exist
-                             add-port {bridge_name} {port}""")
+                             add-port {bridge_name} {port}{tag_option}""")
     return success
 
   def delete_flow(self, bridge_name, flow):
@@ -61,6 +120,9 @@ class OVSControl:
 
   def delete_port(self, bridge_name, port):
     # Delete a port from the bridge using ovs-ofctl commands
+    result = self._ovsdb_call('delete_ports', bridge_name, [port])
+    if result is not None:
+      return result
     success=True
     if self.port_exists(bridge_name, port):
       LOGGER.debug(f'Deleting port {port} from bridge: {bridge_name}')
@@ -69,6 +131,9 @@ class OVSControl:
 
   def get_bridge_ports(self, bridge_name):
     # Get a list of all the ports on a bridge
+    bridges = self._get_bridges()
+    if bridges is not None:
+      return bridges.get(bridge_name, [])
     response = util.run_command(f'ovs-vsctl list-ports {bridge_name}',
                                 output=True)
     return response[0].splitlines()
@@ -76,12 +141,18 @@ class OVSControl:
   def bridge_exists(self, bridge_name):
     # Check if a bridge exists by the name provided
     LOGGER.debug(f'Checking if {bridge_name} exists')
+    bridges = self._get_bridges()
+    if bridges is not None:
+      return bridge_name in bridges
     success = util.run_command(f'ovs-vsctl br-exists {bridge_name}')
     return success
 
   def port_exists(self, bridge_name, port):
     # Check if a port exists on a specified bridge
     LOGGER.debug(f'Checking if {bridge_name} exists')
+    bridges = self._get_bridges()
+    if bridges is not None:
+      return port in bridges.get(bridge_name, [])
     resp = util.run_command(f'ovs-vsctl port-to-br {port}', True)
     return resp[0] == bridge_name
 
@@ -92,54 +163,72 @@ class OVSControl:
     dev_bridge = True
     int_bridge = True
 
+    # Read the state of all bridges at once
+    bridges = self._get_bridges()
+
     # Verify the device bridge
     dev_bridge = self.verify_bridge(DEVICE_BRIDGE,
-                                    [self._session.get_device_interface()])
+                                    [self._session.get_device_interface()],
+                                    bridges)
     LOGGER.debug('Device bridge verified: ' + str(dev_bridge))
 
     # Verify the internet bridge
     if 'single_intf' not in self._session.get_runtime_params():
       int_bridge = self.verify_bridge(INTERNET_BRIDGE,
-                                      [self._session.get_internet_interface()])
+                                      [self._session.get_internet_interface()],
+                                      bridges)
       LOGGER.debug('Internet bridge verified: ' + str(int_bridge))
 
     return dev_bridge and int_bridge
 
-  def verify_bridge(self, bridge_name, ports):
+  def verify_bridge(self, bridge_name, ports, bridges=None):
     LOGGER.debug('Verifying bridge: ' + bridge_name)
     verified = True
-    if self.bridge_exists(bridge_name):
+    if bridges is not None:
+      bridge_ports = bridges.get(bridge_name)
+      verified = bridge_ports is not None
+    elif self.bridge_exists(bridge_name):
       bridge_ports = self.get_bridge_ports(bridge_name)
+    else:
+      verified = False
+    if verified:
       LOGGER.debug('Checking bridge for ports: ' + str(ports))
       for port in ports:
         if port not in bridge_ports:
           verified = False
           break
-    else:
-      verified = False
     return verified
 
   def create_baseline_net(self, verify=True):
     LOGGER.debug('Creating baseline network')
 
-    # Create data plane
-    self.add_bridge(DEVICE_BRIDGE)
-
-    # Create control plane
-    self.add_bridge(INTERNET_BRIDGE)
-
-    # Add external interfaces to data and control plane
-    self.add_port(self._session.get_device_interface(), DEVICE_BRIDGE)
+    # Data plane and control plane with their external interfaces
+    bridges = {
+        DEVICE_BRIDGE: [self._session.get_device_interface()],
+        INTERNET_BRIDGE: []
+    }
 
     # Remove IP from internet adapter
     if not 'single_intf' in self._session.get_runtime_params():
       self.set_interface_ip(interface=self._session.get_internet_interface(),
                             ip_addr='0.0.0.0')
-      self.add_port(self._session.get_internet_interface(), INTERNET_BRIDGE)
+      bridges[INTERNET_BRIDGE].append(self._session.get_internet_interface())
+
+    # Create both bridges in a single transaction
+    self.add_bridges(bridges)
+
+    # Pass traffic which is not counted straight to the filter table, where
+    # traffic which is not filtered is switched as normal
+    self.add_flow(bridge_name=DEVICE_BRIDGE,
+                  flow=f'table={COUNTER_TABLE}, priority=0, ' +
+                  f'actions=resubmit(,{FILTER_TABLE})')
+    self.add_flow(bridge_name=DEVICE_BRIDGE,
+                  flow=f'table={FILTER_TABLE}, priority=0, actions=normal')
 
     # Enable forwarding of eapol packets
     self.add_flow(bridge_name=DEVICE_BRIDGE,
-                  flow='table=0, dl_dst=01:80:c2:00:00:03, actions=flood')
+                  flow=f'table={FILTER_TABLE}, dl_dst=01:80:c2:00:00:03, ' +
+                  'actions=flood')
 
     # Add a DHCP snooping equivalent to the device bridge
     # ToDo Define these IP's dynamically
@@ -162,26 +251,27 @@ class OVSControl:
   def add_dhcp_filters(self,dhcp_server_primary_ip,dhcp_server_secondary_ip):
 
     # Allow DHCP traffic from primary server
-    allow_primary_dhcp_server = (
-      'table=0, dl_type=0x800, priority=65535, tp_src=67, ' +
-      f'tp_dst=68, nw_src={dhcp_server_primary_ip}, actions=normal')
-    self.add_flow(bridge_name=DEVICE_BRIDGE,flow=allow_primary_dhcp_server)
+    self.add_dhcp_server_filter(dhcp_server_primary_ip)
 
     # Allow DHCP traffic from secondary server
-    allow_secondary_dhcp_server = (
-      'table=0, dl_type=0x800, priority=65535, ' +
-      f'tp_src=67, tp_dst=68, nw_src={dhcp_server_secondary_ip},' +
-       ' actions=normal''')
-    self.add_flow(bridge_name=DEVICE_BRIDGE,flow=allow_secondary_dhcp_server)
+    self.add_dhcp_server_filter(dhcp_server_secondary_ip)
 
     # Drop DHCP packets not associated with known servers
-    drop_dhcp_flow = ('table=0, dl_type=0x800, priority=0, ' +
+    drop_dhcp_flow = (f'table={FILTER_TABLE}, dl_type=0x800, priority=0, ' +
                       'tp_src=67, tp_dst=68, actions=drop')
     self.add_flow(bridge_name=DEVICE_BRIDGE,flow=drop_dhcp_flow)
 
+  def add_dhcp_server_filter(self, dhcp_server_ip):
+    # Allow DHCP traffic from a known server
+    allow_dhcp_server = (
+      f'table={FILTER_TABLE}, dl_type=0x800, priority=65535, tp_src=67, ' +
+      f'tp_dst=68, nw_src={dhcp_server_ip}, actions=normal')
+    self.add_flow(bridge_name=DEVICE_BRIDGE,flow=allow_dhcp_server)
+
   def add_arp_inspection_filter(self,ip_address,mac_address):
     # Allow ARP packets with known MAC-to-IP mappings
-    allow_known_arps= (f'table=0, cookie={DEVICER_ARP_COOKIE}, ' +
+    allow_known_arps= (f'table={FILTER_TABLE}, ' +
+                       f'cookie={DEVICER_ARP_COOKIE}, ' +
                        f'priority=65535, arp, arp_tpa={ip_address}, ' +
                        f'arp_tha={mac_address}, action=normal')
     self.add_flow(bridge_name=DEVICE_BRIDGE,flow=allow_known_arps)
@@ -191,16 +281,17 @@ class OVSControl:
     dhcp1_ip = '10.10.10.2'
     dhcp2_ip = '10.10.10.3'
 
-    dhcp_1_arps= ('table=0, priority=65535, arp, ' +
+    dhcp_1_arps= (f'table={FILTER_TABLE}, priority=65535, arp, ' +
                   f'arp_tpa={dhcp1_ip}, arp_tha={dhcp1_mac}, action=normal')
-    dhcp_2_arps= ('table=0, priority=65535, arp, ' +
+    dhcp_2_arps= (f'table={FILTER_TABLE}, priority=65535, arp, ' +
                   f'arp_tpa={dhcp2_ip}, arp_tha={dhcp2_mac}, action=normal')
     self.add_flow(bridge_name=DEVICE_BRIDGE,flow=dhcp_1_arps)
     self.add_flow(bridge_name=DEVICE_BRIDGE,flow=dhcp_2_arps)
 
     # Drop ARP packets with unknown MAC-to-IP mappings
     drop_unknown_arps = (
-        f'table=0, cookie={UNKNOWN_ARP_COOKIE} priority=100, arp, '
+        f'table={FILTER_TABLE}, cookie={UNKNOWN_ARP_COOKIE} '
+        'priority=100, arp, '
         f'action=drop'
     )
     self.add_flow(bridge_name=DEVICE_BRIDGE,flow=drop_unknown_arps)
@@ -211,11 +302,40 @@ class OVSControl:
     self.delete_flow(bridge_name=DEVICE_BRIDGE,
                      flow=f'cookie={UNKNOWN_ARP_COOKIE}/-1')
 
+  def add_traffic_counters(self, mac_addr):
+    """Count the broadcast, multicast and unicast traffic of a device,
+    replacing any existing counters"""
+    self.delete_traffic_counters()
+    for offset, priority, match in TRAFFIC_COUNTERS.values():
+      self.add_flow(bridge_name=DEVICE_BRIDGE,
+                    flow=f'table={COUNTER_TABLE}, ' +
+                    f'cookie={TRAFFIC_COOKIE + offset}, priority={priority}, ' +
+                    match.format(mac=mac_addr) +
+                    f', actions=resubmit(,{FILTER_TABLE})')
+
+  def get_traffic_counters(self, mac_addr):
+    """Read the traffic counters of a device, None if they could not be
+    read"""
+    flows, error = util.run_command(
+        f'ovs-ofctl dump-flows {DEVICE_BRIDGE} ' +
+        f'cookie={TRAFFIC_COOKIE}/{TRAFFIC_COOKIE_MASK}')
+    if error:
+      LOGGER.error(f'Failed to read traffic counters: {error}')
+      return None
+    return parse_traffic_counters(flows, mac_addr)
+
+  def delete_traffic_counters(self):
+    self.delete_flow(bridge_name=DEVICE_BRIDGE,
+                     flow=f'cookie={TRAFFIC_COOKIE}/{TRAFFIC_COOKIE_MASK}')
+
   def delete_bridge(self, bridge_name):
     LOGGER.debug('Deleting OVS Bridge: ' + bridge_name)
     # Delete the bridge using ovs-vsctl commands
     # Uses the --if-exists option to prevent failures
     # if this bridge does not exists
+    result = self._ovsdb_call('delete_bridge', bridge_name)
+    if result is not None:
+      return result
     success = util.run_command('ovs-vsctl --if-exists del-br ' + bridge_name)
     return success
 
@@ -244,3 +364,37 @@ class OVSControl:
     LOGGER.debug('Setting interface ' + interface + ' to ' + ip_addr)
     # Remove IP from internet adapter
     util.run_command(f'ifconfig {interface} {ip_addr}')
+
+
+def parse_traffic_counters(flows, mac_addr):
+  """Packet counts of a device from the traffic counter flows listed by
+  ovs-ofctl dump-flows, by traffic type and direction"""
+  counters = {
+      'mac_address': mac_addr,
+      'multicast': {
+          'from': 0,
+          'to': 0
+      },
+      'broadcast': {
+          'from': 0,
+          'to': 0
+      },
+      'unicast': {
+          'from': 0,
+          'to': 0
+      },
+  }
+
+  cookies = {
+      TRAFFIC_COOKIE + offset: name
+      for name, (offset, _, _) in TRAFFIC_COUNTERS.items()
+  }
+  for line in flows.splitlines():
+    match = re.search(r'cookie=(0x[0-9a-f]+),.*\bn_packets=(\d+)', line)
+    if match is None:
+      continue
+    name = cookies.get(int(match.group(1), 16))
+    if name is not None:
+      traffic_type, direction = name
+      counters[traffic_type][direction] += int(match.group(2))
+  return counters
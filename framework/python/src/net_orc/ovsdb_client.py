@@ -0,0 +1,312 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""JSON-RPC client for the Open vSwitch database (RFC 7047).
+
+Keeps a single connection to the ovsdb-server unix socket open so that
+bridge and port changes are applied as one transaction each, without
+forking ovs-vsctl. Like ovs-vsctl, each change waits for ovs-vswitchd to
+apply it, so bridges and ports exist in the kernel once a call returns."""
+import json
+import socket
+import threading
+import time
+from common import codec
+from common import logger
+
+LOGGER = logger.get_logger('ovsdb')
+
+OVSDB_SOCKET = '/var/run/openvswitch/db.sock'
+DATABASE = 'Open_vSwitch'
+RECV_SIZE = 65536
+TIMEOUT = 5
+# Seconds between checks of whether ovs-vswitchd has applied a change
+CFG_POLL_INTERVAL = 0.01
+
+
+class OvsdbError(Exception):
+  """Raised when a request to the database fails"""
+
+
+class OvsdbClient:
+  """Connection to ovsdb-server"""
+
+  def __init__(self, path=OVSDB_SOCKET, timeout=TIMEOUT):
+    self._path = path
+    self._timeout = timeout
+    self._socket = None
+    self._buffer = b''
+    self._decoder = json.JSONDecoder()
+    self._request_id = 0
+    self._lock = threading.Lock()
+
+  def close(self):
+    with self._lock:
+      self._close()
+
+  def get_bridges(self):
+    """Read every bridge and the names of its ports in one request.
+    Returns a dictionary of bridge name to a list of port names, which
+    like ovs-vsctl list-ports excludes the internal port of the bridge."""
+    bridges, ports = self.transact(
+        _select('Bridge', ['name', 'ports']),
+        _select('Port', ['_uuid', 'name']))
+    port_names = {
+        port['_uuid'][1]: port['name'] for port in ports['rows']
+    }
+    return {
+        bridge['name']: [
+            port_names[uuid] for uuid in _get_uuids(bridge['ports'])
+            if port_names.get(uuid, bridge['name']) != bridge['name']
+        ] for bridge in bridges['rows']
+    }
+
+  def add_bridges(self, bridges, tag=None):
+    """Create the bridges and add the ports to them in a single
+    transaction. bridges is a dictionary of bridge name to a list of port
+    names. Bridges and ports which already exist are left unchanged. New
+    ports are VLAN access ports if a tag is given."""
+    existing = self.get_bridges()
+    existing_ports = {port for ports in existing.values() for port in ports}
+
+    operations = []
+    new_bridges = []
+    for bridge_name, ports in bridges.items():
+      new_ports = []
+      for port in ports:
+        if port not in existing_ports:
+          new_ports.append(_insert_port(operations, port, tag=tag))
+          existing_ports.add(port)
+
+      if bridge_name in existing:
+        if new_ports:
+          operations.append(
+              _mutate_bridge(bridge_name, 'insert', _named_uuids(new_ports)))
+        continue
+
+      # A bridge has an internal port of the same name
+      new_ports.append(_insert_port(operations, bridge_name, 'internal'))
+      row = 'bridge_' + _row_name(bridge_name)
+      operations.append({
+          'op': 'insert',
+          'table': 'Bridge',
+          'uuid-name': row,
+          'row': {
+              'name': bridge_name,
+              'ports': _named_uuids(new_ports)
+          }
+      })
+      new_bridges.append(row)
+
+    if new_bridges:
+      operations.append({
+          'op': 'mutate',
+          'table': 'Open_vSwitch',
+          'where': [],
+          'mutations': [['bridges', 'insert', _named_uuids(new_bridges)]]
+      })
+
+    if operations:
+      self._reconfigure(*operations)
+    return True
+
+  def add_ports(self, bridge_name, ports, tag=None):
+    """Add ports to an existing bridge in a single transaction"""
+    return self.add_bridges({bridge_name: ports}, tag)
+
+  def delete_ports(self, bridge_name, ports):
+    """Remove ports from a bridge in a single transaction. Ports which are
+    not on the bridge are ignored."""
+    result = self.transact(_select('Port', ['_uuid', 'name']))[0]
+    uuids = [row['_uuid'] for row in result['rows'] if row['name'] in ports]
+    if uuids:
+      # Port and Interface rows are removed by the database once they are
+      # no longer referenced by a bridge
+      self._reconfigure(_mutate_bridge(bridge_name, 'delete', ['set', uuids]))
+    return True
+
+  def delete_bridge(self, bridge_name):
+    """Remove a bridge with all of its ports if it exists"""
+    result = self.transact(_select('Bridge', ['_uuid'], _where_name(
+        bridge_name)))[0]
+    if result['rows']:
+      self._reconfigure({
+          'op': 'mutate',
+          'table': 'Open_vSwitch',
+          'where': [],
+          'mutations': [['bridges', 'delete', result['rows'][0]['_uuid']]]
+      })
+    return True
+
+  def _reconfigure(self, *operations):
+    """Apply the operations and wait until ovs-vswitchd has reconfigured
+    itself from the database, as ovs-vsctl does by default"""
+    results = self.transact(
+        *operations, {
+            'op': 'mutate',
+            'table': 'Open_vSwitch',
+            'where': [],
+            'mutations': [['next_cfg', '+=', 1]]
+        }, _select('Open_vSwitch', ['next_cfg']))
+    self._wait_for_cfg(results[-1]['rows'][0]['next_cfg'])
+    return results[:-2]
+
+  def _wait_for_cfg(self, next_cfg):
+    deadline = time.monotonic() + self._timeout
+    while True:
+      result = self.transact(_select('Open_vSwitch', ['cur_cfg']))[0]
+      if result['rows'][0]['cur_cfg'] >= next_cfg:
+        return
+      if time.monotonic() >= deadline:
+        raise OvsdbError('Timed out waiting for ovs-vswitchd to apply ' +
+                         f'configuration {next_cfg}')
+      time.sleep(CFG_POLL_INTERVAL)
+
+  def transact(self, *operations):
+    """Apply the operations atomically, returning the result of each"""
+    results = self.request('transact', [DATABASE, *operations])
+    for result in results:
+      if result is not None and 'error' in result:
+        raise OvsdbError(f'{result["error"]}: {result.get("details", "")}')
+    return results
+
+  def request(self, method, params):
+    """Send a request and wait for its response"""
+    with self._lock:
+      try:
+        if self._socket is None:
+          self._connect()
+        self._request_id += 1
+        request_id = self._request_id
+        self._send({'method': method, 'params': params, 'id': request_id})
+
+        while True:
+          message = self._receive()
+          if message.get('method') == 'echo':
+            # Keepalive from the server
+            self._send({
+                'result': message['params'],
+                'error': None,
+                'id': message['id']
+            })
+          elif message.get('id') == request_id:
+            break
+      except (OSError, ValueError) as e:
+        self._close()
+        raise OvsdbError(f'Request to {self._path} failed: {e}') from e
+
+    if message.get('error') is not None:
+      raise OvsdbError(str(message['error']))
+    return message['result']
+
+  def _connect(self):
+    LOGGER.debug(f'Connecting to {self._path}')
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(self._timeout)
+    try:
+      sock.connect(self._path)
+    except OSError:
+      sock.close()
+      raise
+    self._socket = sock
+    self._buffer = b''
+
+  def _close(self):
+    if self._socket is not None:
+      self._socket.close()
+      self._socket = None
+
+  def _send(self, message):
+    self._socket.sendall(codec.dumpb(message))
+
+  def _receive(self):
+    while True:
+      if self._buffer.strip():
+        try:
+          text = self._buffer.decode('utf-8').lstrip()
+          message, end = self._decoder.raw_decode(text)
+          self._buffer = text[end:].encode('utf-8')
+          return message
+        except ValueError:
+          # Incomplete message
+          pass
+
+      data = self._socket.recv(RECV_SIZE)
+      if not data:
+        raise ConnectionError('Connection closed by ovsdb-server')
+      self._buffer += data
+
+
+def _select(table, columns, where=None):
+  return {
+      'op': 'select',
+      'table': table,
+      'where': where or [],
+      'columns': columns
+  }
+
+
+def _where_name(name):
+  return [['name', '==', name]]
+
+
+def _mutate_bridge(bridge_name, mutator, value):
+  return {
+      'op': 'mutate',
+      'table': 'Bridge',
+      'where': _where_name(bridge_name),
+      'mutations': [['ports', mutator, value]]
+  }
+
+
+def _insert_port(operations, port, interface_type=None, tag=None):
+  """Add the operations to create a port with one interface, returning the
+  name of the new port row"""
+  name = _row_name(port)
+  interface = {'name': port}
+  if interface_type is not None:
+    interface['type'] = interface_type
+  row = {'name': port, 'interfaces': ['named-uuid', 'iface_' + name]}
+  if tag is not None:
+    row['tag'] = tag
+  operations.append({
+      'op': 'insert',
+      'table': 'Interface',
+      'uuid-name': 'iface_' + name,
+      'row': interface
+  })
+  operations.append({
+      'op': 'insert',
+      'table': 'Port',
+      'uuid-name': 'port_' + name,
+      'row': row
+  })
+  return 'port_' + name
+
+
+def _row_name(name):
+  # uuid-name values must be valid identifiers
+  return ''.join(c if c.isalnum() else '_' for c in name)
+
+
+def _named_uuids(names):
+  return ['set', [['named-uuid', name] for name in names]]
+
+
+def _get_uuids(value):
+  """Resolve the UUIDs from a set column, which holds either a single
+  UUID or a set of them"""
+  if value[0] == 'uuid':
+    return [value[1]]
+  return [uuid[1] for uuid in value[1]]
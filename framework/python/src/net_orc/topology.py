@@ -0,0 +1,108 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Fingerprint of the virtual network, used to determine which parts of
+a previously created network can be reused."""
+import hashlib
+import os
+import docker
+from common import codec
+from common import docker_util
+from common import logger
+
+LOGGER = logger.get_logger('topology')
+
+TOPOLOGY_FILE = 'runtime/topology.json'
+
+# Incremented when the way the network is built changes, so that networks
+# built by earlier versions are not reused
+TOPOLOGY_VERSION = 3
+MODULE_CONFIG = 'conf/module_config.json'
+
+
+def get_fingerprint(session, network_config, net_modules, get_image_id=None):
+  """Fingerprint of the network and of each network service.
+
+  The network fingerprint covers the interfaces and subnets, and each
+  service fingerprint covers its module config and image."""
+  if get_image_id is None:
+    get_image_id = _get_image_id
+
+  network = {
+      'version': TOPOLOGY_VERSION,
+      'device_intf': session.get_device_interface(),
+      'device_mac': session.get_device_interface_mac_addr(),
+      'internet_intf': session.get_internet_interface(),
+      'single_intf': 'single_intf' in session.get_runtime_params(),
+      'vlans': session.get_vlans(),
+      'ipv4_network': str(network_config.ipv4_network),
+      'ipv6_network': str(network_config.ipv6_network)
+  }
+
+  modules = {}
+  for net_module in net_modules:
+    with open(os.path.join(net_module.dir, MODULE_CONFIG), 'rb') as f:
+      config = f.read()
+    modules[net_module.dir_name] = _hash({
+        'config': hashlib.sha256(config).hexdigest(),
+        'image': get_image_id(net_module.image_name),
+        'enabled': net_module.enabled,
+        'root': net_module.root_path
+    })
+
+  return {'network': _hash(network), 'modules': modules}
+
+
+def get_drift(previous, current):
+  """Compare two fingerprints. Returns whether the network has drifted and
+  the names of the services which have drifted."""
+  if previous is None or previous.get('network') != current['network']:
+    return True, set(current['modules'])
+  previous_modules = previous.get('modules', {})
+  return False, {
+      name for name, fingerprint in current['modules'].items()
+      if previous_modules.get(name) != fingerprint
+  }
+
+
+def load(path=TOPOLOGY_FILE):
+  try:
+    with open(path, 'rb') as f:
+      return codec.load(f)
+  except (OSError, codec.JSONDecodeError) as e:
+    LOGGER.debug(f'No network topology to reuse: {e}')
+    return None
+
+
+def save(fingerprint, path=TOPOLOGY_FILE):
+  os.makedirs(os.path.dirname(path), exist_ok=True)
+  with open(path, 'w', encoding='utf-8') as f:
+    codec.dump(fingerprint, f, indent=2)
+
+
+def delete(path=TOPOLOGY_FILE):
+  if os.path.exists(path):
+    os.remove(path)
+
+
+def _hash(value):
+  return hashlib.sha256(codec.dumpb(value)).hexdigest()
+
+
+def _get_image_id(image_name):
+  try:
+    return docker_util.get_client().images.get(image_name).id
+  except docker.errors.DockerException as e:
+    LOGGER.debug(f'Unable to resolve image {image_name}: {e}')
+    return None
@@ -29,6 +29,8 @@ class TestCase:  # pylint: disable=too-few-public-methods,too-many-instance-attr
   recommendations: list = field(default_factory=lambda: [])
   optional_recommendations: list = field(default_factory=lambda: [])
   details: str = ""
+  # Time and resources used by the test, recorded by the test module
+  metrics: dict = None
 
   def to_dict(self):
 
@@ -48,6 +50,9 @@ class TestCase:  # pylint: disable=too-few-public-methods,too-many-instance-attr
       and len(self.optional_recommendations) > 0):
       test_dict["optional_recommendations"] = self.optional_recommendations
 
+    if self.metrics is not None:
+      test_dict["metrics"] = self.metrics
+
     return test_dict
 
   def __post_init__(self):
@@ -14,13 +14,13 @@
 """Provides high level management of the test orchestrator."""
 import copy
 import os
-import json
 import pathlib
 import re
 import time
 import shutil
 import docker
-from common import logger, util, risk_profile
+from common import (codec, docker_util, logger, util, risk_profile,
+                    report_archive, ntp_whitelist)
 from common.testreport import TestReport
 from common.statuses import TestrunStatus, TestrunResult, TestResult
 from common.device import Device
@@ -53,6 +53,9 @@ DEVICE_ROOT_CERTS = "local/root_certs"
 LOG_REGEX = r"^[A-Z][a-z]{2} [0-9]{2} [0-9]{2}:[0-9]{2}:[0-9]{2} test_"
 API_URL = "http://localhost:8000"
 
+# Seconds between checks of the session status whilst a module is running
+MODULE_WAIT_INTERVAL = 1
+
 
 class TestOrchestrator:
   """Manages and controls the test modules."""
@@ -206,6 +209,7 @@ class TestOrchestrator:
     self.get_session().set_report_url(report.get_report_url())
     self.get_session().set_export_url(report.get_export_url())
     device.add_report(report)
+    self.get_session().get_analytics().add_report(report)
 
     self.get_session().set_description(message)
 
@@ -229,7 +233,7 @@ class TestOrchestrator:
 
     # Write the json report
     with open(os.path.join(out_dir, "report.json"), "w", encoding="utf-8") as f:
-      json.dump(test_report.to_json(), f, indent=2)
+      codec.dump(test_report.to_json(), f, indent=2)
 
     # Write the html report
     with open(os.path.join(out_dir, "report.html"), "w", encoding="utf-8") as f:
@@ -306,6 +310,8 @@ class TestOrchestrator:
       while len(device.get_reports()) > max_device_reports:
         report = device.get_reports().pop(0)
         report.delete_folder()
+        self.get_session().get_analytics().remove_report(
+            report.get_folder_name())
 
   def _copy_report_to_common_folder(self, device: Device) -> str:
 
@@ -361,7 +367,14 @@ class TestOrchestrator:
       if os.path.exists(zip_location + ".zip"):
         os.remove(zip_location + ".zip")
 
-      shutil.copytree(src_path, results_dir)
+      # Archived captures and logs are restored to their original form.
+      # The report is not archived whilst it is being copied
+      with report_archive.get_report_lock(
+          os.path.join(self._root_path, REPORTS_FOLDER,
+                       report.get_folder_name())):
+        shutil.copytree(src_path,
+                        results_dir,
+                        copy_function=report_archive.copy_decompressed)
 
       # Include profile if specified
       if profile is not None:
@@ -391,6 +404,52 @@ class TestOrchestrator:
       LOGGER.debug(error)
       return None
 
+  def archive_reports(self):
+    """Compress the captures and logs of aged reports"""
+    archive_config = self.get_session().get_report_archive_config()
+    archiver = report_archive.ReportArchiver(
+        os.path.join(self._root_path, REPORTS_FOLDER),
+        archive_config.get("age_days"),
+        archive_config.get("compression"))
+    return archiver.archive()
+
+  def open_report_file(self, report: TestReport, file_path: str):
+    """Open a file of a report for binary reading, decompressing it
+    on the fly if it has been archived"""
+    report_dir = os.path.realpath(
+        os.path.join(self._root_path, REPORTS_FOLDER,
+                     report.get_folder_name()))
+    path = os.path.realpath(os.path.join(report_dir, file_path))
+    # Only files within the report can be read
+    if os.path.commonpath([report_dir, path]) != report_dir:
+      raise FileNotFoundError(file_path)
+    with report_archive.get_report_lock(report_dir):
+      return report_archive.open_report_file(path)
+
+  def refresh_ntp_whitelist(self):
+    """Remove expired servers from the cache used by the NTP module"""
+    return self._get_ntp_whitelist().refresh()
+
+  def _get_ntp_whitelist(self):
+    whitelist_config = self.get_session().get_ntp_whitelist_config()
+    return ntp_whitelist.NTPWhitelist(
+        os.path.join(self._root_path, ntp_whitelist.CACHE_FILE),
+        whitelist_config.get("ttl_hours", ntp_whitelist.DEFAULT_TTL_HOURS),
+        whitelist_config.get("offline", False))
+
+  def _update_ntp_whitelist(self, module):
+    """Add the NTP servers checked by a test module to the cache"""
+    checked_file = os.path.join(module.container_runtime_dir,
+                                ntp_whitelist.CHECKED_FILE)
+    if not os.path.isfile(checked_file):
+      return
+    try:
+      with open(checked_file, "r", encoding="utf-8") as f:
+        self._get_ntp_whitelist().add(codec.load(f))
+    except (OSError, codec.JSONDecodeError, AttributeError) as e:
+      LOGGER.error(f"Failed to update the NTP whitelist from {module.name}")
+      LOGGER.error(e)
+
   def regenerate_pdf(self, device: Device, report: TestReport) -> str:
     """Regenerate the pdf report"""
     return self._regenerate_report_files(device, report)
@@ -419,7 +478,7 @@ class TestOrchestrator:
         with open(os.path.join(test_path, "report.json"),
                   "w",
                   encoding="utf-8") as f:
-          json.dump(report.to_json(), f, indent=2)
+          codec.dump(report.to_json(), f, indent=2)
 
         with open(os.path.join(test_path, "report.html"),
                   "r",
@@ -575,8 +634,12 @@ class TestOrchestrator:
     log_thread.daemon = True
     log_thread.start()
 
-    while (module.get_status() == "running"
-           and self.get_session().get_status() == TestrunStatus.IN_PROGRESS):
+    while self.get_session().get_status() == TestrunStatus.IN_PROGRESS:
+
+      # Wake periodically to check whether Testrun is stopping
+      remaining = max(0, test_module_timeout - time.time())
+      if module.wait_for_exit(min(remaining, MODULE_WAIT_INTERVAL)):
+        break
 
       # Check that timeout has not exceeded
       if time.time() > test_module_timeout:
@@ -615,7 +678,7 @@ class TestOrchestrator:
       with open(results_file, "r", encoding="utf-8-sig") as f:
 
         # Load results from JSON file
-        module_results_json = json.load(f)
+        module_results_json = codec.load(f)
         module_results = module_results_json["results"]
         for test_result in module_results:
 
@@ -634,15 +697,20 @@ class TestOrchestrator:
           # Add details to the test case if presented
           if "details" in test_result:
             test_case.details = test_result["details"]
+          # Add the time and resources used by the test if recorded
+          if "metrics" in test_result:
+            test_case.metrics = test_result["metrics"]
 
           self.get_session().add_test_result(test_case)
 
     except (FileNotFoundError, PermissionError,
-            json.JSONDecodeError) as results_error:
+            codec.JSONDecodeError) as results_error:
       LOGGER.error(
           f"Error occurred whilst obtaining results for module {module.name}")
       LOGGER.error(results_error)
 
+    self._update_ntp_whitelist(module)
+
     # Get the markdown report from the module if generated
     markdown_file = f"{module.container_runtime_dir}/{module.name}_report.md"
     try:
@@ -705,7 +773,7 @@ class TestOrchestrator:
   def _get_module_container(self, module):
     container = None
     try:
-      client = docker.from_env()
+      client = docker_util.get_client()
       container = client.containers.get(module.container_name)
     except docker.errors.NotFound:
       LOGGER.debug("Container " + module.container_name + " not found")
@@ -122,6 +122,17 @@ class DHCPConfig:
       host_start = host_end + 1
     return hosts
 
+  def set_scope(self, network):
+    """Serve only the given network, without a failover peer or other
+    network services. Used for the networks of VLANs, which are served
+    by the primary server alone."""
+    hosts = list(network.hosts())
+    subnet = self._subnets[0]
+    subnet.set_subnet(str(network.network_address), str(network.netmask))
+    subnet.clear_servers()
+    subnet.pools[0].set_range(str(hosts[9]), str(hosts[19]))
+    self.disable_failover()
+
   def set_range(self, start, end, subnet=0, pool=0):
     # Calculate the subnet from the range
     octets = start.split('.')
@@ -393,6 +404,11 @@ class DHCPSubnet:
     for pool in self.pools:
       pool.enable_peer()
 
+  def clear_servers(self):
+    self._routers = None
+    self._dns_servers = None
+    self._ntp_servers = None
+
   def set_subnet(self, subnet, netmask=None):
     if netmask is None:
       netmask = '255.255.255.0'
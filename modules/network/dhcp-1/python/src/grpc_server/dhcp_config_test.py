@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """Unit Testing for the DHCP Server config"""
+import ipaddress
 import unittest
 from dhcp_config import DHCPConfig
 import os
@@ -102,6 +103,17 @@ class DHCPConfigTest(unittest.TestCase):
                     and pool.range_end == range_end)
     print('SetSubnetRange:\n' + str(DHCP_CONFIG))
 
+  def test_set_scope(self):
+    vlan_config = get_config()
+    vlan_config.set_scope(ipaddress.ip_network('172.16.100.0/24'))
+    config = str(vlan_config)
+    print('SetScope:\n' + config)
+    self.assertIn('subnet 172.16.100.0 netmask 255.255.255.0', config)
+    self.assertIn('range 172.16.100.10 172.16.100.20;', config)
+    self.assertNotIn('option routers', config)
+    self.assertNotIn('option domain-name-servers', config)
+    self.assertIn('#failover peer', config)
+
 if __name__ == '__main__':
   suite = unittest.TestSuite()
   suite.addTest(DHCPConfigTest('test_resolve_config'))
@@ -111,6 +123,7 @@ if __name__ == '__main__':
   suite.addTest(DHCPConfigTest('test_delete_reserved_host'))
   suite.addTest(DHCPConfigTest('test_resolve_config_with_hosts'))
   suite.addTest(DHCPConfigTest('test_set_subnet_range'))
+  suite.addTest(DHCPConfigTest('test_set_scope'))
 
   runner = unittest.TextTestRunner()
   runner.run(suite)
@@ -13,6 +13,7 @@
 # limitations under the License.
 """Used to resolve the DHCP servers lease information"""
 import os
+import time
 from dhcp_lease import DHCPLease
 import logger
 from common import util
@@ -26,6 +27,14 @@ DHCP_LEASE_FILES = [
 ]
 DHCP_CONFIG_FILE = '/etc/dhcp/dhcpd.conf'
 
+# Changes to the lease table reported when watching leases
+LEASE_ADDED = 'ADDED'
+LEASE_UPDATED = 'UPDATED'
+LEASE_REMOVED = 'REMOVED'
+
+# Seconds between checks of the lease files for changes
+WATCH_INTERVAL = 0.5
+
 
 class DHCPLeases:
   """Leases for the DHCP server"""
@@ -72,6 +81,56 @@ class DHCPLeases:
         LOGGER.error('Get lease error: ' + str(e))
     return leases
 
+  def watch(self, is_active, hw_addr=None):
+    """Generate the changes to the lease of a MAC address, or to all
+    leases, until is_active returns False. The current leases are reported
+    as added first. The lease table is only resolved again when a lease
+    file changes or a lease expires."""
+    leases = {}
+    files_state = None
+    next_expiry = None
+    while is_active():
+      state = self._get_files_state()
+      if state != files_state or (next_expiry is not None
+                                  and time.time() >= next_expiry):
+        files_state = state
+        current = {
+            lease.hw_addr: lease
+            for lease in self.get_leases()
+            if hw_addr in (None, lease.hw_addr)
+        }
+        for mac, lease in current.items():
+          if mac not in leases:
+            yield LEASE_ADDED, lease
+          elif str(lease) != str(leases[mac]):
+            yield LEASE_UPDATED, lease
+        for mac in leases.keys() - current.keys():
+          yield LEASE_REMOVED, leases[mac]
+        leases = current
+        next_expiry = self._get_next_expiry(leases.values())
+      time.sleep(WATCH_INTERVAL)
+
+  def _get_files_state(self):
+    state = []
+    for lease_file in DHCP_LEASE_FILES:
+      try:
+        stat = os.stat(lease_file)
+        state.append((stat.st_mtime_ns, stat.st_size))
+      except OSError:
+        state.append(None)
+    return state
+
+  def _get_next_expiry(self, leases):
+    expiries = []
+    for lease in leases:
+      try:
+        if not lease.is_expired():
+          expiries.append(lease.get_expires_millis() / 1000)
+      except ValueError:
+        # Leases which never expire
+        pass
+    return min(expiries) if expiries else None
+
   def delete_lease(self, ip_addr):
     LOGGER.info('Deleting lease')
     for lease in DHCP_LEASE_FILES:
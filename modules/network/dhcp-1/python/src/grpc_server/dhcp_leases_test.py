@@ -0,0 +1,138 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Unit Testing for watching the DHCP Server leases"""
+import time
+import unittest
+from unittest import mock
+import dhcp_leases
+from dhcp_lease import time_format
+from dhcp_leases import (DHCPLeases, LEASE_ADDED, LEASE_UPDATED,
+                         LEASE_REMOVED)
+
+LEASE_LIST_HEADER = ('To get manufacturer names please download ' +
+                     'http://standards.ieee.org/regauth/oui/oui.txt\n' +
+                     'MAC                IP              hostname       ' +
+                     'valid until         manufacturer\n' +
+                     '=' * 99 + '\n')
+
+MAC_1 = '9a:02:57:1e:8f:01'
+MAC_2 = '9a:02:57:1e:8f:02'
+
+
+def get_lease_line(hw_addr, ip, expires):
+  expires = time.strftime(time_format, time.localtime(expires))
+  return f'{hw_addr}  {ip}  device  {expires}  -NA-'
+
+
+class DHCPLeasesTest(unittest.TestCase):
+  """Checks the changes reported when watching the leases"""
+
+  def setUp(self):
+    self.now = time.time()
+    self.files_state = None
+    self.lease_lines = []
+    self.lease_list_calls = 0
+    # Stub the lease files and the lease list command
+    # pylint: disable=W0212
+    self.leases = DHCPLeases()
+    self.leases._get_files_state = lambda: self.files_state
+    self.leases._get_lease_list = self._get_lease_list
+
+  def _get_lease_list(self):
+    self.lease_list_calls += 1
+    return LEASE_LIST_HEADER + '\n'.join(self.lease_lines) + '\n'
+
+  def _watch(self, steps, hw_addr=None):
+    """Changes reported after each step. A step sets the state of the
+    lease files, the lease list and the time before the leases are
+    checked."""
+    steps = iter(steps)
+    changes = []
+
+    def is_active():
+      step = next(steps, None)
+      if step is None:
+        return False
+      self.files_state, self.lease_lines, clock.time.return_value = step
+      changes.append([])
+      return True
+
+    with mock.patch.object(dhcp_leases, 'time') as clock:
+      for change, lease in self.leases.watch(is_active, hw_addr):
+        changes[-1].append((change, lease.hw_addr, lease.ip))
+    return changes
+
+  def test_watch(self):
+    expires = self.now + 3600
+    lease_1 = get_lease_line(MAC_1, '10.10.10.2', expires)
+    lease_1_updated = get_lease_line(MAC_1, '10.10.10.3', expires)
+    lease_2 = get_lease_line(MAC_2, '10.10.10.4', expires + 3600)
+
+    changes = self._watch([
+        # The current leases are added
+        (1, [lease_1, lease_2], self.now),
+        # The leases are not resolved while the files are unchanged
+        (1, [lease_1_updated], self.now),
+        # A change to the lease files resolves the leases again
+        (2, [lease_1_updated, lease_2], self.now),
+        (3, [lease_1_updated], self.now),
+    ])
+    self.assertEqual(changes, [
+        [(LEASE_ADDED, MAC_1, '10.10.10.2'),
+         (LEASE_ADDED, MAC_2, '10.10.10.4')],
+        [],
+        [(LEASE_UPDATED, MAC_1, '10.10.10.3')],
+        [(LEASE_REMOVED, MAC_2, '10.10.10.4')],
+    ])
+    self.assertEqual(self.lease_list_calls, 3)
+
+  def test_watch_expiry(self):
+    expires = self.now + 3600
+    lease_1 = get_lease_line(MAC_1, '10.10.10.2', expires)
+
+    changes = self._watch([
+        (1, [lease_1], self.now),
+        (1, [], expires - 1),
+        # The leases are resolved again once a lease expires
+        (1, [], expires),
+    ])
+    self.assertEqual(changes, [
+        [(LEASE_ADDED, MAC_1, '10.10.10.2')],
+        [],
+        [(LEASE_REMOVED, MAC_1, '10.10.10.2')],
+    ])
+    self.assertEqual(self.lease_list_calls, 2)
+
+  def test_watch_hw_addr(self):
+    lease_1 = get_lease_line(MAC_1, '10.10.10.2', self.now + 3600)
+    lease_2 = get_lease_line(MAC_2, '10.10.10.4', self.now + 3600)
+
+    changes = self._watch([
+        (1, [lease_1, lease_2], self.now),
+        (2, [lease_1], self.now),
+    ], hw_addr=MAC_2)
+    self.assertEqual(changes, [
+        [(LEASE_ADDED, MAC_2, '10.10.10.4')],
+        [(LEASE_REMOVED, MAC_2, '10.10.10.4')],
+    ])
+
+
+if __name__ == '__main__':
+  suite = unittest.TestSuite()
+  suite.addTest(DHCPLeasesTest('test_watch'))
+  suite.addTest(DHCPLeasesTest('test_watch_expiry'))
+  suite.addTest(DHCPLeasesTest('test_watch_hw_addr'))
+
+  runner = unittest.TextTestRunner()
+  runner.run(suite)
@@ -13,6 +13,8 @@
 # limitations under the License.
 """Contains all the necessary classes to maintain the 
 DHCP server"""
+import ipaddress
+import os
 import sys
 import time
 from common import logger
@@ -34,6 +36,13 @@ class DHCPServer:
     self.isc_dhcp = ISCDHCPServer()
     self.dhcp_config.resolve_config()
 
+    # Serve the network of a VLAN instead of the default network
+    vlan_network = os.environ.get('VLAN_IPV4_NETWORK')
+    if vlan_network:
+      LOGGER.info('Serving VLAN network ' + vlan_network)
+      self.dhcp_config.set_scope(ipaddress.ip_network(vlan_network))
+      self.dhcp_config.write_config()
+
   def restart(self):
     LOGGER.info('Restarting DHCP server')
     isc_started = self.isc_dhcp.restart()
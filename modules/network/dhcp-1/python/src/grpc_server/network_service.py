@@ -16,9 +16,11 @@ import proto.grpc_pb2_grpc as pb2_grpc
 import proto.grpc_pb2 as pb2
 
 from dhcp_server import DHCPServer
-from dhcp_config import DHCPConfig
+from dhcp_config import DHCPConfig, CONFIG_FILE
 from dhcp_leases import DHCPLeases
 
+import grpc
+import os
 import traceback
 from common import logger
 
@@ -32,14 +34,19 @@ class NetworkService(pb2_grpc.NetworkModule):
   def __init__(self):
     self._dhcp_server = DHCPServer()
     self._dhcp_config = None
+    self._dhcp_config_mtime = None
     self.dhcp_leases = DHCPLeases()
     global LOGGER
     LOGGER = logger.get_logger(LOG_NAME, 'dhcp-1')
 
   def _get_dhcp_config(self):
-    if self._dhcp_config is None:
+    # Resolve the config again once the file has been replaced, such as
+    # when the service is reset for a new session
+    mtime = os.stat(CONFIG_FILE).st_mtime_ns
+    if self._dhcp_config is None or mtime != self._dhcp_config_mtime:
       self._dhcp_config = DHCPConfig()
       self._dhcp_config.resolve_config()
+      self._dhcp_config_mtime = mtime
     return self._dhcp_config
 
   def RestartDHCPServer(self, request, context):  # pylint: disable=W0613
@@ -168,6 +175,28 @@ class NetworkService(pb2_grpc.NetworkModule):
       LOGGER.error(traceback.format_exc())
       return pb2.Response(code=500, message=fail_message)
 
+  def WatchLeases(self, request, context):
+    """
+      Stream the changes to the DHCP lease of the provided
+      MAC address, or to all leases if no address is provided
+    """
+    LOGGER.info('Watch leases called')
+    try:
+      for event_type, lease in self.dhcp_leases.watch(
+          context.is_active, request.hw_addr or None):
+        yield pb2.LeaseEvent(type=pb2.LeaseEvent.Type.Value(event_type),
+                             lease=pb2.Lease(hw_addr=lease.hw_addr,
+                                             ip=lease.ip,
+                                             hostname=lease.hostname,
+                                             expires=lease.expires,
+                                             manufacturer=lease.manufacturer))
+    except Exception as e:  # pylint: disable=W0718
+      fail_message = 'Failed to watch leases: ' + str(e)
+      LOGGER.error(fail_message)
+      LOGGER.error(traceback.format_exc())
+      context.abort(grpc.StatusCode.INTERNAL, fail_message)
+    LOGGER.info('Watch leases ended')
+
   def SetDHCPRange(self, request, context):  # pylint: disable=W0613
     """
       Change DHCP configuration and set the 
@@ -92,6 +92,18 @@ class Client():
 
     return response
 
+  def watch_leases(self, hw_addr=None, timeout=None):
+    # Create a request message
+    request = pb2.WatchLeasesRequest()
+    if hw_addr is not None:
+      request.hw_addr = hw_addr
+
+    # Make the RPC call, returning the stream of lease events
+    # which can be cancelled by the caller
+    response = self._stub.WatchLeases(request, timeout=timeout)
+
+    return response
+
   def get_status(self):
     # Create a request message
     request = pb2.GetStatusRequest()
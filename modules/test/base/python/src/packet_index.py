@@ -0,0 +1,464 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Columnar index of the packets in one or more capture files.
+
+The captures are parsed once into a NumPy structured array holding the
+fields used by the test modules, which is cached on disk and memory
+mapped so that each test can query it with vectorised filters instead of
+reading and dissecting the captures again."""
+import hashlib
+import ipaddress
+import json
+import os
+import struct
+import tempfile
+import threading
+import numpy as np
+
+CACHE_DIR = '/tmp/packet_index'
+
+# Incremented when the table layout or parsing changes
+INDEX_VERSION = 3
+
+ETH_P_IP = 0x0800
+ETH_P_ARP = 0x0806
+ETH_P_IPV6 = 0x86dd
+ETH_P_8021Q = 0x8100
+
+IPPROTO_ICMP = 1
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+IPPROTO_ICMPV6 = 58
+
+ICMPV6_ND_NS = 135
+DNS_PORTS = (53, 5353)
+DNS_TYPE_A = 1
+DNS_TYPE_AAAA = 28
+NTP_PORT = 123
+DHCP_PORTS = (67, 68)
+DHCP_MAGIC_COOKIE = b'\x63\x82\x53\x63'
+DHCP_MESSAGE_TYPE = 53
+
+# IP addresses are stored as 16 bytes, with IPv4 addresses IPv4-mapped
+# so that 0.0.0.0 can be distinguished from no address
+_IPV4_MAPPED = bytes(10) + b'\xff\xff'
+
+DTYPE = np.dtype([
+    ('time', 'f8'),
+    ('length', 'u4'),
+    ('capture', 'u1'),
+    ('src_mac', 'u8'),
+    ('dst_mac', 'u8'),
+    ('vlan', 'u2'),
+    ('ethertype', 'u2'),
+    ('ip_version', 'u1'),
+    ('src_ip', 'S16'),
+    ('dst_ip', 'S16'),
+    ('protocol', 'u1'),
+    ('src_port', 'u2'),
+    ('dst_port', 'u2'),
+    ('tcp_flags', 'u1'),
+    ('icmp_type', 'i2'),
+    ('nd_target', 'S16'),
+    ('arp_op', 'u2'),
+    ('arp_hwsrc', 'u8'),
+    ('dhcp_type', 'u1'),
+    ('dns_qr', 'i1'),
+    ('dns_qtype', 'u2'),
+    ('dns_qname', 'i4'),
+    ('dns_answer', 'S16'),
+    ('ntp_version', 'i1'),
+    ('ntp_mode', 'i1'),
+    ('ntp_stratum', 'i2'),
+])
+
+# Values of the fields which are not present in a packet
+_DEFAULTS = {name: 0 for name in DTYPE.names}
+_DEFAULTS.update(src_ip=b'',
+                 dst_ip=b'',
+                 nd_target=b'',
+                 dns_answer=b'',
+                 icmp_type=-1,
+                 dns_qr=-1,
+                 dns_qname=-1,
+                 ntp_version=-1,
+                 ntp_mode=-1,
+                 ntp_stratum=-1)
+
+MAC_FIELDS = ('src_mac', 'dst_mac', 'arp_hwsrc')
+IP_FIELDS = ('src_ip', 'dst_ip', 'nd_target', 'dns_answer')
+
+_PCAP_MAGIC = {
+    b'\xd4\xc3\xb2\xa1': ('<', 1e-6),
+    b'\xa1\xb2\xc3\xd4': ('>', 1e-6),
+    b'\x4d\x3c\xb2\xa1': ('<', 1e-9),
+    b'\xa1\xb2\x3c\x4d': ('>', 1e-9),
+}
+_LINKTYPE_ETHERNET = 1
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+class PacketIndex:
+  """Packets of a set of captures in capture order, with DNS query names
+  held in a separate string table referenced by the dns_qname column"""
+
+  def __init__(self, table, qnames):
+    self.table = table
+    self._qnames = qnames
+
+  def __len__(self):
+    return len(self.table)
+
+  @classmethod
+  def load(cls, capture_files, cache_dir=CACHE_DIR):
+    """Index of the capture files, read from the cache when the files
+    have not changed since they were indexed"""
+    key = _get_cache_key(capture_files)
+    with _lock:
+      if key in _indexes:
+        return _indexes[key]
+
+      table_file = os.path.join(cache_dir, key + '.npy')
+      qnames_file = os.path.join(cache_dir, key + '.json')
+      try:
+        with open(qnames_file, encoding='utf-8') as f:
+          qnames = json.load(f)
+        index = cls(_load_table(table_file), qnames)
+      except (OSError, ValueError):
+        index = build(capture_files)
+        _save(index, cache_dir, table_file, qnames_file)
+      _indexes[key] = index
+      return index
+
+  def mask(self, **conditions):
+    """Boolean mask of the packets matching all conditions. Each condition
+    is a column name and a value, or a collection of values any of which
+    may match. MAC and IP columns accept string addresses."""
+    mask = np.ones(len(self.table), dtype=bool)
+    for field, value in conditions.items():
+      column = self.table[field]
+      if isinstance(value, (list, tuple, set, frozenset)):
+        mask &= np.isin(column, [_encode(field, v) for v in value])
+      else:
+        mask &= column == _encode(field, value)
+    return mask
+
+  def select(self, mask=None, **conditions):
+    """Packets matching a mask and conditions"""
+    if mask is None:
+      mask = self.mask(**conditions)
+    elif conditions:
+      mask = mask & self.mask(**conditions)
+    return self.table[mask]
+
+  def get_qname(self, row):
+    index = int(row['dns_qname'])
+    return self._qnames[index] if index >= 0 else None
+
+
+def build(capture_files):
+  """Parse the capture files into an index"""
+  rows = []
+  qnames = {}
+  for capture, capture_file in enumerate(capture_files):
+    for timestamp, length, data in read_pcap(capture_file):
+      row = parse_packet(data, qnames)
+      row.update(time=timestamp, length=length, capture=capture)
+      rows.append(tuple(row[name] for name in DTYPE.names))
+  table = np.array(rows, dtype=DTYPE)
+  return PacketIndex(table, list(qnames))
+
+
+def read_pcap(capture_file):
+  """Timestamp, original length and data of each packet in an Ethernet
+  pcap file. Empty files contain no packets."""
+  with open(capture_file, 'rb') as f:
+    header = f.read(24)
+    if not header:
+      return
+    if len(header) < 24 or header[:4] not in _PCAP_MAGIC:
+      raise ValueError(f'Unsupported capture file format: {capture_file}')
+    endian, resolution = _PCAP_MAGIC[header[:4]]
+    linktype = struct.unpack(endian + 'I', header[20:24])[0]
+    if linktype != _LINKTYPE_ETHERNET:
+      raise ValueError(f'Unsupported link type {linktype}: {capture_file}')
+
+    record = struct.Struct(endian + 'IIII')
+    while True:
+      record_header = f.read(record.size)
+      if len(record_header) < record.size:
+        return
+      seconds, fraction, captured, length = record.unpack(record_header)
+      data = f.read(captured)
+      if len(data) < captured:
+        return
+      yield seconds + fraction * resolution, length, data
+
+
+def parse_packet(data, qnames):
+  """Fields of an Ethernet frame by column name, adding any DNS query
+  name to qnames"""
+  row = dict(_DEFAULTS)
+  if len(data) < 14:
+    return row
+  row['dst_mac'] = int.from_bytes(data[0:6], 'big')
+  row['src_mac'] = int.from_bytes(data[6:12], 'big')
+  ethertype = int.from_bytes(data[12:14], 'big')
+  offset = 14
+  if ethertype == ETH_P_8021Q and len(data) >= 18:
+    row['vlan'] = int.from_bytes(data[14:16], 'big') & 0xfff
+    ethertype = int.from_bytes(data[16:18], 'big')
+    offset = 18
+  row['ethertype'] = ethertype
+
+  if ethertype == ETH_P_ARP:
+    _parse_arp(data[offset:], row)
+    return row
+
+  if ethertype == ETH_P_IP:
+    payload = _parse_ipv4(data[offset:], row)
+  elif ethertype == ETH_P_IPV6:
+    payload = _parse_ipv6(data[offset:], row)
+  else:
+    return row
+  if payload is None:
+    return row
+
+  protocol = row['protocol']
+  if protocol in (IPPROTO_ICMP, IPPROTO_ICMPV6):
+    if payload:
+      row['icmp_type'] = payload[0]
+      if (protocol == IPPROTO_ICMPV6 and payload[0] == ICMPV6_ND_NS
+          and len(payload) >= 24):
+        row['nd_target'] = payload[8:24]
+  elif protocol == IPPROTO_TCP and len(payload) >= 20:
+    row['src_port'], row['dst_port'] = struct.unpack('!HH', payload[0:4])
+    row['tcp_flags'] = payload[13]
+    if DNS_PORTS[0] in (row['src_port'], row['dst_port']):
+      # DNS over TCP is prefixed with the message length
+      body = payload[(payload[12] >> 4) * 4:]
+      _parse_dns(body[2:], row, qnames)
+  elif protocol == IPPROTO_UDP and len(payload) >= 8:
+    row['src_port'], row['dst_port'] = struct.unpack('!HH', payload[0:4])
+    ports = (row['src_port'], row['dst_port'])
+    body = payload[8:]
+    if any(port in DNS_PORTS for port in ports):
+      _parse_dns(body, row, qnames)
+    elif NTP_PORT in ports:
+      _parse_ntp(body, row)
+    elif any(port in DHCP_PORTS for port in ports):
+      _parse_dhcp(body, row)
+  return row
+
+
+def _parse_arp(payload, row):
+  if len(payload) < 28:
+    return
+  row['arp_op'] = int.from_bytes(payload[6:8], 'big')
+  row['arp_hwsrc'] = int.from_bytes(payload[8:14], 'big')
+  row['src_ip'] = _IPV4_MAPPED + payload[14:18]
+  row['dst_ip'] = _IPV4_MAPPED + payload[24:28]
+
+
+def _parse_ipv4(payload, row):
+  if len(payload) < 20:
+    return None
+  header_length = (payload[0] & 0xf) * 4
+  row['ip_version'] = 4
+  row['protocol'] = payload[9]
+  row['src_ip'] = _IPV4_MAPPED + payload[12:16]
+  row['dst_ip'] = _IPV4_MAPPED + payload[16:20]
+  # Only the first fragment contains the transport header
+  if int.from_bytes(payload[6:8], 'big') & 0x1fff:
+    return None
+  total_length = int.from_bytes(payload[2:4], 'big')
+  return payload[header_length:max(total_length, header_length)]
+
+
+def _parse_ipv6(payload, row):
+  if len(payload) < 40:
+    return None
+  row['ip_version'] = 6
+  row['src_ip'] = payload[8:24]
+  row['dst_ip'] = payload[24:40]
+  next_header = payload[6]
+  offset = 40
+  # Skip the hop-by-hop, routing and destination options headers
+  while next_header in (0, 43, 60) and len(payload) >= offset + 8:
+    next_header = payload[offset]
+    offset += (payload[offset + 1] + 1) * 8
+  row['protocol'] = next_header
+  return payload[offset:]
+
+
+def _parse_dns(payload, row, qnames):
+  """Header, first question and, for responses, the first A or AAAA
+  record in the answer section of a DNS message"""
+  if len(payload) < 12:
+    return
+  row['dns_qr'] = payload[2] >> 7
+  qdcount, ancount = struct.unpack('!HH', payload[4:8])
+  offset = 12
+  for question in range(qdcount):
+    name, offset = _read_name(payload, offset)
+    if name is None or offset + 4 > len(payload):
+      return
+    if question == 0:
+      row['dns_qtype'] = int.from_bytes(payload[offset:offset + 2], 'big')
+      qname = b'.'.join(name).decode('utf-8', 'replace')
+      row['dns_qname'] = qnames.setdefault(qname, len(qnames))
+    offset += 4
+
+  if row['dns_qr'] != 1:
+    return
+  for _ in range(ancount):
+    name, offset = _read_name(payload, offset)
+    if name is None or offset + 10 > len(payload):
+      return
+    rtype, _, _, rdlength = struct.unpack('!HHIH',
+                                          payload[offset:offset + 10])
+    rdata = payload[offset + 10:offset + 10 + rdlength]
+    if rtype == DNS_TYPE_A and len(rdata) == 4:
+      row['dns_answer'] = _IPV4_MAPPED + rdata
+      return
+    if rtype == DNS_TYPE_AAAA and len(rdata) == 16:
+      row['dns_answer'] = rdata
+      return
+    offset += 10 + rdlength
+
+
+def _read_name(payload, offset):
+  """Labels of a DNS name and the offset following it, or None for the
+  labels if the name is malformed. Compression pointers are followed."""
+  labels = []
+  end = None
+  for _ in range(len(payload)):
+    if offset >= len(payload):
+      return None, offset
+    length = payload[offset]
+    if length == 0:
+      return labels, offset + 1 if end is None else end
+    if length & 0xc0 == 0xc0:
+      if offset + 2 > len(payload):
+        return None, offset
+      if end is None:
+        end = offset + 2
+      offset = int.from_bytes(payload[offset:offset + 2], 'big') & 0x3fff
+    elif length & 0xc0:
+      return None, offset
+    else:
+      labels.append(payload[offset + 1:offset + 1 + length])
+      offset += length + 1
+  # Compression pointers which loop
+  return None, offset
+
+
+def _parse_ntp(payload, row):
+  if len(payload) < 48:
+    return
+  row['ntp_version'] = (payload[0] >> 3) & 0x7
+  row['ntp_mode'] = payload[0] & 0x7
+  row['ntp_stratum'] = payload[1]
+
+
+def _parse_dhcp(payload, row):
+  if len(payload) < 240 or payload[236:240] != DHCP_MAGIC_COOKIE:
+    return
+  offset = 240
+  while offset < len(payload):
+    option = payload[offset]
+    if option == 255:
+      return
+    if option == 0:
+      offset += 1
+      continue
+    if offset + 1 >= len(payload):
+      return
+    length = payload[offset + 1]
+    if option == DHCP_MESSAGE_TYPE and length >= 1:
+      row['dhcp_type'] = payload[offset + 2]
+      return
+    offset += length + 2
+
+
+def mac_to_int(mac):
+  return int(mac.replace(':', '').replace('-', ''), 16)
+
+
+def int_to_mac(value):
+  return int(value).to_bytes(6, 'big').hex(':')
+
+
+def ip_to_bytes(ip):
+  address = ipaddress.ip_address(ip)
+  if address.version == 4:
+    return _IPV4_MAPPED + address.packed
+  return address.packed
+
+
+def bytes_to_ip(value):
+  """Address stored in an IP column, or None if no address was stored"""
+  if not value:
+    return None
+  value = value.ljust(16, b'\x00')
+  if value.startswith(_IPV4_MAPPED):
+    return str(ipaddress.IPv4Address(value[12:]))
+  return str(ipaddress.IPv6Address(value))
+
+
+def _encode(field, value):
+  if field in MAC_FIELDS and isinstance(value, str):
+    return mac_to_int(value)
+  if field in IP_FIELDS and isinstance(value, str):
+    return ip_to_bytes(value)
+  return value
+
+
+def _get_cache_key(capture_files):
+  key = hashlib.sha256(str(INDEX_VERSION).encode())
+  for capture_file in capture_files:
+    stat = os.stat(capture_file)
+    key.update(
+        f'{os.path.abspath(capture_file)}:{stat.st_size}:{stat.st_mtime_ns}\0'
+        .encode())
+  return key.hexdigest()
+
+
+def _load_table(table_file):
+  try:
+    return np.load(table_file, mmap_mode='r')
+  except ValueError:
+    # Empty tables cannot be memory mapped
+    return np.load(table_file)
+
+
+def _save(index, cache_dir, table_file, qnames_file):
+  """Write the cache files, replacing them atomically so that a partially
+  written cache is never read"""
+  try:
+    os.makedirs(cache_dir, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=cache_dir, delete=False) as f:
+      np.save(f, index.table)
+    os.replace(f.name, table_file)
+    with tempfile.NamedTemporaryFile('w',
+                                     dir=cache_dir,
+                                     delete=False,
+                                     encoding='utf-8') as f:
+      json.dump(index._qnames, f)  # pylint: disable=W0212
+    os.replace(f.name, qnames_file)
+  except OSError:
+    # The index can still be used without the cache
+    pass
@@ -0,0 +1,80 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Time and resources used by an individual test.
+
+Subprocesses are counted with an audit hook against the thread which
+started them, so tests run at the same time are counted separately. The
+CPU time of subprocesses and the peak RSS are only available for the
+whole container, so they include any tests run alongside."""
+import resource
+import sys
+import threading
+import time
+
+# Audit events raised when a subprocess is started. Popen may also raise
+# os.posix_spawn so it is not counted separately.
+SUBPROCESS_EVENTS = ('subprocess.Popen', 'os.system', 'os.spawn', 'os.fork',
+                     'os.forkpty')
+
+_thread_state = threading.local()
+_hook_lock = threading.Lock()
+_hook_installed = False
+
+
+class TestMetrics:
+  """Records the resources used from creation until stop is called"""
+
+  def __init__(self):
+    _install_hook()
+    self._subprocesses = _get_subprocess_count()
+    self._wall_time = time.monotonic()
+    self._cpu_time = time.thread_time()
+    self._child_cpu_time = _get_cpu_time(resource.RUSAGE_CHILDREN)
+    self._max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+  def stop(self):
+    """Metrics for the test as a dictionary. Times are in seconds and the
+    peak RSS increase in kilobytes."""
+    cpu_time = time.thread_time() - self._cpu_time
+    cpu_time += _get_cpu_time(resource.RUSAGE_CHILDREN) - self._child_cpu_time
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'wall_time': round(time.monotonic() - self._wall_time, 3),
+        'cpu_time': round(cpu_time, 3),
+        'peak_rss_delta': max_rss - self._max_rss,
+        'subprocesses': _get_subprocess_count() - self._subprocesses
+    }
+
+
+def _install_hook():
+  global _hook_installed
+  with _hook_lock:
+    if not _hook_installed:
+      # Audit hooks cannot be removed so only one is ever added
+      sys.addaudithook(_audit)
+      _hook_installed = True
+
+
+def _audit(event, args):  # pylint: disable=W0613
+  if event in SUBPROCESS_EVENTS:
+    _thread_state.subprocesses = _get_subprocess_count() + 1
+
+
+def _get_subprocess_count():
+  return getattr(_thread_state, 'subprocesses', 0)
+
+
+def _get_cpu_time(who):
+  usage = resource.getrusage(who)
+  return usage.ru_utime + usage.ru_stime
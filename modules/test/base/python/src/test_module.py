@@ -20,14 +20,19 @@ import os
 import util
 from datetime import datetime
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from jinja2 import Environment, FileSystemLoader, BaseLoader
 
 from common.statuses import TestResult
+from test_metrics import TestMetrics
 
 LOGGER = None
 RESULTS_DIR = '/runtime/output/'
 CONF_FILE = '/testrun/conf/module_config.json'
 
+# Maximum number of parallel_safe tests run at the same time
+TEST_WORKERS = 4
+
 
 class TestModule:
   """An example test module."""
@@ -147,90 +152,114 @@ class TestModule:
         json_results = json.dumps({'results': tests}, indent=2)
         self._write_results(json_results)
         return
-    for test in tests:
-      test_method_name = '_' + test['name'].replace('.', '_')
-      result = None
-
-      test['start'] = datetime.now().isoformat()
-
-      if ('enabled' in test and test['enabled']) or 'enabled' not in test:
-        LOGGER.debug('Attempting to run test: ' + test['name'])
-        # Resolve the correct python method by test name and run test
-        if hasattr(self, test_method_name):
-          try:
-            if 'config' in test:
-              result = getattr(self, test_method_name)(config=test['config'])
-            else:
-              result = getattr(self, test_method_name)()
-          except Exception as e:  # pylint: disable=W0718
-            LOGGER.error(f'An error occurred whilst running {test["name"]}') # pylint: disable=W1405
-            LOGGER.error(e)
-            traceback.print_exc()
-        else:
-          LOGGER.error(f'Test {test["name"]} has not been implemented') # pylint: disable=W1405
-          result = TestResult.ERROR, 'This test could not be found'
-      else:
-        LOGGER.debug(f'Test {test["name"]} is disabled') # pylint: disable=W1405
-        result = (TestResult.DISABLED,
-                  'This test did not run because it is disabled')
+    self._run_module_tests(tests)
 
-      # Check if the test module has returned a result
-      if result is not None:
+    json_results = json.dumps({'results': tests}, indent=2)
+    self._write_results(json_results)
 
-        # Compliant or non-compliant as a boolean only
-        if isinstance(result, bool):
-          test['result'] = (TestResult.COMPLIANT
-                            if result else TestResult.NON_COMPLIANT)
-          test['description'] = 'No description was provided for this test'
-        else:
-          # Error result
-          if result[0] is None:
-            test['result'] = TestResult.ERROR
-            if len(result) > 1:
-              test['description'] = result[1]
-            else:
-              test['description'] = 'An error occurred whilst running this test'
-
-          # Compliant / Non-Compliant result
-          elif isinstance(result[0], bool):
-            test['result'] = (TestResult.COMPLIANT
-                              if result[0] else TestResult.NON_COMPLIANT)
-          # Result may be a string, e.g Error, Feature Not Detected
-          elif isinstance(result[0], str):
-            test['result'] = result[0]
+  def _run_module_tests(self, tests):
+    """Run the tests in order. Tests marked as parallel_safe in the module
+    config are run in a thread pool alongside the others, which remain
+    serial. Results are recorded against each test so their order is
+    unchanged."""
+    workers = self._config['config'].get('test_workers', TEST_WORKERS)
+    parallel_tests = [test for test in tests if test.get('parallel_safe')]
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+      running = [
+          executor.submit(self._run_test, test) for test in parallel_tests
+      ]
+      for test in tests:
+        if not test.get('parallel_safe'):
+          self._run_test(test)
+      for future in running:
+        future.result()
+
+  def _run_test(self, test):
+    """Run a single test and record its result in the test config"""
+    test_method_name = '_' + test['name'].replace('.', '_')
+    result = None
+
+    test['start'] = datetime.now().isoformat()
+    metrics = TestMetrics()
+
+    if ('enabled' in test and test['enabled']) or 'enabled' not in test:
+      LOGGER.debug('Attempting to run test: ' + test['name'])
+      # Resolve the correct python method by test name and run test
+      if hasattr(self, test_method_name):
+        try:
+          if 'config' in test:
+            result = getattr(self, test_method_name)(config=test['config'])
           else:
-            LOGGER.error(f'Unknown result detected: {result[0]}')
-            test['result'] = TestResult.ERROR
-
-          # Check that description is a string
-          if isinstance(result[1], str):
+            result = getattr(self, test_method_name)()
+        except Exception as e:  # pylint: disable=W0718
+          LOGGER.error(f'An error occurred whilst running {test["name"]}') # pylint: disable=W1405
+          LOGGER.error(e)
+          traceback.print_exc()
+      else:
+        LOGGER.error(f'Test {test["name"]} has not been implemented') # pylint: disable=W1405
+        result = TestResult.ERROR, 'This test could not be found'
+    else:
+      LOGGER.debug(f'Test {test["name"]} is disabled') # pylint: disable=W1405
+      result = (TestResult.DISABLED,
+                'This test did not run because it is disabled')
+
+    test['metrics'] = metrics.stop()
+    LOGGER.debug(f'Test {test["name"]} metrics: {test["metrics"]}') # pylint: disable=W1405
+
+    # Check if the test module has returned a result
+    if result is not None:
+
+      # Compliant or non-compliant as a boolean only
+      if isinstance(result, bool):
+        test['result'] = (TestResult.COMPLIANT
+                          if result else TestResult.NON_COMPLIANT)
+        test['description'] = 'No description was provided for this test'
+      else:
+        # Error result
+        if result[0] is None:
+          test['result'] = TestResult.ERROR
+          if len(result) > 1:
             test['description'] = result[1]
           else:
-            test['description'] = 'No description was provided for this test'
-
-          # Check if details were provided
-          if len(result)>2:
-            test['details'] = result[2]
-
-          # Check if tags were provided
-          if len(result)>3:
-            test['tags'] = result[3]
-      else:
-        LOGGER.debug('No result was returned from the test module')
-        test['result'] = TestResult.ERROR
-        test['description'] = 'An error occurred whilst running this test'
+            test['description'] = 'An error occurred whilst running this test'
 
-      # Remove the steps to resolve if compliant already
-      if (test['result'] == TestResult.COMPLIANT and 'recommendations' in test):
-        test.pop('recommendations')
+        # Compliant / Non-Compliant result
+        elif isinstance(result[0], bool):
+          test['result'] = (TestResult.COMPLIANT
+                            if result[0] else TestResult.NON_COMPLIANT)
+        # Result may be a string, e.g Error, Feature Not Detected
+        elif isinstance(result[0], str):
+          test['result'] = result[0]
+        else:
+          LOGGER.error(f'Unknown result detected: {result[0]}')
+          test['result'] = TestResult.ERROR
 
-      test['end'] = datetime.now().isoformat()
-      duration = datetime.fromisoformat(test['end']) - datetime.fromisoformat(
-          test['start'])
-      test['duration'] = str(duration)
+        # Check that description is a string
+        if isinstance(result[1], str):
+          test['description'] = result[1]
+        else:
+          test['description'] = 'No description was provided for this test'
 
-    json_results = json.dumps({'results': tests}, indent=2)
-    self._write_results(json_results)
+        # Check if details were provided
+        if len(result)>2:
+          test['details'] = result[2]
+
+        # Check if tags were provided
+        if len(result)>3:
+          test['tags'] = result[3]
+    else:
+      LOGGER.debug('No result was returned from the test module')
+      test['result'] = TestResult.ERROR
+      test['description'] = 'An error occurred whilst running this test'
+
+    # Remove the steps to resolve if compliant already
+    if (test['result'] == TestResult.COMPLIANT and 'recommendations' in test):
+      test.pop('recommendations')
+
+    test['end'] = datetime.now().isoformat()
+    duration = datetime.fromisoformat(test['end']) - datetime.fromisoformat(
+        test['start'])
+    test['duration'] = str(duration)
 
   def _read_config(self, conf_file=CONF_FILE):
     with open(conf_file, encoding='utf-8') as f:
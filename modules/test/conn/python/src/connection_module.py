@@ -13,26 +13,30 @@
 # limitations under the License.
 """Connection test module"""
 import util
-import time
 import traceback
 import os
-from scapy.error import Scapy_Exception
-from scapy.all import rdpcap, DHCP, ARP, Ether, ICMP, IPv6, ICMPv6ND_NS
+import numpy as np
+from packet_index import (PacketIndex, bytes_to_ip, int_to_mac, ETH_P_ARP,
+                          ETH_P_IPV6, ICMPV6_ND_NS)
 from test_module import TestModule
 from dhcp1.client import Client as DHCPClient1
 from dhcp2.client import Client as DHCPClient2
 from host.client import Client as HostClient
-from dhcp_util import DHCPUtil
+from dhcp_util import DHCPUtil, LEASE_REMOVED
 from port_stats_util import PortStatsUtil
+from common import oui_index
 import json
 
 LOG_NAME = 'test_connection'
 OUI_FILE = '/usr/local/etc/oui.txt'
+OUI_INDEX_FILE = '/usr/local/etc/oui.idx'
 DEFAULT_BIN_DIR = '/testrun/bin'
 STARTUP_CAPTURE_FILE = '/runtime/device/startup.pcap'
 MONITOR_CAPTURE_FILE = '/runtime/device/monitor.pcap'
 DHCP_CAPTURE_FILE = '/runtime/network/dhcp-1.pcap'
+TRAFFIC_COUNTERS_FILE = '/runtime/network/traffic_counters.json'
 SLAAC_PREFIX = 'fd10:77be:4186'
+DHCP_REQUEST = 3
 TR_CONTAINER_MAC_PREFIX = '9a:02:57:1e:8f:'
 LOGGER = None
 
@@ -40,6 +44,15 @@ LOGGER = None
 # set in the DHCP server
 LEASE_WAIT_TIME_DEFAULT = 60
 
+# Upper bounds for the device to respond to ping at a new IP address,
+# for its lease to be removed while it is disconnected and for it to
+# replace the reserved lease once the network is restored. The ping
+# bound matches the previous 5 rounds of 5 pings with a 2 second timeout
+# and a 2 second delay, followed by a 5 second sleep
+PING_WAIT_TIME_DEFAULT = 125
+DISCONNECT_WAIT_TIME_DEFAULT = 10
+RESTORE_WAIT_TIME_DEFAULT = 30
+
 
 class ConnectionModule(TestModule):
   """Connection Test module"""
@@ -50,7 +63,8 @@ class ConnectionModule(TestModule):
                results_dir=None,
                startup_capture_file=STARTUP_CAPTURE_FILE,
                monitor_capture_file=MONITOR_CAPTURE_FILE,
-               bin_dir=DEFAULT_BIN_DIR):
+               bin_dir=DEFAULT_BIN_DIR,
+               traffic_counters_file=TRAFFIC_COUNTERS_FILE):
 
     super().__init__(module_name=module,
                      log_name=LOG_NAME,
@@ -66,7 +80,9 @@ class ConnectionModule(TestModule):
     self.host_client = HostClient()
     self._dhcp_util = DHCPUtil(self.dhcp1_client, self.dhcp2_client, LOGGER)
     self._lease_wait_time_sec = LEASE_WAIT_TIME_DEFAULT
+    self._waits = []
     self._bin_dir = bin_dir
+    self._traffic_counters_file = traffic_counters_file
 
     # ToDo: Move this into some level of testing, leave for
     # reference until tests are implemented with these calls
@@ -118,37 +134,24 @@ class ConnectionModule(TestModule):
       LOGGER.error('No device IP could be resolved')
       return 'Error', 'Could not resolve device IP address'
 
-    no_arp = True
-
-    # Read all the pcap files
-    packets = rdpcap(self.startup_capture_file) + rdpcap(
-        self.monitor_capture_file)
-    for packet in packets:
-
-      # We are not interested in packets unless they are ARP packets
-      if not ARP in packet:
-        continue
-
-      # We are only interested in packets from the device
-      if packet.src != self._device_mac:
-        continue
-
-      # Get the ARP packet
-      arp_packet = packet[ARP]
-      no_arp = False
+    # ARP packets from the device
+    arp_packets = self._get_packet_index().select(ethertype=ETH_P_ARP,
+                                                  src_mac=self._device_mac)
+    if len(arp_packets) == 0:
+      return None, 'No ARP packets from the device found'
 
-      # Check MAC address matches IP address
-      if (arp_packet.hwsrc == self._device_mac
-          and (arp_packet.psrc not in (self._device_ipv4_addr, '0.0.0.0'))
-          and not arp_packet.psrc.startswith('169.254')):
+    # Check MAC address matches IP address
+    sent_by_device = arp_packets[arp_packets['arp_hwsrc'] ==
+                                 arp_packets['src_mac']]
+    for psrc in np.unique(sent_by_device['src_ip']):
+      psrc = bytes_to_ip(psrc)
+      if (psrc not in (self._device_ipv4_addr, '0.0.0.0')
+          and not psrc.startswith('169.254')):
         LOGGER.info(f'Bad ARP packet detected for MAC: {self._device_mac}')
-        LOGGER.info(f'''ARP packet from IP {arp_packet.psrc}
+        LOGGER.info(f'''ARP packet from IP {psrc}
                     does not match {self._device_ipv4_addr}''')
         return False, 'Device is sending false ARP response'
 
-    if no_arp:
-      return None, 'No ARP packets from the device found'
-
     return True, 'Device uses ARP correctly'
 
   def _connection_switch_dhcp_snooping(self):
@@ -156,27 +159,11 @@ class ConnectionModule(TestModule):
 
     disallowed_dhcp_types = [2, 4, 5, 6, 9, 10, 12, 13, 15, 17]
 
-    # Read all the pcap files
-    packets = rdpcap(self.startup_capture_file) + rdpcap(
-        self.monitor_capture_file)
-    for packet in packets:
-
-      # We are not interested in packets unless they are DHCP packets
-      if not DHCP in packet:
-        continue
-
-      # We are only interested in packets from the device
-      if packet.src != self._device_mac:
-        continue
-
-      dhcp_type = self._get_dhcp_type(packet)
-      if dhcp_type in disallowed_dhcp_types:
-
-        # Check if packet is responding with port unreachable
-        if ICMP in packet and packet[ICMP].type == 3:
-          continue
-
-        return False, 'Device has sent disallowed DHCP message'
+    # DHCP packets quoted in ICMP port unreachable responses are not
+    # indexed as DHCP packets
+    if len(self._get_packet_index().select(
+        src_mac=self._device_mac, dhcp_type=disallowed_dhcp_types)) > 0:
+      return False, 'Device has sent disallowed DHCP message'
 
     return True, 'Device does not act as a DHCP server'
 
@@ -238,21 +225,18 @@ class ConnectionModule(TestModule):
       LOGGER.info('No MAC address found.')
       return result, 'No MAC address found.'
 
-    # Read all the pcap files containing DHCP packet information
-    packets = rdpcap(self.startup_capture_file) + rdpcap(
-        self.monitor_capture_file)
-
     # Extract MAC addresses from DHCP packets
+    packet_index = self._get_packet_index()
     mac_addresses = set()
-    LOGGER.info('Inspecting: ' + str(len(packets)) + ' packets')
-    for packet in packets:
-      if DHCP in packet:
-        if self._get_dhcp_type(packet) == 3:
-          mac_address = packet[Ether].src
-          LOGGER.info('DHCPREQUEST detected MAC address: ' + mac_address)
-          if (not mac_address.startswith(TR_CONTAINER_MAC_PREFIX)
-              and mac_address != self._dev_iface_mac):
-            mac_addresses.add(mac_address.upper())
+    LOGGER.info('Inspecting: ' + str(len(packet_index)) + ' packets')
+    # Clients on the VLANs share the device interface but are not tested
+    requests = packet_index.select(dhcp_type=DHCP_REQUEST, vlan=0)
+    for mac_address in np.unique(requests['src_mac']):
+      mac_address = int_to_mac(mac_address)
+      LOGGER.info('DHCPREQUEST detected MAC address: ' + mac_address)
+      if (not mac_address.startswith(TR_CONTAINER_MAC_PREFIX)
+          and mac_address != self._dev_iface_mac):
+        mac_addresses.add(mac_address.upper())
 
     # Check if the device mac address is in the list of DHCPREQUESTs
     result = self._device_mac.upper() in mac_addresses
@@ -270,11 +254,6 @@ class ConnectionModule(TestModule):
     else:
       return result, 'Device is using multiple IP addresses'
 
-  def _get_dhcp_type(self, packet):
-    for option in packet[DHCP].options:
-      if 'message-type' in option:
-        return option[1]
-
   def _connection_target_ping(self):
     LOGGER.info('Running connection.target_ping')
 
@@ -291,6 +270,7 @@ class ConnectionModule(TestModule):
 
   def _connection_ipaddr_ip_change(self, config):
     LOGGER.info('Running connection.ipaddr.ip_change')
+    self._waits = []
     # Resolve the configured lease wait time
     if (not 'lease_wait_time_sec' in config or
       not self._dhcp_util.setup_single_dhcp_server()):
@@ -310,32 +290,23 @@ class ConnectionModule(TestModule):
     if not self._dhcp_util.add_reserved_lease(lease['hostname'],
                                               lease['hw_addr'], ip_address):
       return None, 'Failed to create reserved lease for device'
-    self._dhcp_util.wait_for_lease_expire(lease,
-                                          self._lease_wait_time_sec)
+    self._wait_for_lease_expire(lease)
     LOGGER.info('Checking device accepted new IP')
-    for _ in range(5):
-      LOGGER.info('Pinging device at IP: ' + ip_address)
-      if self._ping(ip_address):
-        LOGGER.debug('Ping success')
-        LOGGER.debug('Reserved lease confirmed active in device')
-        result = True, 'Device has accepted an IP address change'
-        LOGGER.debug('Restoring DHCP failover configuration')
-        break
-      else:
-        LOGGER.info('Device did not respond to ping')
-        result = False, 'Device did not accept IP address change'
-        time.sleep(5)  # Wait 5 seconds before trying again
+    if self._wait_for_ping(ip_address, config):
+      LOGGER.debug('Reserved lease confirmed active in device')
+      result = True, 'Device has accepted an IP address change'
+      LOGGER.debug('Restoring DHCP failover configuration')
+    else:
+      result = False, 'Device did not accept IP address change'
     self._dhcp_util.delete_reserved_lease(lease['hw_addr'])
     # Restore the network
     self._dhcp_util.restore_failover_dhcp_server()
-    LOGGER.info('Waiting 30 seconds for reserved lease to expire')
-    time.sleep(30)
-    self._dhcp_util.get_cur_lease(mac_address=self._device_mac,
-                                timeout=self._lease_wait_time_sec)
-    return result
+    self._wait_for_restored_lease(config)
+    return result + (self._get_wait_details(),)
 
   def _connection_ipaddr_dhcp_failover(self, config):
     LOGGER.info('Running connection.ipaddr.dhcp_failover')
+    self._waits = []
     # Resolve the configured lease wait time
     if 'lease_wait_time_sec' in config:
       self._lease_wait_time_sec = config['lease_wait_time_sec']
@@ -359,23 +330,24 @@ class ConnectionModule(TestModule):
     # Shutdown the primary server
     if not self._dhcp_util.stop_dhcp_server(dhcp_server_primary=True):
       return None, 'Failed to shutdown primary DHCP server'
-    # Wait until the current lease is expired
-    self._dhcp_util.wait_for_lease_expire(lease,
-                                          self._lease_wait_time_sec)
+    # Wait until the current lease is renewed or expired
+    self._wait_for_lease_expire(lease)
     # Make sure the device has received a new lease from the
     # secondary server
     lease = self._dhcp_util.get_cur_lease(mac_address=self._device_mac,
                                              timeout=self._lease_wait_time_sec)
     if lease is None:
-      return False, ('Device did not recieve a new lease from '
-                               'secondary DHCP server')
+      return (False, ('Device did not recieve a new lease from '
+                      'secondary DHCP server'), self._get_wait_details())
     if not self._dhcp_util.is_lease_active(lease):
-      return False, 'Could not validate lease is active in device'
-    return True, ('Secondary DHCP server lease confirmed active '
-                                'in device')
+      return (False, 'Could not validate lease is active in device',
+              self._get_wait_details())
+    return (True, 'Secondary DHCP server lease confirmed active in device',
+            self._get_wait_details())
 
-  def _connection_dhcp_disconnect(self) -> tuple[str | bool, str]:
+  def _connection_dhcp_disconnect(self, config) -> tuple[str | bool, ...]:
     LOGGER.info('Running connection.dhcp.disconnect')
+    self._waits = []
     dev_iface = os.getenv('DEV_IFACE')
     rpc_error_msg = 'Unable to connect to gRPC server'
     try:
@@ -402,14 +374,9 @@ class ConnectionModule(TestModule):
       return 'Error', 'Failed to set device interface to down state'
     LOGGER.info('Device interface set to down state')
 
-    # Wait for the lease to expire
-    self._dhcp_util.wait_for_lease_expire(lease,
-                                          self._lease_wait_time_sec)
-
-    # Wait an additonal 10 seconds to better test a true disconnect
-    # state
-    LOGGER.info('Waiting 10 seconds before bringing iface back up')
-    time.sleep(10)
+    # Wait for the lease to be removed to better test a true
+    # disconnect state
+    self._wait_for_disconnect(lease, config)
     try:
       # Enable the device interface
       iface_up = self.host_client.set_iface_up(dev_iface)
@@ -424,13 +391,17 @@ class ConnectionModule(TestModule):
                       mac_address=self._device_mac,
                       timeout=self._lease_wait_time_sec)
     if lease is None:
-      return False, 'Device did not recieve a DHCP lease after disconnect'
+      return (False, 'Device did not recieve a DHCP lease after disconnect',
+              self._get_wait_details())
     if not self._dhcp_util.is_lease_active(lease):
-      return False, 'Could not confirm DHCP lease active after disconnect'
-    return True, 'Device received a DHCP lease after disconnect'
+      return (False, 'Could not confirm DHCP lease active after disconnect',
+              self._get_wait_details())
+    return (True, 'Device received a DHCP lease after disconnect',
+            self._get_wait_details())
 
-  def _connection_dhcp_disconnect_ip_change(self):
+  def _connection_dhcp_disconnect_ip_change(self, config):
     LOGGER.info('Running connection.dhcp.disconnect_ip_change')
+    self._waits = []
     result = None
     description = ''
     reserved_lease = None
@@ -457,37 +428,20 @@ class ConnectionModule(TestModule):
                 if iface_down:
                   LOGGER.info('Device interface set to down state')
 
-                  # Wait for the lease to expire
-                  self._dhcp_util.wait_for_lease_expire(lease,
-                                                    self._lease_wait_time_sec)
-
                   if reserved_lease:
-                    # Wait an additonal 10 seconds to better test a true
-                    # disconnect state
-                    LOGGER.info(
-                        'Waiting 10 seconds before bringing iface back up')
-                    time.sleep(10)
+                    # Wait for the lease to be removed to better test a
+                    # true disconnect state
+                    self._wait_for_disconnect(lease, config)
 
                     # Enable the device interface
                     iface_up = self.host_client.set_iface_up(dev_iface)
                     if iface_up:
                       LOGGER.info('Device interface set to up state')
                       # Confirm device receives a new lease
-                      reserved_lease_accepted = False
                       LOGGER.info('Checking device accepted new IP')
-                      for _ in range(5):
-                        LOGGER.info('Pinging device at IP: ' + ip_address)
-                        if self._ping(ip_address):
-                          LOGGER.debug('Ping success')
-                          LOGGER.debug(
-                              'Reserved lease confirmed active in device')
-                          reserved_lease_accepted = True
-                          break
-                        else:
-                          LOGGER.info('Device did not respond to ping')
-                          time.sleep(5)  # Wait 5 seconds before trying again
-
-                      if reserved_lease_accepted:
+                      if self._wait_for_ping(ip_address, config):
+                        LOGGER.debug(
+                            'Reserved lease confirmed active in device')
                         result = True
                         description = ('Device received expected IP address '
                                       'after disconnect')
@@ -531,22 +485,68 @@ class ConnectionModule(TestModule):
 
     # Restore the network
     self._dhcp_util.restore_failover_dhcp_server()
-    LOGGER.info('Waiting 30 seconds for reserved lease to expire')
-    time.sleep(30)
+    self._wait_for_restored_lease(config)
+    return result, description, self._get_wait_details()
+
+  def _wait_for_lease_expire(self, lease):
+    """Wait for the lease to be renewed, replaced or to expire"""
+    change, waited = self._dhcp_util.wait_for_lease_expire(
+        lease, self._lease_wait_time_sec)
+    self._record_wait('lease to expire', waited, change or 'unchanged')
+    return change
+
+  def _wait_for_disconnect(self, lease, config):
+    """Wait for the DHCP server to remove the lease of the disconnected
+    device"""
+    if self._wait_for_lease_expire(lease) == LEASE_REMOVED:
+      return
+    wait_time = config.get('disconnect_wait_time_sec',
+                           DISCONNECT_WAIT_TIME_DEFAULT)
+    LOGGER.info(f'Waiting up to {wait_time} seconds for lease to be removed '
+                'before bringing iface back up')
+    change, waited = self._dhcp_util.wait_for_lease_change(lease, wait_time)
+    self._record_wait('lease to be removed', waited, change or 'unchanged')
+
+  def _wait_for_ping(self, ip_address, config):
+    """Wait for the device to respond to ping at an IP address"""
+    wait_time = config.get('ping_wait_time_sec', PING_WAIT_TIME_DEFAULT)
+    LOGGER.info(f'Pinging device at IP: {ip_address} for up to {wait_time} '
+                'seconds')
+    reachable, waited = self._dhcp_util.wait_for_ping(ip_address, wait_time)
+    self._record_wait(f'device to respond to ping at {ip_address}', waited,
+                      'responded' if reachable else 'no response')
+    if not reachable:
+      LOGGER.info('Device did not respond to ping')
+    return reachable
+
+  def _wait_for_restored_lease(self, config):
+    """Wait for the device to replace the reserved lease once the
+    network is restored, then for its new lease"""
+    lease = self._dhcp_util.get_cur_lease(mac_address=self._device_mac,
+                                          timeout=0)
+    if lease is not None:
+      wait_time = config.get('restore_wait_time_sec',
+                             RESTORE_WAIT_TIME_DEFAULT)
+      LOGGER.info(f'Waiting up to {wait_time} seconds for reserved lease '
+                  'to expire')
+      change, waited = self._dhcp_util.wait_for_lease_change(lease, wait_time)
+      self._record_wait('reserved lease to expire', waited, change or
+                        'unchanged')
     self._dhcp_util.get_cur_lease(mac_address=self._device_mac,
                                   timeout=self._lease_wait_time_sec)
-    return result, description
+
+  def _record_wait(self, reason, waited, outcome):
+    wait = f'Waited {waited:.1f} seconds for {reason}: {outcome}'
+    LOGGER.info(wait)
+    self._waits.append(wait)
+
+  def _get_wait_details(self):
+    """Time waited for each condition during the current test"""
+    return '\n'.join(self._waits)
 
   def _get_oui_manufacturer(self, mac_address):
-    # Do some quick fixes on the format of the mac_address
-    # to match the oui file pattern
-    mac_address = mac_address.replace(':', '-').upper()
-    with open(OUI_FILE, 'r', encoding='UTF-8') as file:
-      for line in file:
-        if mac_address.startswith(line[:8]):
-          start = line.index('(hex)') + len('(hex)')
-          return line[start:].strip()  # Extract the company name
-    return None
+    # The index is compiled from the oui file when the image is built
+    return oui_index.load(OUI_INDEX_FILE, OUI_FILE).lookup(mac_address)
 
   def _connection_ipv6_slaac(self):
     LOGGER.info('Running connection.ipv6_slaac')
@@ -564,28 +564,35 @@ class ConnectionModule(TestModule):
         return False, 'Device does not support IPv6'
 
   def _has_slaac_address(self):
-    packet_capture = (rdpcap(self.startup_capture_file) +
-                      rdpcap(self.monitor_capture_file))
-
-    try:
-      packet_capture += rdpcap(DHCP_CAPTURE_FILE)
-    except (FileNotFoundError, Scapy_Exception):
-      LOGGER.error('dhcp-1.pcap not found or empty, ignoring')
-
-    sends_ipv6 = False
-    for packet_number, packet in enumerate(packet_capture, start=1):
-      if IPv6 in packet and packet.src == self._device_mac:
-        sends_ipv6 = True
-        if ICMPv6ND_NS in packet:
-          ipv6_addr = str(packet[ICMPv6ND_NS].tgt)
-          if ipv6_addr.startswith(SLAAC_PREFIX):
-            self._device_ipv6_addr = ipv6_addr
-            LOGGER.info('SLAAC address detected at packet number' +
-                        f'{packet_number}')
-            LOGGER.info(f'Device has formed SLAAC address {ipv6_addr}')
-            return True, sends_ipv6
+    capture_files = [self.startup_capture_file, self.monitor_capture_file]
+    if os.path.exists(DHCP_CAPTURE_FILE):
+      capture_files.append(DHCP_CAPTURE_FILE)
+    else:
+      LOGGER.error('dhcp-1.pcap not found, ignoring')
+    packet_index = self._get_packet_index(capture_files)
+
+    ipv6_packets = packet_index.mask(ethertype=ETH_P_IPV6,
+                                     src_mac=self._device_mac)
+    sends_ipv6 = bool(ipv6_packets.any())
+    neighbor_solicitations = np.flatnonzero(
+        packet_index.mask(icmp_type=ICMPV6_ND_NS) & ipv6_packets)
+    for packet_number in neighbor_solicitations:
+      ipv6_addr = bytes_to_ip(packet_index.table[packet_number]['nd_target'])
+      if ipv6_addr is not None and ipv6_addr.startswith(SLAAC_PREFIX):
+        self._device_ipv6_addr = ipv6_addr
+        LOGGER.info('SLAAC address detected at packet number' +
+                    f'{packet_number + 1}')
+        LOGGER.info(f'Device has formed SLAAC address {ipv6_addr}')
+        return True, sends_ipv6
     return False, sends_ipv6
 
+  def _get_packet_index(self, capture_files=None):
+    """Index of the packets in the startup and monitor captures, parsed
+    once and shared between tests"""
+    if capture_files is None:
+      capture_files = [self.startup_capture_file, self.monitor_capture_file]
+    return PacketIndex.load(capture_files)
+
   def _connection_ipv6_ping(self):
     LOGGER.info('Running connection.ipv6_ping')
     if self._device_ipv6_addr is None:
@@ -623,10 +630,9 @@ class ConnectionModule(TestModule):
     if response.code != 200:
       return False, 'Secondary DHCP server stop command failed'
     LOGGER.info('Secondary DHCP server stop command success')
-    time.sleep(3)  # Give some time for the server to stop
     LOGGER.info('Checking secondary DHCP server status')
-    response = self.dhcp2_client.get_status()
-    if response.code != 200:
+    if not self._dhcp_util.wait_for_dhcp_server_status(
+        False, dhcp_server_primary=False):
       return False, 'Secondary DHCP server still running'
     LOGGER.info('Secondary DHCP server stopped')
     LOGGER.info('Configuring primary DHCP server')
@@ -668,6 +674,12 @@ class ConnectionModule(TestModule):
     return result, description, details
 
   def get_network_packet_types(self):
+    # Use the counters of the device bridge if available, rather than
+    # counting the packets in the capture files
+    counters = self._get_traffic_counters()
+    if counters is not None:
+      return counters
+
     combined_results = {
         'mac_address': self._device_mac,
         'multicast': {
@@ -699,6 +711,18 @@ class ConnectionModule(TestModule):
       combined_results['unicast']['to'] += packets['unicast']['to']
     return combined_results
 
+  def _get_traffic_counters(self):
+    try:
+      with open(self._traffic_counters_file, 'r', encoding='utf-8') as f:
+        counters = json.load(f)
+    except (OSError, ValueError) as e:
+      LOGGER.debug(f'Traffic counters not available: {e}')
+      return None
+    if counters.get('mac_address') != self._device_mac:
+      LOGGER.debug('Traffic counters are not for the device')
+      return None
+    return counters
+
   def enable_failover(self):
     # Move primary DHCP server to primary failover
     LOGGER.info('Configuring primary failover DHCP server')
@@ -720,6 +744,7 @@ class ConnectionModule(TestModule):
     return start_int <= ip_int <= end_int
 
   def _run_subnet_test(self, config):
+    self._waits = []
 
     # Resolve the configured dhcp subnet ranges
     ranges = None
@@ -790,12 +815,9 @@ class ConnectionModule(TestModule):
       lease = self._dhcp_util.get_cur_lease(mac_address=self._device_mac,
                                             timeout=self._lease_wait_time_sec)
 
-      # Check if lease is active
+      # Check if lease is active, otherwise wait for a new lease below
       if lease is not None:
-        self._dhcp_util.wait_for_lease_expire(lease, self._lease_wait_time_sec)
-      else:
-        # If not, wait for 30 seconds as a fallback
-        time.sleep(30)
+        self._wait_for_lease_expire(lease)
 
       # Wait for a new lease to be provided before exiting test
       # to prevent other test modules from failing
@@ -817,12 +839,12 @@ class ConnectionModule(TestModule):
     except Exception:  # pylint: disable=W0718
       LOGGER.error('Failed to restore DHCP server configuration')
 
-    return final_result, final_result_details
+    return final_result, final_result_details, self._get_wait_details()
 
   def _test_subnet(self, subnet, lease):
     LOGGER.info('Testing subnet: ' + str(subnet))
     if self._change_subnet(subnet):
-      self._dhcp_util.wait_for_lease_expire(lease, self._lease_wait_time_sec)
+      self._wait_for_lease_expire(lease)
       LOGGER.debug('Checking for new lease')
       # Subnet changes tend to take longer to pick up so we'll allow
       # for twice the lease wait time
@@ -14,15 +14,38 @@
 """Module that contains various methods for validating the DHCP 
 device behaviors"""
 
+import queue
 import re
+import threading
 import time
 from datetime import datetime
+import grpc
 import util
 from dateutil import tz
 
 LOG_NAME = 'dhcp_util'
 LOGGER = None
 
+# Seconds between lease requests when lease events are unavailable
+LEASE_POLL_INTERVAL = 5
+
+# Seconds between pings while waiting for a host to respond
+PING_INTERVAL = 1
+
+# Seconds between status requests while waiting for a DHCP server
+# to start or stop
+STATUS_POLL_INTERVAL = 0.5
+DHCP_SERVER_WAIT_TIME = 10
+
+# Changes to a lease reported by wait_for_lease_change
+LEASE_RENEWED = 'renewed'
+LEASE_REMOVED = 'removed'
+
+
+def _has_lease(lease):
+  """Default wait condition, met by any lease reported"""
+  return lease
+
 
 class DHCPUtil():
   """Helper class for various tests concerning DHCP behavior"""
@@ -137,19 +160,130 @@ class DHCPUtil():
                        or None if no lease is found within the timeout.
 
       Note:
-          This method will attempt to query both primary and secondary 
-          DHCP servers for the lease, with a 5-second pause between 
-          retries until the `timeout` is reached.
+          This method will query both primary and secondary DHCP
+          servers for the lease and then wait for a lease event from
+          either server until the `timeout` is reached.
       """
     LOGGER.info('Resolving current lease with max wait time of ' +
                 str(timeout) + ' seconds')
-    start_time = time.time()
+    deadline = time.monotonic() + timeout
+    lease = self._get_cur_lease(mac_address)
+    if lease is None and timeout > 0:
+      lease = self._wait_for_lease(mac_address, deadline)
+    return lease
 
-    while True:
-      lease = self._get_cur_lease(mac_address)
-      if lease is not None or (time.time() - start_time) >= timeout:
-        return lease
-      time.sleep(5)
+  def wait_for_lease_change(self, lease, timeout):
+    """
+      Wait for a lease to be renewed, replaced by a lease with a
+      different IP address or removed by the DHCP servers.
+
+      Args:
+          lease (dict): The current lease of the client.
+          timeout (int): The maximum time (in seconds) to wait
+                         for the lease to change.
+
+      Returns:
+          tuple: LEASE_RENEWED or LEASE_REMOVED, or None if the lease
+                 did not change within the timeout, and the time
+                 (in seconds) waited.
+      """
+    start = time.monotonic()
+
+    def get_change(cur_lease):
+      if cur_lease is None:
+        return LEASE_REMOVED
+      if (cur_lease['ip'] != lease['ip']
+          or cur_lease['expires'] > lease['expires']):
+        return LEASE_RENEWED
+      return None
+
+    change = self._wait_for_lease(lease['hw_addr'], start + timeout,
+                                  get_change)
+    waited = time.monotonic() - start
+    LOGGER.info(f'Lease {change or "unchanged"} after {waited:.1f} seconds')
+    return change, waited
+
+  def _wait_for_lease(self, mac_address, deadline, condition=_has_lease):
+    """
+    Wait for the primary or secondary DHCP server to report a lease
+    for a given MAC address, falling back to requesting the lease
+    periodically if neither server can stream lease events.
+
+    The condition is called with each lease reported, or None once the
+    lease is removed, and the wait ends on the first result other than
+    None. By default the wait ends on the first lease reported.
+    """
+    events = queue.Queue()
+    watches = []
+    for primary in (True, False):
+      watch = self.get_dhcp_client(primary).watch_leases(
+          mac_address, timeout=max(0, deadline - time.monotonic()))
+      watches.append(watch)
+      threading.Thread(target=self._read_lease_events,
+                       args=(watch, primary, events),
+                       daemon=True).start()
+    try:
+      active = len(watches)
+      while active:
+        try:
+          primary, event = events.get(
+              timeout=max(0, deadline - time.monotonic()))
+        except queue.Empty:
+          return None
+        if event is None:
+          active -= 1
+          continue
+        if event.type == event.REMOVED:
+          result = condition(None)
+        elif self.get_dhcp_server_status(primary):
+          result = condition(self._lease_from_event(event, primary))
+        else:
+          continue
+        if result is not None:
+          return result
+    finally:
+      for watch in watches:
+        watch.cancel()
+
+    if time.monotonic() >= deadline:
+      return None
+    LOGGER.info('Lease events unavailable, requesting lease every ' +
+                str(LEASE_POLL_INTERVAL) + ' seconds')
+    while time.monotonic() < deadline:
+      time.sleep(min(LEASE_POLL_INTERVAL,
+                     max(0, deadline - time.monotonic())))
+      result = condition(self._get_cur_lease(mac_address))
+      if result is not None:
+        return result
+    return None
+
+  def _read_lease_events(self, watch, primary, events):
+    try:
+      for event in watch:
+        events.put((primary, event))
+    except grpc.RpcError as e:
+      if e.code() not in (grpc.StatusCode.CANCELLED,
+                          grpc.StatusCode.DEADLINE_EXCEEDED):
+        LOGGER.debug('Lease events from ' +
+                     ('primary' if primary else 'secondary') +
+                     ' server unavailable: ' + str(e.details()))
+    finally:
+      # Mark the end of the events from this server
+      events.put((primary, None))
+
+  def _lease_from_event(self, event, primary):
+    lease = {
+        'hw_addr': event.lease.hw_addr,
+        'ip': event.lease.ip,
+        'hostname': event.lease.hostname,
+        'expires': event.lease.expires,
+        'manufacturer': event.lease.manufacturer,
+        'primary': primary
+    }
+    LOGGER.info('DHCP lease resolved from ' +
+                ('primary' if primary else 'secondary') + ' server')
+    LOGGER.info('DHCP Lease resolved:\n' + str(lease))
+    return lease
 
   def _get_cur_lease(self, mac_address):
     """
@@ -219,6 +353,42 @@ class DHCPUtil():
       time.sleep(delay)
     return False
 
+  def wait_for_ping(self, host, timeout, ipv6=False):
+    """
+      Ping a host until it responds or the timeout is reached.
+
+      Returns:
+          tuple: Whether the host responded and the time (in seconds)
+                 waited.
+      """
+    start = time.monotonic()
+    deadline = start + timeout
+    while True:
+      if self.ping(host, ipv6=ipv6, retries=1, delay=0):
+        return True, time.monotonic() - start
+      remaining = deadline - time.monotonic()
+      if remaining <= 0:
+        return False, time.monotonic() - start
+      time.sleep(min(PING_INTERVAL, remaining))
+
+  def wait_for_dhcp_server_status(self,
+                                  running,
+                                  dhcp_server_primary=True,
+                                  timeout=DHCP_SERVER_WAIT_TIME):
+    """
+      Wait for a DHCP server to report that it is running or stopped.
+
+      Returns:
+          bool: Whether the server reported the status within the timeout.
+      """
+    deadline = time.monotonic() + timeout
+    while bool(self.get_dhcp_server_status(dhcp_server_primary)) != running:
+      remaining = deadline - time.monotonic()
+      if remaining <= 0:
+        return False
+      time.sleep(min(STATUS_POLL_INTERVAL, remaining))
+    return True
+
   def add_reserved_lease(self,
                          hostname,
                          mac_address,
@@ -248,8 +418,7 @@ class DHCPUtil():
     LOGGER.info('Stopping secondary DHCP server')
     if self.stop_dhcp_server(False):
       LOGGER.info('Secondary DHCP server stop command success')
-      time.sleep(3)  # Give some time for the server to stop
-      if not self.get_dhcp_server_status(False):
+      if self.wait_for_dhcp_server_status(False, dhcp_server_primary=False):
         LOGGER.info('Secondary DHCP server stopped')
         if self.disable_failover(True):
           LOGGER.info('Primary DHCP server failover disabled')
@@ -265,7 +434,15 @@ class DHCPUtil():
       return False
 
   def wait_for_lease_expire(self, lease, max_wait_time=30):
+    """
+      Wait until a lease is renewed, replaced or removed, for no longer
+      than the time until it expires, padded by 5 seconds, or
+      max_wait_time.
 
+      Returns:
+          tuple: The change to the lease as returned by
+                 wait_for_lease_change and the time (in seconds) waited.
+      """
     try:
       expiration_utc = datetime.strptime(lease['expires'], '%Y-%m-%d %H:%M:%S')
 
@@ -284,11 +461,12 @@ class DHCPUtil():
       LOGGER.info('Waiting for current lease to expire: ' + str(expiration))
 
       if wait_time > 0:
-        time.sleep(wait_time)
+        return self.wait_for_lease_change(lease, wait_time)
       LOGGER.info('Current lease expired')
 
     except TypeError:
       LOGGER.error('Device does not have an active lease')
+    return None, 0
 
   # Convert from a UTC datetime to the local time zone
   def utc_to_local(self, utc_datetime):
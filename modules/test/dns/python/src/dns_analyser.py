@@ -0,0 +1,81 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Summary of the DNS and mDNS traffic of a device, classified from the
+packet index in a single pass so that every DNS test and the module
+report are answered without reading the captures again"""
+from collections import Counter
+import numpy as np
+from packet_index import (bytes_to_ip, ip_to_bytes, mac_to_int, IPPROTO_TCP,
+                          IPPROTO_UDP)
+
+DNS_PORT = 53
+MDNS_PORT = 5353
+
+
+class DNSAnalyser:
+  """DNS traffic of a device in an indexed set of captures"""
+
+  def __init__(self, packet_index, device_mac, dns_server):
+    table = packet_index.table
+    device = mac_to_int(device_mac)
+    from_device = table['src_mac'] == device
+    udp = table['protocol'] == IPPROTO_UDP
+    transport = udp | (table['protocol'] == IPPROTO_TCP)
+
+    # Packets sent by the device to a DNS server, by destination
+    to_dns = from_device & transport & (table['dst_port'] == DNS_PORT)
+    to_server = table['dst_ip'] == ip_to_bytes(dns_server)
+    self.local_packets = int(np.count_nonzero(to_dns & to_server))
+    self.external_packets = int(np.count_nonzero(to_dns & ~to_server))
+
+    # mDNS packets sent by the device
+    self.mdns_packets = int(
+        np.count_nonzero(from_device & udp
+                         & ((table['src_port'] == MDNS_PORT)
+                            | (table['dst_port'] == MDNS_PORT))))
+
+    # DNS messages and the totals and table shown in the module report
+    self.records = self._get_records(packet_index, device)
+    queries = [record for record in self.records if record['Type'] == 'Query']
+    self.queries = len(queries)
+    self.responses = len(self.records) - self.queries
+    self.local_queries = sum(
+        1 for record in queries if record['Destination'] == dns_server)
+    self.external_queries = self.queries - self.local_queries
+    self.table = Counter(
+        (record['Source'], record['Destination'], record['ResolvedIP'],
+         record['Type'], record['Data']) for record in self.records)
+
+  def _get_records(self, packet_index, device):
+    """DNS messages over IPv4 sent or received by the device, in capture
+    order. Packets seen in more than one capture are included once."""
+    table = packet_index.table
+    mask = ((table['dns_qr'] >= 0) & (table['ip_version'] == 4)
+            & ((table['src_mac'] == device) | (table['dst_mac'] == device)))
+    packets = table[mask]
+    _, first = np.unique(packets['time'], return_index=True)
+
+    records = []
+    for packet in packets[np.sort(first)]:
+      qname = packet_index.get_qname(packet)
+      resolved_ip = bytes_to_ip(packet['dns_answer'])
+      records.append({
+          'Timestamp': float(packet['time']),
+          'Source': bytes_to_ip(packet['src_ip']),
+          'Destination': bytes_to_ip(packet['dst_ip']),
+          'ResolvedIP': resolved_ip if resolved_ip is not None else 'N/A',
+          'Type': 'Query' if packet['dns_qr'] == 0 else 'Response',
+          'Data': qname if qname is not None else 'N/A'
+      })
+    return records
@@ -12,12 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """DNS test module"""
-import subprocess
-from scapy.all import rdpcap, DNS, IP, Ether, DNSRR
-from scapy.error import Scapy_Exception
+from dns_analyser import DNSAnalyser
+from packet_index import PacketIndex
 from test_module import TestModule
 import os
-from collections import Counter
 from jinja2 import Environment, FileSystemLoader
 
 LOG_NAME = 'test_dns'
@@ -48,6 +46,7 @@ class DNSModule(TestModule):
     self.startup_capture_file = startup_capture_file
     self.monitor_capture_file = monitor_capture_file
     self._dns_server = '10.10.10.4'
+    self._dns_analyser = None
     global LOGGER
     LOGGER = self._get_logger()
 
@@ -79,47 +78,27 @@ class DNSModule(TestModule):
                             'URL',
                             'Count',
                           ]
-    # Extract DNS data from the pcap file
-    dns_table_data = self.extract_dns_data()
-
-    # Set the summary variables
-    local_requests = sum(
-        1 for row in dns_table_data
-        if row['Destination'] == self._dns_server and row['Type'] == 'Query')
-    external_requests = sum(
-        1 for row in dns_table_data
-        if row['Destination'] != self._dns_server and row['Type'] == 'Query')
-
-    total_requests = sum(1 for row in dns_table_data if row['Type'] == 'Query')
-
-    total_responses = sum(1 for row in dns_table_data
-                          if row['Type'] == 'Response')
+    dns_analyser = self._get_dns_analyser()
 
     # Add summary table
     summary_data = [
-                    local_requests,
-                    external_requests,
-                    total_requests,
-                    total_responses,
+                    dns_analyser.local_queries,
+                    dns_analyser.external_queries,
+                    dns_analyser.queries,
+                    dns_analyser.responses,
                     ]
 
+    # Generate the HTML table with the count column
     module_data = []
-    if (total_requests + total_responses) > 0:
-
-      # Count unique combinations
-      counter = Counter((row['Source'], row['Destination'], row['ResolvedIP'],
-                         row['Type'], row['Data']) for row in dns_table_data)
-
-      # Generate the HTML table with the count column
-      for (src, dst, res_ip, typ, dat), count in counter.items():
-        module_data.append({
-                            'src': src,
-                            'dst': dst,
-                            'res_ip': res_ip,
-                            'typ': typ,
-                            'dat': dat,
-                            'count': count,
-                            })
+    for (src, dst, res_ip, typ, dat), count in dns_analyser.table.items():
+      module_data.append({
+                          'src': src,
+                          'dst': dst,
+                          'res_ip': res_ip,
+                          'typ': typ,
+                          'dat': dat,
+                          'count': count,
+                          })
 
     col_limits = {
         'res_ip': 16,
@@ -206,93 +185,30 @@ class DNSModule(TestModule):
     return report_path
 
   def extract_dns_data(self):
-    dns_data = []
-
-    # Read the startup and monitor pcap files
-    packets = (rdpcap(self.startup_capture_file) +
-               rdpcap(self.monitor_capture_file))
-
-    # Read the dns.pcap file
-    try:
-      packets += rdpcap(self.dns_server_capture_file)
-    except (FileNotFoundError, Scapy_Exception):
-      LOGGER.error('dns.pcap not found or empty, ignoring')
-
-    # Iterate through DNS packets
-    for packet in packets:
-      if DNS in packet and packet.haslayer(IP):
-
-        # Check if either source or destination MAC matches the device
-        if self._device_mac in [packet[Ether].src, packet[Ether].dst]:
-          source_ip = packet[IP].src
-          destination_ip = packet[IP].dst
-          dns_layer = packet[DNS]
-          # 'qr' field indicates query (0) or response (1)
-          dns_type = 'Query' if dns_layer.qr == 0 else 'Response'
-
-          # Check if 'qd' (query data) exists and has at least one entry
-          if hasattr(dns_layer, 'qd') and dns_layer.qdcount > 0:
-            qname = dns_layer.qd.qname.decode() if dns_layer.qd.qname else 'N/A'
-          else:
-            qname = 'N/A'
-          resolved_ip = 'N/A'
-          # If it's a response packet, extract the resolved IP address
-          # from the answer section
-          if dns_layer.qr == 1 and hasattr(dns_layer,
-                                           'an') and dns_layer.ancount > 0:
-            # Loop through all answers in the DNS response
-            for i in range(min(dns_layer.ancount, len(dns_layer.an))):
-              answer = dns_layer.an[i]
-              # Check if the answer is of type DNSRR
-              if isinstance(answer, DNSRR):
-                # Check for IPv4 (A record) or IPv6 (AAAA record)
-                if answer.type == 1:  # Indicates an A record (IPv4 address)
-                  resolved_ip = answer.rdata  # Extract IPv4 address
-                  break  # Stop after finding the first valid resolved IP
-                elif answer.type == 28: # Indicates AAAA record (IPv6 address)
-                  resolved_ip = answer.rdata  # Extract IPv6 address
-                  break  # Stop after finding the first valid resolved IP
-          qname = qname.rstrip('.') if (isinstance(qname, str)
-                                        and qname.endswith('.')) else qname
-          dns_data.append({
-              'Timestamp': float(packet.time),  # Timestamp of the DNS packet
-              'Source': source_ip,
-              'Destination': destination_ip,
-              'ResolvedIP': resolved_ip,  # Adding the resolved IP address
-              'Type': dns_type,
-              'Data': qname,
-          })
-
-    # Filter unique entries based on 'Timestamp'
-    filtered_unique_dns_data = []
-    seen_timestamps = set()
-
-    for entry in dns_data:
-      timestamp = entry.get('Timestamp')
-      if timestamp not in seen_timestamps:
-        seen_timestamps.add(timestamp)
-        filtered_unique_dns_data.append(entry)
-
-    return filtered_unique_dns_data
-
-  def _has_dns_traffic(self, tcpdump_filter):
-    dns_server_queries = self._exec_tcpdump(tcpdump_filter,
-                                            self.dns_server_capture_file)
-    LOGGER.info('DNS Server queries found: ' + str(len(dns_server_queries)))
-
-    dns_startup_queries = self._exec_tcpdump(tcpdump_filter,
-                                             self.startup_capture_file)
-    LOGGER.info('Startup DNS queries found: ' + str(len(dns_startup_queries)))
-
-    dns_monitor_queries = self._exec_tcpdump(tcpdump_filter,
-                                             self.monitor_capture_file)
-    LOGGER.info('Monitor DNS queries found: ' + str(len(dns_monitor_queries)))
-
-    num_query_dns = len(dns_server_queries) + len(dns_startup_queries) + len(
-        dns_monitor_queries)
-    LOGGER.info('DNS queries found: ' + str(num_query_dns))
-
-    return num_query_dns > 0
+    return self._get_dns_analyser().records
+
+  def _get_dns_analyser(self):
+    """DNS traffic of the device, classified once and shared between
+    the tests and the module report"""
+    if self._dns_analyser is None:
+      capture_files = []
+      for capture_file in (self.startup_capture_file,
+                           self.monitor_capture_file,
+                           self.dns_server_capture_file):
+        if os.path.exists(capture_file):
+          capture_files.append(capture_file)
+        else:
+          LOGGER.error(f'{os.path.basename(capture_file)} not found, ignoring')
+      self._dns_analyser = DNSAnalyser(PacketIndex.load(capture_files),
+                                       device_mac=self._device_mac,
+                                       dns_server=self._dns_server)
+      LOGGER.info('DNS packets to the DHCP DNS server: ' +
+                  str(self._dns_analyser.local_packets))
+      LOGGER.info('DNS packets to other DNS servers: ' +
+                  str(self._dns_analyser.external_packets))
+      LOGGER.info('MDNS packets found: ' +
+                  str(self._dns_analyser.mdns_packets))
+    return self._dns_analyser
 
   # Added to access the method for dns unittests
   def dns_network_from_dhcp(self):
@@ -305,14 +221,10 @@ class DNSModule(TestModule):
 
     # Check if the device DNS traffic is to appropriate local
     # DHCP provided server
-    tcpdump_filter = (f'dst port 53 and dst host {self._dns_server} ' +
-                      f'and ether src {self._device_mac}')
-    dns_packets_local = self._has_dns_traffic(tcpdump_filter=tcpdump_filter)
+    dns_packets_local = self._get_dns_analyser().local_packets > 0
 
     # Check if the device sends any DNS traffic to non-DHCP provided server
-    tcpdump_filter = (f'dst port 53 and not dst host {self._dns_server} ' +
-                      f'and ether src {self._device_mac}')
-    dns_packets_not_local = self._has_dns_traffic(tcpdump_filter=tcpdump_filter)
+    dns_packets_not_local = self._get_dns_analyser().external_packets > 0
     if dns_packets_local or dns_packets_not_local:
       if dns_packets_not_local:
         description = 'DNS traffic detected to non-DHCP provided server'
@@ -331,8 +243,9 @@ class DNSModule(TestModule):
     LOGGER.info('Checking DNS traffic from device: ' + self._device_mac)
 
     # Check if the device DNS traffic
-    tcpdump_filter = f'dst port 53 and ether src {self._device_mac}'
-    dns_packets = self._has_dns_traffic(tcpdump_filter=tcpdump_filter)
+    dns_analyser = self._get_dns_analyser()
+    dns_packets = (dns_analyser.local_packets +
+                   dns_analyser.external_packets) > 0
 
     if dns_packets:
       LOGGER.info('DNS traffic detected from device')
@@ -345,8 +258,7 @@ class DNSModule(TestModule):
   def _dns_mdns(self):
     LOGGER.info('Running dns.mdns')
     # Check if the device sends any MDNS traffic
-    tcpdump_filter = f'udp port 5353 and ether src {self._device_mac}'
-    dns_packets = self._has_dns_traffic(tcpdump_filter=tcpdump_filter)
+    dns_packets = self._get_dns_analyser().mdns_packets > 0
 
     if dns_packets:
       LOGGER.info('MDNS traffic detected from device')
@@ -355,29 +267,3 @@ class DNSModule(TestModule):
       LOGGER.info('No MDNS traffic detected from the device')
       result = 'Informational', 'No MDNS traffic detected from the device'
     return result
-
-  def _exec_tcpdump(self, tcpdump_filter, capture_file):
-    """
-    Args
-        tcpdump_filter: Filter to pass onto tcpdump file
-        capture_file: Optional capture file to look
-    Returns
-        List of packets matching the filter
-    """
-    command = f'tcpdump -tttt -n -r {capture_file} {tcpdump_filter}'
-
-    LOGGER.debug('tcpdump command: ' + command)
-
-    with subprocess.Popen(command,
-                          universal_newlines=True,
-                          shell=True,
-                          stdout=subprocess.PIPE,
-                          stderr=subprocess.PIPE) as process:
-      text = str(process.stdout.read()).rstrip()
-
-      LOGGER.debug('tcpdump response: ' + text)
-
-      if text:
-        return text.split('\n')
-
-    return []
@@ -0,0 +1,96 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Summary of the NTP traffic of a device, built from the NTP headers in
+the packet index in a single pass so that every NTP test and the module
+report are answered without reading the captures again"""
+from collections import defaultdict
+import numpy as np
+from packet_index import bytes_to_ip, mac_to_int, IPPROTO_UDP
+
+NTP_MODE_CLIENT = 3
+
+
+class NTPAnalyser:
+  """NTP traffic of a device in an indexed set of captures"""
+
+  def __init__(self, packet_index, device_mac, ntp_server):
+    table = packet_index.table
+    device = mac_to_int(device_mac)
+    ntp = ((table['ntp_mode'] >= 0) & (table['protocol'] == IPPROTO_UDP)
+           & (table['ip_version'] > 0))
+
+    # Versions and destinations of the NTP packets sent by the device
+    sent = table[ntp & (table['src_mac'] == device)]
+    self.versions = {int(version) for version in sent['ntp_version']}
+    self.destinations = list(
+        dict.fromkeys(bytes_to_ip(dst_ip) for dst_ip in sent['dst_ip']))
+
+    # Responses received by the device from each server
+    self.servers = {}
+    received = table[ntp & (table['dst_mac'] == device)
+                     & (table['ntp_mode'] != NTP_MODE_CLIENT)]
+    for packet in received:
+      server = self.servers.setdefault(bytes_to_ip(packet['src_ip']), {
+          'responses': 0,
+          'version': int(packet['ntp_version']),
+          'stratum': int(packet['ntp_stratum'])
+      })
+      server['responses'] += 1
+
+    # NTP messages and the totals shown in the module report
+    self.records = self._get_records(table[ntp], device)
+    clients = [record for record in self.records if record['Type'] == 'Client']
+    self.requests = len(clients)
+    self.responses = len(self.records) - self.requests
+    self.local_requests = sum(
+        1 for record in clients if record['Destination'] == ntp_server)
+    self.external_requests = self.requests - self.local_requests
+
+  def _get_records(self, packets, device):
+    """NTP messages sent or received by the device, in capture order.
+    Packets seen in more than one capture are included once."""
+    packets = packets[(packets['src_mac'] == device)
+                      | (packets['dst_mac'] == device)]
+    _, first = np.unique(packets['time'], return_index=True)
+    return [{
+        'Source': bytes_to_ip(packet['src_ip']),
+        'Destination': bytes_to_ip(packet['dst_ip']),
+        'Type': 'Client' if packet['ntp_mode'] == NTP_MODE_CLIENT else 'Server',
+        'Version': str(packet['ntp_version']),
+        'Timestamp': float(packet['time'])
+    } for packet in packets[np.sort(first)]]
+
+  def get_table(self):
+    """Number of messages and average interval between them for each
+    source, destination, type and version"""
+    timestamps = defaultdict(list)
+    for record in self.records:
+      key = (record['Source'], record['Destination'], record['Type'],
+             record['Version'])
+      timestamps[key].append(record['Timestamp'])
+
+    rows = []
+    for (src, dst, typ, version), times in timestamps.items():
+      times.sort()
+      time_diffs = [t2 - t1 for t1, t2 in zip(times[:-1], times[1:])]
+      avg_diff = sum(time_diffs) / len(time_diffs) if time_diffs else 0
+      rows.append({
+          'src': src,
+          'dst': dst,
+          'typ': typ,
+          'version': version,
+          'cnt': len(times),
+          'avg_diff': avg_diff
+      })
+    return rows
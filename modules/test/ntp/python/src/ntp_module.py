@@ -13,13 +13,11 @@
 # limitations under the License.
 """NTP test module"""
 from test_module import TestModule
-from scapy.all import rdpcap, IP, IPv6, NTP
-from scapy.error import Scapy_Exception
 import os
-from collections import defaultdict
 from jinja2 import Environment, FileSystemLoader
-import pyshark
+from ntp_analyser import NTPAnalyser
 from ntp_white_list import check_all_ips
+from packet_index import PacketIndex
 
 LOG_NAME = 'test_ntp'
 MODULE_REPORT_FILE_NAME = 'ntp_report.j2.html'
@@ -51,6 +49,7 @@ class NTPModule(TestModule):
     self.monitor_capture_file = monitor_capture_file
     # TODO: This should be fetched dynamically
     self._ntp_server = '10.10.10.5'
+    self._ntp_analyser = None
 
     global LOGGER
     LOGGER = self._get_logger()
@@ -84,84 +83,31 @@ class NTPModule(TestModule):
         'Sync Request Average',
     ]
 
-    # List of capture files to scan
-    pcap_files = [
-        self.startup_capture_file, self.monitor_capture_file,
-        self.ntp_server_capture_file
-    ]
-    # Extract NTP data from the pcap file
-    ntp_table_data = self.extract_ntp_data(pcap_files)
-
-    # Set the summary variables
-    local_requests = sum(
-        1 for row in ntp_table_data
-        if row['Destination'] == self._ntp_server and row['Type'] == 'Client')
-    external_requests = sum(
-        1 for row in ntp_table_data
-        if row['Destination'] != self._ntp_server and row['Type'] == 'Client')
-
-    total_requests = sum(1 for row in ntp_table_data if row['Type'] == 'Client')
-
-    total_responses = sum(1 for row in ntp_table_data
-                          if row['Type'] == 'Server')
+    ntp_analyser = self._get_ntp_analyser()
 
     # Summary table data
     summary_data = [
-        local_requests, external_requests, total_requests, total_responses
+        ntp_analyser.local_requests, ntp_analyser.external_requests,
+        ntp_analyser.requests, ntp_analyser.responses
     ]
 
-    # Initialize a dictionary to store timestamps for each unique combination
-    timestamps = defaultdict(list)
-
-    # Collect timestamps for each unique combination
-    for row in ntp_table_data:
-      # Add the timestamp to the corresponding combination
-      key = (row['Source'], row['Destination'], row['Type'], row['Version'])
-      timestamps[key].append(row['Timestamp'])
-
-    # Calculate the average time between requests for each unique combination
-    average_time_between_requests = {}
-
-    for key, times in timestamps.items():
-      # Sort the timestamps
-      times.sort()
-
-      # Calculate the time differences between consecutive timestamps
-      time_diffs = [t2 - t1 for t1, t2 in zip(times[:-1], times[1:])]
-
-      # Calculate the average of the time differences
-      if time_diffs:
-        avg_diff = sum(time_diffs) / len(time_diffs)
-      else:
-        avg_diff = 0  # one timestamp, the average difference is 0
-
-      average_time_between_requests[key] = avg_diff
-
     # Module table data
     module_table_data = []
-    if total_requests + total_responses > 0:
-
-      # Generate the HTML table with the count column
-      for (src, dst, typ,
-          version), avg_diff in average_time_between_requests.items():
-        cnt = len(timestamps[(src, dst, typ, version)])
-
-        # Sync Average only applies to client requests
-        if 'Client' in typ:
-          # Convert avg_diff to seconds and format it
-          avg_diff_seconds = avg_diff
-          avg_formatted_time = f'{avg_diff_seconds:.3f} seconds'
-        else:
-          avg_formatted_time = 'N/A'
+    for row in ntp_analyser.get_table():
+      # Sync Average only applies to client requests
+      if 'Client' in row['typ']:
+        avg_formatted_time = f'{row["avg_diff"]:.3f} seconds'
+      else:
+        avg_formatted_time = 'N/A'
 
-        module_table_data.append({
-            'src': src,
-            'dst': dst,
-            'typ': typ,
-            'version': version,
-            'cnt': cnt,
-            'avg_fmt': avg_formatted_time
-        })
+      module_table_data.append({
+          'src': row['src'],
+          'dst': row['dst'],
+          'typ': row['typ'],
+          'version': row['version'],
+          'cnt': row['cnt'],
+          'avg_fmt': avg_formatted_time
+      })
 
     # Handling the possible table split
     table_height = (len(module_table_data) + 1) * row_height
@@ -214,98 +160,37 @@ class NTPModule(TestModule):
 
     return report_path
 
-  def extract_ntp_data(self, pcap_files):
-    all_packets = []
-    for pcap_file in pcap_files:
-      packets = pyshark.FileCapture(pcap_file,
-                                    display_filter='ntp and not icmp')
-      try:
-        for packet in packets:
-          all_packets.append(packet)
-      finally:
-        packets.close()
-
-    ntp_data = []
-    for packet in all_packets:
-      try:
-        if not hasattr(packet, 'eth') or not (hasattr(packet, 'ip')
-                                              or hasattr(packet, 'ipv6')):
-          continue
-
-        source_mac = getattr(packet.eth, 'src', None)
-        destination_mac = getattr(packet.eth, 'dst', None)
-
-        if self._device_mac not in (source_mac, destination_mac):
-          continue
-
-        if hasattr(packet, 'ip'):
-          source_ip = packet.ip.src
-          dest_ip = packet.ip.dst
+  def extract_ntp_data(self):
+    return self._get_ntp_analyser().records
+
+  def _get_ntp_analyser(self):
+    """NTP traffic of the device, decoded once and shared between the
+    tests and the module report"""
+    if self._ntp_analyser is None:
+      capture_files = []
+      for capture_file in (self.startup_capture_file,
+                           self.monitor_capture_file,
+                           self.ntp_server_capture_file):
+        if os.path.exists(capture_file):
+          capture_files.append(capture_file)
         else:
-          source_ip = packet.ipv6.src
-          dest_ip = packet.ipv6.dst
-
-        ntp_mode_value = int(packet.ntp.flags_mode)
-        ntp_mode = 'Client' if ntp_mode_value == 3 else 'Server'
-        ntp_version = packet.ntp.flags_vn
-
-        ntp_data.append({
-            'Source': source_ip,
-            'Destination': dest_ip,
-            'Type': ntp_mode,
-            'Version': str(ntp_version),
-            'Timestamp': float(packet.sniff_time.timestamp()),
-        })
-
-      except Exception as e:  # pylint: disable=W0718
-        LOGGER.exception(f'Unexpected error while parsing packet: {e}')
-        continue
-
-    # Filter unique entries based on 'Timestamp'
-    # NTP Server will duplicate messages caught by
-    # startup and monitor
-    filtered_unique_ntp_data = []
-    seen_timestamps = set()
-
-    for entry in ntp_data:
-      timestamp = entry.get('Timestamp')
-      if timestamp not in seen_timestamps:
-        seen_timestamps.add(timestamp)
-        filtered_unique_ntp_data.append(entry)
-
-    return filtered_unique_ntp_data
+          LOGGER.error(f'{os.path.basename(capture_file)} not found, ignoring')
+      self._ntp_analyser = NTPAnalyser(PacketIndex.load(capture_files),
+                                       device_mac=self._device_mac,
+                                       ntp_server=self._ntp_server)
+      for ip, server in self._ntp_analyser.servers.items():
+        LOGGER.info(f'NTPv{server["version"]} server {ip} at stratum '
+                    f'{server["stratum"]} sent {server["responses"]} '
+                    'responses')
+    return self._ntp_analyser
 
   def _ntp_network_ntp_support(self):
     LOGGER.info('Running ntp.network.ntp_support')
 
-    # Read the pcap files
-    packet_capture = (rdpcap(self.startup_capture_file) +
-                      rdpcap(self.monitor_capture_file))
-
-    try:
-      packet_capture += rdpcap(self.ntp_server_capture_file)
-    except (FileNotFoundError, Scapy_Exception):
-      LOGGER.error('ntp.pcap not found or empty, ignoring')
-
-    device_sends_ntp4 = False
-    device_sends_ntp3 = False
-
-    for packet in packet_capture:
-
-      if NTP in packet and packet.src == self._device_mac:
-
-        dest_ip = None
-
-        if IP in packet:
-          dest_ip = packet[IP].dst
-        elif IPv6 in packet:
-          dest_ip = packet[IPv6].dst
-        if packet[NTP].version == 4:
-          device_sends_ntp4 = True
-          LOGGER.info(f'Device sent NTPv4 request to {dest_ip}')
-        elif packet[NTP].version == 3:
-          device_sends_ntp3 = True
-          LOGGER.info(f'Device sent NTPv3 request to {dest_ip}')
+    versions = self._get_ntp_analyser().versions
+    LOGGER.info(f'Device sent NTP versions: {sorted(versions)}')
+    device_sends_ntp4 = 4 in versions
+    device_sends_ntp3 = 3 in versions
 
     result = False, 'Device has not sent any NTP requests'
 
@@ -322,40 +207,25 @@ class NTPModule(TestModule):
   def _ntp_network_ntp_dhcp(self):
     LOGGER.info('Running ntp.network.ntp_dhcp')
 
-    # Read the pcap files
-    packet_capture = (rdpcap(self.startup_capture_file) +
-                      rdpcap(self.monitor_capture_file))
-
-    try:
-      packet_capture += rdpcap(self.ntp_server_capture_file)
-    except (FileNotFoundError, Scapy_Exception):
-      LOGGER.error('ntp.pcap not found or empty, ignoring')
-
-    device_sends_ntp = False
+    destinations = self._get_ntp_analyser().destinations
+    device_sends_ntp = len(destinations) > 0
     ntp_to_local = False
     ntp_to_remote = False
-    ntp_to_remote_ips = set()
-
-    for packet in packet_capture:
-      if NTP in packet and packet.src == self._device_mac:
-        device_sends_ntp = True
-        dest_ip = None
-        if IP in packet:
-          dest_ip = packet[IP].dst
-        elif IPv6 in packet:
-          dest_ip = packet[IPv6].dst
-        LOGGER.info(f'Device sent NTP request to {dest_ip}')
-        if dest_ip == self._ntp_server:
-          LOGGER.info('Device sent NTP request to DHCP provided NTP server')
-          ntp_to_local = True
-        else:
-          LOGGER.info('Device sent NTP request to non-DHCP provided NTP server')
-          ntp_to_remote = True
-          ntp_to_remote_ips.add(dest_ip)
+    ntp_to_remote_ips = []
+
+    for dest_ip in destinations:
+      LOGGER.info(f'Device sent NTP request to {dest_ip}')
+      if dest_ip == self._ntp_server:
+        LOGGER.info('Device sent NTP request to DHCP provided NTP server')
+        ntp_to_local = True
+      else:
+        LOGGER.info('Device sent NTP request to non-DHCP provided NTP server')
+        ntp_to_remote = True
+        ntp_to_remote_ips.append(dest_ip)
     ips_trusted = []
     all_ips_trusted = False
     if ntp_to_remote_ips:
-      ips_trusted =  check_all_ips(list(ntp_to_remote_ips))
+      ips_trusted =  check_all_ips(ntp_to_remote_ips)
       LOGGER.debug(f'Checked NTP remote IPs: {ips_trusted}')
       all_ips_trusted = all(is_trusted for _, is_trusted in ips_trusted)
 
@@ -3,10 +3,54 @@
 import asyncio
 import aiohttp
 import concurrent.futures
+import json
+import time
 import ntplib
 
 NTP_URL = 'https://ntppool.org/scores/{ip}/json'
 
+# Cache of checked NTP servers maintained by the framework
+WHITELIST_FILE = '/testrun/ntp_whitelist.json'
+
+# Servers checked during the test, added to the cache by the framework
+CHECKED_FILE = '/runtime/output/ntp_servers.json'
+
+
+class NTPWhitelist:
+  """Trusted and untrusted NTP servers from the whitelist cache."""
+
+  def __init__(self, trusted=(), untrusted=(), offline=False):
+    self.trusted = set(trusted)
+    self.untrusted = set(untrusted)
+    self.offline = offline
+
+  def lookup(self, ip: str) -> bool | None:
+    """Whether a server is trusted, None if it is not in the cache."""
+    if ip in self.trusted:
+      return True
+    if ip in self.untrusted:
+      return False
+    return None
+
+
+def load_whitelist(path: str = WHITELIST_FILE) -> NTPWhitelist:
+  """Load the unexpired entries of the whitelist cache. All entries are
+  used in offline mode since they cannot be rechecked."""
+  try:
+    with open(path, 'r', encoding='utf-8') as f:
+      cache = json.load(f)
+  except (OSError, ValueError):
+    return NTPWhitelist()
+  offline = bool(cache.get('offline', False))
+  ttl = cache.get('ttl', 0)
+  now = time.time()
+  trusted, untrusted = [], []
+  for ip, server in cache.get('servers', {}).items():
+    if not offline and now - server.get('checked', 0) >= ttl:
+      continue
+    (trusted if server.get('trusted') else untrusted).append(ip)
+  return NTPWhitelist(trusted, untrusted, offline)
+
 
 async def fetch_ntp_status(
     session: aiohttp.ClientSession,
@@ -44,22 +88,47 @@ def _get_ntp_data(ip):
     return False
 
 
-def check_all_ips(ip_list: list[str]) -> list[tuple[str, bool]]:
-  """Check NTP status for all IPs in a separate thread."""  
-  def run_in_thread():
-    new_loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(new_loop)
-    try:
-      return new_loop.run_until_complete(_check_all_ips_async(ip_list))
-    finally:
-      new_loop.close()
-
-  with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-    future = executor.submit(run_in_thread)
-    ntps = future.result()
-    for i in range(len(ntps)):
-      ip, trusted = ntps[i]
-      if not trusted:
-        trusted = _get_ntp_data(ip)
-      ntps[i] = (ip, trusted)
-    return ntps
+def _write_checked(servers: dict[str, bool], path: str) -> None:
+  """Write the servers checked during the test for the framework."""
+  now = time.time()
+  try:
+    with open(path, 'w', encoding='utf-8') as f:
+      json.dump({ip: {'trusted': trusted, 'checked': now}
+                 for ip, trusted in servers.items()}, f)
+  except OSError:
+    pass
+
+
+def check_all_ips(
+    ip_list: list[str],
+    whitelist: NTPWhitelist | None = None,
+    checked_file: str = CHECKED_FILE
+  ) -> list[tuple[str, bool]]:
+  """Check NTP status for all IPs, using the whitelist cache and only
+  checking the remaining IPs in a separate thread. The checked IPs are
+  written to checked_file to be added to the cache. Servers missing from
+  the cache are untrusted in offline mode."""
+  if whitelist is None:
+    whitelist = load_whitelist()
+  results = {ip: whitelist.lookup(ip) for ip in ip_list}
+  missing = [ip for ip, trusted in results.items() if trusted is None]
+
+  if missing and whitelist.offline:
+    results.update((ip, False) for ip in missing)
+  elif missing:
+    def run_in_thread():
+      new_loop = asyncio.new_event_loop()
+      asyncio.set_event_loop(new_loop)
+      try:
+        return new_loop.run_until_complete(_check_all_ips_async(missing))
+      finally:
+        new_loop.close()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+      future = executor.submit(run_in_thread)
+      for ip, trusted in future.result():
+        if not trusted:
+          trusted = _get_ntp_data(ip)
+        results[ip] = trusted
+    _write_checked({ip: results[ip] for ip in missing}, checked_file)
+  return [(ip, results[ip]) for ip in ip_list]
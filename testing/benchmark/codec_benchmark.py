@@ -0,0 +1,151 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Serialisation micro-benchmarks for the JSON codec.
+
+Compares the previous stdlib json and jsonable_encoder paths with the
+codec for the device config, report and status payloads.
+
+Run from the Testrun root directory:
+  PYTHONPATH=framework/python/src:framework/python/src/common \\
+    python3 testing/benchmark/codec_benchmark.py
+"""
+
+import copy
+import datetime
+import json
+import timeit
+from fastapi.encoders import jsonable_encoder
+from common import codec
+from common.device import Device
+from test_orc.test_case import TestCase
+
+REPORTS = 50
+TESTS_PER_REPORT = 40
+REPEAT = 5
+
+
+def _report_json(index):
+  started = datetime.datetime(2024, 1, 1) + datetime.timedelta(days=index)
+  return {
+      'testrun': {'version': '2.2'},
+      'mac_addr': '00:1e:42:35:73:c4',
+      'device': {
+          'mac_addr': '00:1e:42:35:73:c4',
+          'manufacturer': 'Google',
+          'model': 'Benchmark',
+          'firmware': '1.0',
+          'test_pack': 'Device Qualification'
+      },
+      'status': 'Complete',
+      'result': 'Compliant',
+      'started': started.strftime('%Y-%m-%d %H:%M:%S'),
+      'finished': started.strftime('%Y-%m-%d %H:%M:%S'),
+      'tests': {
+          'total': TESTS_PER_REPORT,
+          'results': [{
+              'name': f'module.test_{test}',
+              'description': 'The device does something as expected',
+              'expected_behavior': 'The device does something',
+              'required_result': 'Required',
+              'result': 'Compliant',
+              'details': 'Details of the test result ' * 4
+          } for test in range(TESTS_PER_REPORT)]
+      },
+      'report': f'/report/001e423573c4_{index}',
+      'export': f'/export/001e423573c4_{index}',
+      'folder_name': f'001e423573c4_{index}'
+  }
+
+
+def _device_config():
+  return {
+      'mac_addr': '00:1e:42:35:73:c4',
+      'manufacturer': 'Google',
+      'model': 'Benchmark',
+      'test_modules': {'dns': {'enabled': True}},
+      'created_at': datetime.datetime.now().isoformat(),
+      'modified_at': datetime.datetime.now().isoformat(),
+      'reports': [_report_json(index) for index in range(REPORTS)]
+  }
+
+
+def _status():
+  device = Device(mac_addr='00:1e:42:35:73:c4',
+                  manufacturer='Google',
+                  model='Benchmark',
+                  device_folder='Google Benchmark')
+  results = [
+      TestCase(name=f'module.test_{test}', result='Compliant')
+      for test in range(TESTS_PER_REPORT)
+  ]
+  return device, results
+
+
+def _status_previous(device, results):
+  status_device = copy.deepcopy(device)
+  status_device.reports = None
+  status = {
+      'status': 'In Progress',
+      'device': status_device,
+      'started': datetime.datetime.now(),
+      'finished': None,
+      'tests': {'total': len(results), 'results': results}
+  }
+  return json.dumps(jsonable_encoder(status))
+
+
+def _status_codec(device, results):
+  status_device = codec.dataclass_to_dict(device)
+  status_device['reports'] = None
+  status = {
+      'status': 'In Progress',
+      'device': status_device,
+      'started': datetime.datetime.now(),
+      'finished': None,
+      'tests': {'total': len(results), 'results': results}
+  }
+  return codec.dumps(status)
+
+
+def _run(name, func, number):
+  best = min(timeit.repeat(func, number=number, repeat=REPEAT)) / number
+  print(f'{name:<40} {best * 1000:10.3f} ms')
+
+
+def main():
+  print(f'Serializer: {"orjson" if codec.orjson else "json"}')
+
+  device_config = _device_config()
+  encoded = json.dumps(device_config, indent=4)
+  print(f'Device config with {REPORTS} reports: {len(encoded)} bytes')
+  _run('device_config.json dump (json)',
+       lambda: json.dumps(device_config, indent=4), 20)
+  _run('device_config.json dump (codec)',
+       lambda: codec.dumps(device_config, indent=2), 20)
+  _run('device_config.json load (json)', lambda: json.loads(encoded), 20)
+  _run('device_config.json load (codec)', lambda: codec.loads(encoded), 20)
+
+  report = _report_json(0)
+  _run('report.json dump (json)', lambda: json.dumps(report, indent=2), 500)
+  _run('report.json dump (codec)', lambda: codec.dumps(report, indent=2), 500)
+
+  device, results = _status()
+  _run('status (jsonable_encoder + json)',
+       lambda: _status_previous(device, results), 500)
+  _run('status (codec)', lambda: _status_codec(device, results), 500)
+
+
+if __name__ == '__main__':
+  main()
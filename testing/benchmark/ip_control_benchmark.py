@@ -0,0 +1,82 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Startup time benchmark for the IPControl backends.
+
+Attaches a set of network namespaces to veth pairs, as is done for each
+network service and test module during startup, using the netlink and
+ip command backends, then removes them again.
+
+Must be run as root from the Testrun root directory:
+  sudo PYTHONPATH=framework/python/src:framework/python/src/common \\
+    python3 testing/benchmark/ip_control_benchmark.py
+"""
+
+import ipaddress
+import time
+from net_orc import netlink_control
+from net_orc.ip_control import IPControl
+
+MODULES = 12
+REPEAT = 3
+IPV4_NETWORK = ipaddress.ip_network('10.10.10.0/24')
+IPV6_NETWORK = ipaddress.ip_network('fd10:77be:4186::/64')
+
+
+def _attach(ip_ctrl, index):
+  namespace = f'tr-bench-{index}'
+  ip_ctrl.add_namespace(namespace)
+  return ip_ctrl.configure_container_interface(
+      f'tr-b-{index}', f'tr-bc-{index}', 'veth0', namespace,
+      f'9a:02:57:1e:8f:{index + 10:02d}', None,
+      f'{IPV4_NETWORK[index + 10]}/{IPV4_NETWORK.prefixlen}',
+      f'{IPV6_NETWORK[index + 10]}/{IPV6_NETWORK.prefixlen}')
+
+
+def _detach(ip_ctrl, index):
+  ip_ctrl.delete_link(f'tr-b-{index}')
+  ip_ctrl.delete_namespace(f'tr-bench-{index}')
+
+
+def _run(name, use_netlink):
+  setup, teardown = [], []
+  for _ in range(REPEAT):
+    ip_ctrl = IPControl(use_netlink=use_netlink)
+
+    started = time.monotonic()
+    for index in range(MODULES):
+      if not _attach(ip_ctrl, index):
+        raise RuntimeError(f'Failed to attach module {index}')
+    setup.append(time.monotonic() - started)
+
+    started = time.monotonic()
+    for index in range(MODULES):
+      _detach(ip_ctrl, index)
+    teardown.append(time.monotonic() - started)
+
+  print(f'{name:<12} setup {min(setup) * 1000:8.1f} ms   '
+        f'teardown {min(teardown) * 1000:8.1f} ms')
+
+
+def main():
+  print(f'Attaching {MODULES} namespaces, best of {REPEAT}')
+  if netlink_control.is_available():
+    _run('netlink', True)
+  else:
+    print('netlink      not installed')
+  _run('ip command', False)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,105 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""OUI lookup micro-benchmarks.
+
+Compares the previous line by line scan of oui.txt with lookups in the
+compiled index. An oui.txt file of the size published by the IEEE is
+generated unless the path of a real file is given.
+
+Run from the Testrun root directory:
+  PYTHONPATH=framework/python/src:framework/python/src/common \\
+    python3 testing/benchmark/oui_index_benchmark.py [oui.txt]
+"""
+
+import itertools
+import os
+import random
+import sys
+import tempfile
+import timeit
+from common import oui_index
+
+PREFIXES = 38000
+LOOKUPS = 200
+REPEAT = 5
+
+
+def _write_oui_file(path):
+  rng = random.Random(0)
+  with open(path, 'w', encoding='utf-8') as f:
+    f.write('OUI/MA-L' + ' ' * 52 + 'Organization\n\n')
+    for prefix in rng.sample(range(1 << 24), PREFIXES):
+      name = f'Manufacturer {rng.randrange(PREFIXES // 2)}, Inc.'
+      digits = f'{prefix:06X}'
+      f.write(f'{digits[0:2]}-{digits[2:4]}-{digits[4:6]}   (hex)\t\t{name}\n')
+      f.write(f'{digits}     (base 16)\t\t{name}\n')
+      f.write('\t\t\t\t1 Example Street\n\t\t\t\tExample City  12345\n')
+      f.write('\t\t\t\tUS\n\n')
+
+
+def _scan(oui_file, mac_address):
+  """Lookup used by the connection module before the index"""
+  mac_address = mac_address.replace(':', '-').upper()
+  with open(oui_file, 'r', encoding='UTF-8') as file:
+    for line in file:
+      if mac_address.startswith(line[:8]):
+        start = line.index('(hex)') + len('(hex)')
+        return line[start:].strip()
+  return None
+
+
+def _run(name, func, number):
+  best = min(timeit.repeat(func, number=number, repeat=REPEAT)) / number
+  print(f'{name:<40} {best * 1000000:10.1f} us')
+
+
+def main():
+  with tempfile.TemporaryDirectory() as tmp_dir:
+    if len(sys.argv) > 1:
+      oui_file = sys.argv[1]
+    else:
+      oui_file = os.path.join(tmp_dir, 'oui.txt')
+      _write_oui_file(oui_file)
+    index_file = os.path.join(tmp_dir, 'oui.idx')
+
+    prefixes = list(oui_index.parse_oui_file(oui_file))
+    rng = random.Random(1)
+    macs = [
+        ':'.join(f'{prefix:06x}{rng.randrange(1 << 24):06x}'[i:i + 2]
+                 for i in range(0, 12, 2))
+        for prefix in rng.choices(prefixes, k=LOOKUPS)
+    ]
+
+    print(f'OUI file: {os.path.getsize(oui_file)} bytes, ' +
+          f'{len(prefixes)} prefixes')
+    _run('compile index',
+         lambda: oui_index.compile_index(oui_file, index_file), 1)
+    print(f'OUI index: {os.path.getsize(index_file)} bytes')
+
+    index = oui_index.OUIIndex(index_file)
+    for mac in macs[:20]:
+      assert index.lookup(mac) == _scan(oui_file, mac)
+
+    scan_macs = itertools.cycle(macs)
+    _run('lookup (scan oui.txt)', lambda: _scan(oui_file, next(scan_macs)),
+         10)
+    _run('open index', lambda: oui_index.OUIIndex(index_file).close(), 1000)
+    index_macs = itertools.cycle(macs)
+    _run('lookup (index)', lambda: index.lookup(next(index_macs)), 10000)
+    index.close()
+
+
+if __name__ == '__main__':
+  main()
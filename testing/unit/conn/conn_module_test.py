@@ -14,9 +14,16 @@
 """Module run all the Connection module related unit tests"""
 from port_stats_util import PortStatsUtil
 from connection_module import ConnectionModule
+from dhcp_util import DHCPUtil, LEASE_RENEWED, LEASE_REMOVED as REMOVED
+from packet_index import PacketIndex, bytes_to_ip, int_to_mac
+from scapy.all import rdpcap, ARP, DHCP, Ether, ICMP
+import json
 import os
+import queue
 import sys
+import threading
 import unittest
+from types import SimpleNamespace
 from common import logger
 
 MODULE = 'conn'
@@ -54,6 +61,62 @@ MONITOR_CAPTURE_FILE = os.path.join(CAPTURES_DIR, 'monitor.pcap')
 
 LOGGER = None
 
+# Lease event types of the DHCP servers
+LEASE_ADDED = 0
+LEASE_UPDATED = 1
+LEASE_REMOVED = 2
+
+
+class FakeDHCPClient():
+  """Stands in for the gRPC client of a DHCP server"""
+
+  def __init__(self, running=True):
+    self.running = running
+    self.stream = None
+    self.watching = threading.Event()
+
+  def get_status(self):
+    return SimpleNamespace(code=200, message=str({'dhcpStatus': self.running}))
+
+  def get_lease(self, hw_addr):  # pylint: disable=W0613
+    return SimpleNamespace(code=200, message='{}')
+
+  def watch_leases(self, hw_addr=None, timeout=None):  # pylint: disable=W0613
+    self.stream = FakeLeaseStream()
+    self.watching.set()
+    return self.stream
+
+  def send_lease_event(self,
+                       event_type,
+                       hw_addr,
+                       ip,
+                       expires='2026-01-01 00:00:00'):
+    self.stream.events.put(
+        SimpleNamespace(type=event_type,
+                        REMOVED=LEASE_REMOVED,
+                        lease=SimpleNamespace(hw_addr=hw_addr,
+                                              ip=ip,
+                                              hostname='device',
+                                              expires=expires,
+                                              manufacturer='')))
+
+
+class FakeLeaseStream():
+  """Lease events streamed until cancelled"""
+
+  def __init__(self):
+    self.events = queue.Queue()
+
+  def __iter__(self):
+    while True:
+      event = self.events.get()
+      if event is None:
+        return
+      yield event
+
+  def cancel(self):
+    self.events.put(None)
+
 
 class ConnectionModuleTest(unittest.TestCase):
   """Contains and runs all the unit tests concerning Connection 
@@ -172,6 +235,38 @@ class ConnectionModuleTest(unittest.TestCase):
     LOGGER.info(result)
     self.assertEqual(result[0], True)
 
+  # Check the packet index against the packets dissected by scapy
+  def packet_index_test(self):
+    LOGGER.info('packet_index_test')
+    capture_files = [STARTUP_CAPTURE_FILE, MONITOR_CAPTURE_FILE]
+    packets = rdpcap(STARTUP_CAPTURE_FILE) + rdpcap(MONITOR_CAPTURE_FILE)
+    packet_index = PacketIndex.load(capture_files,
+                                    cache_dir=os.path.join(
+                                        OUTPUT_DIR, 'packet_index'))
+    self.assertEqual(len(packet_index), len(packets))
+
+    device_requests = 0
+    for row, packet in zip(packet_index.table, packets):
+      self.assertEqual(int_to_mac(row['src_mac']), packet[Ether].src)
+      self.assertEqual(int_to_mac(row['dst_mac']), packet[Ether].dst)
+      if ARP in packet:
+        self.assertEqual(bytes_to_ip(row['src_ip']), packet[ARP].psrc)
+      if DHCP in packet and ICMP not in packet:
+        dhcp_type = [o[1] for o in packet[DHCP].options
+                     if 'message-type' in o][0]
+        self.assertEqual(row['dhcp_type'], dhcp_type)
+        if (dhcp_type in (1, 3)
+            and packet[Ether].src == os.environ['DEVICE_MAC']):
+          device_requests += 1
+
+    # Vectorised queries match filtering the packets
+    self.assertEqual(
+        len(packet_index.select(src_mac=os.environ['DEVICE_MAC'],
+                                dhcp_type=[1, 3])), device_requests)
+
+    # A second load of unchanged captures is served from the cache
+    self.assertIs(PacketIndex.load(capture_files), packet_index)
+
   def communication_network_type_test(self):
     LOGGER.info('communication_network_type_test')
     conn_module = ConnectionModule(module=MODULE,
@@ -200,6 +295,120 @@ class ConnectionModuleTest(unittest.TestCase):
     self.assertEqual(result[2], details_expected)
     #self.assertEqual(result[0], True)
 
+  def communication_network_type_counters_test(self):
+    LOGGER.info('communication_network_type_counters_test')
+    traffic_counters_file = os.path.join(OUTPUT_DIR, 'traffic_counters.json')
+    conn_module = ConnectionModule(module=MODULE,
+                                   results_dir=OUTPUT_DIR,
+                                   startup_capture_file=STARTUP_CAPTURE_FILE,
+                                   monitor_capture_file=MONITOR_CAPTURE_FILE,
+                                   traffic_counters_file=traffic_counters_file)
+    counters = {
+        'mac_address': conn_module._device_mac,  # pylint: disable=W0212
+        'multicast': {
+            'from': 0,
+            'to': 0
+        },
+        'broadcast': {
+            'from': 0,
+            'to': 0
+        },
+        'unicast': {
+            'from': 5,
+            'to': 7
+        }
+    }
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    with open(traffic_counters_file, 'w', encoding='utf-8') as f:
+      json.dump(counters, f)
+    result = conn_module._communication_network_type()  # pylint: disable=W0212
+    LOGGER.info(result)
+    self.assertEqual(result[1], 'Packet types detected: Unicast')
+    self.assertEqual(result[2], counters)
+
+  # Test waiting for a lease event from the DHCP servers
+  def dhcp_util_lease_events_test(self):
+    LOGGER.info('dhcp_util_lease_events_test')
+    device_mac = os.environ['DEVICE_MAC']
+    primary = FakeDHCPClient()
+    secondary = FakeDHCPClient(running=False)
+    dhcp_util = DHCPUtil(primary, secondary, LOGGER)
+
+    # No lease within the timeout
+    self.assertIsNone(dhcp_util.get_cur_lease(device_mac, timeout=0.2))
+
+    def send_events():
+      primary.watching.wait()
+      secondary.watching.wait()
+      # Leases of a stopped server and removed leases are ignored
+      secondary.send_lease_event(LEASE_ADDED, device_mac, '10.10.10.20')
+      primary.send_lease_event(LEASE_REMOVED, device_mac, '10.10.10.14')
+      primary.send_lease_event(LEASE_ADDED, device_mac, '10.10.10.15')
+
+    primary.watching.clear()
+    secondary.watching.clear()
+    sender = threading.Thread(target=send_events)
+    sender.start()
+    lease = dhcp_util.get_cur_lease(device_mac, timeout=10)
+    sender.join()
+    self.assertEqual(lease['ip'], '10.10.10.15')
+    self.assertTrue(lease['primary'])
+
+  # Test waiting for a lease to be renewed or removed
+  def dhcp_util_lease_change_test(self):
+    LOGGER.info('dhcp_util_lease_change_test')
+    device_mac = os.environ['DEVICE_MAC']
+    primary = FakeDHCPClient()
+    secondary = FakeDHCPClient(running=False)
+    dhcp_util = DHCPUtil(primary, secondary, LOGGER)
+    lease = {
+        'hw_addr': device_mac,
+        'ip': '10.10.10.14',
+        'expires': '2026-01-01 00:00:00'
+    }
+
+    # The wait is bounded by the timeout
+    change, waited = dhcp_util.wait_for_lease_change(lease, timeout=0.2)
+    self.assertIsNone(change)
+    self.assertGreaterEqual(waited, 0.2)
+
+    def wait_for_change(*events):
+      primary.watching.clear()
+      secondary.watching.clear()
+
+      def send_events():
+        primary.watching.wait()
+        secondary.watching.wait()
+        for event in events:
+          primary.send_lease_event(*event)
+
+      sender = threading.Thread(target=send_events)
+      sender.start()
+      change, waited = dhcp_util.wait_for_lease_change(lease, timeout=10)
+      sender.join()
+      self.assertLess(waited, 10)
+      return change
+
+    # The current lease is reported first and does not end the wait
+    self.assertEqual(
+        wait_for_change(
+            (LEASE_ADDED, device_mac, '10.10.10.14'),
+            (LEASE_UPDATED, device_mac, '10.10.10.14', '2026-01-01 00:01:00')),
+        LEASE_RENEWED)
+    self.assertEqual(
+        wait_for_change((LEASE_ADDED, device_mac, '10.10.10.14'),
+                        (LEASE_UPDATED, device_mac, '10.10.10.30')),
+        LEASE_RENEWED)
+    self.assertEqual(
+        wait_for_change((LEASE_ADDED, device_mac, '10.10.10.14'),
+                        (LEASE_REMOVED, device_mac, '10.10.10.14')), REMOVED)
+
+    # Waits for a server to stop
+    self.assertTrue(
+        dhcp_util.wait_for_dhcp_server_status(False,
+                                              dhcp_server_primary=False))
+    self.assertFalse(dhcp_util.wait_for_dhcp_server_status(False, timeout=0.2))
+
 
 if __name__ == '__main__':
   suite = unittest.TestSuite()
@@ -227,8 +436,17 @@ if __name__ == '__main__':
   suite.addTest(
       ConnectionModuleTest('connection_switch_dhcp_snooping_icmp_test'))
 
+  # Packet index shared by the capture tests
+  suite.addTest(ConnectionModuleTest('packet_index_test'))
+
   # DHCP Snooping related tests
   suite.addTest(ConnectionModuleTest('communication_network_type_test'))
+  suite.addTest(
+      ConnectionModuleTest('communication_network_type_counters_test'))
+
+  # DHCP lease events
+  suite.addTest(ConnectionModuleTest('dhcp_util_lease_events_test'))
+  suite.addTest(ConnectionModuleTest('dhcp_util_lease_change_test'))
 
   runner = unittest.TextTestRunner()
   test_result = runner.run(suite)
@@ -13,6 +13,7 @@
 # limitations under the License.
 """Module run all the DNS related unit tests"""
 from dns_module import DNSModule
+import subprocess
 import unittest
 import os
 import sys
@@ -48,6 +49,9 @@ DNS_NO_DNS_CAPTURE = os.path.join(DNS_NO_DNS_DIR, 'dns.pcap')
 STARTUP_NO_DNS_CAPTURE = os.path.join(DNS_NO_DNS_DIR, 'startup.pcap')
 MONITOR_NO_DNS_CAPTURE = os.path.join(DNS_NO_DNS_DIR, 'monitor.pcap')
 
+# Devices in the capture files
+DEVICE_MACS = ['38:d1:35:01:17:fe', '00:30:64:8a:c8:cc']
+
 class DNSModuleTest(unittest.TestCase):
   """Contains and runs all the unit tests concerning DNS behaviors"""
 
@@ -186,6 +190,59 @@ class DNSModuleTest(unittest.TestCase):
     # Assert that the actual result matches the expected result.
     self.assertEqual(expected_result, result)
 
+  # Test the DNS analyser against tcpdump filters for each capture set
+  def dns_analyser_test(self):
+    dns_server = '10.10.10.4'
+    for capture_dir in (DNS_DHCP_SERVER_DIR, DNS_NON_DHCP_SERVER_DIR,
+                        DNS_NO_DNS_DIR):
+      capture_files = [
+          os.path.join(capture_dir, capture_file)
+          for capture_file in ('startup.pcap', 'monitor.pcap', 'dns.pcap')
+      ]
+      for device_mac in DEVICE_MACS:
+        with self.subTest(capture_dir=capture_dir, device_mac=device_mac):
+          os.environ['DEVICE_MAC'] = device_mac
+          dns_module = DNSModule(module=MODULE,
+                                 results_dir=OUTPUT_DIR,
+                                 startup_capture_file=capture_files[0],
+                                 monitor_capture_file=capture_files[1],
+                                 dns_server_capture_file=capture_files[2])
+          dns_analyser = dns_module._get_dns_analyser() # pylint: disable=W0212
+
+          self.assertEqual(
+              dns_analyser.local_packets,
+              count_packets(capture_files, f'dst port 53 and dst host '
+                            f'{dns_server} and ether src {device_mac}'))
+          self.assertEqual(
+              dns_analyser.external_packets,
+              count_packets(capture_files, f'dst port 53 and not dst host '
+                            f'{dns_server} and ether src {device_mac}'))
+          self.assertEqual(
+              dns_analyser.mdns_packets,
+              count_packets(capture_files,
+                            f'udp port 5353 and ether src {device_mac}'))
+
+          # Packets in more than one capture are only included once
+          timestamps = [
+              record['Timestamp'] for record in dns_analyser.records
+          ]
+          self.assertEqual(len(timestamps), len(set(timestamps)))
+          self.assertEqual(sum(dns_analyser.table.values()),
+                           len(dns_analyser.records))
+
+
+def count_packets(capture_files, tcpdump_filter):
+  """Number of packets matching a filter in the capture files"""
+  count = 0
+  for capture_file in capture_files:
+    output = subprocess.run(
+        ['tcpdump', '-n', '-r', capture_file] + tcpdump_filter.split(),
+        capture_output=True,
+        text=True,
+        check=False).stdout
+    count += len(output.splitlines())
+  return count
+
 if __name__ == '__main__':
   suite = unittest.TestSuite()
 
@@ -196,6 +253,7 @@ if __name__ == '__main__':
   suite.addTest(DNSModuleTest('dns_traffic_to_dhcp_provided_server_test'))
   suite.addTest(DNSModuleTest('dns_traffic_to_non_dhcp_server_test'))
   suite.addTest(DNSModuleTest('dns_no_dns_traffic_test'))
+  suite.addTest(DNSModuleTest('dns_analyser_test'))
 
   # Run the tests
   runner = unittest.TextTestRunner()
@@ -0,0 +1,158 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Report analytics tests"""
+
+import datetime
+import pytest
+from common.analytics import ReportAnalytics
+from common.statuses import TestResult, TestrunResult
+from common import testreport
+
+
+def create_report(mac_addr, manufacturer, started, results, # pylint: disable=R0917
+                  version='2.2', test_pack='Device Qualification'):
+  report_json = {
+      'testrun': {'version': version},
+      'mac_addr': mac_addr,
+      'device': {
+          'mac_addr': mac_addr,
+          'manufacturer': manufacturer,
+          'model': 'Model',
+          'test_pack': test_pack
+      },
+      'status': 'Complete',
+      'result': (TestrunResult.COMPLIANT
+                 if TestResult.NON_COMPLIANT not in results.values()
+                 else TestrunResult.NON_COMPLIANT),
+      'started': started,
+      'finished': started,
+      'tests': {
+          'total': len(results),
+          'results': [{
+              'name': name,
+              'description': '',
+              'expected_behavior': '',
+              'required_result': 'Required',
+              'result': result
+          } for name, result in results.items()]
+      },
+      'folder_name': f'{mac_addr.replace(":", "")}_{started}'
+  }
+  report = testreport.TestReport()
+  report.from_json(report_json)
+  return report
+
+
+@pytest.fixture
+def analytics():
+  table = ReportAnalytics()
+  table.add_reports([
+      create_report('00:00:00:00:00:01', 'Google', '2024-01-01 10:00:00', {
+          'connection.dhcp_address': TestResult.COMPLIANT,
+          'dns.network.hostname_resolution': TestResult.NON_COMPLIANT
+      }, version='2.1'),
+      create_report('00:00:00:00:00:01', 'Google', '2024-02-01 10:00:00', {
+          'connection.dhcp_address': TestResult.COMPLIANT,
+          'dns.network.hostname_resolution': TestResult.COMPLIANT
+      }),
+      create_report('00:00:00:00:00:02', 'Acme', '2024-02-02 10:00:00', {
+          'connection.dhcp_address': TestResult.NON_COMPLIANT,
+          'dns.network.hostname_resolution': TestResult.FEATURE_NOT_DETECTED
+      }),
+  ])
+  return table
+
+
+def test_test_summary(analytics):  # pylint: disable=W0621
+  summary = {s['name']: s for s in analytics.get_test_summary()}
+
+  dhcp = summary['connection.dhcp_address']
+  assert dhcp['total'] == 3
+  assert dhcp['results'] == {
+      TestResult.COMPLIANT: 2,
+      TestResult.NON_COMPLIANT: 1
+  }
+  assert dhcp['pass_rate'] == round(2 / 3, 4)
+
+  dns = summary['dns.network.hostname_resolution']
+  assert dns['results'][TestResult.FEATURE_NOT_DETECTED] == 1
+  assert dns['pass_rate'] == 0.5
+
+
+def test_test_summary_filters(analytics):  # pylint: disable=W0621
+  summary = analytics.get_test_summary(manufacturer='Acme')
+  assert {s['name']: s['total'] for s in summary} == {
+      'connection.dhcp_address': 1,
+      'dns.network.hostname_resolution': 1
+  }
+
+  summary = analytics.get_test_summary(
+      start=datetime.datetime(2024, 1, 15),
+      end=datetime.datetime(2024, 2, 1, 23, 59))
+  assert [s['total'] for s in summary] == [1, 1]
+
+  assert not analytics.get_test_summary(manufacturer='Unknown')
+
+
+def test_trends_by_version(analytics):  # pylint: disable=W0621
+  trends = {t['group']: t for t in analytics.get_trends()}
+  assert trends['2.1']['reports'] == 1
+  assert trends['2.1']['failure_rate'] == 0.5
+  assert trends['2.2']['reports'] == 2
+  assert trends['2.2']['non_compliant'] == 1
+  assert trends['2.2']['failure_rate'] == round(1 / 3, 4)
+
+
+def test_trends_by_interval(analytics):  # pylint: disable=W0621
+  trends = analytics.get_trends(interval='month',
+                                test='connection.dhcp_address')
+  assert [(t['group'], t['total']) for t in trends] == [('2024-01', 1),
+                                                        ('2024-02', 2)]
+
+  with pytest.raises(ValueError):
+    analytics.get_trends(interval='hour')
+
+
+def test_manufacturer_summary(analytics):  # pylint: disable=W0621
+  summary = {s['manufacturer']: s for s in analytics.get_manufacturer_summary()}
+  assert summary['Google']['devices'] == 1
+  assert summary['Google']['reports'] == 2
+  assert summary['Google']['compliant_reports'] == 1
+  assert summary['Google']['pass_rate'] == 0.75
+  assert summary['Acme']['reports'] == 1
+  assert summary['Acme']['pass_rate'] == 0.0
+
+
+def test_remove_report(analytics):  # pylint: disable=W0621
+  analytics.remove_report('000000000001_2024-01-01 10:00:00')
+  assert len(analytics) == 4
+  assert [t['group'] for t in analytics.get_trends()] == ['2.2']
+
+  analytics.remove_device('00:00:00:00:00:02')
+  assert len(analytics) == 2
+
+  analytics.clear()
+  assert not analytics.get_test_summary()
+  assert not analytics.get_manufacturer_summary()
+
+
+def test_table_grows():
+  table = ReportAnalytics()
+  results = {f'test_{i}': TestResult.COMPLIANT for i in range(100)}
+  for day in range(1, 29):
+    table.add_report(create_report('00:00:00:00:00:03', 'Google',
+                                   f'2024-03-{day:02d} 10:00:00', results))
+  assert len(table) == 2800
+  assert all(s['total'] == 28 for s in table.get_test_summary())
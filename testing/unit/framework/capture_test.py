@@ -0,0 +1,156 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Packet capture tests"""
+
+import socket
+import struct
+import time
+from unittest.mock import MagicMock
+from scapy.all import Dot1Q, Ether, IP, UDP, rdpcap
+from net_orc import capture
+
+DEVICE_MAC = '00:1e:42:35:73:c4'
+
+
+def create_socket(frames, auxdata=None):
+  """Socket which returns the frames and then times out"""
+  timestamp = struct.pack('@ll', 1700000000, 250000)
+  ancdata = [(socket.SOL_SOCKET, capture.SO_TIMESTAMP, timestamp)]
+  if auxdata is not None:
+    ancdata.append((capture.SOL_PACKET, capture.PACKET_AUXDATA, auxdata))
+  responses = [(frame, ancdata, 0, None) for frame in frames]
+
+  def recvmsg(*_):
+    if responses:
+      return responses.pop(0)
+    time.sleep(0.01)
+    raise socket.timeout()
+
+  mock_socket = MagicMock()
+  mock_socket.recvmsg.side_effect = recvmsg
+  return mock_socket
+
+
+def create_frames(count):
+  return [
+      bytes(Ether(src=DEVICE_MAC) / IP(dst='10.10.10.1') / UDP(dport=i))
+      for i in range(count)
+  ]
+
+
+def test_capture_to_pcap(tmp_path):
+  path = str(tmp_path / 'startup.pcap')
+  frames = create_frames(5)
+  updates = []
+
+  packet_capture = capture.PacketCapture('eth0',
+                                         path,
+                                         max_duration=0.1,
+                                         on_update=updates.append)
+  packet_capture._capture(create_socket(frames))  # pylint: disable=W0212
+
+  packets = rdpcap(path)
+  assert [bytes(p) for p in packets] == frames
+  assert float(packets[0].time) == 1700000000.25
+
+  stats = packet_capture.get_stats()
+  assert stats['packets'] == 5
+  assert stats['bytes'] == sum(len(f) for f in frames)
+  assert not stats['truncated']
+
+  # Final statistics are always published
+  assert updates[-1] == stats
+
+
+def test_capture_stop_filter(tmp_path):
+  path = str(tmp_path / 'startup.pcap')
+  frames = create_frames(5)
+
+  packet_capture = capture.PacketCapture(
+      'eth0', path, stop_filter=lambda frame: frame == frames[2])
+  packet_capture._capture(create_socket(frames))  # pylint: disable=W0212
+
+  assert len(rdpcap(path)) == 3
+
+
+def test_capture_max_size(tmp_path):
+  path = str(tmp_path / 'monitor.pcap')
+  frames = create_frames(10)
+  max_size = (len(capture.PCAP_GLOBAL_HEADER) +
+              3 * (capture.PCAP_RECORD_HEADER.size + len(frames[0])))
+
+  packet_capture = capture.PacketCapture('eth0',
+                                         path,
+                                         max_duration=0.1,
+                                         max_size=max_size)
+  packet_capture._capture(create_socket(frames))  # pylint: disable=W0212
+
+  # Packets are counted but no longer written once the limit is reached
+  assert len(rdpcap(path)) == 3
+  stats = packet_capture.get_stats()
+  assert stats['packets'] == 10
+  assert stats['truncated']
+
+
+def create_auxdata(status, tci, tpid=0):
+  # tp_status, tp_len, tp_snaplen, tp_mac, tp_net, tp_vlan_tci, tp_vlan_tpid
+  return struct.pack('@IIIHHHH', status, 0, 0, 0, 0, tci, tpid)
+
+
+def test_capture_vlan_tag(tmp_path):
+  path = str(tmp_path / 'startup.pcap')
+  frames = create_frames(1)
+
+  # The tag stripped by the kernel is written back to the frame
+  auxdata = create_auxdata(capture.TP_STATUS_VLAN_VALID, (3 << 13) | 100)
+  packet_capture = capture.PacketCapture('eth0', path, max_duration=0.1)
+  sock = create_socket(frames, auxdata)
+  packet_capture._capture(sock)  # pylint: disable=W0212
+  packet = rdpcap(path)[0]
+  assert packet[Dot1Q].vlan == 100
+  assert packet[Dot1Q].prio == 3
+  assert packet[Dot1Q].type == 0x0800
+  assert packet[UDP].dport == 0
+
+  # with the TPID reported by the kernel when it is valid
+  auxdata = create_auxdata(
+      capture.TP_STATUS_VLAN_VALID | capture.TP_STATUS_VLAN_TPID_VALID, 200,
+      0x88a8)
+  tagged = capture.restore_vlan_tag(
+      frames[0], [(capture.SOL_PACKET, capture.PACKET_AUXDATA, auxdata)])
+  assert tagged[12:16] == bytes.fromhex('88a800c8')
+  assert tagged[16:] == frames[0][12:]
+
+  # Untagged frames are unchanged
+  auxdata = create_auxdata(0, 0)
+  assert capture.restore_vlan_tag(
+      frames[0],
+      [(capture.SOL_PACKET, capture.PACKET_AUXDATA, auxdata)]) == frames[0]
+
+
+def test_capture_untagged(tmp_path):
+  path = str(tmp_path / 'monitor.pcap')
+  frames = create_frames(2)
+  tagged = bytes(Ether(src=DEVICE_MAC) / Dot1Q(vlan=100) / IP() / UDP())
+
+  # Traffic on the VLANs is left out of the capture
+  packet_capture = capture.PacketCapture('eth0',
+                                         path,
+                                         max_duration=0.1,
+                                         untagged=True)
+  sock = create_socket([frames[0], tagged, frames[1]])
+  packet_capture._capture(sock)  # pylint: disable=W0212
+  assert [bytes(p) for p in rdpcap(path)] == frames
+  assert packet_capture.get_stats()['packets'] == 2
@@ -0,0 +1,96 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""JSON codec tests"""
+
+import datetime
+import json
+from unittest.mock import patch
+import pytest
+from common import codec
+from common.device import Device
+from test_orc import test_case
+
+# Run every test with orjson (when installed) and the stdlib fallback
+BACKENDS = {'orjson': codec.orjson, 'json': None}
+
+STARTED = datetime.datetime(2024, 1, 1, 10, 30, 15)
+
+
+@pytest.fixture(params=BACKENDS.keys())
+def backend(request):
+  if request.param == 'orjson' and codec.orjson is None:
+    pytest.skip('orjson is not installed')
+  with patch.object(codec, 'orjson', BACKENDS[request.param]):
+    yield
+
+
+def test_round_trip(backend):  # pylint: disable=W0613,W0621
+  obj = {'name': 'Testrun', 'tests': [1, 2.5, None, True], 'nested': {}}
+  assert codec.loads(codec.dumps(obj)) == obj
+  assert codec.loads(codec.dumpb(obj)) == obj
+  assert json.loads(codec.dumps(obj, indent=2)) == obj
+  assert codec.dumps(obj, indent=2).startswith('{\n  "name"')
+
+
+def test_fallback_indent(backend):  # pylint: disable=W0613,W0621
+  assert codec.dumps({'a': 1}, indent=4) == '{\n    "a": 1\n}'
+
+
+def test_datetime(backend):  # pylint: disable=W0613,W0621
+  assert codec.loads(codec.dumps({'started': STARTED})) == {
+      'started': '2024-01-01T10:30:15'
+  }
+
+
+def test_dataclass(backend):  # pylint: disable=W0613,W0621
+  device = Device(mac_addr='00:1e:42:35:73:c4',
+                  manufacturer='Google',
+                  model='Test',
+                  created_at=STARTED,
+                  modified_at=STARTED)
+  device_json = codec.loads(codec.dumps(device))
+
+  assert device_json['mac_addr'] == '00:1e:42:35:73:c4'
+  assert device_json['created_at'] == '2024-01-01T10:30:15'
+  assert device_json['reports'] == []
+
+  # Private fields are not serialized
+  assert '_initial_values' not in device_json
+
+  test = test_case.TestCase(name='dns.network.hostname_resolution')
+  assert codec.loads(codec.dumps([test]))[0]['name'] == test.name
+
+
+def test_unsupported_type(backend):  # pylint: disable=W0613,W0621
+  with pytest.raises(TypeError):
+    codec.dumps({'value': object()})
+
+
+def test_invalid_json(backend):  # pylint: disable=W0613,W0621
+  with pytest.raises(codec.JSONDecodeError):
+    codec.loads('{"name": ')
+
+
+def test_file(tmp_path, backend):  # pylint: disable=W0613,W0621
+  path = tmp_path / 'report.json'
+  obj = {'started': STARTED, 'total': 3}
+  with open(path, 'w', encoding='utf-8') as f:
+    codec.dump(obj, f, indent=2)
+  with open(path, 'rb') as f:
+    assert codec.load(f) == {'started': '2024-01-01T10:30:15', 'total': 3}
+  with open(path, 'wb') as f:
+    codec.dump(obj, f)
+  with open(path, encoding='utf-8') as f:
+    assert codec.load(f)['total'] == 3
@@ -0,0 +1,170 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Container monitor tests"""
+
+import queue
+import threading
+import requests
+from common import container_monitor
+from common import docker_util
+
+TIMEOUT = 5
+
+
+class FakeEvents:
+  """Events stream fed from the test"""
+
+  def __init__(self):
+    self._events = queue.Queue()
+
+  def __iter__(self):
+    while True:
+      event = self._events.get()
+      if event is None:
+        return
+      yield event
+
+  def send(self, action, name, container_id='1', **attributes):
+    self._events.put({
+        'Type': 'container',
+        'Action': action,
+        'Actor': {
+            'ID': container_id,
+            'Attributes': dict(attributes, name=name)
+        },
+        'time': 1700000000,
+        'timeNano': 1700000000500000000
+    })
+
+  def close(self):
+    self._events.put(None)
+
+
+def create_monitor(containers=None):
+  streams = []
+
+  def get_events():
+    streams.append(FakeEvents())
+    return streams[-1]
+
+  monitor = container_monitor.ContainerMonitor(
+      event_source=get_events, container_source=lambda: containers or [])
+  monitor.start()
+  return monitor, streams
+
+
+def wait_for_subscription(monitor):
+  subscribed = threading.Event()
+  for _ in range(TIMEOUT * 100):
+    if monitor.is_subscribed():
+      subscribed.set()
+      break
+    subscribed.wait(0.01)
+  assert subscribed.is_set()
+
+
+def test_container_state():
+  monitor, streams = create_monitor()
+  events = []
+  monitor.register_callback(lambda *args: events.append(args), [
+      container_monitor.CONTAINER_DIED, container_monitor.CONTAINER_OOM
+  ])
+  wait_for_subscription(monitor)
+  stream = streams[0]
+
+  stream.send('create', 'tr-ct-dns')
+  stream.send('start', 'tr-ct-dns')
+  stream.send('health_status: healthy', 'tr-ct-dns')
+  stream.send('oom', 'tr-ct-dns')
+  stream.send('die', 'tr-ct-dns', exitCode='137')
+
+  state = monitor.wait_for_exit('tr-ct-dns', '1', TIMEOUT)
+  assert state['status'] == container_monitor.EXITED
+  assert state['exit_code'] == 137
+  assert state['oom_killed']
+  assert state['health'] == 'healthy'
+  assert state['started'] == 1700000000.5
+  assert state['finished'] == 1700000000.5
+  assert events == [(container_monitor.CONTAINER_OOM, 'tr-ct-dns'),
+                    (container_monitor.CONTAINER_DIED, 'tr-ct-dns')]
+
+  # Removed containers have no status. Events are applied in order, so the
+  # container has been removed once the following container has exited
+  stream.send('destroy', 'tr-ct-dns')
+  stream.send('die', 'tr-ct-ntp', container_id='2', exitCode='0')
+  assert monitor.wait_for_exit('tr-ct-ntp', '2', TIMEOUT) is not None
+  assert monitor.get_status('tr-ct-dns') is None
+
+  monitor.stop()
+  assert not monitor.is_running()
+
+
+def test_wait_for_exit(monkeypatch):
+  monkeypatch.setattr(container_monitor, 'RETRY_INTERVAL', 0.1)
+  monitor, streams = create_monitor([{
+      'name': 'tr-ct-dns',
+      'id': '1',
+      'status': container_monitor.RUNNING
+  }])
+  wait_for_subscription(monitor)
+  assert monitor.get_status('tr-ct-dns') == container_monitor.RUNNING
+
+  # Still running when the timeout expires
+  assert monitor.wait_for_exit('tr-ct-dns', '1', 0.1) is None
+
+  # A new container with the same name does not satisfy the wait
+  streams[0].send('die', 'tr-ct-dns', container_id='2', exitCode='0')
+  assert monitor.wait_for_exit('tr-ct-dns', '1', 0.1) is None
+
+  waiter = threading.Thread(
+      target=lambda: results.append(monitor.wait_for_exit('tr-ct-dns', '3')))
+  results = []
+  waiter.start()
+  streams[0].send('start', 'tr-ct-dns', container_id='3')
+  streams[0].send('die', 'tr-ct-dns', container_id='3', exitCode='1')
+  waiter.join(TIMEOUT)
+  assert results[0]['exit_code'] == 1
+
+  # Waits end when the events stream is lost
+  streams[0].close()
+  assert monitor.wait_for_exit('tr-ct-dns', '4', TIMEOUT) is None
+
+  # The table is reloaded on resubscribing
+  wait_for_subscription(monitor)
+  assert len(streams) == 2
+  assert monitor.get_status('tr-ct-dns') == container_monitor.RUNNING
+  monitor.stop()
+
+
+def test_reconnect_after_connection_error(monkeypatch):
+  monkeypatch.setattr(container_monitor, 'RETRY_INTERVAL', 0.1)
+  resets = []
+  monkeypatch.setattr(docker_util, 'reset_client', lambda: resets.append(1))
+  streams = []
+
+  def get_events():
+    if not resets:
+      raise requests.exceptions.ConnectionError('Connection refused')
+    streams.append(FakeEvents())
+    return streams[-1]
+
+  monitor = container_monitor.ContainerMonitor(event_source=get_events,
+                                               container_source=lambda: [])
+  monitor.start()
+
+  # The shared client is replaced before subscribing again
+  wait_for_subscription(monitor)
+  assert resets == [1]
+  monitor.stop()
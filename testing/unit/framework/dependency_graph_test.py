@@ -0,0 +1,101 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Dependency graph tests"""
+
+import threading
+import time
+import pytest
+from common.dependency_graph import DependencyGraph
+
+
+def create_graph():
+  # base is an image only dependency which is not part of the graph
+  graph = DependencyGraph()
+  graph.add_node('gateway', ['base'])
+  graph.add_node('dns', ['gateway'])
+  graph.add_node('dhcp-1', ['gateway'])
+  graph.add_node('ntp', ['base'])
+  return graph
+
+
+def test_get_order():
+  graph = create_graph()
+  order = graph.get_order()
+  assert order.index('gateway') < order.index('dns')
+  assert order.index('gateway') < order.index('dhcp-1')
+  assert graph.get_order(reverse=True) == order[::-1]
+
+  graph.add_node('gateway', ['dns'])
+  with pytest.raises(ValueError):
+    graph.get_order()
+
+
+def test_run_concurrently():
+  graph = create_graph()
+  lock = threading.Lock()
+  running = set()
+  events = []
+
+  def task(name):
+    with lock:
+      running.add(name)
+      events.append((name, set(running)))
+    time.sleep(0.05)
+    with lock:
+      running.discard(name)
+
+  durations = graph.run(task, max_workers=4)
+  assert set(durations) == {'gateway', 'dns', 'dhcp-1', 'ntp'}
+
+  # Dependencies complete before their dependents start
+  started = dict(events)
+  assert 'gateway' not in started['dns']
+  assert 'gateway' not in started['dhcp-1']
+
+  # Independent tasks run at the same time
+  assert max(len(active) for _, active in events) > 1
+
+
+def test_run_reverse():
+  graph = create_graph()
+  order = []
+  graph.run(order.append, max_workers=1, reverse=True)
+  assert order.index('gateway') > order.index('dns')
+  assert order.index('gateway') > order.index('dhcp-1')
+
+
+def test_run_failure():
+  graph = create_graph()
+  started = []
+
+  def task(name):
+    started.append(name)
+    if name == 'gateway':
+      raise RuntimeError('Failed to start')
+
+  with pytest.raises(RuntimeError):
+    graph.run(task, max_workers=1)
+
+  # Dependents of the failed task are never started
+  assert 'dns' not in started
+  assert 'dhcp-1' not in started
+
+
+def test_critical_path():
+  graph = create_graph()
+  durations = {'gateway': 2, 'dns': 1, 'dhcp-1': 3, 'ntp': 4}
+  assert graph.get_critical_path(durations) == (['gateway', 'dhcp-1'], 5)
+  assert graph.get_critical_path(durations, reverse=True) == (
+      ['dhcp-1', 'gateway'], 5)
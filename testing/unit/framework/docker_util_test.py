@@ -0,0 +1,100 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Shared docker client tests"""
+
+import threading
+import docker
+from common.docker_util import DockerClientManager
+
+
+class FakeClient:
+  """Docker client which can lose its connection to the daemon"""
+
+  def __init__(self, max_pool_size):
+    self.max_pool_size = max_pool_size
+    self.connected = True
+    self.closed = False
+
+  def ping(self):
+    if not self.connected:
+      raise docker.errors.APIError('Daemon unreachable')
+    return True
+
+  def close(self):
+    self.closed = True
+
+
+class FakeFactory:
+  """Records the clients it creates"""
+
+  def __init__(self):
+    self.clients = []
+    self._lock = threading.Lock()
+
+  def __call__(self, max_pool_size):
+    with self._lock:
+      client = FakeClient(max_pool_size)
+      self.clients.append(client)
+      return client
+
+
+def test_reuse_and_reconnect():
+  factory = FakeFactory()
+  manager = DockerClientManager(max_pool_size=4,
+                                health_check_interval=0,
+                                factory=factory)
+
+  client = manager.get_client()
+  assert client.max_pool_size == 4
+  assert manager.get_client() is client
+
+  # A client which cannot reach the daemon is replaced
+  client.connected = False
+  new_client = manager.get_client()
+  assert new_client is not client
+  assert client.closed
+
+  manager.reset()
+  assert new_client.closed
+  assert manager.get_client() is factory.clients[-1]
+  assert len(factory.clients) == 3
+
+
+def test_health_check_interval():
+  factory = FakeFactory()
+  manager = DockerClientManager(health_check_interval=3600, factory=factory)
+  client = manager.get_client()
+
+  # The daemon is not checked again until the interval has passed
+  client.connected = False
+  assert manager.get_client() is client
+
+
+def test_shared_between_threads():
+  factory = FakeFactory()
+  manager = DockerClientManager(factory=factory)
+  clients = []
+
+  def get_client():
+    clients.append(manager.get_client())
+
+  threads = [threading.Thread(target=get_client) for _ in range(16)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+
+  assert len(factory.clients) == 1
+  assert all(client is factory.clients[0] for client in clients)
@@ -0,0 +1,159 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Image builder tests"""
+
+import json
+import os
+import threading
+import pytest
+from core import image_builder
+
+BASE_DOCKERFILE = """FROM ubuntu@sha256:1234 AS builder
+ARG MODULE_NAME=base
+ARG MODULE_DIR=modules/network/$MODULE_NAME
+COPY $MODULE_DIR/bin /testrun/bin
+COPY --from=builder /testrun /testrun
+"""
+
+MODULE_DOCKERFILE = """FROM testrun/base:latest
+ARG MODULE_NAME={name}
+ARG MODULE_DIR=modules/network/$MODULE_NAME
+ENV CONF_DIR=conf
+COPY ${{MODULE_DIR}}/$CONF_DIR \\
+     /testrun/conf
+"""
+
+
+def create_module(root_dir, name, dockerfile, depends_on=None):
+  module_dir = os.path.join(root_dir, 'modules', 'network', name)
+  for directory in ('bin', 'conf'):
+    os.makedirs(os.path.join(module_dir, directory), exist_ok=True)
+  with open(os.path.join(module_dir, 'bin', 'start'), 'w',
+            encoding='utf-8') as f:
+    f.write('#!/bin/bash')
+  docker_config = {'depends_on': depends_on} if depends_on else {}
+  with open(os.path.join(module_dir, image_builder.MODULE_CONFIG),
+            'w',
+            encoding='utf-8') as f:
+    json.dump({'config': {'meta': {'name': name}, 'docker': docker_config}},
+              f)
+  with open(os.path.join(module_dir, name + '.Dockerfile'),
+            'w',
+            encoding='utf-8') as f:
+    f.write(dockerfile.format(name=name))
+
+
+@pytest.fixture
+def root(tmp_path):
+  create_module(tmp_path, 'base', BASE_DOCKERFILE)
+  create_module(tmp_path, 'dns', MODULE_DOCKERFILE, depends_on='base')
+  create_module(tmp_path, 'ntp', MODULE_DOCKERFILE)
+  return str(tmp_path)
+
+
+def test_discover_images(root):  # pylint: disable=W0621
+  images = image_builder.discover_images(root)
+  assert sorted(images) == ['testrun/base', 'testrun/dns', 'testrun/ntp']
+
+  # Dependencies come from depends_on and the FROM instruction
+  assert images['testrun/base'].dependencies == set()
+  assert images['testrun/dns'].dependencies == {'testrun/base'}
+  assert images['testrun/ntp'].dependencies == {'testrun/base'}
+
+  with open(os.path.join(root, images['testrun/dns'].dockerfile),
+            encoding='utf-8') as f:
+    assert image_builder.get_sources(f.read()) == ['modules/network/dns/conf']
+  assert image_builder.get_sources('COPY $UNKNOWN/bin /testrun/bin') is None
+
+
+def test_build(root):  # pylint: disable=W0621
+  built = {}
+  running = []
+  concurrent = threading.Barrier(2, timeout=5)
+
+  def build_image(image):
+    running.append(image.name)
+    if image.name != 'testrun/base':
+      # Independent images are built at the same time
+      concurrent.wait()
+    built[image.name] = image.context_hash
+
+  builder = image_builder.ImageBuilder(root,
+                                       build_image=build_image,
+                                       get_built_hash=built.get)
+  durations = builder.build()
+  assert running[0] == 'testrun/base'
+  assert sorted(durations) == sorted(built)
+  builder.report(durations)
+
+  # Unchanged images are not rebuilt
+  running.clear()
+  builder = image_builder.ImageBuilder(root,
+                                       build_image=build_image,
+                                       get_built_hash=built.get)
+  builder.build()
+  assert not running
+
+  # Changing the base image context rebuilds its dependents
+  with open(os.path.join(root, 'modules/network/base/bin/start'),
+            'a',
+            encoding='utf-8') as f:
+    f.write('\necho started')
+  builder = image_builder.ImageBuilder(root,
+                                       build_image=build_image,
+                                       get_built_hash=built.get)
+  builder.build()
+  assert sorted(running) == ['testrun/base', 'testrun/dns', 'testrun/ntp']
+
+
+def test_build_error(root):  # pylint: disable=W0621
+  built = []
+
+  def build_image(image):
+    if image.name == 'testrun/base':
+      raise RuntimeError('Failed to build image testrun/base')
+    built.append(image.name)
+
+  builder = image_builder.ImageBuilder(root,
+                                       build_image=build_image,
+                                       get_built_hash=lambda name: None)
+  with pytest.raises(RuntimeError):
+    builder.build()
+
+  # Dependents of a failed image are not built
+  assert not built
+
+
+def test_docker_build(root, tmp_path, monkeypatch):  # pylint: disable=W0621
+  # Docker CLI which prints the build output and fails for one image
+  bin_dir = tmp_path / 'bin'
+  bin_dir.mkdir()
+  docker = bin_dir / 'docker'
+  docker.write_text('#!/bin/sh\n'
+                    'case "$1" in image) exit 1;; esac\n'
+                    'echo "Step 1/2 : FROM testrun/base"\n'
+                    'case "$*" in *testrun/ntp*) exit 1;; esac\n',
+                    encoding='utf-8')
+  docker.chmod(0o755)
+  monkeypatch.setenv('PATH', f'{bin_dir}:{os.environ["PATH"]}')
+
+  builder = image_builder.ImageBuilder(root)
+  images = builder.get_images()
+  builder._docker_build(images['testrun/dns'])  # pylint: disable=W0212
+  with pytest.raises(RuntimeError):
+    builder._docker_build(images['testrun/ntp'])  # pylint: disable=W0212
+
+  # Images are not found, so are always built
+  assert image_builder._get_built_hash('testrun/dns') is None  # pylint: disable=W0212
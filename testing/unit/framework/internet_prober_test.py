@@ -0,0 +1,129 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Internet prober tests"""
+
+import asyncio
+import os
+import socket
+import subprocess
+import pytest
+from net_orc.internet_prober import InternetProber
+
+NAMESPACE = 'tr-probe-test'
+HOST_INTF = 'tr-pt-h'
+NAMESPACE_INTF = 'tr-pt-n'
+HOST_IP = '10.251.0.1'
+NAMESPACE_IP = '10.251.0.2'
+
+
+def create_prober(states, **kwargs):
+  return InternetProber(should_probe=lambda: True,
+                        on_change=states.append,
+                        **kwargs)
+
+
+def test_publish_transitions_only():
+  states = []
+  prober = create_prober(states, min_interval=2, max_interval=16)
+  results = [True, True, True, True, False, False]
+
+  async def probe():
+    return results.pop(0)
+
+  prober.probe = probe
+
+  intervals = []
+  for _ in range(6):
+    asyncio.run(prober.check())
+    intervals.append(prober._interval)  # pylint: disable=W0212
+
+  assert states == [True, False]
+  assert prober.get_state() is False
+
+  # Backs off while stable, resetting on each change
+  assert intervals == [2, 4, 8, 16, 2, 4]
+
+
+def test_skipped_when_not_required():
+  states = []
+  prober = InternetProber(should_probe=lambda: False,
+                          on_change=states.append)
+  prober._state = True  # pylint: disable=W0212
+  asyncio.run(prober.check())
+  assert states == [None]
+
+
+def test_not_probed_when_unavailable():
+  states = []
+  prober = create_prober(states, can_probe=lambda: False)
+
+  async def probe():
+    raise AssertionError('Probed without an internet interface')
+
+  prober.probe = probe
+  asyncio.run(prober.check())
+  assert states == [False]
+
+
+@pytest.fixture
+def namespace():
+  """Namespace connected to the host over a veth pair"""
+  if os.geteuid() != 0:
+    pytest.skip('Requires root to create a network namespace')
+  commands = [
+      f'ip netns add {NAMESPACE}',
+      f'ip link add {HOST_INTF} type veth peer name {NAMESPACE_INTF}',
+      f'ip link set {NAMESPACE_INTF} netns {NAMESPACE}',
+      f'ip addr add {HOST_IP}/30 dev {HOST_INTF}',
+      f'ip link set {HOST_INTF} up',
+      f'ip netns exec {NAMESPACE} ip addr add {NAMESPACE_IP}/30 '
+      f'dev {NAMESPACE_INTF}',
+      f'ip netns exec {NAMESPACE} ip link set {NAMESPACE_INTF} up',
+  ]
+  error = None
+  try:
+    for command in commands:
+      subprocess.run(command.split(), check=True, capture_output=True)
+    created = True
+  except (OSError, subprocess.CalledProcessError) as e:
+    created = False
+    error = e
+
+  if created:
+    yield NAMESPACE
+  subprocess.run(['ip', 'link', 'delete', HOST_INTF],
+                 capture_output=True,
+                 check=False)
+  subprocess.run(['ip', 'netns', 'delete', NAMESPACE],
+                 capture_output=True,
+                 check=False)
+  if not created:
+    pytest.skip(f'Unable to create network namespace: {error}')
+
+
+def test_probe_from_namespace(namespace):  # pylint: disable=W0621
+  with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server:
+    server.bind((HOST_IP, 0))
+    server.listen(1)
+    port = server.getsockname()[1]
+
+    prober = create_prober([],
+                           namespace=namespace,
+                           targets=[('192.0.2.1', 53), (HOST_IP, port)])
+    assert asyncio.run(prober.probe())
+
+  # No route from the namespace to other hosts
+  prober = create_prober([], namespace=namespace, targets=[('192.0.2.1', 53)])
+  assert not asyncio.run(prober.probe())
@@ -0,0 +1,91 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""IP control backend tests"""
+
+from unittest.mock import patch, MagicMock
+from net_orc import ip_control
+
+
+def create_ip_control(netlink):
+  with patch.object(ip_control.netlink_control, 'is_available',
+                    return_value=True), \
+      patch.object(ip_control.netlink_control, 'NetlinkControl',
+                   return_value=netlink):
+    return ip_control.IPControl()
+
+
+@patch.object(ip_control.util, 'run_command')
+def test_netlink_backend(mock_run_command: MagicMock):
+  netlink = MagicMock()
+  netlink.get_links.return_value = ['lo', 'tr-d-t-dns']
+  ip_ctrl = create_ip_control(netlink)
+
+  assert ip_ctrl.link_exists('tr-d-t-dns')
+  assert ip_ctrl.configure_container_interface('tr-di-dhcp', 'tr-cti-dhcp',
+                                               'eth1', 'tr-ctns-dhcp',
+                                               '9a:02:57:1e:8f:02')
+  netlink.configure_container_interface.assert_called_once_with(
+      'tr-di-dhcp', 'tr-cti-dhcp', 'eth1', 'tr-ctns-dhcp', '9a:02:57:1e:8f:02',
+      None, None)
+  mock_run_command.assert_not_called()
+
+
+@patch.object(ip_control.util, 'run_command')
+def test_ip_command_fallback(mock_run_command: MagicMock):
+  netlink = MagicMock()
+  netlink.delete_link.side_effect = OSError('Operation not permitted')
+  mock_run_command.return_value = True
+  ip_ctrl = create_ip_control(netlink)
+
+  assert ip_ctrl.delete_link('tr-d-t-dns')
+  mock_run_command.assert_called_once_with('ip link delete tr-d-t-dns')
+
+  # Netlink is not used when disabled
+  mock_run_command.reset_mock()
+  ip_ctrl = ip_control.IPControl(use_netlink=False)
+  ip_ctrl.set_interface_up('veth0', 'tr-test-dns')
+  mock_run_command.assert_called_once_with(
+      'ip netns exec tr-test-dns ip link set dev veth0 up')
+
+
+@patch.object(ip_control.util, 'run_command')
+def test_ip_command_configure_container_interface(mock_run_command: MagicMock):
+  mock_run_command.return_value = True
+  ip_ctrl = ip_control.IPControl(use_netlink=False)
+  with patch.object(ip_ctrl, 'link_exists', return_value=True), \
+      patch.object(ip_ctrl, 'namespace_exists', return_value=True):
+    assert ip_ctrl.configure_container_interface('tr-di-dhcp', 'tr-cti-dhcp',
+                                                 'eth1', 'tr-ctns-dhcp',
+                                                 '9a:02:57:1e:8f:02')
+  commands = [call.args[0] for call in mock_run_command.call_args_list]
+  assert commands[:2] == [
+      'ip link delete tr-di-dhcp',
+      'ip link add tr-di-dhcp type veth peer name tr-cti-dhcp'
+  ]
+  # The namespace of the container is left in place
+  assert 'ip netns delete tr-ctns-dhcp' not in commands
+
+
+@patch.object(ip_control.util, 'run_command')
+def test_ip_command_cleanup(mock_run_command: MagicMock):
+  mock_run_command.return_value = True
+  ip_ctrl = ip_control.IPControl(use_netlink=False)
+  with patch.object(ip_ctrl, 'link_exists', return_value=True), \
+      patch.object(ip_ctrl, 'namespace_exists', return_value=True):
+    assert ip_ctrl.cleanup('tr-di-dhcp', 'tr-ctns-dhcp')
+  commands = [call.args[0] for call in mock_run_command.call_args_list]
+  assert commands == [
+      'ip link delete tr-di-dhcp', 'ip netns delete tr-ctns-dhcp'
+  ]
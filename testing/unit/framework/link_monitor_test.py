@@ -0,0 +1,89 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Link monitor tests"""
+
+import struct
+from net_orc import link_monitor
+
+IF_OPER_DOWN = 2
+
+
+def link_message(msg_type, index, name, operstate, mac='00:1e:42:35:73:c4'):
+  """Build an rtnetlink link message"""
+  attrs = b''
+  for attr_type, value in ((link_monitor.IFLA_IFNAME, name.encode() + b'\x00'),
+                           (link_monitor.IFLA_ADDRESS, bytes.fromhex(
+                               mac.replace(':', ''))),
+                           (link_monitor.IFLA_OPERSTATE, bytes([operstate]))):
+    attr = struct.pack('=HH', 4 + len(value), attr_type) + value
+    attrs += attr + b'\x00' * (-len(attr) % 4)
+  payload = struct.pack('=BxHiII', 0, 1, index, 0, 0) + attrs
+  return struct.pack('=IHHII', 16 + len(payload), msg_type, 0, 0,
+                     0) + payload
+
+
+def test_parse_messages():
+  data = (link_message(link_monitor.RTM_NEWLINK, 4, 'eth0',
+                       link_monitor.IF_OPER_UP) +
+          link_message(link_monitor.RTM_DELLINK, 5, 'eth1', IF_OPER_DOWN))
+  assert link_monitor.parse_messages(data) == [
+      (link_monitor.RTM_NEWLINK, {
+          'index': 4,
+          'name': 'eth0',
+          'mac_addr': '00:1e:42:35:73:c4',
+          'up': True
+      }),
+      (link_monitor.RTM_DELLINK, {
+          'index': 5,
+          'name': 'eth1',
+          'mac_addr': '00:1e:42:35:73:c4',
+          'up': False
+      }),
+  ]
+
+  # Truncated messages are ignored
+  assert not link_monitor.parse_messages(data[:10])
+
+
+def test_link_events():
+  monitor = link_monitor.LinkMonitor()
+  events = []
+  monitor.register_callback(lambda *args: events.append(args), [
+      link_monitor.LINK_ADDED, link_monitor.LINK_REMOVED, link_monitor.LINK_UP,
+      link_monitor.LINK_DOWN
+  ])
+
+  monitor._handle(link_message(link_monitor.RTM_NEWLINK, 4, 'eth0',  # pylint: disable=W0212
+                               IF_OPER_DOWN))
+  monitor._handle(link_message(link_monitor.RTM_NEWLINK, 4, 'eth0',  # pylint: disable=W0212
+                               link_monitor.IF_OPER_UP))
+  assert monitor.is_up('eth0')
+
+  # Repeated notifications without a change produce no events
+  monitor._handle(link_message(link_monitor.RTM_NEWLINK, 4, 'eth0',  # pylint: disable=W0212
+                               link_monitor.IF_OPER_UP))
+
+  monitor._handle(link_message(link_monitor.RTM_NEWLINK, 4, 'eth0',  # pylint: disable=W0212
+                               IF_OPER_DOWN))
+  monitor._handle(link_message(link_monitor.RTM_DELLINK, 4, 'eth0',  # pylint: disable=W0212
+                               IF_OPER_DOWN))
+  assert not monitor.link_exists('eth0')
+
+  assert events == [
+      (link_monitor.LINK_ADDED, 'eth0'),
+      (link_monitor.LINK_UP, 'eth0'),
+      (link_monitor.LINK_DOWN, 'eth0'),
+      (link_monitor.LINK_REMOVED, 'eth0'),
+  ]
@@ -0,0 +1,128 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Network listener tests"""
+
+import socket
+import struct
+from unittest.mock import patch, MagicMock
+import pytest
+from scapy.all import BOOTP, DHCP, Dot1Q, Ether, IP, UDP
+from net_orc import capture, listener
+from net_orc.network_event import NetworkEvent
+
+DEVICE_MAC = '00:1e:42:35:73:c4'
+HOST_MAC = '02:42:ac:11:00:02'
+CONTAINER_MAC = '9a:02:57:1e:8f:02'
+
+
+def dhcp_frame(message_type, src=CONTAINER_MAC, vlan=None):
+  frame = Ether(src=src, dst='ff:ff:ff:ff:ff:ff')
+  if vlan is not None:
+    frame /= Dot1Q(vlan=vlan)
+  frame /= (IP(src='10.10.10.2', dst='255.255.255.255') /
+            UDP(sport=67, dport=68) /
+            BOOTP(op=2,
+                  yiaddr='10.10.10.14',
+                  chaddr=bytes.fromhex(DEVICE_MAC.replace(':', ''))) /
+            DHCP(options=[('message-type', message_type), 'end']))
+  return bytes(frame)
+
+
+@pytest.fixture
+def net_listener():
+  session = MagicMock()
+  session.get_device_interface.return_value = 'eth0'
+  with patch.object(listener, 'get_if_hwaddr', return_value=HOST_MAC):
+    yield listener.Listener(session)
+
+
+def test_parse_dhcp_ack():
+  assert listener.parse_dhcp(dhcp_frame('ack')) == (listener.DHCP_ACK,
+                                                   DEVICE_MAC,
+                                                   '10.10.10.14')
+  assert listener.parse_dhcp(dhcp_frame('offer'))[0] == listener.DHCP_OFFER
+
+  # Messages on the VLANs are not parsed
+  assert listener.parse_dhcp(dhcp_frame('ack', vlan=10)) is None
+
+
+def test_parse_dhcp_ignores_other_traffic():
+  frame = bytes(Ether(src=DEVICE_MAC) / IP(dst='8.8.8.8') /
+                UDP(sport=5353, dport=53))
+  assert listener.parse_dhcp(frame) is None
+
+  # Truncated frames
+  assert listener.parse_dhcp(dhcp_frame('ack')[:60]) is None
+  assert listener.get_src_mac(b'\x00' * 10) is None
+
+
+def test_get_filter(net_listener):  # pylint: disable=W0621
+  bpf = net_listener._get_filter()  # pylint: disable=W0212
+  assert bpf.startswith('(udp port 67 or udp port 68) or ')
+  assert 'ether[6:4] = 0x9a02571e and ether[10] = 0x8f' in bpf
+  assert f'ether src {HOST_MAC}' in bpf
+  assert DEVICE_MAC not in bpf
+
+
+@patch.object(listener, 'attach_filter')
+def test_packet_callback(mock_attach_filter: MagicMock, net_listener):  # pylint: disable=W0621
+  net_listener._socket = MagicMock()  # pylint: disable=W0212
+
+  with patch.object(net_listener, 'call_callback') as mock_call_callback:
+    # DHCP ACK from the DHCP container
+    net_listener._packet_callback(dhcp_frame('ack'))  # pylint: disable=W0212
+    mock_call_callback.assert_called_once_with(NetworkEvent.DHCP_LEASE_ACK,
+                                               DEVICE_MAC, '10.10.10.14')
+    mock_call_callback.reset_mock()
+
+    # First frame from the device
+    frame = bytes(Ether(src=DEVICE_MAC) / IP() / UDP())
+    net_listener._packet_callback(frame)  # pylint: disable=W0212
+    mock_call_callback.assert_called_once_with(
+        NetworkEvent.DEVICE_DISCOVERED, DEVICE_MAC)
+    assert DEVICE_MAC in net_listener._get_filter()  # pylint: disable=W0212
+    mock_attach_filter.assert_called_once()
+    mock_call_callback.reset_mock()
+
+    # Subsequent frames from the device and host are ignored
+    net_listener._packet_callback(frame)  # pylint: disable=W0212
+    net_listener._packet_callback(bytes(Ether(src=HOST_MAC) / IP()))  # pylint: disable=W0212
+    mock_call_callback.assert_not_called()
+
+
+@patch.object(listener, 'attach_filter')
+def test_listen_ignores_vlans(mock_attach_filter: MagicMock, net_listener):  # pylint: disable=W0621
+  # The kernel strips the tag and reports it in the packet auxdata
+  auxdata = struct.pack('@IIIHHHH', capture.TP_STATUS_VLAN_VALID, 0, 0, 0,
+                        0, 10, 0)
+  ancdata = [(capture.SOL_PACKET, capture.PACKET_AUXDATA, auxdata)]
+  frames = [dhcp_frame('ack'), bytes(Ether(src=DEVICE_MAC) / IP() / UDP())]
+  responses = [(frame, ancdata, 0, None) for frame in frames]
+
+  def recvmsg(*_):
+    if responses:
+      return responses.pop(0)
+    net_listener._stop_event.set()  # pylint: disable=W0212
+    raise socket.timeout()
+
+  net_listener._socket = MagicMock()  # pylint: disable=W0212
+  net_listener._socket.recvmsg.side_effect = recvmsg  # pylint: disable=W0212
+
+  # Neither the DHCP ACK nor the device on the VLAN are reported
+  with patch.object(net_listener, 'call_callback') as mock_call_callback:
+    net_listener._listen()  # pylint: disable=W0212
+  mock_call_callback.assert_not_called()
+  mock_attach_filter.assert_not_called()
+  assert DEVICE_MAC not in net_listener._get_filter()  # pylint: disable=W0212
@@ -0,0 +1,38 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Network configuration tests"""
+
+import ipaddress
+from net_orc.network_orchestrator import NetworkConfig
+
+DOCKER_NETWORKS = ipaddress.ip_network('172.16.0.0/12')
+
+
+def test_vlan_networks():
+  config = NetworkConfig()
+  vlan = config.get_vlan(100)
+  assert vlan.name == 'vlan-100'
+  assert vlan.ipv4_network == ipaddress.ip_network('10.16.100.0/24')
+  assert vlan.ipv6_network == ipaddress.ip_network('fd10:77be:4186:64::/64')
+
+  # Every VLAN has a separate network, which does not overlap the default
+  # network or the Docker bridge networks
+  networks = set()
+  for vlan_id in range(1, 4095):
+    network = config.get_vlan(vlan_id).ipv4_network
+    assert not network.overlaps(config.ipv4_network)
+    assert not network.overlaps(DOCKER_NETWORKS)
+    networks.add(network)
+  assert len(networks) == 4094
@@ -0,0 +1,93 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""NTP whitelist tests"""
+
+import json
+import os
+import time
+import pytest
+from common import ntp_whitelist
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+  return str(tmp_path / 'local' / 'ntp_whitelist.json')
+
+
+def read_cache(cache_file):  # pylint: disable=W0621
+  with open(cache_file, encoding='utf-8') as f:
+    return json.load(f)
+
+
+def test_add(cache_file):  # pylint: disable=W0621
+  whitelist = ntp_whitelist.NTPWhitelist(cache_file)
+  whitelist.add({
+      '192.0.2.1': {'trusted': True, 'checked': 100},
+      '2001:db8::1': {'trusted': False, 'checked': 200}
+  })
+  cache = read_cache(cache_file)
+  assert cache['servers'] == {
+      '192.0.2.1': {'trusted': True, 'checked': 100},
+      '2001:db8::1': {'trusted': False, 'checked': 200}
+  }
+  assert not cache['offline']
+  assert oct(os.stat(cache_file).st_mode & 0o777) == oct(0o644)
+
+  # Entries are replaced when checked again and invalid entries are ignored
+  whitelist.add({
+      '192.0.2.1': {'trusted': False, 'checked': 300},
+      'pool.ntp.org': {'trusted': True, 'checked': 300},
+      '192.0.2.2': {'trusted': True},
+      '192.0.2.3': None
+  })
+  assert read_cache(cache_file)['servers'] == {
+      '192.0.2.1': {'trusted': False, 'checked': 300},
+      '2001:db8::1': {'trusted': False, 'checked': 200}
+  }
+  assert os.listdir(os.path.dirname(cache_file)) == ['ntp_whitelist.json']
+
+
+def test_refresh(cache_file):  # pylint: disable=W0621
+  now = time.time()
+  servers = {
+      '192.0.2.1': {'trusted': True, 'checked': now},
+      '192.0.2.2': {'trusted': False, 'checked': now - 7200},
+      '192.0.2.3': {'trusted': True, 'checked': now - 7200}
+  }
+  ntp_whitelist.NTPWhitelist(cache_file).add(servers)
+
+  # Nothing is removed in offline mode
+  whitelist = ntp_whitelist.NTPWhitelist(cache_file,
+                                         ttl_hours=1,
+                                         offline=True)
+  assert whitelist.refresh() == 0
+  cache = read_cache(cache_file)
+  assert cache['offline']
+  assert cache['ttl'] == 3600
+  assert cache['servers'] == servers
+
+  # Expired entries are removed
+  whitelist = ntp_whitelist.NTPWhitelist(cache_file, ttl_hours=1)
+  assert whitelist.refresh() == 2
+  cache = read_cache(cache_file)
+  assert not cache['offline']
+  assert cache['servers'] == {'192.0.2.1': servers['192.0.2.1']}
+
+  # An invalid cache is replaced
+  with open(cache_file, 'w', encoding='utf-8') as f:
+    f.write('{')
+  assert whitelist.load() == {}
+  assert whitelist.refresh() == 0
+  assert read_cache(cache_file)['servers'] == {}
@@ -0,0 +1,109 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""OUI index tests"""
+
+import os
+import pytest
+from common import oui_index
+
+# Header of the IEEE file, with the columns aligned by spaces
+OUI_HEADER = ('OUI/MA-L' + ' ' * 52 + 'Organization\n' +
+              'company_id' + ' ' * 50 + 'Organization\n' +
+              ' ' * 60 + 'Address\n')
+
+OUI_FILE = OUI_HEADER + """
+38-D1-35   (hex)\t\tEasyIO Corporation Sdn. Bhd.
+38D135     (base 16)\t\tEasyIO Corporation Sdn. Bhd.
+\t\t\t\tNo. 32-2 & 32-3, Jalan Puteri 2/4
+\t\t\t\tMY
+
+00-00-0C   (hex)\t\tCisco Systems, Inc
+00000C     (base 16)\t\tCisco Systems, Inc
+\t\t\t\t80 West Tasman Drive
+\t\t\t\tUS
+
+FC-FB-FB   (hex)\t\tCisco Systems, Inc
+FCFBFB     (base 16)\t\tCisco Systems, Inc
+
+00-00-0C   (hex)\t\tDuplicate Entry
+00-1E-42   (hex)\t\tTeltonika
+"""
+
+
+@pytest.fixture
+def oui_file(tmp_path):
+  path = str(tmp_path / 'oui.txt')
+  with open(path, 'w', encoding='utf-8') as f:
+    f.write(OUI_FILE)
+  return path
+
+
+def test_lookup(oui_file, tmp_path):  # pylint: disable=W0621
+  index_file = str(tmp_path / 'oui.idx')
+  assert oui_index.compile_index(oui_file, index_file) == 4
+  # Manufacturer names are only stored once
+  names = ('EasyIO Corporation Sdn. Bhd.', 'Cisco Systems, Inc', 'Teltonika')
+  assert os.path.getsize(index_file) == 8 + 4 * 8 + sum(
+      2 + len(name) for name in names)
+
+  with oui_index.OUIIndex(index_file) as index:
+    assert len(index) == 4
+    assert index.lookup('38:d1:35:09:01:8e') == 'EasyIO Corporation Sdn. Bhd.'
+    assert index.lookup('00-00-0C-12-34-56') == 'Cisco Systems, Inc'
+    assert index.lookup('FCFBFB000000') == 'Cisco Systems, Inc'
+    assert index.lookup('00:1e:42:35:73:c4') == 'Teltonika'
+    assert index.lookup('00:00:0b:00:00:00') is None
+    assert index.lookup('ff:ff:ff:ff:ff:ff') is None
+    assert index.lookup('00:00') is None
+    assert index.lookup('zz:zz:zz:00:00:00') is None
+
+
+def test_lookup_matches_oui_file(oui_file, tmp_path):  # pylint: disable=W0621
+  index_file = str(tmp_path / 'oui.idx')
+  oui_index.compile_index(oui_file, index_file)
+  with oui_index.OUIIndex(index_file) as index:
+    for prefix, name in oui_index.parse_oui_file(oui_file).items():
+      assert index.lookup(f'{prefix:06x}000000') == name
+
+
+def test_load(oui_file, tmp_path):  # pylint: disable=W0621
+  index_file = str(tmp_path / 'oui.idx')
+
+  # The index is compiled when missing and shared between callers
+  index = oui_index.load(index_file, oui_file)
+  assert oui_index.load(index_file, oui_file) is index
+  assert index.lookup('00:1e:42:35:73:c4') == 'Teltonika'
+
+  # and recompiled when the OUI file is updated
+  with open(oui_file, 'a', encoding='utf-8') as f:
+    f.write('9A-02-57   (hex)\t\tTestrun\n')
+  mtime = os.path.getmtime(index_file) + 1
+  os.utime(oui_file, (mtime, mtime))
+  old_index = index
+  index = oui_index.load(index_file, oui_file)
+  assert index is not old_index
+  assert index.lookup('9a:02:57:1e:8f:01') == 'Testrun'
+
+  # The replaced index is closed
+  with pytest.raises(ValueError):
+    old_index.lookup('9a:02:57:1e:8f:01')
+
+
+def test_invalid_index(tmp_path):
+  index_file = str(tmp_path / 'oui.idx')
+  with open(index_file, 'wb') as f:
+    f.write(b'not an index')
+  with pytest.raises(ValueError):
+    oui_index.OUIIndex(index_file)
@@ -0,0 +1,54 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""OVS control tests"""
+
+from net_orc import ovs_control
+
+MAC_ADDR = '00:1e:42:35:73:c4'
+
+DUMP_FLOWS = f"""\
+ cookie=0x2000, duration=30.1s, table=0, n_packets=13, n_bytes=4264, \
+priority=300,dl_src={MAC_ADDR},dl_dst=ff:ff:ff:ff:ff:ff \
+actions=resubmit(,1)
+ cookie=0x2001, duration=30.1s, table=0, n_packets=11, n_bytes=1210, \
+priority=200,dl_src={MAC_ADDR},dl_dst=01:00:00:00:00:00/01:00:00:00:00:00 \
+actions=resubmit(,1)
+ cookie=0x2002, duration=30.1s, table=0, n_packets=42, n_bytes=9876, \
+priority=100,dl_src={MAC_ADDR} actions=resubmit(,1)
+ cookie=0x2003, duration=30.1s, table=0, n_packets=40, n_bytes=8765, \
+priority=100,dl_dst={MAC_ADDR} actions=resubmit(,1)
+"""
+
+
+def test_parse_traffic_counters():
+  assert ovs_control.parse_traffic_counters(DUMP_FLOWS, MAC_ADDR) == {
+      'mac_address': MAC_ADDR,
+      'multicast': {
+          'from': 11,
+          'to': 0
+      },
+      'broadcast': {
+          'from': 13,
+          'to': 0
+      },
+      'unicast': {
+          'from': 42,
+          'to': 40
+      },
+  }
+
+  # No counters before any traffic has been counted
+  counters = ovs_control.parse_traffic_counters('', MAC_ADDR)
+  assert counters['unicast'] == {'from': 0, 'to': 0}
@@ -0,0 +1,183 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""OVSDB client tests"""
+
+import json
+import socket
+import threading
+import pytest
+from net_orc import ovsdb_client
+
+BRIDGES = {
+    'rows': [{
+        'name': 'tr-d',
+        'ports': ['set', [['uuid', 'p1'], ['uuid', 'p2']]]
+    }, {
+        'name': 'tr-c',
+        'ports': ['uuid', 'p3']
+    }]
+}
+PORTS = {
+    'rows': [{
+        '_uuid': ['uuid', 'p1'],
+        'name': 'tr-d'
+    }, {
+        '_uuid': ['uuid', 'p2'],
+        'name': 'eth0'
+    }, {
+        '_uuid': ['uuid', 'p3'],
+        'name': 'tr-c'
+    }]
+}
+# Results of the next_cfg increment and select added to each change
+NEXT_CFG = [{'count': 1}, {'rows': [{'next_cfg': 2}]}]
+CUR_CFG = [{'rows': [{'cur_cfg': 2}]}]
+
+
+class FakeOvsdbServer:
+  """Replies to each request with the next result"""
+
+  def __init__(self, path, results):
+    self.requests = []
+    self._results = list(results)
+    self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    self._server.bind(path)
+    self._server.listen(1)
+    self._thread = threading.Thread(target=self._serve, daemon=True)
+    self._thread.start()
+
+  def _serve(self):
+    conn, _ = self._server.accept()
+    decoder = json.JSONDecoder()
+    buffer = ''
+    with conn:
+      while True:
+        data = conn.recv(65536)
+        if not data:
+          break
+        buffer += data.decode('utf-8')
+        while buffer:
+          request, end = decoder.raw_decode(buffer)
+          buffer = buffer[end:]
+          if request.get('id') == 'echo':
+            continue
+          self.requests.append(request)
+
+          # Send a keepalive, then the response in two parts
+          conn.sendall(b'{"method": "echo", "params": [], "id": "echo"}')
+          response = json.dumps({
+              'id': request['id'],
+              'result': self._results.pop(0),
+              'error': None
+          }).encode('utf-8')
+          conn.sendall(response[:10])
+          conn.sendall(response[10:])
+    self._server.close()
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+  return str(tmp_path / 'db.sock')
+
+
+def test_get_bridges(socket_path):  # pylint: disable=W0621
+  server = FakeOvsdbServer(socket_path, [[BRIDGES, PORTS]])
+  client = ovsdb_client.OvsdbClient(socket_path)
+
+  # Internal ports of the bridges are not listed
+  assert client.get_bridges() == {'tr-d': ['eth0'], 'tr-c': []}
+  assert len(server.requests) == 1
+  assert server.requests[0]['method'] == 'transact'
+  client.close()
+
+
+def test_add_bridges_single_transaction(socket_path):  # pylint: disable=W0621
+  server = FakeOvsdbServer(socket_path,
+                           [[BRIDGES, PORTS], [{}] * 6 + NEXT_CFG, CUR_CFG])
+  client = ovsdb_client.OvsdbClient(socket_path)
+
+  assert client.add_bridges({'tr-d': ['eth0', 'tr-di-dhcp'], 'tr-c': ['eth1']})
+  client.close()
+
+  # Ports that already exist are not added again
+  operations = server.requests[1]['params'][1:]
+  inserted = [(op['table'], op['row']['name'])
+              for op in operations
+              if op['op'] == 'insert']
+  assert inserted == [('Interface', 'tr-di-dhcp'), ('Port', 'tr-di-dhcp'),
+                      ('Interface', 'eth1'), ('Port', 'eth1')]
+  mutations = [(op['where'][0][2], op['mutations'][0][2])
+               for op in operations
+               if op['op'] == 'mutate' and op['table'] == 'Bridge']
+  assert mutations == [
+      ('tr-d', ['set', [['named-uuid', 'port_tr_di_dhcp']]]),
+      ('tr-c', ['set', [['named-uuid', 'port_eth1']]]),
+  ]
+
+  # The change is not complete until ovs-vswitchd has applied it
+  assert operations[-2]['mutations'] == [['next_cfg', '+=', 1]]
+  assert server.requests[2]['params'][1]['columns'] == ['cur_cfg']
+
+
+def test_add_vlan_port(socket_path):  # pylint: disable=W0621
+  server = FakeOvsdbServer(socket_path,
+                           [[BRIDGES, PORTS], [{}] * 3 + NEXT_CFG, CUR_CFG])
+  client = ovsdb_client.OvsdbClient(socket_path)
+
+  assert client.add_ports('tr-d', ['tr-v100i-2'], tag=100)
+  client.close()
+
+  ports = [
+      op['row'] for op in server.requests[1]['params'][1:]
+      if op['op'] == 'insert' and op['table'] == 'Port'
+  ]
+  assert ports[0]['name'] == 'tr-v100i-2'
+  assert ports[0]['tag'] == 100
+
+
+def test_wait_for_reconfiguration(socket_path):  # pylint: disable=W0621
+  server = FakeOvsdbServer(socket_path, [[PORTS], [{}] + NEXT_CFG,
+                                         [{'rows': [{'cur_cfg': 1}]}], CUR_CFG])
+  client = ovsdb_client.OvsdbClient(socket_path)
+
+  assert client.delete_ports('tr-d', ['eth0'])
+  client.close()
+  assert len(server.requests) == 4
+
+
+def test_wait_for_reconfiguration_timeout(socket_path):  # pylint: disable=W0621
+  FakeOvsdbServer(socket_path, [[PORTS], [{}] + NEXT_CFG] +
+                  [[{'rows': [{'cur_cfg': 1}]}]] * 1000)
+  client = ovsdb_client.OvsdbClient(socket_path, timeout=0.05)
+  with pytest.raises(ovsdb_client.OvsdbError):
+    client.delete_ports('tr-d', ['eth0'])
+  client.close()
+
+
+def test_transaction_error(socket_path):  # pylint: disable=W0621
+  FakeOvsdbServer(socket_path, [[{
+      'error': 'constraint violation',
+      'details': 'duplicate name'
+  }]])
+  client = ovsdb_client.OvsdbClient(socket_path)
+  with pytest.raises(ovsdb_client.OvsdbError):
+    client.transact({'op': 'insert', 'table': 'Bridge', 'row': {}})
+  client.close()
+
+
+def test_connection_error(socket_path):  # pylint: disable=W0621
+  client = ovsdb_client.OvsdbClient(socket_path)
+  with pytest.raises(ovsdb_client.OvsdbError):
+    client.get_bridges()
@@ -0,0 +1,153 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Report archive tests"""
+
+import os
+import shutil
+from datetime import datetime, timedelta
+import pytest
+from common import report_archive
+
+CAPTURE = b'\xd4\xc3\xb2\xa1' + b'\x00' * 4096
+LOG = b'Jan 01 00:00:00 test_conn INFO Started\n' * 128
+
+
+def _create_report(parent_dir, age_days):
+  """Create a report folder the same way the test orchestrator does"""
+  timestamp = datetime.now() - timedelta(days=age_days)
+  folder = f'aabbccddeeff_{timestamp.strftime("%Y-%m-%dT%H:%M:%S")}'
+  report_dir = os.path.join(parent_dir, folder)
+  os.makedirs(os.path.join(report_dir, 'test', 'dns'))
+  with open(os.path.join(report_dir, 'startup.pcap'), 'wb') as f:
+    f.write(CAPTURE)
+  with open(os.path.join(report_dir, 'testrun.log'), 'wb') as f:
+    f.write(LOG)
+  with open(os.path.join(report_dir, 'report.json'), 'w',
+            encoding='utf-8') as f:
+    f.write('{}')
+  with open(os.path.join(report_dir, 'test', 'dns', 'dns.pcap'), 'wb') as f:
+    f.write(CAPTURE)
+  return report_dir
+
+
+@pytest.fixture
+def reports_dir(tmp_path):
+  return str(tmp_path / 'reports')
+
+
+def test_archive_disabled(reports_dir):  # pylint: disable=W0621
+  report_dir = _create_report(reports_dir, 10)
+  archiver = report_archive.ReportArchiver(reports_dir, 0)
+  assert archiver.archive() == 0
+  assert os.path.isfile(os.path.join(report_dir, 'startup.pcap'))
+
+
+def test_archive_only_aged_reports(reports_dir):  # pylint: disable=W0621
+  old_report = _create_report(reports_dir, 10)
+  new_report = _create_report(reports_dir, 1)
+
+  archiver = report_archive.ReportArchiver(reports_dir, 7)
+  assert archiver.archive() > 0
+
+  assert os.path.isfile(os.path.join(old_report, 'startup.pcap.gz'))
+  assert os.path.isfile(os.path.join(old_report, 'testrun.log.gz'))
+  assert os.path.isfile(os.path.join(old_report, 'test', 'dns', 'dns.pcap.gz'))
+  assert not os.path.exists(os.path.join(old_report, 'startup.pcap'))
+
+  # Reports are left as they are
+  assert os.path.isfile(os.path.join(old_report, 'report.json'))
+
+  # Newer reports are untouched
+  assert os.path.isfile(os.path.join(new_report, 'startup.pcap'))
+  assert not os.path.exists(os.path.join(new_report, 'startup.pcap.gz'))
+
+  # Already archived files are not compressed again
+  assert archiver.archive() == 0
+
+
+def test_archive_unsupported_compression(reports_dir):  # pylint: disable=W0621
+  report_dir = _create_report(reports_dir, 10)
+  archiver = report_archive.ReportArchiver(reports_dir, 7, 'lzma')
+  assert archiver.archive() == 0
+  assert os.path.isfile(os.path.join(report_dir, 'startup.pcap'))
+
+
+def test_open_report_file(reports_dir):  # pylint: disable=W0621
+  report_dir = _create_report(reports_dir, 10)
+  report_archive.ReportArchiver(reports_dir, 7).archive()
+
+  with report_archive.open_report_file(
+      os.path.join(report_dir, 'startup.pcap')) as f:
+    assert f.read() == CAPTURE
+
+  # Files which have not been archived are read as they are
+  with report_archive.open_report_file(
+      os.path.join(report_dir, 'report.json')) as f:
+    assert f.read() == b'{}'
+
+  with pytest.raises(FileNotFoundError):
+    report_archive.open_report_file(os.path.join(report_dir, 'missing.pcap'))
+
+
+def test_copy_decompressed(reports_dir, tmp_path):  # pylint: disable=W0621
+  report_dir = _create_report(reports_dir, 10)
+  report_archive.ReportArchiver(reports_dir, 7).archive()
+
+  results_dir = str(tmp_path / 'results')
+  shutil.copytree(report_dir,
+                  results_dir,
+                  copy_function=report_archive.copy_decompressed)
+
+  with open(os.path.join(results_dir, 'startup.pcap'), 'rb') as f:
+    assert f.read() == CAPTURE
+  with open(os.path.join(results_dir, 'testrun.log'), 'rb') as f:
+    assert f.read() == LOG
+  with open(os.path.join(results_dir, 'test', 'dns', 'dns.pcap'), 'rb') as f:
+    assert f.read() == CAPTURE
+  assert not os.path.exists(os.path.join(results_dir, 'startup.pcap.gz'))
+
+
+@pytest.mark.skipif(report_archive.zstandard is None,
+                    reason='zstandard is not installed')
+def test_archive_zstd(reports_dir):  # pylint: disable=W0621
+  report_dir = _create_report(reports_dir, 10)
+  archiver = report_archive.ReportArchiver(reports_dir, 7, 'zstd')
+  assert archiver.archive() > 0
+  assert os.path.isfile(os.path.join(report_dir, 'startup.pcap.zst'))
+
+  with report_archive.open_report_file(
+      os.path.join(report_dir, 'startup.pcap')) as f:
+    assert f.read() == CAPTURE
+
+
+def test_archive_skips_report_in_use(reports_dir):  # pylint: disable=W0621
+  report_dir = _create_report(reports_dir, 10)
+  archiver = report_archive.ReportArchiver(reports_dir, 7)
+
+  # Reports being exported are not archived until they are released
+  with report_archive.get_report_lock(report_dir):
+    assert archiver.archive() == 0
+  assert os.path.isfile(os.path.join(report_dir, 'startup.pcap'))
+  assert archiver.archive() > 0
+
+
+@pytest.mark.skipif(os.geteuid() != 0, reason='requires root to chown')
+def test_archive_keeps_owner(reports_dir):  # pylint: disable=W0621
+  report_dir = _create_report(reports_dir, 10)
+  capture = os.path.join(report_dir, 'startup.pcap')
+  os.chown(capture, 1234, 1234)
+  report_archive.ReportArchiver(reports_dir, 7).archive()
+  stat = os.stat(capture + '.gz')
+  assert (stat.st_uid, stat.st_gid) == (1234, 1234)
@@ -23,6 +23,7 @@ from unittest.mock import patch, MagicMock, mock_open
 from common.statuses import TestResult
 from common.device import Device
 from core import session
+from test_orc import test_case
 
 
 def create_mock_cert(
@@ -208,6 +209,32 @@ def test_add_test_result_informational_coercion(
   assert initial_result.recommendations is None
 
 
+def test_add_test_result_metrics(
+      session_instance: session.TestrunSession
+): #pylint: disable=W0621
+  session_instance.add_test_result(
+      test_case.TestCase(name="connection.mac_oui",
+                         result=TestResult.IN_PROGRESS))
+  assert "metrics" not in session_instance.get_report_tests()["results"][0]
+
+  metrics = {
+      "wall_time": 1.5,
+      "cpu_time": 0.25,
+      "peak_rss_delta": 1024,
+      "subprocesses": 2
+  }
+  session_instance.add_test_result(
+      test_case.TestCase(name="connection.mac_oui",
+                         result=TestResult.COMPLIANT,
+                         metrics=metrics))
+  assert session_instance.get_report_tests()["results"][0]["metrics"] == metrics
+
+  # Results without metrics keep those already recorded
+  session_instance.add_test_result(
+      test_case.TestCase(name="connection.mac_oui", result=TestResult.ERROR))
+  assert session_instance.get_report_tests()["results"][0]["metrics"] == metrics
+
+
 # 5. Risk Profile Validation Tests
 
 def test_validate_profile_json_invalid_cases(
@@ -403,3 +430,50 @@ def test_detect_network_adapters_change(
     # Verify that session_instance updated its local _ifaces state
     assert session_instance.get_ifaces() == {"eth0": "up", "wlan0": "down"}
 
+
+
+def test_get_vlans(
+  session_instance: session.TestrunSession  #pylint: disable=W0621
+  ):
+  assert session_instance.get_vlans() == []
+  session_instance.get_config()["vlans"] = [200, 100, 100, 0, 4095, "300"]
+  # Invalid and duplicate VLAN IDs are ignored
+  assert session_instance.get_vlans() == [100, 200]
+
+
+def test_load_config_report_archive(
+  session_instance: session.TestrunSession  #pylint: disable=W0621
+  ):
+  config = '{"report_archive": {"age_days": 30}}'
+  with patch("os.path.isfile", return_value=True), \
+    patch("builtins.open", mock_open(read_data=config)):
+    session_instance._load_config()  # pylint: disable=W0212
+  assert session_instance.get_report_archive_config() == {
+      "age_days": 30,
+      "compression": "gzip"
+  }
+
+  # A null value keeps the current options
+  with patch("os.path.isfile", return_value=True), \
+    patch("builtins.open", mock_open(read_data='{"report_archive": null}')):
+    session_instance._load_config()  # pylint: disable=W0212
+  assert session_instance.get_report_archive_config()["age_days"] == 30
+
+
+def test_load_config_ntp_whitelist(
+  session_instance: session.TestrunSession  #pylint: disable=W0621
+  ):
+  config = '{"ntp_whitelist": {"offline": true}}'
+  with patch("os.path.isfile", return_value=True), \
+    patch("builtins.open", mock_open(read_data=config)):
+    session_instance._load_config()  # pylint: disable=W0212
+  assert session_instance.get_ntp_whitelist_config() == {
+      "ttl_hours": 24,
+      "offline": True
+  }
+
+  # A null value keeps the current options
+  with patch("os.path.isfile", return_value=True), \
+    patch("builtins.open", mock_open(read_data='{"ntp_whitelist": null}')):
+    session_instance._load_config()  # pylint: disable=W0212
+  assert session_instance.get_ntp_whitelist_config()["offline"]
@@ -0,0 +1,107 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Network topology fingerprint tests"""
+
+import ipaddress
+import os
+from types import SimpleNamespace
+from net_orc import topology
+
+NETWORK_CONFIG = SimpleNamespace(
+    ipv4_network=ipaddress.ip_network('10.10.10.0/24'),
+    ipv6_network=ipaddress.ip_network('fd10:77be:4186::/64'))
+
+
+class FakeSession:
+  """Session with the interface configuration"""
+
+  def __init__(self, device_intf='enx123456789123'):
+    self._device_intf = device_intf
+
+  def get_device_interface(self):
+    return self._device_intf
+
+  def get_device_interface_mac_addr(self):
+    return '00:1e:42:35:73:c4'
+
+  def get_internet_interface(self):
+    return 'enx987654321123'
+
+  def get_runtime_params(self):
+    return []
+
+  def get_vlans(self):
+    return [100]
+
+
+def create_module(modules_dir, name, config='{}'):
+  module_dir = os.path.join(modules_dir, name)
+  os.makedirs(os.path.join(module_dir, 'conf'), exist_ok=True)
+  with open(os.path.join(module_dir, topology.MODULE_CONFIG),
+            'w',
+            encoding='utf-8') as f:
+    f.write(config)
+  return SimpleNamespace(dir=module_dir,
+                         dir_name=name,
+                         image_name='testrun/' + name,
+                         enabled=True,
+                         root_path='/testrun')
+
+
+def get_fingerprint(session, modules, images=None):
+  images = images or {}
+  return topology.get_fingerprint(session, NETWORK_CONFIG, modules,
+                                  lambda image: images.get(image, 'sha256:1'))
+
+
+def test_drift(tmp_path):
+  dns = create_module(tmp_path, 'dns')
+  dhcp = create_module(tmp_path, 'dhcp-1')
+  previous = get_fingerprint(FakeSession(), [dns, dhcp])
+
+  # Nothing has changed
+  current = get_fingerprint(FakeSession(), [dns, dhcp])
+  assert topology.get_drift(previous, current) == (False, set())
+
+  # Only the services whose config or image has changed are rebuilt
+  create_module(tmp_path, 'dns', '{"enabled": false}')
+  current = get_fingerprint(FakeSession(), [dns, dhcp],
+                            {'testrun/dhcp-1': 'sha256:2'})
+  assert topology.get_drift(previous, current) == (False, {'dns', 'dhcp-1'})
+
+  # Changing the interfaces rebuilds everything
+  current = get_fingerprint(FakeSession('eth1'), [dns, dhcp])
+  assert topology.get_drift(previous, current) == (True, {'dns', 'dhcp-1'})
+
+  # As does having no previous topology
+  assert topology.get_drift(None, current) == (True, {'dns', 'dhcp-1'})
+
+
+def test_save_and_load(tmp_path):
+  path = os.path.join(tmp_path, 'runtime', 'topology.json')
+  assert topology.load(path) is None
+
+  fingerprint = get_fingerprint(FakeSession(),
+                                [create_module(tmp_path, 'ntp')])
+  topology.save(fingerprint, path)
+  assert topology.load(path) == fingerprint
+
+  topology.delete(path)
+  assert not os.path.exists(path)
+
+  # A corrupt topology is not reused
+  with open(path, 'w', encoding='utf-8') as f:
+    f.write('{')
+  assert topology.load(path) is None
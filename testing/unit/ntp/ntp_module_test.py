@@ -13,11 +13,15 @@
 # limitations under the License.
 """Module run all the NTP related unit tests"""
 from ntp_module import NTPModule
+import ntp_white_list
 import unittest
-from scapy.all import rdpcap, NTP, wrpcap
+from unittest import mock
+from scapy.all import rdpcap, NTP, wrpcap, Ether, IP, IPv6, UDPerror
+import json
 import os
 import shutil
 import sys
+import time
 
 MODULE = 'ntp'
 
@@ -30,6 +34,8 @@ MODULE_FILES_DIR = 'modules/test/' + MODULE
 
 LOCAL_REPORT = os.path.join(REPORTS_DIR,'ntp_report_local.html')
 LOCAL_REPORT_NO_NTP = os.path.join(REPORTS_DIR,'ntp_report_local_no_ntp.html')
+WHITELIST_FILE = os.path.join(OUTPUT_DIR,'ntp_whitelist.json')
+CHECKED_FILE = os.path.join(OUTPUT_DIR,'ntp_servers.json')
 
 # Define the capture files to be used for the test
 NTP_SERVER_CAPTURE_FILE = os.path.join(CAPTURES_DIR,'ntp.pcap')
@@ -123,12 +129,115 @@ class NTPModuleTest(unittest.TestCase):
 
     self.assertEqual(report_out, report_local)
 
+  # Test the NTP analyser against the packets decoded by scapy
+  def ntp_analyser_test(self):
+    ntp_module = NTPModule(module=MODULE,
+                           results_dir=OUTPUT_DIR,
+                           ntp_server_capture_file=NTP_SERVER_CAPTURE_FILE,
+                           startup_capture_file=STARTUP_CAPTURE_FILE,
+                           monitor_capture_file=MONITOR_CAPTURE_FILE)
+    ntp_analyser = ntp_module._get_ntp_analyser() # pylint: disable=W0212
+
+    device_mac = os.environ['DEVICE_MAC']
+    versions = set()
+    destinations = []
+    servers = {}
+    for capture_file in (STARTUP_CAPTURE_FILE, MONITOR_CAPTURE_FILE,
+                         NTP_SERVER_CAPTURE_FILE):
+      for packet in rdpcap(capture_file):
+        # NTP packets quoted in ICMP errors are not NTP traffic
+        if NTP not in packet or UDPerror in packet:
+          continue
+        ip = packet[IP] if IP in packet else packet[IPv6]
+        if packet[Ether].src == device_mac:
+          versions.add(packet[NTP].version)
+          if ip.dst not in destinations:
+            destinations.append(ip.dst)
+        elif packet[Ether].dst == device_mac and packet[NTP].mode != 3:
+          server = servers.setdefault(ip.src, {
+              'responses': 0,
+              'version': packet[NTP].version,
+              'stratum': packet[NTP].stratum
+          })
+          server['responses'] += 1
+
+    self.assertEqual(ntp_analyser.versions, versions)
+    self.assertEqual(ntp_analyser.destinations, destinations)
+    self.assertEqual(ntp_analyser.servers, servers)
+    self.assertEqual(ntp_module._ntp_network_ntp_support(), # pylint: disable=W0212
+                     (True, 'Device sent NTPv4 packets'))
+
+  # Test the lookups against the whitelist cache written by the framework
+  def ntp_whitelist_test(self):
+    now = time.time()
+    cache = {
+        'ttl': 3600,
+        'offline': False,
+        'servers': {
+            '192.0.2.1': {'trusted': True, 'checked': now},
+            '192.0.2.2': {'trusted': False, 'checked': now},
+            '192.0.2.3': {'trusted': True, 'checked': now - 7200}
+        }
+    }
+    with open(WHITELIST_FILE, 'w', encoding='utf-8') as f:
+      json.dump(cache, f)
+
+    # Expired entries are not used
+    whitelist = ntp_white_list.load_whitelist(WHITELIST_FILE)
+    self.assertEqual(whitelist.trusted, {'192.0.2.1'})
+    self.assertEqual(whitelist.untrusted, {'192.0.2.2'})
+    self.assertIsNone(whitelist.lookup('192.0.2.3'))
+
+    # All entries are used in offline mode and other servers are untrusted
+    cache['offline'] = True
+    with open(WHITELIST_FILE, 'w', encoding='utf-8') as f:
+      json.dump(cache, f)
+    whitelist = ntp_white_list.load_whitelist(WHITELIST_FILE)
+    self.assertEqual(whitelist.trusted, {'192.0.2.1', '192.0.2.3'})
+    self.assertEqual(
+        ntp_white_list.check_all_ips(
+            ['192.0.2.3', '192.0.2.2', '192.0.2.4'], whitelist),
+        [('192.0.2.3', True), ('192.0.2.2', False), ('192.0.2.4', False)])
+    self.assertFalse(os.path.exists(CHECKED_FILE))
+
+    # Servers missing from the cache are checked and written for the
+    # framework to add to the cache
+    async def check_ips(ip_list):
+      return [(ip, ip == '192.0.2.4') for ip in ip_list]
+    whitelist = ntp_white_list.NTPWhitelist(trusted=['192.0.2.1'])
+    with mock.patch.object(ntp_white_list, '_check_all_ips_async',
+                           check_ips), \
+         mock.patch.object(ntp_white_list, '_get_ntp_data',
+                           return_value=False):
+      self.assertEqual(
+          ntp_white_list.check_all_ips(
+              ['192.0.2.1', '192.0.2.4', '192.0.2.5'], whitelist,
+              CHECKED_FILE),
+          [('192.0.2.1', True), ('192.0.2.4', True), ('192.0.2.5', False)])
+    with open(CHECKED_FILE, encoding='utf-8') as f:
+      checked = json.load(f)
+    self.assertEqual({ip: server['trusted'] for ip, server in checked.items()},
+                     {'192.0.2.4': True, '192.0.2.5': False})
+    os.remove(CHECKED_FILE)
+
+    # A missing cache has no entries
+    whitelist = ntp_white_list.load_whitelist(
+        os.path.join(OUTPUT_DIR, 'missing.json'))
+    self.assertFalse(whitelist.offline)
+    self.assertIsNone(whitelist.lookup('192.0.2.1'))
+
 if __name__ == '__main__':
   suite = unittest.TestSuite()
   # Module report test
   suite.addTest(NTPModuleTest('ntp_module_report_test'))
   suite.addTest(NTPModuleTest('ntp_module_report_no_ntp_test'))
 
+  # Traffic analysis test
+  suite.addTest(NTPModuleTest('ntp_analyser_test'))
+
+  # NTP whitelist test
+  suite.addTest(NTPModuleTest('ntp_whitelist_test'))
+
   runner = unittest.TextTestRunner()
   test_result = runner.run(suite)
 
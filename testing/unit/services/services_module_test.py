@@ -13,10 +13,16 @@
 # limitations under the License.
 """Module run all the services related unit tests"""
 from services_module import ServicesModule
+from test_metrics import TestMetrics
+import copy
+import json
 import unittest
 import os
+import subprocess
 import sys
 import shutil
+import threading
+import time
 # from testreport import TestReport
 
 MODULE = 'services'
@@ -90,12 +96,81 @@ class ServicesTest(unittest.TestCase):
 
     self.assertEqual(report_out, report_local)
 
+  # Test the parallel_safe tests give the same results when run serially
+  def services_module_parallel_tests_test(self):
+    services_module = ServicesModule(module=MODULE,
+                                     results_dir=OUTPUT_DIR,
+                                     run=False,
+                                     nmap_scan_results_path=OUTPUT_DIR)
+    with open(os.path.join(RESULTS_DIR, 'ports_open_scan_result.json'),
+              'r',
+              encoding='utf-8') as file:
+      services_module._scan_results = json.load(file) # pylint: disable=W0212
+
+    tests = copy.deepcopy(services_module._config['config']['tests']) # pylint: disable=W0212
+    serial_tests = copy.deepcopy(tests)
+    for test in serial_tests:
+      test.pop('parallel_safe', None)
+    self.assertTrue(any(test.get('parallel_safe') for test in tests))
+
+    services_module._run_module_tests(tests) # pylint: disable=W0212
+    services_module._run_module_tests(serial_tests) # pylint: disable=W0212
+
+    # Results are in the order of the module config
+    self.assertEqual([test['name'] for test in tests],
+                     [test['name'] for test in serial_tests])
+    for test, serial_test in zip(tests, serial_tests):
+      self.assertEqual(test['result'], serial_test['result'])
+      self.assertEqual(test['description'], serial_test['description'])
+      self.assertIn('metrics', test)
+
+  # Test the metrics of tests run at the same time are kept separate
+  def services_module_test_metrics_test(self):
+    results = {}
+    barrier = threading.Barrier(2, timeout=10)
+
+    def run_test(name, commands):
+      metrics = TestMetrics()
+      for _ in range(commands):
+        subprocess.run(['true'], check=True)
+      barrier.wait()
+      time.sleep(0.1)
+      results[name] = metrics.stop()
+
+    threads = [
+        threading.Thread(target=run_test, args=('subprocesses', 3)),
+        threading.Thread(target=run_test, args=('none', 0))
+    ]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+    # Subprocesses are counted against the thread which started them
+    self.assertEqual(results['subprocesses']['subprocesses'], 3)
+    self.assertEqual(results['none']['subprocesses'], 0)
+    for metrics in results.values():
+      self.assertEqual(set(metrics),
+                       {'wall_time', 'cpu_time', 'peak_rss_delta',
+                        'subprocesses'})
+      self.assertGreaterEqual(metrics['wall_time'], 0.1)
+      self.assertGreaterEqual(metrics['cpu_time'], 0)
+      self.assertGreaterEqual(metrics['peak_rss_delta'], 0)
+
+    # Metrics are relative to when recording started
+    metrics = TestMetrics()
+    self.assertEqual(metrics.stop()['subprocesses'], 0)
+
 if __name__ == '__main__':
   suite = unittest.TestSuite()
   # Module report test
   suite.addTest(ServicesTest('services_module_ports_open_report_test'))
   suite.addTest(ServicesTest('services_module_report_all_closed_test'))
 
+  # Test execution
+  suite.addTest(ServicesTest('services_module_parallel_tests_test'))
+  suite.addTest(ServicesTest('services_module_test_metrics_test'))
+
   runner = unittest.TextTestRunner()
   test_result = runner.run(suite)
 